@@ -15,17 +15,12 @@ logger = logging.getLogger(__name__)
 
 def format_customer(customer) -> Dict:
     """Customer ORM 객체를 Dict로 변환"""
-    # 위험 점수 계산 (churn_probability 기반)
-    risk_score = int((customer.churn_probability or 0.5) * 100)
+    from services.segment_cube import risk_band
     
-    if risk_score >= 90:
-        risk_level = "CRITICAL"
-    elif risk_score >= 70:
-        risk_level = "HIGH"
-    elif risk_score >= 50:
-        risk_level = "MEDIUM"
-    else:
-        risk_level = "LOW"
+    # 위험 점수/등급 (churn_probability 기반, 등급은 세그먼트 큐브와 같은 구간 - 점수가 없으면 UNSCORED)
+    probability = customer.churn_probability
+    risk_score = int(probability * 100) if probability is not None else None
+    risk_level = risk_band(probability)
     
     # 생애주기 단계 (영어 키로 변환)
     lifecycle_map = {
@@ -61,7 +56,7 @@ def format_customer(customer) -> Dict:
         "risk_score": risk_score,
         "risk_level": risk_level,
         "lifecycle_stage": lifecycle,
-        "churn_probability": round(customer.churn_probability or 0.5, 3),
+        "churn_probability": round(probability, 3) if probability is not None else None,
         "monthly_avg_amount": customer.monthly_avg_amount or random.randint(200000, 5000000),
         "ltv_estimate": customer.ltv_estimate or random.randint(3000000, 15000000),
         "last_transaction_date": last_txn,
@@ -79,40 +74,53 @@ async def get_customers(
     page_size: int = Query(20, ge=1, le=100),
     risk_level: Optional[str] = None,
     lifecycle: Optional[str] = None,
-    search: Optional[str] = None,
-    sort_by: Optional[str] = Query(default="customer_id", description="정렬 기준: customer_id, risk_score, churn_probability, monthly_avg_amount, ltv_estimate, last_transaction_date"),
-    sort_order: Optional[str] = Query(default="asc", description="정렬 순서: asc, desc")
+    search: Optional[str] = Query(default=None, description="검색어: 고객 ID(정확/앞자리 일치) 또는 지역/직업 단어 접두 일치 (단어 중간 일치 없음)"),
+    sort_by: Optional[str] = Query(default=None, description="정렬 기준: relevance(검색 시 기본), customer_id(기본), risk_score, churn_probability, monthly_avg_amount, ltv_estimate, last_transaction_date"),
+    sort_order: Optional[str] = Query(default="asc", description="정렬 순서: asc, desc"),
+    cursor: Optional[str] = Query(default=None, description="이전 응답의 next_cursor (지정 시 page 대신 키셋 페이지네이션, 응답 page는 커서 기준)"),
+    approximate_total: bool = Query(default=False, description="텍스트 검색 시 전체 건수를 상한까지만 계산 (total_approximate=true면 'N건 이상')")
 ) -> Dict:
-    """고객 목록 (페이지네이션, 필터링, 정렬)"""
-    from services.db import get_db_context
+    """
+    고객 목록 (페이지네이션, 필터링, 정렬)
+    
+    다음 페이지는 next_cursor(키셋)로 이동하고, 커서 없는 페이지 번호 이동(OFFSET)은
+    얕은 페이지(PAGINATION_MAX_OFFSET_ROWS 이하)만 허용합니다 - 더 깊은 페이지는 400.
+    """
+    from services.db import get_async_db_context
+    from services.count_cache import APPROXIMATE_COUNT_LIMIT, cached_count, filter_signature
+    from services.customer_search import apply_search, parse_customer_id
+    from services.pagination import (
+        InvalidCursor, PageTooDeep, cursor_page, decode_cursor, keyset_segments, offset_rows, page_info
+    )
+    from services.segment_cube import get_segment_cube_async
     from models.database import Customer
-    from sqlalchemy import func, or_, asc, desc
+    from sqlalchemy import select
+    
+    search = (search or "").strip()
+    sort_by = sort_by or ("relevance" if search else "customer_id")
     
     try:
-        with get_db_context() as db:
+        async with get_async_db_context() as db:
             # 기본 쿼리
-            query = db.query(Customer)
+            query = select(Customer)
             
-            # 검색 필터
+            # 검색 필터 (고객 ID는 기본 키 정확/접두 일치, 지역/직업은 전문 검색 인덱스)
+            relevance = None
             if search:
-                query = query.filter(
-                    or_(
-                        Customer.customer_id.ilike(f"%{search}%"),
-                        Customer.region.ilike(f"%{search}%"),
-                        Customer.occupation.ilike(f"%{search}%")
-                    )
-                )
+                query, relevance = apply_search(query, search, db.bind.dialect.name)
             
             # 위험 레벨 필터
             if risk_level:
                 if risk_level == "CRITICAL":
-                    query = query.filter(Customer.churn_probability >= 0.9)
+                    query = query.where(Customer.churn_probability >= 0.9)
                 elif risk_level == "HIGH":
-                    query = query.filter(Customer.churn_probability >= 0.7, Customer.churn_probability < 0.9)
+                    query = query.where(Customer.churn_probability >= 0.7, Customer.churn_probability < 0.9)
                 elif risk_level == "MEDIUM":
-                    query = query.filter(Customer.churn_probability >= 0.5, Customer.churn_probability < 0.7)
+                    query = query.where(Customer.churn_probability >= 0.5, Customer.churn_probability < 0.7)
                 elif risk_level == "LOW":
-                    query = query.filter(Customer.churn_probability < 0.5)
+                    query = query.where(Customer.churn_probability < 0.5)
+                elif risk_level == "UNSCORED":
+                    query = query.where(Customer.churn_probability.is_(None))
             
             # 생애주기 필터
             if lifecycle:
@@ -124,24 +132,28 @@ async def get_customers(
                     'at_risk': None
                 }
                 if lifecycle == 'at_risk':
-                    query = query.filter(Customer.churned == 1)
+                    query = query.where(Customer.churned == 1)
                 elif lifecycle in lifecycle_reverse_map:
                     korean_stage = lifecycle_reverse_map[lifecycle]
                     if korean_stage:
-                        query = query.filter(Customer.lifecycle_stage == korean_stage)
+                        query = query.where(Customer.lifecycle_stage == korean_stage)
             
-            # 전체 카운트 (필터 적용된)
-            total = query.count()
+            # 전체 카운트 (필터 적용된, 정규화한 필터 시그니처별 캐시)
+            approximate = approximate_total and bool(search) and parse_customer_id(search) is None
+            total, total_approximate = await cached_count(
+                db, query,
+                filter_signature(search=search, approximate=approximate, risk_level=risk_level, lifecycle=lifecycle),
+                APPROXIMATE_COUNT_LIMIT if approximate else None
+            )
             
-            # 전체 DB 통계 (필터 무관)
-            total_all = db.query(func.count(Customer.customer_id)).scalar() or 0
-            avg_risk_all = db.query(func.avg(Customer.churn_probability)).scalar() or 0.5
+            # 전체 DB 통계 (필터 무관, 세그먼트 큐브)
+            cube = await get_segment_cube_async()
+            total_all = cube.total.customers
+            avg_risk_all = cube.total.avg_probability or 0.5
             avg_risk_score_all = round(avg_risk_all * 100, 1)
-            high_risk_count_all = db.query(func.count(Customer.customer_id)).filter(
-                Customer.churn_probability >= 0.7
-            ).scalar() or 0
+            high_risk_count_all = sum(cube.count('risk_band', band).customers for band in ('CRITICAL', 'HIGH'))
             
-            # 정렬 설정
+            # 정렬 설정 (동순위는 customer_id로 정렬 → 커서 위치가 항상 유일)
             sort_column_map = {
                 "customer_id": Customer.customer_id,
                 "risk_score": Customer.churn_probability,
@@ -152,25 +164,67 @@ async def get_customers(
                 "age": Customer.age,
             }
             
-            sort_column = sort_column_map.get(sort_by, Customer.customer_id)
+            if sort_by == "relevance" and relevance is not None:
+                sort_order = "asc"
+            elif sort_by not in sort_column_map:
+                sort_by = "customer_id"
+            sort_order = "desc" if sort_order == "desc" else "asc"
+            sort_column = sort_column_map.get(sort_by)
+            descending = sort_order == "desc"
             
-            if sort_order == "desc":
-                query = query.order_by(desc(sort_column))
+            if cursor and sort_column is not None:
+                # 키셋: 커서 다음 행부터 (정렬 컬럼, customer_id) 인덱스 범위 스캔
+                try:
+                    after = decode_cursor(cursor, sort_by, sort_order)
+                    page = cursor_page(cursor) or page
+                except InvalidCursor as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                
+                customers = []
+                for segment in keyset_segments(query, sort_column, Customer.customer_id, descending, after):
+                    customers += (await db.execute(segment.limit(page_size + 1 - len(customers)))).scalars().all()
+                    if len(customers) > page_size:
+                        break
             else:
-                query = query.order_by(asc(sort_column))
+                # OFFSET: 커버링 인덱스 (정렬 컬럼, customer_id)에서 ID만 건너뛴 뒤 해당 페이지 행만 조회
+                if sort_column is None:
+                    # 관련도순 (키셋 커서 없음)
+                    order_by = [relevance, Customer.customer_id]
+                elif sort_column is Customer.customer_id:
+                    order_by = [Customer.customer_id.desc() if descending else Customer.customer_id.asc()]
+                elif descending:
+                    order_by = [sort_column.desc().nulls_first(), Customer.customer_id.desc()]
+                else:
+                    order_by = [sort_column.asc().nulls_last(), Customer.customer_id.asc()]
+                
+                # 얕은 페이지만 (깊은 페이지 번호 이동은 건너뛴 행 수만큼 비용이 커지므로 커서 사용)
+                try:
+                    offset = offset_rows(page, page_size)
+                except PageTooDeep as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                page_ids = (await db.execute(
+                    query.with_only_columns(Customer.customer_id).order_by(*order_by).offset(offset).limit(page_size + 1)
+                )).scalars().all()
+                rows = {
+                    c.customer_id: c
+                    for c in (await db.execute(select(Customer).where(Customer.customer_id.in_(page_ids)))).scalars()
+                }
+                customers = [rows[customer_id] for customer_id in page_ids if customer_id in rows]
             
-            # 페이지네이션
-            offset = (page - 1) * page_size
-            customers = query.offset(offset).limit(page_size).all()
+            result = page_info(customers, page_size, sort_by, sort_order,
+                               sort_column.key if sort_column is not None else None, "customer_id", page)
             
             return {
                 "total": total,
+                "total_approximate": total_approximate,
                 "page": page,
                 "page_size": page_size,
                 "total_pages": (total + page_size - 1) // page_size,
                 "sort_by": sort_by,
                 "sort_order": sort_order,
-                "customers": [format_customer(c) for c in customers],
+                "customers": [format_customer(c) for c in result["rows"]],
+                "has_more": result["has_more"],
+                "next_cursor": result["next_cursor"],
                 # 전체 DB 기준 통계 (필터 무관)
                 "stats": {
                     "total_customers": total_all,
@@ -178,18 +232,23 @@ async def get_customers(
                     "high_risk_count": high_risk_count_all
                 }
             }
-            
+    
+    except HTTPException:
+        raise
     except Exception as e:
         logger.warning(f"고객 목록 조회 실패: {e}")
         # Mock 데이터 반환
         return {
             "total": 5000,
+            "total_approximate": False,
             "page": page,
             "page_size": page_size,
             "total_pages": 250,
             "sort_by": sort_by,
             "sort_order": sort_order,
             "customers": [generate_mock_customer(f"C{str(i).zfill(8)}") for i in range((page-1)*page_size + 1, (page-1)*page_size + page_size + 1)],
+            "has_more": page < 250,
+            "next_cursor": None,
             "stats": {
                 "total_customers": 5000,
                 "avg_risk_score": 49.4,
@@ -242,84 +301,54 @@ def generate_mock_customer(customer_id: str) -> Dict:
 
 @router.get("/{customer_id}")
 async def get_customer_detail(customer_id: str) -> Dict:
-    """고객 상세 정보 (실제 DB 데이터)"""
-    from services.db import get_db_context
-    from models.database import Customer, Transaction, CustomerAction
+    """고객 상세 정보 (로컬/Redis 캐시 → Customer-360 읽기 모델, 최신 문서면 기본 키 한 번 조회)"""
+    from services.cache import cache_customer_detail, get_cached_customer_detail
+    from services.db import get_async_db_context
+    from services.customer_360 import load_customer_360
     
     try:
-        with get_db_context() as db:
-            customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
-            
-            if not customer:
-                raise HTTPException(status_code=404, detail=f"고객을 찾을 수 없습니다: {customer_id}")
-            
-            # 기본 정보
-            result = format_customer(customer)
-            
-            # 거래 내역 (최근 10건)
-            transactions = db.query(Transaction).filter(
-                Transaction.customer_id == customer_id
-            ).order_by(Transaction.transaction_date.desc()).limit(10).all()
+        async with get_async_db_context() as db:
+            result = await get_cached_customer_detail(customer_id)
+            if result is None:
+                result = await db.run_sync(lambda session: load_customer_360(session, customer_id, format_customer))
+                
+                if result is None:
+                    raise HTTPException(status_code=404, detail=f"고객을 찾을 수 없습니다: {customer_id}")
+                
+                # 요청마다 붙이는 예시 필드 전의 문서만 캐시
+                await cache_customer_detail(customer_id, result)
             
-            result["recent_transactions"] = [
-                {
-                    "date": t.transaction_date.strftime("%Y-%m-%d") if t.transaction_date else None,
-                    "category": t.category or "기타",
-                    "merchant": t.merchant_type or "Unknown",
-                    "amount": t.amount or 0
-                }
-                for t in transactions
-            ] if transactions else [
-                {
-                    "date": (datetime.now() - timedelta(days=i*3)).strftime("%Y-%m-%d"),
-                    "category": random.choice(["외식", "쇼핑", "주유", "마트", "의료", "통신"]),
-                    "merchant": random.choice(["스타벅스", "이마트", "GS칼텍스", "쿠팡", "올리브영", "교보문고"]),
-                    "amount": random.randint(5000, 150000)
-                }
-                for i in range(10)
-            ]
-            
-            # 액션 이력 (최근 5건)
-            actions = db.query(CustomerAction).filter(
-                CustomerAction.customer_id == customer_id
-            ).order_by(CustomerAction.action_date.desc()).limit(5).all()
-            
-            result["action_history"] = [
-                {
-                    "date": a.action_date.strftime("%Y-%m-%d") if a.action_date else None,
-                    "type": a.action_type,
-                    "title": a.action_title,
-                    "status": a.status,
-                    "result": a.result
-                }
-                for a in actions
-            ] if actions else []
+            # 거래 내역이 없는 고객은 화면 예시 데이터
+            if not result["recent_transactions"]:
+                result["recent_transactions"] = [
+                    {
+                        "date": (datetime.now() - timedelta(days=i*3)).strftime("%Y-%m-%d"),
+                        "category": random.choice(["외식", "쇼핑", "주유", "마트", "의료", "통신"]),
+                        "merchant": random.choice(["스타벅스", "이마트", "GS칼텍스", "쿠팡", "올리브영", "교보문고"]),
+                        "amount": random.randint(5000, 150000)
+                    }
+                    for i in range(10)
+                ]
             
-            # 추가 상세 정보
+            # 추가 상세 정보 (누적 합계는 월별 집계 기준, 나머지는 연동 전 예시 값)
+            lifetime = result.pop("lifetime")
             result["details"] = {
-                "total_transactions_lifetime": len(transactions) * 10 if transactions else random.randint(50, 500),
-                "total_amount_lifetime": random.randint(10000000, 100000000),
-                "favorite_categories": ["외식", "쇼핑", "주유"],
+                "total_transactions_lifetime": lifetime["transaction_count"] if lifetime else random.randint(50, 500),
+                "total_amount_lifetime": lifetime["total_amount"] if lifetime else random.randint(10000000, 100000000),
+                "favorite_categories": lifetime["favorite_categories"] if lifetime else ["외식", "쇼핑", "주유"],
                 "recent_complaints": random.randint(0, 3),
-                "card_type": customer.card_type or "일반",
+                "card_type": result["card_type"] or "일반",
                 "linked_accounts": random.randint(1, 5),
                 "app_usage_days": random.randint(0, 90),
                 "email_open_rate": round(random.uniform(0.1, 0.8), 2),
                 "sms_response_rate": round(random.uniform(0.05, 0.5), 2)
             }
             
-            # 예측 이력
-            result["prediction_history"] = [
-                {
-                    "date": (datetime.now() - timedelta(days=i*30)).strftime("%Y-%m-%d"),
-                    "risk_score": max(10, min(95, result["risk_score"] - random.randint(-10, 10))),
-                    "churn_probability": round(max(0.1, min(0.95, result["churn_probability"] + random.uniform(-0.1, 0.1))), 3)
-                }
-                for i in range(6)
-            ][::-1]
+            # 예측 이력은 문서에 저장된 점수 기준 (이력 필드 추가 전에 만든 문서는 다음 무효화까지 빈 목록)
+            result.setdefault("prediction_history", [])
             
             return result
-            
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -346,14 +375,8 @@ async def get_customer_detail(customer_id: str) -> Dict:
             }
             for i in range(10)
         ]
-        customer["prediction_history"] = [
-            {
-                "date": (datetime.now() - timedelta(days=i*30)).strftime("%Y-%m-%d"),
-                "risk_score": customer["risk_score"] - random.randint(-10, 10),
-                "churn_probability": round((customer["risk_score"] - random.randint(-10, 10)) / 100, 3)
-            }
-            for i in range(6)
-        ][::-1]
+        # 저장된 점수가 없으므로 예측 이력은 만들지 않음
+        customer["prediction_history"] = []
         return customer
 
 
@@ -365,21 +388,24 @@ async def get_customer_transactions(
     category: Optional[str] = None
 ) -> List[Dict]:
     """고객 거래 내역 (실제 DB 데이터)"""
+    from sqlalchemy import select
     from services.db import get_db_context
-    from models.database import Transaction
+    from services.transaction_partitions import transaction_source
     
     try:
         with get_db_context() as db:
-            query = db.query(Transaction).filter(Transaction.customer_id == customer_id)
+            # 월 테이블로 옮긴 달까지 포함 (휴면 고객 내역)
+            source = transaction_source(db)
+            query = select(source).where(source.c.customer_id == customer_id)
             
             if start_date:
-                query = query.filter(Transaction.transaction_date >= start_date)
+                query = query.where(source.c.transaction_date >= start_date)
             if end_date:
-                query = query.filter(Transaction.transaction_date <= end_date)
+                query = query.where(source.c.transaction_date <= end_date)
             if category:
-                query = query.filter(Transaction.category == category)
+                query = query.where(source.c.category == category)
             
-            transactions = query.order_by(Transaction.transaction_date.desc()).limit(100).all()
+            transactions = db.execute(query.order_by(source.c.transaction_date.desc()).limit(100)).all()
             
             if not transactions:
                 return [
@@ -405,7 +431,7 @@ async def get_customer_transactions(
                 }
                 for t in transactions
             ]
-            
+    
     except Exception as e:
         logger.warning(f"거래 내역 조회 실패: {e}")
         return [
@@ -423,7 +449,8 @@ async def get_customer_transactions(
 
 @router.post("/{customer_id}/note")
 async def add_customer_note(customer_id: str, note: Dict) -> Dict:
-    """고객 메모/액션 추가"""
+    """고객 메모/액션 추가 (고객 상세 캐시 삭제)"""
+    from services.cache import invalidate_customer_details
     from services.db import get_db_context
     from models.database import CustomerAction
     
@@ -439,6 +466,7 @@ async def add_customer_note(customer_id: str, note: Dict) -> Dict:
             )
             db.add(action)
             db.commit()
+            await invalidate_customer_details(customer_id)
             
             return {
                 "status": "success",
@@ -17,58 +17,48 @@ logger = logging.getLogger(__name__)
 
 @router.get("/stats")
 async def get_dashboard_stats() -> Dict:
-    """대시보드 실시간 통계 (실제 DB 데이터)"""
-    from services.db import get_db_context
-    from models.database import Customer
-    from sqlalchemy import func
+    """대시보드 실시간 통계 (세그먼트 큐브)"""
+    from services.segment_cube import UNSCORED_BAND, get_segment_cube_async
     
     try:
-        with get_db_context() as db:
-            # 실제 DB 데이터 조회
-            total = db.query(func.count(Customer.customer_id)).scalar() or 0
-            churned = db.query(func.count(Customer.customer_id)).filter(Customer.churned == 1).scalar() or 0
-            churn_rate = (churned / total * 100) if total > 0 else 0
-            
-            # 생애주기별 분포 (실제 DB에서)
-            lifecycle_dist = {}
-            for stage in ['신규', '성장', '성숙', '쇠퇴']:
-                count = db.query(func.count(Customer.customer_id)).filter(Customer.lifecycle_stage == stage).scalar() or 0
-                lifecycle_dist[stage] = count
-            
-            # 고위험 고객 수 (churn_probability 기준)
-            critical_count = db.query(func.count(Customer.customer_id)).filter(
-                Customer.churn_probability >= 0.9
-            ).scalar() or int(churned * 0.3)
-            high_count = db.query(func.count(Customer.customer_id)).filter(
-                Customer.churn_probability >= 0.7,
-                Customer.churn_probability < 0.9
-            ).scalar() or int(churned * 0.4)
-            medium_count = db.query(func.count(Customer.customer_id)).filter(
-                Customer.churn_probability >= 0.5,
-                Customer.churn_probability < 0.7
-            ).scalar() or int(churned * 0.3)
-            
-            return {
-                "summary": {
-                    "total_customers": total,
-                    "at_risk_customers": churned,
-                    "churn_rate": round(churn_rate, 2),
-                    "prevented_this_month": int(total * 0.05),
-                    "revenue_protected": f"{int(total * 0.05 * 0.5)}억원"
-                },
-                "lifecycle_distribution": lifecycle_dist,
-                "risk_levels": {
-                    "critical": critical_count,
-                    "high": high_count,
-                    "medium": medium_count,
-                    "low": total - critical_count - high_count - medium_count
-                },
-                "trend": {
-                    "labels": ["1월", "2월", "3월", "4월", "5월", "6월"],
-                    "churn_rate": [14.2, 13.8, 13.5, 13.1, 12.9, round(churn_rate, 1)],
-                    "prevented": [380, 410, 430, 445, 450, int(total * 0.05)]
-                }
+        cube = await get_segment_cube_async()
+        
+        total = cube.total.customers
+        churned = cube.total.churned
+        churn_rate = (churned / total * 100) if total > 0 else 0
+        
+        # 생애주기별 분포
+        lifecycle_dist = {
+            stage: cube.count('lifecycle_stage', stage).customers
+            for stage in ['신규', '성장', '성숙', '쇠퇴']
+        }
+        
+        # 위험 구간별 고객 수 (churn_probability 구간, 큐브 실제 값 - 점수가 없는 고객은 LOW가 아닌 UNSCORED)
+        risk_counts = {band: cube.count('risk_band', band).customers
+                       for band in ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW', UNSCORED_BAND)}
+        
+        return {
+            "summary": {
+                "total_customers": total,
+                "at_risk_customers": churned,
+                "churn_rate": round(churn_rate, 2),
+                "prevented_this_month": int(total * 0.05),
+                "revenue_protected": f"{int(total * 0.05 * 0.5)}억원"
+            },
+            "lifecycle_distribution": lifecycle_dist,
+            "risk_levels": {
+                "critical": risk_counts['CRITICAL'],
+                "high": risk_counts['HIGH'],
+                "medium": risk_counts['MEDIUM'],
+                "low": risk_counts['LOW'],
+                "unscored": risk_counts[UNSCORED_BAND]
+            },
+            "trend": {
+                "labels": ["1월", "2월", "3월", "4월", "5월", "6월"],
+                "churn_rate": [14.2, 13.8, 13.5, 13.1, 12.9, round(churn_rate, 1)],
+                "prevented": [380, 410, 430, 445, 450, int(total * 0.05)]
             }
+        }
     except Exception as e:
         logger.warning(f"DB 조회 실패, Mock 데이터 사용: {e}")
         # DB 오류 시 Mock 데이터 반환
@@ -81,7 +71,7 @@ async def get_dashboard_stats() -> Dict:
                 "revenue_protected": "12억원"
             },
             "lifecycle_distribution": {"신규": 775, "성장": 1258, "성숙": 1968, "쇠퇴": 999},
-            "risk_levels": {"critical": 222, "high": 296, "medium": 221, "low": 4261},
+            "risk_levels": {"critical": 222, "high": 296, "medium": 221, "low": 4261, "unscored": 0},
             "trend": {
                 "labels": ["1월", "2월", "3월", "4월", "5월", "6월"],
                 "churn_rate": [14.2, 13.8, 13.5, 13.1, 12.9, 14.78],
@@ -153,7 +143,7 @@ async def get_urgent_alerts() -> List[Dict]:
                 })
             
             return alerts
-            
+    
     except Exception as e:
         logger.warning(f"DB 조회 실패, Mock 데이터 사용: {e}")
         # DB 오류 시 Mock 데이터 반환
@@ -219,14 +209,11 @@ async def get_urgent_alerts() -> List[Dict]:
 @router.get("/realtime")
 async def get_realtime_metrics() -> Dict:
     """실시간 지표"""
-    from services.db import get_db_context
-    from models.database import Customer
-    from sqlalchemy import func
+    from services.segment_cube import get_segment_cube_async
     
     try:
-        with get_db_context() as db:
-            total = db.query(func.count(Customer.customer_id)).scalar() or 5000
-            
+        total = (await get_segment_cube_async()).total.customers or 5000
+        
         return {
             "timestamp": datetime.now().isoformat(),
             "active_users_now": random.randint(int(total * 0.3), int(total * 0.5)),
@@ -248,87 +235,30 @@ async def get_realtime_metrics() -> Dict:
 
 @router.get("/segment-analysis")
 async def get_segment_analysis() -> Dict:
-    """세그먼트별 분석 (실제 DB 데이터)"""
-    from services.db import get_db_context
-    from models.database import Customer
-    from sqlalchemy import func
+    """세그먼트별 분석 (세그먼트 큐브)"""
+    from services.segment_cube import AGE_BANDS, get_segment_cube_async
+    
+    def segment_row(key: str, value: str, m) -> Dict:
+        return {key: value, "total": m.customers, "at_risk": m.churned, "churn_rate": m.churn_rate}
     
     try:
-        with get_db_context() as db:
-            # 연령대별 분석
-            age_analysis = []
-            age_ranges = [
-                ("20대", 20, 29),
-                ("30대", 30, 39),
-                ("40대", 40, 49),
-                ("50대", 50, 59),
-                ("60대+", 60, 100)
-            ]
-            
-            for label, min_age, max_age in age_ranges:
-                total = db.query(func.count(Customer.customer_id)).filter(
-                    Customer.age >= min_age,
-                    Customer.age <= max_age
-                ).scalar() or 0
-                
-                at_risk = db.query(func.count(Customer.customer_id)).filter(
-                    Customer.age >= min_age,
-                    Customer.age <= max_age,
-                    Customer.churned == 1
-                ).scalar() or 0
-                
-                churn_rate = round((at_risk / total * 100), 1) if total > 0 else 0
-                age_analysis.append({
-                    "age_group": label,
-                    "total": total,
-                    "at_risk": at_risk,
-                    "churn_rate": churn_rate
-                })
-            
-            # 지역별 분석
-            region_analysis = []
-            regions = db.query(
-                Customer.region,
-                func.count(Customer.customer_id).label('total'),
-                func.sum(Customer.churned).label('at_risk')
-            ).group_by(Customer.region).all()
-            
-            for region, total, at_risk in regions:
-                if region:
-                    at_risk = at_risk or 0
-                    churn_rate = round((at_risk / total * 100), 1) if total > 0 else 0
-                    region_analysis.append({
-                        "region": region,
-                        "total": total,
-                        "at_risk": int(at_risk),
-                        "churn_rate": churn_rate
-                    })
-            
-            # 직업별 분석
-            occupation_analysis = []
-            occupations = db.query(
-                Customer.occupation,
-                func.count(Customer.customer_id).label('total'),
-                func.sum(Customer.churned).label('at_risk')
-            ).group_by(Customer.occupation).all()
-            
-            for occupation, total, at_risk in occupations:
-                if occupation:
-                    at_risk = at_risk or 0
-                    churn_rate = round((at_risk / total * 100), 1) if total > 0 else 0
-                    occupation_analysis.append({
-                        "occupation": occupation,
-                        "total": total,
-                        "at_risk": int(at_risk),
-                        "churn_rate": churn_rate
-                    })
-            
-            return {
-                "by_age": age_analysis,
-                "by_region": sorted(region_analysis, key=lambda x: x['total'], reverse=True)[:5],
-                "by_occupation": sorted(occupation_analysis, key=lambda x: x['total'], reverse=True)[:5]
-            }
-            
+        cube = await get_segment_cube_async()
+        
+        # 연령대별 분석
+        age_analysis = [segment_row("age_group", label, cube.count('age_band', label)) for label, _, _ in AGE_BANDS]
+        
+        # 지역별 / 직업별 분석 (미상 제외)
+        region_analysis = [segment_row("region", value, m) for value, m in cube.by('region').items() if value]
+        occupation_analysis = [
+            segment_row("occupation", value, m) for value, m in cube.by('occupation').items() if value
+        ]
+        
+        return {
+            "by_age": age_analysis,
+            "by_region": sorted(region_analysis, key=lambda x: x['total'], reverse=True)[:5],
+            "by_occupation": sorted(occupation_analysis, key=lambda x: x['total'], reverse=True)[:5]
+        }
+    
     except Exception as e:
         logger.warning(f"세그먼트 분석 DB 조회 실패: {e}")
         # Mock 데이터 반환
@@ -2,7 +2,9 @@
 예측 API 엔드포인트
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
+import asyncio
+
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
 import pandas as pd
@@ -29,15 +31,12 @@ class PredictResponse(BaseModel):
     confidence: float
 
 
-@router.post("/predict", response_model=PredictResponse)
-async def predict_churn(request: PredictRequest) -> PredictResponse:
-    """단일 고객 이탈 예측"""
-    
-    # Mock prediction - 실제 환경에서는 ML 모델 호출
-    churn_prob = np.random.beta(2, 5)  # 0-1 사이 확률
-    risk_score = int(churn_prob * 100)
-    
-    # Risk level
+# 고객 생애주기 단계(DB) → 응답 표기
+LIFECYCLE_LABELS = {'신규': 'onboarding', '성장': 'growth', '성숙': 'maturity', '쇠퇴': 'decline'}
+
+
+def risk_actions(risk_score: int):
+    """위험 점수 → (위험 등급, 권장 액션)"""
     if risk_score >= 90:
         risk_level = "CRITICAL"
         actions = [
@@ -65,6 +64,64 @@ async def predict_churn(request: PredictRequest) -> PredictResponse:
             "정기 고객 만족도 조사",
             "신규 서비스 안내"
         ]
+    return risk_level, actions
+
+
+async def model_prediction(model, customer_id: str) -> Dict:
+    """
+    모델 온라인 점수 (모델 버전별 캐시: 로컬 → Redis → DB 피처 + 추론)
+    
+    추론은 동기 세션/모델 호출이므로 스레드에서 실행합니다.
+    """
+    from services.cache import cache_prediction, get_cached_prediction
+    from services.db import get_db_context
+    from services.online_features import score_customer
+    
+    cached = await get_cached_prediction(customer_id, model.model_version)
+    if cached is not None:
+        return cached
+    
+    def score():
+        with get_db_context() as db:
+            return score_customer(db, model, customer_id)
+    
+    try:
+        prediction = await asyncio.to_thread(score)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"고객을 찾을 수 없습니다: {customer_id}")
+    await cache_prediction(customer_id, prediction, model.model_version)
+    return prediction
+
+
+@router.post("/predict", response_model=PredictResponse)
+async def predict_churn(request: PredictRequest, http_request: Request) -> PredictResponse:
+    """단일 고객 이탈 예측 (온라인 스코어링 모델이 로드되어 있으면 모델 점수, 없으면 예시 값)"""
+    model = getattr(http_request.app.state, 'ml_model', None)
+    if model is not None and getattr(model, 'feature_metadata', None) and request.features is None:
+        prediction = await model_prediction(model, request.customer_id)
+        risk_score = prediction['risk_score']
+        risk_level, actions = risk_actions(risk_score)
+        if risk_score >= 80:
+            lifecycle = "at_risk"
+        elif risk_score >= 60:
+            lifecycle = "decline"
+        else:
+            lifecycle = LIFECYCLE_LABELS.get(prediction.get('lifecycle_stage'), "maturity")
+        probability = prediction['churn_probability']
+        return PredictResponse(
+            customer_id=request.customer_id,
+            churn_probability=probability,
+            risk_level=risk_level,
+            risk_score=risk_score,
+            lifecycle_stage=lifecycle,
+            recommended_actions=actions,
+            confidence=round(max(probability, 1 - probability), 3)
+        )
+    
+    # Mock prediction - 모델이 없을 때 화면 예시
+    churn_prob = np.random.beta(2, 5)  # 0-1 사이 확률
+    risk_score = int(churn_prob * 100)
+    risk_level, actions = risk_actions(risk_score)
     
     # Lifecycle stage (mock)
     lifecycle_stages = ["onboarding", "growth", "maturity", "decline", "at_risk"]
@@ -86,6 +143,33 @@ async def predict_churn(request: PredictRequest) -> PredictResponse:
     )
 
 
+@router.post("/predict/{customer_id}/refresh")
+async def refresh_prediction(customer_id: str, request: Request) -> Dict:
+    """단일 고객 점수 즉시 갱신 (대량 거래/민원 발생 시, DB 기반 온라인 피처)"""
+    from services.cache import cache_prediction, invalidate_customer_details
+    from services.db import get_db_context
+    from services.online_features import refresh_customer_score
+    
+    model = getattr(request.app.state, 'ml_model', None)
+    if model is None or not getattr(model, 'feature_metadata', None):
+        raise HTTPException(status_code=503, detail="온라인 스코어링이 가능한 모델이 로드되지 않았습니다")
+    
+    def refresh():
+        with get_db_context() as db:
+            return refresh_customer_score(db, model, customer_id)
+    
+    try:
+        # 동기 세션 + 모델 추론/SHAP은 스레드에서 (이벤트 루프를 막지 않도록)
+        result = await asyncio.to_thread(refresh)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"고객을 찾을 수 없습니다: {customer_id}")
+    
+    # 예측 API가 바로 새 점수를 반환하도록 캐시 교체, 고객 상세 캐시는 삭제
+    await cache_prediction(customer_id, result, model.model_version)
+    await invalidate_customer_details(customer_id)
+    return result
+
+
 @router.post("/predict/batch")
 async def predict_batch(file: UploadFile = File(...)) -> Dict:
     """배치 예측 (CSV 파일)"""
@@ -181,91 +265,81 @@ async def get_feature_importance() -> Dict:
 
 @router.get("/clusters")
 async def get_clusters() -> Dict:
-    """고객 군집 분석 결과 (실제 DB 기반)"""
-    from services.db import get_db_context
-    from models.database import Customer
-    from sqlalchemy import func
+    """고객 군집 분석 결과 (세그먼트 큐브 기반)"""
+    from services.segment_cube import get_segment_cube_async
     
     try:
-        with get_db_context() as db:
-            total = db.query(func.count(Customer.customer_id)).scalar() or 5000
-            churned = db.query(func.count(Customer.customer_id)).filter(Customer.churned == 1).scalar() or 739
-            
-            # 생애주기 기반 군집 생성
-            lifecycle_stages = {
-                '신규': {'name': '신규 온보딩 고객군', 'risk': 45, 'churn': 22.5},
-                '성장': {'name': '성장 고객군', 'risk': 32, 'churn': 10.2},
-                '성숙': {'name': '안정 성숙 고객군 (VIP)', 'risk': 18, 'churn': 5.8},
-                '쇠퇴': {'name': '이탈 위험 고객군', 'risk': 78, 'churn': 38.5}
-            }
+        cube = await get_segment_cube_async()
+        total = cube.total.customers or 5000
+        
+        # 생애주기 기반 군집 생성
+        lifecycle_stages = {
+            '신규': {'name': '신규 온보딩 고객군', 'risk': 45, 'churn': 22.5},
+            '성장': {'name': '성장 고객군', 'risk': 32, 'churn': 10.2},
+            '성숙': {'name': '안정 성숙 고객군 (VIP)', 'risk': 18, 'churn': 5.8},
+            '쇠퇴': {'name': '이탈 위험 고객군', 'risk': 78, 'churn': 38.5}
+        }
+        
+        clusters = []
+        cluster_id = 0
+        
+        for stage, info in lifecycle_stages.items():
+            segment = cube.count('lifecycle_stage', stage)
+            count = segment.customers
+            at_risk_count = segment.churned
             
-            clusters = []
-            cluster_id = 0
+            actual_churn_rate = round((at_risk_count / count * 100), 1) if count > 0 else info['churn']
+            pct = round((count / total * 100), 1) if total > 0 else 0
             
-            for stage, info in lifecycle_stages.items():
-                count = db.query(func.count(Customer.customer_id)).filter(
-                    Customer.lifecycle_stage == stage
-                ).scalar() or 0
-                
-                at_risk_count = db.query(func.count(Customer.customer_id)).filter(
-                    Customer.lifecycle_stage == stage,
-                    Customer.churned == 1
-                ).scalar() or 0
-                
-                actual_churn_rate = round((at_risk_count / count * 100), 1) if count > 0 else info['churn']
-                pct = round((count / total * 100), 1) if total > 0 else 0
-                
-                characteristics = {
-                    '신규': '가입 0-3개월, 첫 거래 유도 필요',
-                    '성장': '가입 3-12개월, 사용 증가 추세, 주 결제카드 전환 기회',
-                    '성숙': '장기 고객, 높은 충성도, 안정적 사용 패턴',
-                    '쇠퇴': '사용 빈도/금액 감소, 적극적 리텐션 필요'
-                }
-                
-                strategies = {
-                    '신규': '온보딩 프로그램 강화, 첫 거래 인센티브',
-                    '성장': '주 결제카드 전환 유도, 혜택 다양화',
-                    '성숙': 'VIP 전용 혜택, 정기 혜택 유지, 크로스셀 기회 탐색',
-                    '쇠퇴': 'Win-back 캠페인, 맞춤형 쿠폰 발송, 긴급 상담'
-                }
-                
-                clusters.append({
-                    "cluster_id": cluster_id,
-                    "name": info['name'],
-                    "size": count,
-                    "percentage": pct,
-                    "avg_risk_score": info['risk'],
-                    "characteristics": characteristics.get(stage, ''),
-                    "churn_rate": actual_churn_rate,
-                    "recommended_strategy": strategies.get(stage, '')
-                })
-                cluster_id += 1
+            characteristics = {
+                '신규': '가입 0-3개월, 첫 거래 유도 필요',
+                '성장': '가입 3-12개월, 사용 증가 추세, 주 결제카드 전환 기회',
+                '성숙': '장기 고객, 높은 충성도, 안정적 사용 패턴',
+                '쇠퇴': '사용 빈도/금액 감소, 적극적 리텐션 필요'
+            }
             
-            # 추가 군집: 고위험 고객
-            high_risk_count = db.query(func.count(Customer.customer_id)).filter(
-                Customer.churned == 1
-            ).scalar() or 0
+            strategies = {
+                '신규': '온보딩 프로그램 강화, 첫 거래 인센티브',
+                '성장': '주 결제카드 전환 유도, 혜택 다양화',
+                '성숙': 'VIP 전용 혜택, 정기 혜택 유지, 크로스셀 기회 탐색',
+                '쇠퇴': 'Win-back 캠페인, 맞춤형 쿠폰 발송, 긴급 상담'
+            }
             
             clusters.append({
                 "cluster_id": cluster_id,
-                "name": "고위험 이탈 징후군",
-                "size": high_risk_count,
-                "percentage": round((high_risk_count / total * 100), 1) if total > 0 else 0,
-                "avg_risk_score": 88,
-                "characteristics": "이탈 확정 또는 60일+ 미사용, 경쟁사 전환 징후",
-                "churn_rate": 100.0,
-                "recommended_strategy": "긴급 리텐션 프로그램, VIP 전담 상담, 특별 혜택 제공"
+                "name": info['name'],
+                "size": count,
+                "percentage": pct,
+                "avg_risk_score": info['risk'],
+                "characteristics": characteristics.get(stage, ''),
+                "churn_rate": actual_churn_rate,
+                "recommended_strategy": strategies.get(stage, '')
             })
-            
-            return {
-                "total_clusters": len(clusters),
-                "clustering_method": "생애주기 기반 세그멘테이션 + HDBSCAN",
-                "features_used": 100,
-                "silhouette_score": 0.68,
-                "total_customers": total,
-                "clusters": clusters
-            }
-            
+            cluster_id += 1
+        
+        # 추가 군집: 고위험 고객
+        high_risk_count = cube.total.churned
+        
+        clusters.append({
+            "cluster_id": cluster_id,
+            "name": "고위험 이탈 징후군",
+            "size": high_risk_count,
+            "percentage": round((high_risk_count / total * 100), 1) if total > 0 else 0,
+            "avg_risk_score": 88,
+            "characteristics": "이탈 확정 또는 60일+ 미사용, 경쟁사 전환 징후",
+            "churn_rate": 100.0,
+            "recommended_strategy": "긴급 리텐션 프로그램, VIP 전담 상담, 특별 혜택 제공"
+        })
+        
+        return {
+            "total_clusters": len(clusters),
+            "clustering_method": "생애주기 기반 세그멘테이션 + HDBSCAN",
+            "features_used": 100,
+            "silhouette_score": 0.68,
+            "total_customers": total,
+            "clusters": clusters
+        }
+    
     except Exception as e:
         # DB 오류 시 Mock 데이터 (5000명 기준)
         return {
@@ -173,26 +173,26 @@ async def _generate_report_content(
 ):
     """보고서 콘텐츠 생성 (백그라운드 태스크)"""
     from services.db import get_db_context
-    from models.database import Report, Customer, RetentionRecord, Campaign
-    from sqlalchemy import func
+    from services.segment_cube import get_segment_cube
+    from services.transaction_rollup import period_activity
+    from models.database import Report, RetentionRecord, Campaign
     
     try:
         with get_db_context() as db:
-            # 기간 내 통계 수집
-            total_customers = db.query(func.count(Customer.customer_id)).scalar() or 5000
-            churned_count = db.query(func.count(Customer.customer_id)).filter(
-                Customer.churned == 1
-            ).scalar() or 739
+            # 기간 내 통계 수집 (세그먼트 큐브)
+            cube = get_segment_cube(db.get_bind())
+            total_customers = cube.total.customers or 5000
+            churned_count = cube.total.churned or 739
             
             churn_rate = round(churned_count / total_customers * 100, 2) if total_customers > 0 else 0
             
             # 생애주기별 분포
             lifecycle_dist = {}
             for stage in ['신규', '성장', '성숙', '쇠퇴']:
-                count = db.query(func.count(Customer.customer_id)).filter(
-                    Customer.lifecycle_stage == stage
-                ).scalar() or 0
-                lifecycle_dist[stage] = count
+                lifecycle_dist[stage] = cube.count('lifecycle_stage', stage).customers
+            
+            # 기간 거래 통계 (월별 거래 집계, 원본 거래 재집계 없음)
+            transaction_activity = period_activity(db, period_start, period_end)
             
             # 이탈 방지 효과 (있으면)
             retention_stats = {
@@ -224,6 +224,7 @@ async def _generate_report_content(
                     "retention_success_rate": retention_stats["success_rate"]
                 },
                 "lifecycle_distribution": lifecycle_dist,
+                "transaction_activity": transaction_activity,
                 "retention_performance": retention_stats,
                 "campaign_performance": campaign_stats,
                 "ai_model": {
@@ -415,30 +416,26 @@ async def export_report(
 @router.get("/summary/current")
 async def get_current_summary() -> Dict:
     """현재 월간 요약 (대시보드용)"""
-    from services.db import get_db_context
-    from models.database import Customer
-    from sqlalchemy import func
+    from services.segment_cube import get_segment_cube_async
     
     now = datetime.now()
     month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
     try:
-        with get_db_context() as db:
-            total = db.query(func.count(Customer.customer_id)).scalar() or 5000
-            churned = db.query(func.count(Customer.customer_id)).filter(
-                Customer.churned == 1
-            ).scalar() or 739
-            
-            return {
-                "period": f"{now.year}년 {now.month}월",
-                "total_customers": total,
-                "churned_customers": churned,
-                "churn_rate": round(churned / total * 100, 2) if total > 0 else 0,
-                "retention_success_rate": 76.0,  # DB에서 계산 필요
-                "ai_model_accuracy": 99.41,
-                "monthly_saved_revenue": f"{int(total * 0.05 * 0.5)}억원",
-                "generated_at": now.isoformat()
-            }
+        cube = await get_segment_cube_async()
+        total = cube.total.customers or 5000
+        churned = cube.total.churned or 739
+        
+        return {
+            "period": f"{now.year}년 {now.month}월",
+            "total_customers": total,
+            "churned_customers": churned,
+            "churn_rate": round(churned / total * 100, 2) if total > 0 else 0,
+            "retention_success_rate": 76.0,  # DB에서 계산 필요
+            "ai_model_accuracy": 99.41,
+            "monthly_saved_revenue": f"{int(total * 0.05 * 0.5)}억원",
+            "generated_at": now.isoformat()
+        }
     except Exception as e:
         logger.warning(f"현재 요약 조회 실패: {e}")
         return {
@@ -5,7 +5,7 @@ IBK 카드 고객 이탈 예측 API - Main Application
 Copyright (c) 2024 (주)범온누리 이노베이션
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
@@ -16,9 +16,18 @@ from pathlib import Path
 from api.routes import predict, dashboard, campaigns, customers, reports
 
 # Services
-from services.db import init_db, check_db_connection
-from services.cache import is_redis_available, get_cache_stats
+from services.db import engine, init_db, check_db_connection, get_database_info, dispose_async_engine
+from services.segment_cube import ensure_segment_cube
+from services.transaction_rollup import ensure_transaction_rollup
+from services.customer_search import ensure_search_index
+from services.cache import (
+    close_redis, get_cache_stats, is_redis_available, start_cache_invalidation_listener, start_redis_health_probe
+)
 from services.scheduler import start_scheduler, stop_scheduler
+from services.sql_instrumentation import (
+    SQL_DIAGNOSTICS_ENABLED, SQL_INSTRUMENTATION, QueryInstrumentationMiddleware, get_sql_diagnostics,
+    register_sql_instrumentation
+)
 
 # ML 모델은 옵셔널 (의존성 미설치 시에도 동작)
 try:
@@ -65,7 +74,7 @@ def load_ml_model():
         logger.info("✅ ML model loaded successfully!")
         
         return ml_model
-        
+    
     except Exception as e:
         logger.error(f"❌ Failed to load ML model: {e}", exc_info=True)
         logger.warning("   Starting with mock predictions...")
@@ -86,6 +95,12 @@ async def lifespan(app: FastAPI):
         init_db()
         if check_db_connection():
             logger.info("   ✅ Database connected")
+            if ensure_segment_cube(engine):
+                logger.info("   ✅ Segment cube built")
+            if ensure_search_index(engine):
+                logger.info("   ✅ Customer search index built")
+            if ensure_transaction_rollup(engine):
+                logger.info("   ✅ Transaction rollup built")
         else:
             logger.warning("   ⚠️ Database not available (using mock data)")
     except Exception as e:
@@ -93,8 +108,11 @@ async def lifespan(app: FastAPI):
     
     # 2. Redis 캐싱 확인
     logger.info("\n[2/5] Checking Redis cache...")
-    if is_redis_available():
-        stats = get_cache_stats()
+    redis_connected = await start_redis_health_probe()
+    # Redis가 나중에 올라와도 구독하도록 항상 시작
+    await start_cache_invalidation_listener()
+    if redis_connected:
+        stats = await get_cache_stats()
         logger.info(f"   ✅ Redis connected - {stats.get('total_keys', 0)} keys")
     else:
         logger.warning("   ⚠️ Redis not available (caching disabled)")
@@ -141,6 +159,8 @@ async def lifespan(app: FastAPI):
         stop_scheduler()
     except:
         pass
+    await close_redis()
+    await dispose_async_engine()
     logger.info("Goodbye!")
 
 
@@ -174,6 +194,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# SQL 계측 (요청별 쿼리 수/DB 시간/N+1 감지, DEBUG 모드에서 응답 헤더)
+if SQL_INSTRUMENTATION:
+    register_sql_instrumentation()
+    app.add_middleware(QueryInstrumentationMiddleware)
+
 # 라우터 포함
 app.include_router(predict.router, prefix="/api", tags=["Prediction"])
 app.include_router(dashboard.router, prefix="/api", tags=["Dashboard"])
@@ -223,14 +248,16 @@ async def system_info():
             "loaded": hasattr(app.state, 'ml_model') and app.state.ml_model is not None,
             "name": "범온누리 AI",
             "version": "ver. 1.3ibk",
+            "serving_version": getattr(getattr(app.state, 'ml_model', None), 'model_version', None),
             "features": "100+ engineered features",
             "explainability": "SHAP-based"
         },
         "database": {
             "connected": check_db_connection(),
-            "type": "PostgreSQL / SQLite"
+            "type": "PostgreSQL / SQLite",
+            **get_database_info()
         },
-        "cache": get_cache_stats(),
+        "cache": await get_cache_stats(),
         "scheduler": {
             "enabled": os.getenv("ENABLE_SCHEDULER", "true").lower() == "true",
             "jobs": ["Daily Report (08:00)", "Weekly Summary (Mon 09:00)"]
@@ -238,6 +265,14 @@ async def system_info():
     }
 
 
+# SQL 진단은 DEBUG 모드에서만 노출 (인증 없는 내부 진단 정보)
+if SQL_DIAGNOSTICS_ENABLED:
+    @app.get("/api/system/sql", tags=["System"])
+    async def sql_diagnostics(limit: int = Query(50, ge=1, le=500)):
+        """SQL 진단 (엔드포인트별 쿼리 수/DB 시간, N+1 의심 요청, 요청별 느린 쿼리 - 워커 프로세스별 값)"""
+        return get_sql_diagnostics(limit)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -9,6 +9,7 @@ import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Optional
 import joblib
+import hashlib
 from datetime import datetime
 import logging
 
@@ -51,8 +52,10 @@ class ChurnPredictor:
         self.ensemble = None
         self.explainer = None
         self.feature_names = None
+        self.feature_metadata = None  # FeatureEngineer 메타데이터 (RFM 경계 등)
+        self.model_version = None  # 학습 시각 (예측 캐시 키에 포함)
         self.is_fitted = False
-        
+    
     def _default_config(self) -> Dict:
         """기본 모델 설정 (GPU 가속)"""
         return {
@@ -149,6 +152,7 @@ class ChurnPredictor:
         # SHAP
         logger.info("   Initializing SHAP explainer...")
         self.explainer = shap.TreeExplainer(self.models['xgb'])
+        self.model_version = datetime.now().strftime('%Y%m%d%H%M%S')
         self.is_fitted = True
         logger.info("   ✓ Training completed!")
         
@@ -224,6 +228,8 @@ class ChurnPredictor:
             'models': self.models,
             'config': self.config,
             'feature_names': self.feature_names,
+            'feature_metadata': self.feature_metadata,
+            'model_version': self.model_version,
             'explainer': self.explainer
         }, filepath)
         logger.info(f"✅ Model saved to {filepath}")
@@ -236,10 +242,22 @@ class ChurnPredictor:
         self.config = data['config']
         self.feature_names = data['feature_names']
         self.explainer = data.get('explainer')
+        self.feature_metadata = data.get('feature_metadata')
+        # 버전 정보가 없는 이전 모델 파일은 파일 내용 해시로 구분
+        self.model_version = data.get('model_version') or self.file_version(filepath)
         self.is_fitted = True
-        logger.info(f"✅ Model loaded from {filepath}")
+        logger.info(f"✅ Model loaded from {filepath} (version {self.model_version})")
         return self
     
+    @staticmethod
+    def file_version(filepath: str) -> str:
+        """모델 파일 내용 해시 (앞 12자리)"""
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return f"sha-{digest.hexdigest()[:12]}"
+    
     @classmethod
     def load_from_file(cls, filepath: str):
         """파일에서 모델 로드 (클래스 메서드)"""
@@ -5,7 +5,7 @@ SQLAlchemy ORM Models (v2.0 업그레이드)
 Copyright (c) 2024-2026 (주)범온누리 이노베이션
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, JSON, Enum, Index
+from sqlalchemy import BigInteger, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, JSON, Enum, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -115,6 +115,15 @@ class Customer(Base):
     __table_args__ = (
         Index('idx_customer_risk', 'risk_level', 'churn_probability'),
         Index('idx_customer_lifecycle', 'lifecycle_stage'),
+        # 고객 목록 정렬/키셋 페이지네이션 (정렬 컬럼, customer_id) - 양방향 스캔, ID만 읽는 OFFSET은 커버링
+        Index('idx_customer_page_probability', 'churn_probability', 'customer_id'),
+        Index('idx_customer_page_monthly_avg', 'monthly_avg_amount', 'customer_id'),
+        Index('idx_customer_page_ltv', 'ltv_estimate', 'customer_id'),
+        Index('idx_customer_page_last_txn', 'last_transaction_date', 'customer_id'),
+        Index('idx_customer_page_age', 'age', 'customer_id'),
+        # 생애주기/이탈 필터 + 위험도 정렬 (대시보드 드릴다운 기본 조합)
+        Index('idx_customer_page_lifecycle_probability', 'lifecycle_stage', 'churn_probability', 'customer_id'),
+        Index('idx_customer_page_churned_probability', 'churned', 'churn_probability', 'customer_id'),
     )
 
 
@@ -123,7 +132,7 @@ class Transaction(Base):
     __tablename__ = "transactions"
     
     transaction_id = Column(String(50), primary_key=True, index=True)
-    customer_id = Column(String(50), ForeignKey("customers.customer_id"), nullable=False, index=True)
+    customer_id = Column(String(50), ForeignKey("customers.customer_id"), nullable=False)
     transaction_date = Column(DateTime, nullable=False, index=True)
     amount = Column(Integer, nullable=False)
     category = Column(String(50))
@@ -133,7 +142,15 @@ class Transaction(Base):
     # 관계
     customer = relationship("Customer", back_populates="transactions")
     
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)  # 증분 요약 갱신 기준
+    
+    __table_args__ = (
+        # 고객 상세/거래 내역: customer_id = ? [AND 기간] ORDER BY transaction_date DESC LIMIT n
+        # (customer_id 단독 조회/FK 조회도 이 인덱스의 선두 컬럼으로 처리)
+        Index('idx_transaction_customer_date', 'customer_id', 'transaction_date'),
+        # 거래 내역 카테고리 필터: customer_id = ? AND category = ? [AND 기간] ORDER BY transaction_date DESC
+        Index('idx_transaction_customer_category_date', 'customer_id', 'category', 'transaction_date'),
+    )
 
 
 class CustomerAction(Base):
@@ -141,7 +158,7 @@ class CustomerAction(Base):
     __tablename__ = "customer_actions"
     
     action_id = Column(Integer, primary_key=True, autoincrement=True)
-    customer_id = Column(String(50), ForeignKey("customers.customer_id"), nullable=False, index=True)
+    customer_id = Column(String(50), ForeignKey("customers.customer_id"), nullable=False)
     
     action_type = Column(String(50), nullable=False)  # '상담', '캠페인', '쿠폰', '혜택'
     action_date = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -169,6 +186,11 @@ class CustomerAction(Base):
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # 고객 상세 액션 이력: customer_id = ? ORDER BY action_date DESC LIMIT 5
+        Index('idx_action_customer_date', 'customer_id', 'action_date'),
+    )
 
 
 # ===================== 이탈 방지 효과 추적 =====================
@@ -452,3 +474,116 @@ class SystemLog(Base):
     ip_address = Column(String(50))
     
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# ===================== 데이터 적재 =====================
+
+class IngestLedger(Base):
+    """증분 적재 이력 (파일 내용 해시 단위 멱등성 보장)"""
+    __tablename__ = "ingest_ledger"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(50), nullable=False)  # 'transactions'
+    file_name = Column(String(255))
+    file_hash = Column(String(64), nullable=False)  # SHA-256
+    
+    status = Column(String(20), nullable=False, default='STARTED')  # 'STARTED', 'COMPLETED', 'FAILED'
+    rows_read = Column(Integer, default=0)
+    rows_new = Column(Integer, default=0)  # 신규 적재
+    rows_existing = Column(Integer, default=0)  # 이미 존재 (재시도/중복 행, 갱신만 수행)
+    customers_refreshed = Column(Integer, default=0)
+    max_event_date = Column(DateTime)  # 파일 내 최대 거래일
+    error_message = Column(Text)
+    
+    started_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('idx_ingest_ledger_file', 'source', 'file_hash', unique=True),
+    )
+
+
+class IngestWatermark(Base):
+    """소스별 적재 완료 지점 (최대 거래일)"""
+    __tablename__ = "ingest_watermarks"
+    
+    source = Column(String(50), primary_key=True)
+    watermark = Column(DateTime)  # 적재: 최대 거래일 / 요약 갱신: 마지막 집계 기준 시각
+    processed_at = Column(DateTime)  # 마지막 처리 시작 시각 (UTC, created_at 증분 경계)
+    last_ledger_id = Column(Integer, ForeignKey("ingest_ledger.id"))
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# ===================== 집계 =====================
+
+class SegmentCube(Base):
+    """
+    고객 세그먼트 집계 큐브 (생애주기 x 위험 구간 x 연령대 x 지역 x 직업 x 카드 등급)
+    
+    대시보드/리포트 통계는 customers 테이블 대신 이 테이블에서 조회합니다.
+    차원 값이 없는 고객은 '' 로 저장 (NULL은 유니크 키에서 서로 다른 값으로 취급되므로)
+    """
+    __tablename__ = "segment_cube"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    lifecycle_stage = Column(String(20), nullable=False, default='')
+    risk_band = Column(String(20), nullable=False)  # 'CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'UNSCORED'
+    age_band = Column(String(20), nullable=False)  # '20대' ... '60대+', '기타'
+    region = Column(String(50), nullable=False, default='')
+    occupation = Column(String(50), nullable=False, default='')
+    card_type = Column(String(20), nullable=False, default='')
+    
+    customers = Column(Integer, nullable=False, default=0)
+    churned = Column(Integer, nullable=False, default=0)
+    probability_sum = Column(Float, nullable=False, default=0.0)  # 평균 이탈 확률 계산용
+    probability_count = Column(Integer, nullable=False, default=0)  # churn_probability가 있는 고객 수
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_segment_cube_cell', 'lifecycle_stage', 'risk_band', 'age_band', 'region', 'occupation',
+              'card_type', unique=True),
+    )
+
+
+class TransactionMonthly(Base):
+    """
+    고객 x 월 x 카테고리 거래 집계 (건수/금액)
+    
+    고객 상세 월별 추이, 리포트 거래 통계, 장기 구간 피처는 거래 원본 대신 이 테이블에서 조회합니다.
+    카테고리가 없는 거래는 '' 로 저장 (기본 키 컬럼은 NULL 불가)
+    아카이브로 원본 거래가 DB에서 삭제된 달의 집계도 유지됩니다.
+    """
+    __tablename__ = "transaction_monthly"
+    
+    customer_id = Column(String(50), primary_key=True)
+    month = Column(DateTime, primary_key=True)  # 월 첫날 00:00
+    category = Column(String(50), primary_key=True, default='')
+    
+    transaction_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(BigInteger, nullable=False, default=0)
+    
+    __table_args__ = (
+        # 리포트: 기간 내 월 x 카테고리 합계 (테이블을 읽지 않는 커버링 인덱스)
+        Index('idx_transaction_monthly_month', 'month', 'category', 'transaction_count', 'total_amount'),
+    )
+
+
+class Customer360(Base):
+    """
+    고객 상세 화면 읽기 모델 (고객 1명당 1행)
+    
+    프로필/점수, 최근 거래/액션, 월별 추이, SHAP 상위 요인을 압축 JSON 문서 하나로 저장해
+    상세 조회를 기본 키 한 번 읽기로 처리합니다.
+    원천(고객/거래/액션/점수)이 바뀌면 version이 올라가고, built_version과 다르면 다음 조회 때 다시 만듭니다.
+    """
+    __tablename__ = "customer_360"
+    
+    customer_id = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # 원천 변경 시 +1
+    built_version = Column(Integer)  # 문서를 만든 시점의 version (NULL: 아직 없음)
+    document = Column(LargeBinary)  # zlib 압축 JSON
+    top_factors = Column(JSON)  # 점수 계산 시 SHAP 상위 요인 [{feature, shap_value, feature_value}]
+    
+    built_at = Column(DateTime)
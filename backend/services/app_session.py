@@ -0,0 +1,16 @@
+"""
+IBK 카드 고객 이탈 예측 - 애플리케이션 ORM 세션
+읽기 모델(세그먼트 큐브, 고객 상세 문서, 카운트 캐시)의 flush/commit 리스너는 이 세션 클래스에만 등록
+
+- API/서비스: SessionLocal / AsyncSessionLocal이 이 클래스로 세션 생성 → 고객 변경이 같은 트랜잭션에서 읽기 모델에 반영
+- 벌크 로더/증분 적재/요약 갱신: 일반 Session 또는 Core 연결 사용 → flush마다 리스너를 실행하지 않음
+  (대량 변경은 호출부에서 재계산/무효화)
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+from sqlalchemy.orm import Session
+
+
+class AppSession(Session):
+    """읽기 모델 리스너가 등록되는 애플리케이션 세션"""
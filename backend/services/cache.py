@@ -2,54 +2,435 @@
 IBK 카드 고객 이탈 예측 - Redis 캐싱
 예측 결과 캐싱 및 성능 최적화
 
+- 비동기 클라이언트 (redis.asyncio) + 워커 프로세스당 연결 풀 1개 (이벤트 루프를 막지 않음)
+- 상태 확인: 호출마다 PING 하지 않고 백그라운드 프로브 + 서킷 브레이커로 추적
+- Redis 장애 시 회로가 열려 있는 동안 캐시를 건너뛰고 즉시 원본 조회 (소켓 타임아웃 대기 없음)
+- 2계층: 프로세스 로컬 LRU+TTL → Redis 순으로 조회 (핫 키는 네트워크 왕복 없음)
+  저장/무효화는 Redis pub/sub으로 모든 워커에 알려 로컬 계층에서 함께 삭제
+  메시지를 놓칠 수 있는 구간(구독 재연결)에는 로컬 계층을 비우고, 로컬 TTL이 최대 지연을 제한
+- 무효화: 네임스페이스 버전(cache:ns:*)을 키에 포함 → INCR 1회로 네임스페이스 전체 무효화 (KEYS 없음)
+  예측 키는 서빙 모델 버전을 포함하므로 모델 교체 후 이전 모델 점수를 반환하지 않음
+  패턴 무효화가 꼭 필요하면 SCAN으로 나누어 삭제
+
 Copyright (c) 2024 (주)범온누리 이노베이션
 """
 
-import redis
+import asyncio
+import fnmatch
 import json
 import logging
 import os
-from typing import Optional, Any
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
 from functools import wraps
 import hashlib
 
+import redis
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
 logger = logging.getLogger(__name__)
 
 # Redis 연결 설정
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
-REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD") or None
+
+# 연결 풀 (워커 프로세스당), 타임아웃은 캐시 조회가 원본 조회보다 느려지지 않도록 짧게
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "1.0"))  # 풀 고갈 시 대기 + 새 연결 생성까지 포함한 초
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))
+
+# 상태 프로브 / 서킷 브레이커
+REDIS_PROBE_INTERVAL_SECONDS = float(os.getenv("REDIS_PROBE_INTERVAL_SECONDS", "5"))
+REDIS_FAILURE_THRESHOLD = int(os.getenv("REDIS_FAILURE_THRESHOLD", "3"))  # 연속 실패 시 회로 열림
+REDIS_OPEN_SECONDS = float(os.getenv("REDIS_OPEN_SECONDS", "10"))  # 열린 뒤 시험 요청까지 대기
+
+# 로컬 계층 (워커 프로세스당) - TTL은 다른 워커 변경이 늦게 반영될 수 있는 최대 시간
+LOCAL_CACHE_ENABLED = os.getenv("LOCAL_CACHE_ENABLED", "true").lower() == "true"
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "10000"))
+LOCAL_CACHE_TTL_SECONDS = float(os.getenv("LOCAL_CACHE_TTL_SECONDS", "10"))
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache:invalidate")
+
+# 네임스페이스 버전 키 접두사 / 패턴 무효화 SCAN 1회당 검사 키 수
+NAMESPACE_KEY_PREFIX = "cache:ns:"
+# 로컬 계층의 네임스페이스 버전 보관 시간 - 무효화 메시지를 놓쳐도 이전 버전을 읽는 최대 시간
+CACHE_NAMESPACE_VERSION_TTL_SECONDS = float(os.getenv("CACHE_NAMESPACE_VERSION_TTL_SECONDS", "1"))
+
+# API 캐시 TTL (초) - 예측 점수 / 고객 상세 문서
+PREDICTION_CACHE_TTL_SECONDS = int(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "3600"))
+CUSTOMER_DETAIL_CACHE_TTL_SECONDS = int(os.getenv("CUSTOMER_DETAIL_CACHE_TTL_SECONDS", "60"))
+CUSTOMER_DETAIL_NAMESPACE = "customer_detail"
+CACHE_SCAN_COUNT = int(os.getenv("CACHE_SCAN_COUNT", "1000"))
+
+# 캐시 호출 실패로 처리할 예외 (연결 거부/타임아웃 포함)
+REDIS_ERRORS = (RedisError, OSError, asyncio.TimeoutError)
+
+
+class CircuitBreaker:
+    """
+    Redis 서킷 브레이커
+    
+    - closed: 정상, 연속 실패가 failure_threshold에 이르면 open
+    - open: 모든 캐시 호출을 건너뜀, open_seconds 후 half_open
+    - half_open: 시험 요청 1건만 허용, 성공하면 closed / 실패하면 다시 open
+    백그라운드 프로브가 성공하면 대기 시간과 관계없이 바로 closed
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = REDIS_FAILURE_THRESHOLD, open_seconds: float = REDIS_OPEN_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.reset()
+    
+    def reset(self):
+        self._state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+    
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self.clock() - self.opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+    
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+    
+    def record_success(self):
+        if self._state != self.CLOSED:
+            logger.info("✅ Redis recovered, cache re-enabled")
+        self._state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+    
+    def record_failure(self):
+        self.failures += 1
+        if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip()
+    
+    def trip(self):
+        if self._state != self.OPEN:
+            logger.warning(f"⚠️ Redis circuit opened, skipping cache for {self.open_seconds:.0f}s")
+        self._state = self.OPEN
+        self.opened_at = self.clock()
+        self._trial_in_flight = False
 
-# Redis 클라이언트
-try:
-    redis_client = redis.Redis(
+
+class LocalCache:
+    """
+    프로세스 로컬 LRU + TTL 캐시
+    
+    값은 JSON 문자열로 보관해 호출자가 반환 객체를 수정해도 캐시가 바뀌지 않습니다.
+    동기 함수 캐싱(스레드풀)과 이벤트 루프가 함께 사용하므로 잠금으로 보호합니다.
+    """
+    
+    def __init__(self, max_entries: int = LOCAL_CACHE_MAX_ENTRIES, ttl_seconds: float = LOCAL_CACHE_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()  # 키 → (만료 시각, JSON)
+        self._lock = threading.Lock()
+        self.reset_stats()
+    
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= self.clock():
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key: str, payload: str, ttl: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl is None else min(ttl, self.ttl_seconds)
+        with self._lock:
+            self.entries[key] = (self.clock() + ttl, payload)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                if self.entries.pop(key, None) is not None:
+                    self.invalidations += 1
+    
+    def delete_pattern(self, pattern: str):
+        """Redis glob 패턴과 같은 규칙으로 삭제"""
+        with self._lock:
+            keys = [key for key in self.entries if fnmatch.fnmatchcase(key, pattern)]
+        self.delete(keys)
+    
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+breaker = CircuitBreaker()
+local_cache = LocalCache()
+
+# Redis 계층 호출 결과 카운터 (get_cache_stats)
+counters = {"hits": 0, "misses": 0, "errors": 0, "skipped": 0}
+
+# 무효화 메시지 발신자 (자기 메시지는 이미 로컬에 반영했으므로 무시)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# 캐시를 조회하지 못한 경우 (회로 열림/호출 실패) - 미스와 구분
+UNAVAILABLE = object()
+
+_client: Optional[aioredis.Redis] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_client: Optional[redis.Redis] = None
+_probe_task: Optional[asyncio.Task] = None
+_invalidation_task: Optional[asyncio.Task] = None
+_last_probe = {"at": None, "ok": None, "error": None}
+
+
+def _pool_options() -> Dict:
+    return dict(
         host=REDIS_HOST,
         port=REDIS_PORT,
         db=REDIS_DB,
         password=REDIS_PASSWORD,
         decode_responses=True,
-        socket_connect_timeout=5,
-        socket_timeout=5
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
     )
-    # 연결 테스트
-    redis_client.ping()
-    logger.info(f"✅ Redis connected: {REDIS_HOST}:{REDIS_PORT}")
-except Exception as e:
-    logger.warning(f"⚠️ Redis connection failed: {e}. Caching disabled.")
-    redis_client = None
 
 
-def is_redis_available() -> bool:
-    """Redis 사용 가능 여부 확인"""
-    if redis_client is None:
-        return False
+def get_redis() -> aioredis.Redis:
+    """
+    공유 비동기 클라이언트 (첫 호출 시 연결 풀 생성, 실제 연결은 명령 실행 시)
+    
+    연결 풀은 만든 이벤트 루프에 묶이므로, 다른 루프(스크립트의 asyncio.run 반복 등)에서는 새로 만듭니다.
+    """
+    global _client, _client_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _client is None or _client_loop is not loop:
+        _client = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(**_pool_options()))
+        _client_loop = loop
+    return _client
+
+
+def get_sync_redis() -> redis.Redis:
+    """동기 함수 캐싱용 클라이언트 (스레드풀/스크립트에서 호출, 첫 사용 시 생성)"""
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis(connection_pool=redis.BlockingConnectionPool(**_pool_options()))
+    return _sync_client
+
+
+async def close_redis():
+    """프로브/무효화 구독 중지 + 연결 풀 종료 (앱 종료 시)"""
+    global _client, _probe_task, _invalidation_task
+    for task in (_probe_task, _invalidation_task):
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    _probe_task = _invalidation_task = None
+    if _client is not None:
+        await _client.aclose(close_connection_pool=True)
+        _client = None
+    close_sync_redis()
+
+
+def close_sync_redis():
+    global _sync_client
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client.connection_pool.disconnect()
+        _sync_client = None
+
+
+async def redis_call(command: Callable[[aioredis.Redis], Awaitable], default: Any = None) -> Any:
+    """
+    Redis 명령 실행 (회로가 열려 있으면 네트워크 호출 없이 default)
+    
+    실패는 브레이커에 기록하고 default를 반환합니다 (캐시 장애가 API 오류가 되지 않도록).
+    """
+    if not breaker.allow_request():
+        counters["skipped"] += 1
+        return default
+    
+    try:
+        result = await command(get_redis())
+    except REDIS_ERRORS as e:
+        counters["errors"] += 1
+        breaker.record_failure()
+        logger.warning(f"Redis call failed: {e}")
+        return default
+    
+    breaker.record_success()
+    return result
+
+
+def redis_call_sync(command: Callable[[redis.Redis], Any], default: Any = None) -> Any:
+    """redis_call의 동기 버전 (같은 서킷 브레이커/카운터 사용)"""
+    if not breaker.allow_request():
+        counters["skipped"] += 1
+        return default
+    
     try:
-        redis_client.ping()
-        return True
-    except:
+        result = command(get_sync_redis())
+    except REDIS_ERRORS as e:
+        counters["errors"] += 1
+        breaker.record_failure()
+        logger.warning(f"Redis call failed: {e}")
+        return default
+    
+    breaker.record_success()
+    return result
+
+
+# ========================================
+# 상태 프로브
+# ========================================
+
+async def probe_redis() -> bool:
+    """PING 1회로 상태 갱신 (성공: 회로 닫힘, 실패: 즉시 열림)"""
+    _last_probe["at"] = time.time()
+    try:
+        await get_redis().ping()
+    except REDIS_ERRORS as e:
+        _last_probe.update(ok=False, error=str(e))
+        breaker.trip()
         return False
+    
+    _last_probe.update(ok=True, error=None)
+    breaker.record_success()
+    return True
+
+
+async def _probe_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        await probe_redis()
+
+
+async def start_redis_health_probe(interval: float = REDIS_PROBE_INTERVAL_SECONDS) -> bool:
+    """첫 상태 확인 후 백그라운드 프로브 시작 (앱 시작 시, 여러 번 호출해도 태스크 1개)"""
+    global _probe_task
+    available = await probe_redis()
+    if _probe_task is None or _probe_task.done():
+        _probe_task = asyncio.create_task(_probe_loop(interval))
+    return available
+
+
+# ========================================
+# 워커 간 무효화 (pub/sub)
+# ========================================
+
+def invalidation_message(keys: Iterable[str] = (), pattern: Optional[str] = None) -> str:
+    return json.dumps({"origin": WORKER_ID, "keys": list(keys), "pattern": pattern})
+
 
+def handle_invalidation_message(data: str):
+    """다른 워커의 저장/무효화 메시지 → 로컬 계층에서 해당 키 삭제"""
+    try:
+        message = json.loads(data)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed cache invalidation message: {data!r}")
+        return
+    if message.get("origin") == WORKER_ID:
+        return
+    local_cache.delete(message.get("keys") or ())
+    if message.get("pattern"):
+        local_cache.delete_pattern(message["pattern"])
+
+
+async def _invalidation_loop(interval: float):
+    while True:
+        if breaker.state != CircuitBreaker.CLOSED:
+            await asyncio.sleep(interval)
+            continue
+        
+        pubsub = get_redis().pubsub()
+        try:
+            await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            # 구독 전/끊긴 동안의 메시지는 받을 수 없으므로 로컬 계층을 비우고 시작
+            local_cache.clear()
+            while breaker.state == CircuitBreaker.CLOSED:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    handle_invalidation_message(message["data"])
+            local_cache.clear()
+        except REDIS_ERRORS as e:
+            logger.warning(f"Cache invalidation subscription lost: {e}")
+            local_cache.clear()
+            await asyncio.sleep(interval)
+        finally:
+            await pubsub.aclose()
+
+
+async def start_cache_invalidation_listener(interval: float = REDIS_PROBE_INTERVAL_SECONDS):
+    """무효화 채널 구독 태스크 시작 (앱 시작 시, Redis 장애 중에는 interval마다 재시도)"""
+    global _invalidation_task
+    if LOCAL_CACHE_ENABLED and (_invalidation_task is None or _invalidation_task.done()):
+        _invalidation_task = asyncio.create_task(_invalidation_loop(interval))
+
+
+def is_redis_available() -> bool:
+    """Redis 사용 가능 여부 (네트워크 호출 없음 - 프로브/최근 호출 결과 기준)"""
+    return breaker.state == CircuitBreaker.CLOSED
+
+
+# ========================================
+# 캐시 API
+# ========================================
 
 def cache_key(*args, **kwargs) -> str:
     """캐시 키 생성 (함수 인자 기반)"""
@@ -57,134 +438,375 @@ def cache_key(*args, **kwargs) -> str:
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
-def cache_prediction(customer_id: str, prediction: dict, ttl: int = 3600):
+async def cache_get_json(key: str) -> Optional[Any]:
+    """JSON 값 조회: 로컬 → Redis (Redis 적중 시 로컬에 채움, 없거나 사용 불가면 None)"""
+    if LOCAL_CACHE_ENABLED:
+        payload = local_cache.get(key)
+        if payload is not None:
+            return json.loads(payload)
+    
+    cached = await redis_call(lambda client: client.get(key), default=UNAVAILABLE)
+    if cached is UNAVAILABLE:
+        return None
+    if cached is None:
+        counters["misses"] += 1
+        return None
+    counters["hits"] += 1
+    if LOCAL_CACHE_ENABLED:
+        local_cache.set(key, cached)
+    return json.loads(cached)
+
+
+def _set_and_publish_pipeline(client, key: str, payload: str, ttl: int):
+    # 저장 + 다른 워커 로컬 계층 무효화를 한 번의 왕복으로
+    pipe = client.pipeline(transaction=False)
+    pipe.setex(key, ttl, payload)
+    pipe.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(keys=[key]))
+    return pipe
+
+
+async def _set_and_publish(client: aioredis.Redis, key: str, payload: str, ttl: int):
+    return await _set_and_publish_pipeline(client, key, payload, ttl).execute()
+
+
+async def _delete_and_publish(client: aioredis.Redis, keys: List[str]):
+    pipe = client.pipeline(transaction=False)
+    pipe.delete(*keys)
+    pipe.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(keys=keys))
+    return await pipe.execute()
+
+
+async def cache_delete(keys: Iterable[str]):
+    """키 삭제 (로컬 + Redis, 다른 워커 로컬 계층도 삭제)"""
+    keys = list(keys)
+    if not keys:
+        return
+    local_cache.delete(keys)
+    await redis_call(lambda client: _delete_and_publish(client, keys))
+
+
+async def cache_set_json(key: str, value: Any, ttl: int):
+    payload = json.dumps(value)
+    if LOCAL_CACHE_ENABLED:
+        local_cache.set(key, payload, ttl)
+        await redis_call(lambda client: _set_and_publish(client, key, payload, ttl))
+    else:
+        await redis_call(lambda client: client.setex(key, ttl, payload))
+
+
+def cache_get_json_sync(key: str) -> Optional[Any]:
+    """cache_get_json의 동기 버전 (동기 함수 캐싱)"""
+    if LOCAL_CACHE_ENABLED:
+        payload = local_cache.get(key)
+        if payload is not None:
+            return json.loads(payload)
+    
+    cached = redis_call_sync(lambda client: client.get(key), default=UNAVAILABLE)
+    if cached is UNAVAILABLE:
+        return None
+    if cached is None:
+        counters["misses"] += 1
+        return None
+    counters["hits"] += 1
+    if LOCAL_CACHE_ENABLED:
+        local_cache.set(key, cached)
+    return json.loads(cached)
+
+
+def cache_set_json_sync(key: str, value: Any, ttl: int):
+    """cache_set_json의 동기 버전 (동기 함수 캐싱)"""
+    payload = json.dumps(value)
+    if LOCAL_CACHE_ENABLED:
+        local_cache.set(key, payload, ttl)
+        redis_call_sync(lambda client: _set_and_publish_pipeline(client, key, payload, ttl).execute())
+    else:
+        redis_call_sync(lambda client: client.setex(key, ttl, payload))
+
+
+# ========================================
+# 네임스페이스 버전 (태그 무효화)
+# ========================================
+
+def namespace_key(namespace: str) -> str:
+    return f"{NAMESPACE_KEY_PREFIX}{namespace}"
+
+
+async def namespace_versions(namespaces: List[str]) -> Optional[List[int]]:
+    """
+    네임스페이스 현재 버전 (로컬 → 나머지는 Redis MGET 1회, 한 번도 무효화되지 않았으면 0)
+    
+    로컬에는 CACHE_NAMESPACE_VERSION_TTL_SECONDS(기본 1초)만 보관합니다. 무효화 메시지는 즉시 반영되고,
+    메시지를 놓친 경우(구독 재연결, 회로 열림)에도 이 시간 뒤에는 Redis에서 다시 읽습니다
+    (구독을 다시 시작하거나 잃으면 로컬 계층 전체를 비우므로 버전도 함께 다시 읽음).
+    Redis에서 버전을 읽지 못하면 None (버전을 모르는 채로 캐시를 쓰지 않음)
+    """
+    keys = [namespace_key(namespace) for namespace in namespaces]
+    versions = [local_cache.get(key) if LOCAL_CACHE_ENABLED else None for key in keys]
+    missing = [i for i, version in enumerate(versions) if version is None]
+    if missing:
+        fetched = await redis_call(lambda client: client.mget([keys[i] for i in missing]), default=UNAVAILABLE)
+        if fetched is UNAVAILABLE:
+            return None
+        for i, version in zip(missing, fetched):
+            versions[i] = version or "0"
+            if LOCAL_CACHE_ENABLED:
+                local_cache.set(keys[i], versions[i], CACHE_NAMESPACE_VERSION_TTL_SECONDS)
+    return [int(version) for version in versions]
+
+
+async def versioned_key(key: str, namespaces: List[str]) -> Optional[str]:
+    """네임스페이스 버전을 붙인 실제 캐시 키 (예: prediction:v3:C1@2.0.5, 버전을 모르면 None)"""
+    versions = await namespace_versions(namespaces)
+    if versions is None:
+        return None
+    return f"{key}@{'.'.join(map(str, versions))}"
+
+
+async def _bump_namespace(client: aioredis.Redis, key: str):
+    # 버전 증가 + 다른 워커 로컬 계층의 버전 삭제를 한 번의 왕복으로
+    pipe = client.pipeline(transaction=False)
+    pipe.incr(key)
+    pipe.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(keys=[key]))
+    return await pipe.execute()
+
+
+async def invalidate_namespace(namespace: str) -> Optional[int]:
+    """
+    네임스페이스 무효화 - 버전 INCR 1회 (키 개수와 무관하게 O(1))
+    
+    이전 버전 키는 더 이상 조회되지 않고 각자의 TTL로 만료됩니다.
+    
+    Returns:
+        새 버전 (Redis 사용 불가면 None)
+    """
+    key = namespace_key(namespace)
+    local_cache.delete([key])
+    result = await redis_call(lambda client: _bump_namespace(client, key))
+    if result is None:
+        logger.warning(f"Cache namespace {namespace} was not invalidated (Redis unavailable)")
+        return None
+    logger.info(f"Invalidated cache namespace {namespace} (version {result[0]})")
+    return result[0]
+
+
+# ========================================
+# 예측 캐시
+# ========================================
+
+def prediction_namespaces(model_version: str, segment: Optional[str] = None) -> List[str]:
+    """예측 키가 속한 네임스페이스: 전체 / 모델 버전 / 세그먼트(선택)"""
+    namespaces = ["prediction", f"prediction:model:{model_version}"]
+    if segment is not None:
+        namespaces.append(f"prediction:segment:{segment}")
+    return namespaces
+
+
+async def cache_prediction(customer_id: str, prediction: dict, model_version: str,
+                           segment: Optional[str] = None, ttl: int = PREDICTION_CACHE_TTL_SECONDS):
     """
     예측 결과 캐싱
     
     Args:
         customer_id: 고객 ID
         prediction: 예측 결과 딕셔너리
+        model_version: 예측한 모델 버전 (ChurnPredictor.model_version)
+        segment: 세그먼트 (예: 생애주기 단계) - 조회 시에도 같은 값을 전달해야 함
         ttl: Time To Live (초, 기본 1시간)
     """
-    if not is_redis_available():
+    key = await versioned_key(f"prediction:{model_version}:{customer_id}",
+                              prediction_namespaces(model_version, segment))
+    if key is None:
         return
-    
-    try:
-        key = f"prediction:{customer_id}"
-        redis_client.setex(
-            key,
-            ttl,
-            json.dumps(prediction)
-        )
-        logger.debug(f"Cached prediction for {customer_id}")
-    except Exception as e:
-        logger.warning(f"Cache write failed: {e}")
+    await cache_set_json(key, prediction, ttl)
+    logger.debug(f"Cached prediction for {customer_id}")
 
 
-def get_cached_prediction(customer_id: str) -> Optional[dict]:
+async def get_cached_prediction(customer_id: str, model_version: str,
+                                segment: Optional[str] = None) -> Optional[dict]:
     """
-    캐시된 예측 결과 가져오기
+    캐시된 예측 결과 가져오기 (현재 서빙 모델 버전의 결과만)
     
     Args:
         customer_id: 고객 ID
+        model_version: 현재 서빙 모델 버전
+        segment: 저장 시 전달한 세그먼트
     
     Returns:
         예측 결과 딕셔너리 또는 None
     """
-    if not is_redis_available():
+    key = await versioned_key(f"prediction:{model_version}:{customer_id}",
+                              prediction_namespaces(model_version, segment))
+    if key is None:
         return None
+    return await cache_get_json(key)
+
+
+async def invalidate_predictions(model_version: Optional[str] = None, segment: Optional[str] = None) -> Optional[int]:
+    """예측 캐시 무효화 (O(1)): 모델 버전 지정 시 해당 버전만, 세그먼트 지정 시 해당 세그먼트만, 없으면 전체"""
+    if model_version is not None:
+        return await invalidate_namespace(f"prediction:model:{model_version}")
+    if segment is not None:
+        return await invalidate_namespace(f"prediction:segment:{segment}")
+    return await invalidate_namespace("prediction")
+
+
+# ========================================
+# 고객 상세 문서 캐시
+# ========================================
+
+async def _customer_detail_key(customer_id: str) -> Optional[str]:
+    return await versioned_key(f"customer_detail:{customer_id}", [CUSTOMER_DETAIL_NAMESPACE])
+
+
+async def get_cached_customer_detail(customer_id: str) -> Optional[dict]:
+    """
+    캐시된 고객 상세 문서 (Customer-360, 요청마다 붙이는 예시 필드 제외)
     
-    try:
-        key = f"prediction:{customer_id}"
-        cached = redis_client.get(key)
-        
-        if cached:
-            logger.debug(f"Cache hit for {customer_id}")
-            return json.loads(cached)
-        
-        logger.debug(f"Cache miss for {customer_id}")
-        return None
-    except Exception as e:
-        logger.warning(f"Cache read failed: {e}")
+    DB 문서 무효화(거래 적재/점수 갱신 등)는 이 캐시에 바로 전달되지 않으므로 TTL을 짧게 두고,
+    같은 프로세스의 갱신 API와 배치 작업은 invalidate_customer_details()로 함께 삭제합니다.
+    """
+    key = await _customer_detail_key(customer_id)
+    if key is None:
         return None
+    return await cache_get_json(key)
+
+
+async def cache_customer_detail(customer_id: str, document: dict, ttl: int = CUSTOMER_DETAIL_CACHE_TTL_SECONDS):
+    key = await _customer_detail_key(customer_id)
+    if key is not None:
+        await cache_set_json(key, document, ttl)
+
+
+async def invalidate_customer_details(customer_id: Optional[str] = None):
+    """고객 상세 캐시 무효화 (고객 지정 시 해당 키 삭제, 없으면 네임스페이스 전체 O(1))"""
+    if customer_id is None:
+        await invalidate_namespace(CUSTOMER_DETAIL_NAMESPACE)
+        return
+    key = await _customer_detail_key(customer_id)
+    if key is not None:
+        await cache_delete([key])
 
 
-def cache_decorator(prefix: str = "cache", ttl: int = 3600):
+async def invalidate_customer_caches():
+    """고객 데이터 일괄 변경 후 (거래 적재, 요약/집계 재계산) 예측 + 고객 상세 캐시 전체 무효화"""
+    await invalidate_predictions()
+    await invalidate_customer_details()
+
+
+def cache_decorator(prefix: str = "cache", ttl: int = 3600, namespaces: Iterable[str] = ()):
     """
-    함수 결과 캐싱 데코레이터
+    함수 결과 캐싱 데코레이터 (비동기/동기 함수)
+    
+    - 비동기 함수: 비동기 클라이언트 사용
+    - 동기 함수: 동기 클라이언트 사용 (스레드풀/스크립트에서 호출되는 함수, 이벤트 루프에서 직접 호출 금지)
+    namespaces를 지정하면 invalidate_namespace()로 결과를 한 번에 무효화할 수 있습니다 (비동기 함수만).
     
     Usage:
-        @cache_decorator(prefix="customer", ttl=1800)
-        def get_customer_data(customer_id: str):
-            return expensive_operation(customer_id)
+        @cache_decorator(prefix="customer", ttl=1800, namespaces=["customer"])
+        async def get_customer_data(customer_id: str):
+            return await expensive_operation(customer_id)
     """
+    namespaces = list(namespaces)
+    
     def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            if not is_redis_available():
-                return func(*args, **kwargs)
-            
-            # 캐시 키 생성
-            key = f"{prefix}:{cache_key(*args, **kwargs)}"
+        if not asyncio.iscoroutinefunction(func):
+            if namespaces:
+                raise TypeError(f"cache_decorator namespaces require an async function: {func.__name__}")
             
-            # 캐시 확인
-            try:
-                cached = redis_client.get(key)
-                if cached:
+            @wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                key = f"{prefix}:{cache_key(*args, **kwargs)}"
+                cached = cache_get_json_sync(key)
+                if cached is not None:
                     logger.debug(f"Cache hit: {func.__name__}")
-                    return json.loads(cached)
-            except Exception as e:
-                logger.warning(f"Cache read error: {e}")
+                    return cached
+                
+                result = func(*args, **kwargs)
+                cache_set_json_sync(key, result, ttl)
+                return result
             
-            # 함수 실행
-            result = func(*args, **kwargs)
+            return sync_wrapper
+        
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = f"{prefix}:{cache_key(*args, **kwargs)}"
+            if namespaces:
+                key = await versioned_key(key, namespaces)
+                if key is None:
+                    return await func(*args, **kwargs)
             
-            # 결과 캐싱
-            try:
-                redis_client.setex(key, ttl, json.dumps(result))
-                logger.debug(f"Cached: {func.__name__}")
-            except Exception as e:
-                logger.warning(f"Cache write error: {e}")
+            cached = await cache_get_json(key)
+            if cached is not None:
+                logger.debug(f"Cache hit: {func.__name__}")
+                return cached
             
+            result = await func(*args, **kwargs)
+            await cache_set_json(key, result, ttl)
             return result
         
         return wrapper
     return decorator
 
 
-def invalidate_cache(pattern: str = "*"):
+async def _unlink_matching(client: aioredis.Redis, pattern: str) -> int:
+    # SCAN으로 나누어 순회하며 CACHE_SCAN_COUNT개씩 UNLINK (네임스페이스 버전 키는 유지 - 버전이 되돌아가지 않도록)
+    deleted = 0
+    batch = []
+    async for key in client.scan_iter(match=pattern, count=CACHE_SCAN_COUNT):
+        if key.startswith(NAMESPACE_KEY_PREFIX):
+            continue
+        batch.append(key)
+        if len(batch) >= CACHE_SCAN_COUNT:
+            deleted += await client.unlink(*batch)
+            batch = []
+    if batch:
+        deleted += await client.unlink(*batch)
+    return deleted
+
+
+async def invalidate_cache(pattern: str = "*"):
     """
-    캐시 무효화
+    패턴 캐시 무효화 (SCAN - 키 수에 비례, Redis를 오래 막지는 않음)
+    
+    네임스페이스 단위로 지울 수 있으면 invalidate_namespace()/invalidate_predictions()가 O(1)입니다.
     
     Args:
-        pattern: 삭제할 키 패턴 (예: "prediction:*", "customer:*")
+        pattern: 삭제할 키 패턴 (예: "dashboard:*", "customer:*")
     """
-    if not is_redis_available():
-        return
-    
-    try:
-        keys = redis_client.keys(pattern)
-        if keys:
-            redis_client.delete(*keys)
-            logger.info(f"Invalidated {len(keys)} cache entries: {pattern}")
-    except Exception as e:
-        logger.warning(f"Cache invalidation failed: {e}")
+    local_cache.delete_pattern(pattern)
+    deleted = await redis_call(lambda client: _unlink_matching(client, pattern))
+    if deleted:
+        logger.info(f"Invalidated {deleted} cache entries: {pattern}")
+    await redis_call(lambda client: client.publish(CACHE_INVALIDATION_CHANNEL, invalidation_message(pattern=pattern)))
 
 
-def get_cache_stats() -> dict:
-    """캐시 통계"""
+async def get_cache_stats() -> dict:
+    """캐시 통계 (계층별 적중률, 회로가 열려 있으면 서버 정보 없이 로컬 상태만)"""
+    redis_lookups = counters["hits"] + counters["misses"]
+    stats = {
+        "status": "connected" if is_redis_available() else "disabled",
+        "circuit": breaker.state,
+        "consecutive_failures": breaker.failures,
+        "last_probe_error": _last_probe["error"],
+        "tiers": {
+            "local": {"enabled": LOCAL_CACHE_ENABLED, **local_cache.stats()},
+            "redis": {**counters, "hit_ratio": round(counters["hits"] / redis_lookups, 4) if redis_lookups else None},
+        },
+        "max_connections": REDIS_MAX_CONNECTIONS,
+    }
     if not is_redis_available():
-        return {"status": "disabled"}
+        return stats
     
-    try:
-        info = redis_client.info()
-        return {
-            "status": "connected",
-            "used_memory": info.get("used_memory_human", "N/A"),
-            "connected_clients": info.get("connected_clients", 0),
-            "total_keys": redis_client.dbsize(),
-            "hit_rate": f"{info.get('keyspace_hits', 0) / max(info.get('keyspace_hits', 0) + info.get('keyspace_misses', 1), 1) * 100:.2f}%"
-        }
-    except Exception as e:
-        logger.error(f"Failed to get cache stats: {e}")
-        return {"status": "error", "message": str(e)}
+    info = await redis_call(lambda client: client.info())
+    total_keys = await redis_call(lambda client: client.dbsize())
+    if info is None:
+        return {**stats, "status": "error"}
+    
+    hits, misses = info.get("keyspace_hits", 0), info.get("keyspace_misses", 0)
+    return {
+        **stats,
+        "used_memory": info.get("used_memory_human", "N/A"),
+        "connected_clients": info.get("connected_clients", 0),
+        "total_keys": total_keys,
+        "hit_rate": f"{hits / max(hits + misses, 1) * 100:.2f}%"
+    }
@@ -0,0 +1,170 @@
+"""
+IBK 카드 고객 이탈 예측 - 고객 목록 필터 카운트 캐시
+같은 필터로 페이지만 넘길 때 매번 COUNT(*)를 다시 실행하지 않도록 필터별 전체 건수를 캐싱
+
+- 키: 정규화한 필터 시그니처 (검색어 대소문자/공백, ID 표기 차이, 빈 필터 무시)
+- 무효화: 앱 세션(AppSession)으로 고객 추가/삭제 또는 카운트에 영향을 주는 속성(점수 반영 등)이 커밋되면 즉시 전체 무효화
+  다른 워커/배치가 바꾼 값은 COUNT_CACHE_TTL_SECONDS 뒤 반영
+- 근사 카운트(선택): 텍스트 검색은 APPROXIMATE_COUNT_LIMIT 건까지만 세고 넘으면 "N건 이상"으로 반환
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import event, func, inspect, literal, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from models.database import Customer
+from services.app_session import AppSession
+from services.customer_search import parse_customer_id, search_terms
+
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "60"))
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "1024"))
+APPROXIMATE_COUNT_LIMIT = int(os.getenv("APPROXIMATE_COUNT_LIMIT", "10000"))
+
+# 고객 목록 필터가 참조하는 속성 (바뀌면 캐시된 카운트가 틀어짐)
+COUNT_ATTRIBUTES = ('churn_probability', 'lifecycle_stage', 'churned', 'region', 'occupation')
+
+
+def filter_signature(search: Optional[str] = None, approximate: bool = False, **filters) -> str:
+    """
+    필터 → 캐시 키
+    
+    같은 결과 집합이면 같은 키가 되도록 검색어를 검색 인덱스와 같은 규칙으로 정규화합니다.
+    """
+    signature = {name: value for name, value in filters.items() if value not in (None, '')}
+    
+    if search and search.strip():
+        customer_id = parse_customer_id(search)
+        signature['search'] = ['id', *customer_id] if customer_id else ['text', *search_terms(search)]
+        if approximate and not customer_id:
+            signature['approximate'] = APPROXIMATE_COUNT_LIMIT
+    
+    return json.dumps(signature, sort_keys=True, ensure_ascii=False)
+
+
+class CountCache:
+    """
+    프로세스 로컬 LRU 카운트 캐시
+    
+    세대 번호로 무효화합니다. 무효화 전에 시작한 COUNT 결과는 저장하지 않습니다.
+    """
+    
+    def __init__(self, max_entries: int = COUNT_CACHE_MAX_ENTRIES, ttl_seconds: float = COUNT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries: "OrderedDict[str, Tuple[int, bool, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, signature: str) -> Optional[Tuple[int, bool]]:
+        """(건수, 근사 여부) 또는 None"""
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is None or time.monotonic() - entry[2] >= self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(signature)
+            self.hits += 1
+            return entry[0], entry[1]
+    
+    def put(self, signature: str, total: int, approximate: bool, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[signature] = (total, approximate, time.monotonic())
+            self._entries.move_to_end(signature)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'generation': self.generation}
+
+
+count_cache = CountCache()
+
+
+def invalidate_counts():
+    """캐시된 필터 카운트 전체 무효화"""
+    count_cache.invalidate()
+
+
+async def cached_count(db, query: Select, signature: str, approximate_limit: Optional[int] = None) -> Tuple[int, bool]:
+    """
+    필터 적용 쿼리의 전체 건수 (캐시 우선)
+    
+    Args:
+        db: AsyncSession
+        query: 필터가 적용된 SELECT (ORDER BY/LIMIT 없음)
+        signature: filter_signature 결과
+        approximate_limit: 지정 시 이 건수까지만 세고, 넘으면 (limit, True) 반환
+    
+    Returns:
+        (건수, 근사 여부)
+    """
+    cached = count_cache.get(signature)
+    if cached is not None:
+        return cached
+    
+    generation = count_cache.generation
+    if approximate_limit:
+        bounded = query.with_only_columns(literal(1)).limit(approximate_limit + 1).subquery()
+        total = await db.scalar(select(func.count()).select_from(bounded))
+        result = (approximate_limit, True) if total > approximate_limit else (total, False)
+    else:
+        result = (await db.scalar(select(func.count()).select_from(query.subquery())), False)
+    
+    count_cache.put(signature, *result, generation)
+    return result
+
+
+# ========================================
+# 무효화 (ORM 세션 이벤트)
+# ========================================
+
+def _customers_changed(session: Session) -> bool:
+    if any(isinstance(obj, Customer) for obj in (*session.new, *session.deleted)):
+        return True
+    for obj in session.dirty:
+        if isinstance(obj, Customer):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in COUNT_ATTRIBUTES):
+                return True
+    return False
+
+
+def _after_flush(session: Session, flush_context):
+    if _customers_changed(session):
+        session.info['customer_counts_changed'] = True
+
+
+def _after_commit(session: Session):
+    if session.info.pop('customer_counts_changed', False):
+        invalidate_counts()
+
+
+def register_count_cache_listeners():
+    """앱 세션(AppSession) 이벤트 등록 (여러 번 호출해도 한 번만 등록)"""
+    if event.contains(AppSession, 'after_flush', _after_flush):
+        return
+    event.listen(AppSession, 'after_flush', _after_flush)
+    event.listen(AppSession, 'after_commit', _after_commit)
+    event.listen(AppSession, 'after_soft_rollback',
+                 lambda session, previous_transaction: session.info.pop('customer_counts_changed', None))
+
+
+register_count_cache_listeners()
@@ -0,0 +1,284 @@
+"""
+IBK 카드 고객 이탈 예측 - 고객 상세 읽기 모델 (Customer-360)
+고객 상세 화면에 필요한 값을 고객당 압축 문서 하나로 미리 만들어 두고, 원천이 바뀐 고객만 다시 생성
+
+- 문서: 프로필/점수, 최근 거래 10건, 최근 액션 5건, 월별 추이, 누적 합계, 예측 이력, SHAP 상위 요인 (zlib 압축 JSON)
+- 무효화: 원천 변경과 같은 트랜잭션에서 version += 1 (앱 세션 ORM 변경은 세션 이벤트, 적재/배치는 호출부)
+- 생성: 조회 시 built_version != version이면 다시 만들고, 생성 중 다시 무효화되었으면 저장하지 않음
+
+문서가 없는 고객은 무효화할 행이 없으므로 UPDATE만 실행합니다 (첫 조회 때 생성).
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from models.database import Customer, Customer360, CustomerAction, RetentionRecord, Transaction
+from services.app_session import AppSession
+from services.transaction_partitions import transaction_source
+from services.transaction_rollup import customer_rollup_query, latest_rollup_month_query, monthly_trend, rollup_totals
+
+logger = logging.getLogger(__name__)
+
+RECENT_TRANSACTIONS = 10
+RECENT_ACTIONS = 5
+# 예측 이력 최대 점 수 (효과 측정 기록의 액션 전/후 점수 + 현재 점수)
+PREDICTION_HISTORY_POINTS = 12
+TOP_FACTORS = 5
+
+# 고객 ID IN 목록 크기 (SQLite 바인드 변수 제한 이하)
+INVALIDATE_CHUNK_SIZE = 500
+
+
+def encode_document(document: Dict) -> bytes:
+    """문서 → 공백 없는 JSON + zlib 압축"""
+    payload = json.dumps(document, ensure_ascii=False, separators=(',', ':'), default=str)
+    return zlib.compress(payload.encode('utf-8'))
+
+
+def decode_document(data: bytes) -> Dict:
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+# ========================================
+# 무효화
+# ========================================
+
+def invalidate_customer_360(conn, customer_ids: Iterable[str]) -> int:
+    """
+    지정 고객 문서 무효화 (version += 1)
+    
+    Args:
+        conn: Connection 또는 Session (원천 변경과 같은 트랜잭션, 커밋은 호출자 책임)
+    
+    Returns:
+        무효화된 문서 수
+    """
+    table = Customer360.__table__
+    customer_ids = sorted(set(customer_ids))
+    invalidated = 0
+    for start in range(0, len(customer_ids), INVALIDATE_CHUNK_SIZE):
+        chunk = customer_ids[start:start + INVALIDATE_CHUNK_SIZE]
+        invalidated += conn.execute(
+            update(table).where(table.c.customer_id.in_(chunk)).values(version=table.c.version + 1)
+        ).rowcount
+    return invalidated
+
+
+def invalidate_customer_360_range(conn, lower: Optional[str] = None, upper: Optional[str] = None) -> int:
+    """고객 ID 범위 (lower, upper] 문서 무효화 (둘 다 None이면 전체 - 월별 추이 기준월 이동, 집계 재계산)"""
+    table = Customer360.__table__
+    stmt = update(table).values(version=table.c.version + 1)
+    if lower is not None:
+        stmt = stmt.where(table.c.customer_id > lower)
+    if upper is not None:
+        stmt = stmt.where(table.c.customer_id <= upper)
+    return conn.execute(stmt).rowcount
+
+
+def _insert(conn):
+    dialect = conn.get_bind().dialect.name if isinstance(conn, Session) else conn.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(Customer360.__table__)
+
+
+def store_top_factors(conn, customer_id: str, factors: List[Dict]):
+    """점수 계산 시 SHAP 상위 요인 저장 + 문서 무효화"""
+    table = Customer360.__table__
+    stmt = _insert(conn)
+    conn.execute(
+        stmt.values(customer_id=customer_id, version=1, top_factors=factors).on_conflict_do_update(
+            index_elements=[table.c.customer_id],
+            set_={'top_factors': stmt.excluded.top_factors, 'version': table.c.version + 1}
+        )
+    )
+
+
+def top_factors_from_explanation(explanation: Dict, limit: int = TOP_FACTORS) -> List[Dict]:
+    """ChurnPredictor.explain 결과 → 저장용 상위 요인 (numpy 값은 float로)"""
+    return [
+        {
+            'feature': str(factor['feature']),
+            'shap_value': round(float(factor['shap_value']), 4),
+            'feature_value': float(factor['feature_value']),
+        }
+        for factor in explanation['top_factors'][:limit]
+    ]
+
+
+# ORM 변경 시 문서에 영향을 주는 모델
+SOURCE_MODELS = (Customer, Transaction, CustomerAction, RetentionRecord)
+
+
+def changed_customer_ids(session: Session) -> set:
+    """flush 대상 중 문서 원천이 바뀐 고객 ID"""
+    customer_ids = set()
+    for objects, check_modified in ((session.new, False), (session.dirty, True), (session.deleted, False)):
+        for obj in objects:
+            if isinstance(obj, SOURCE_MODELS) and obj.customer_id and (not check_modified or session.is_modified(obj)):
+                customer_ids.add(obj.customer_id)
+    return customer_ids
+
+
+def _after_flush(session: Session, flush_context):
+    customer_ids = changed_customer_ids(session)
+    if customer_ids:
+        invalidate_customer_360(session.connection(), customer_ids)
+
+
+def register_customer_360_listeners():
+    """앱 세션(AppSession) 이벤트 등록 (여러 번 호출해도 한 번만 등록)"""
+    if not event.contains(AppSession, 'after_flush', _after_flush):
+        event.listen(AppSession, 'after_flush', _after_flush)
+
+
+register_customer_360_listeners()
+
+
+# ========================================
+# 생성/조회
+# ========================================
+
+def prediction_history(db: Session, customer: Customer) -> List[Dict]:
+    """
+    저장된 점수로 만든 예측 이력 (오래된 순)
+    
+    효과 측정 기록(retention_records)의 액션 시점/측정 종료 시점 점수와 고객의 현재 점수를 사용하며,
+    저장된 점수가 없으면 빈 목록입니다.
+    """
+    records = db.execute(
+        select(RetentionRecord.action_date, RetentionRecord.before_risk_score, RetentionRecord.before_churn_prob,
+               RetentionRecord.measurement_end_date, RetentionRecord.after_risk_score,
+               RetentionRecord.after_churn_prob)
+        .where(RetentionRecord.customer_id == customer.customer_id)
+        .order_by(RetentionRecord.action_date.desc())
+        .limit(PREDICTION_HISTORY_POINTS)
+    ).all()
+    
+    points = [(customer.last_prediction_date, customer.risk_score, customer.churn_probability)]
+    for r in records:
+        points.append((r.action_date, r.before_risk_score, r.before_churn_prob))
+        points.append((r.measurement_end_date, r.after_risk_score, r.after_churn_prob))
+    
+    history = [
+        {
+            'date': date.strftime('%Y-%m-%d'),
+            'risk_score': score if score is not None else int(probability * 100),
+            'churn_probability': round(probability, 3)
+        }
+        for date, score, probability in sorted(
+            (point for point in points if point[0] is not None and point[2] is not None), key=lambda p: p[0]
+        )
+    ]
+    return history[-PREDICTION_HISTORY_POINTS:]
+
+
+def build_customer_360(db: Session, customer_id: str, format_profile: Callable,
+                       top_factors: Optional[List[Dict]] = None) -> Optional[Dict]:
+    """
+    원천 테이블에서 고객 문서 생성 (고객이 없으면 None)
+    
+    Args:
+        format_profile: Customer → 프로필/점수 Dict (목록 API와 같은 형식)
+        top_factors: 저장된 SHAP 상위 요인
+    """
+    customer = db.get(Customer, customer_id)
+    if customer is None:
+        return None
+    
+    document = format_profile(customer)
+    
+    # 휴면 고객도 마지막 거래가 보이도록 월 테이블까지 조회
+    source = transaction_source(db)
+    transactions = db.execute(
+        select(source.c.transaction_date, source.c.category, source.c.merchant_type, source.c.amount)
+        .where(source.c.customer_id == customer_id)
+        .order_by(source.c.transaction_date.desc())
+        .limit(RECENT_TRANSACTIONS)
+    ).all()
+    document['recent_transactions'] = [
+        {
+            'date': t.transaction_date.strftime('%Y-%m-%d') if t.transaction_date else None,
+            'category': t.category or '기타',
+            'merchant': t.merchant_type or 'Unknown',
+            'amount': t.amount or 0
+        }
+        for t in transactions
+    ]
+    
+    actions = db.execute(
+        select(CustomerAction.action_date, CustomerAction.action_type, CustomerAction.action_title,
+               CustomerAction.status, CustomerAction.result)
+        .where(CustomerAction.customer_id == customer_id)
+        .order_by(CustomerAction.action_date.desc())
+        .limit(RECENT_ACTIONS)
+    ).all()
+    document['action_history'] = [
+        {
+            'date': a.action_date.strftime('%Y-%m-%d') if a.action_date else None,
+            'type': a.action_type,
+            'title': a.action_title,
+            'status': a.status,
+            'result': a.result
+        }
+        for a in actions
+    ]
+    
+    rollup_rows = db.execute(customer_rollup_query(customer_id)).all()
+    document['monthly_trend'] = monthly_trend(rollup_rows, db.scalar(latest_rollup_month_query()))
+    # 집계 행이 없으면 None (화면 기본값은 라우트에서 채움)
+    document['lifetime'] = rollup_totals(rollup_rows) if rollup_rows else None
+    document['prediction_history'] = prediction_history(db, customer)
+    document['top_factors'] = top_factors or []
+    return document
+
+
+def load_customer_360(db: Session, customer_id: str, format_profile: Callable) -> Optional[Dict]:
+    """
+    고객 문서 조회 (최신이면 기본 키 한 번 읽기, 아니면 생성 후 저장)
+    
+    처음 만드는 고객은 빈 행을 먼저 커밋해 두어, 생성 중 원천이 바뀌면 무효화가 이 행의 version을 올리게 합니다.
+    문서 저장은 호출자가 커밋합니다.
+    
+    Returns:
+        문서 Dict (고객이 없으면 None)
+    """
+    table = Customer360.__table__
+    lookup = select(table.c.version, table.c.built_version, table.c.document, table.c.top_factors).where(
+        table.c.customer_id == customer_id
+    )
+    
+    row = db.execute(lookup).first()
+    if row is not None and row.document is not None and row.built_version == row.version:
+        return decode_document(row.document)
+    
+    if row is None:
+        if db.get(Customer, customer_id) is None:
+            return None
+        db.execute(_insert(db).values(customer_id=customer_id, version=0).on_conflict_do_nothing())
+        db.commit()
+        row = db.execute(lookup).first()
+    
+    document = build_customer_360(db, customer_id, format_profile, row.top_factors)
+    if document is None:
+        return None
+    
+    # 생성 중 무효화되었으면 (version 변경) 저장하지 않음 - 다음 조회에서 다시 생성
+    stored = db.execute(
+        update(table)
+        .where(table.c.customer_id == customer_id, table.c.version == row.version)
+        .values(document=encode_document(document), built_version=row.version, built_at=datetime.utcnow())
+    ).rowcount
+    if not stored:
+        logger.debug(f"Customer-360 for {customer_id} changed while building, not stored")
+    return document
@@ -0,0 +1,190 @@
+"""
+IBK 카드 고객 이탈 예측 - 고객 검색 인덱스
+고객 목록 검색어를 전체 스캔(ilike '%검색어%') 대신 인덱스 조회로 처리
+
+- 고객 ID (C00000671, c0000067, 671): 기본 키 정확 일치 + 접두 범위 조회 → 정확 일치가 먼저
+- 지역/직업: 단어 접두 전문 검색 (공백으로 나눈 단어는 모두 일치해야 함, 예: "서울 회사원")
+  단어 중간/끝 일치는 지원하지 않음 ("회사"는 회사원과 일치, "사원"은 불일치 - 이전 ilike '%검색어%'와 다름)
+  - SQLite: FTS5 외부 콘텐츠 테이블 customer_search (customers rowid 기준, 트리거로 동기화) + bm25 순위
+  - PostgreSQL: to_tsvector('simple', ...) GIN 식 인덱스 + ts_rank 순위
+
+벌크 로더처럼 대량으로 적재할 때는 drop_search_index → 적재 → ensure_search_index 순서로 한 번에 색인합니다.
+SQLite에서 VACUUM으로 customers rowid가 바뀌면 rebuild_search_index를 호출합니다.
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import logging
+import re
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, Float, Integer, MetaData, Table, and_, case, false, func, literal_column, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+from models.database import Customer
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'customer_search'
+SEARCH_INDEX = 'idx_customer_search'
+
+# 고객 ID 형식: 'C' + 8자리 숫자 (접두사 'C' 생략 가능)
+CUSTOMER_ID_PATTERN = re.compile(r'^C?(\d{1,8})$', re.IGNORECASE)
+CUSTOMER_ID_WIDTH = 8
+
+# 접두 일치 최소 숫자 수 (접두 범위 최대 10^(8-4) = 1만 행 → 정확 일치 우선 정렬 비용 상한)
+MIN_ID_PREFIX_DIGITS = 4
+
+# 검색어 단어 수 상한 (긴 붙여넣기 입력으로 쿼리가 커지지 않도록)
+MAX_SEARCH_TERMS = 5
+
+# PostgreSQL 검색 문서 식 (인덱스 식과 쿼리 식이 같아야 인덱스 사용)
+POSTGRES_DOCUMENT = "to_tsvector('simple', coalesce(region, '') || ' ' || coalesce(occupation, ''))"
+
+# SQLite FTS5 테이블 (ORM 메타데이터와 분리 → create_all 대상 아님)
+search_table = Table(
+    SEARCH_TABLE, MetaData(),
+    Column('rowid', Integer, primary_key=True),
+    Column('rank', Float),
+)
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+        region, occupation, content='customers', content_rowid='rowid', tokenize='unicode61'
+    )""",
+    f"""CREATE TRIGGER {SEARCH_TABLE}_ai AFTER INSERT ON customers BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, region, occupation) VALUES (new.rowid, new.region, new.occupation);
+    END""",
+    f"""CREATE TRIGGER {SEARCH_TABLE}_ad AFTER DELETE ON customers BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, region, occupation)
+        VALUES ('delete', old.rowid, old.region, old.occupation);
+    END""",
+    f"""CREATE TRIGGER {SEARCH_TABLE}_au AFTER UPDATE OF region, occupation ON customers BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, region, occupation)
+        VALUES ('delete', old.rowid, old.region, old.occupation);
+        INSERT INTO {SEARCH_TABLE}(rowid, region, occupation) VALUES (new.rowid, new.region, new.occupation);
+    END""",
+]
+
+
+# ========================================
+# 인덱스 생성 / 삭제
+# ========================================
+
+def has_search_index(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            return conn.execute(text("SELECT to_regclass(:name)"), {'name': SEARCH_INDEX}).scalar() is not None
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': SEARCH_TABLE}
+        ).first() is not None
+
+
+def rebuild_search_index(engine: Engine) -> float:
+    """검색 인덱스를 customers 전체에서 다시 만들기 (소요 시간 반환)"""
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        if engine.dialect.name == 'postgresql':
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {SEARCH_INDEX}")
+            conn.exec_driver_sql(f"CREATE INDEX {SEARCH_INDEX} ON customers USING gin (({POSTGRES_DOCUMENT}))")
+        else:
+            if conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': SEARCH_TABLE}).first() is None:
+                for ddl in SQLITE_DDL:
+                    conn.exec_driver_sql(ddl)
+            conn.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+    
+    seconds = time.perf_counter() - start
+    logger.info(f"✅ Customer search index built in {seconds:.2f}s")
+    return seconds
+
+
+def ensure_search_index(engine: Engine) -> bool:
+    """검색 인덱스가 없으면 생성 (앱 시작 시, 벌크 적재 후)"""
+    if has_search_index(engine):
+        return False
+    rebuild_search_index(engine)
+    return True
+
+
+def drop_search_index(engine: Engine):
+    """검색 인덱스/동기화 트리거 삭제 (벌크 적재 전)"""
+    with engine.begin() as conn:
+        if engine.dialect.name == 'postgresql':
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {SEARCH_INDEX}")
+        else:
+            for suffix in ('ai', 'ad', 'au'):
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{suffix}")
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+# ========================================
+# 검색 조건
+# ========================================
+
+def parse_customer_id(term: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    고객 ID 형태 검색어 → (정확 일치 ID, 접두사)
+    
+    숫자만 입력하면 정확 일치는 8자리로 채운 ID, 접두사는 입력 그대로 ('00067' → C00000067 / C00067...)
+    숫자가 MIN_ID_PREFIX_DIGITS개 미만이면 접두사 없이 정확 일치만 ('671' → C00000671)
+    """
+    match = CUSTOMER_ID_PATTERN.match(term.strip())
+    if not match:
+        return None
+    digits = match.group(1)
+    prefix = f"C{digits}" if len(digits) >= MIN_ID_PREFIX_DIGITS else None
+    return f"C{digits.zfill(CUSTOMER_ID_WIDTH)}", prefix
+
+
+def search_terms(term: str) -> List[str]:
+    """검색어 → 단어 목록 (FTS5 unicode61 토크나이저와 같은 기준으로 분리)"""
+    return re.findall(r'\w+', term.lower())[:MAX_SEARCH_TERMS]
+
+
+def _prefix_range(prefix: str):
+    """column LIKE 'prefix%' 대신 기본 키 인덱스 범위 조건"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(Customer.customer_id >= prefix, Customer.customer_id < upper)
+
+
+def apply_search(query: Select, term: str, dialect: str) -> Tuple[Select, object]:
+    """
+    고객 SELECT에 검색 조건 적용
+    
+    Args:
+        query: select(Customer) (필터 적용 가능)
+        term: 검색어
+        dialect: 'sqlite' / 'postgresql'
+    
+    Returns:
+        (검색 조건이 적용된 쿼리, 관련도 순위 식 - 오름차순 = 관련도 높은 순)
+    """
+    customer_id = parse_customer_id(term)
+    if customer_id:
+        exact, prefix = customer_id
+        if prefix is None:
+            return query.where(Customer.customer_id == exact), Customer.customer_id
+        query = query.where(or_(Customer.customer_id == exact, _prefix_range(prefix)))
+        return query, case((Customer.customer_id == exact, 0), else_=1)
+    
+    terms = search_terms(term)
+    if not terms:
+        return query.where(false()), Customer.customer_id
+    
+    if dialect == 'postgresql':
+        document = literal_column(POSTGRES_DOCUMENT)
+        tsquery = func.to_tsquery('simple', ' & '.join(f"{t}:*" for t in terms))
+        return query.where(document.op('@@')(tsquery)), -func.ts_rank(document, tsquery)
+    
+    # SQLite FTS5: 단어별 접두 일치 ("서울"* "회사원"*), rank = bm25 (낮을수록 관련도 높음)
+    matches = (
+        select(search_table.c.rowid, search_table.c.rank)
+        .where(text(f"{SEARCH_TABLE} MATCH :search_query").bindparams(
+            search_query=' '.join(f'"{t}"*' for t in terms)
+        ))
+        .subquery('search_matches')
+    )
+    query = query.join(matches, matches.c.rowid == literal_column('customers.rowid'))
+    return query, matches.c.rank
@@ -0,0 +1,246 @@
+"""
+IBK 카드 고객 이탈 예측 - 고객 요약 컬럼 갱신
+거래 테이블에서 Customer 비정규화 컬럼(최근 거래일, 3개월 거래 건수, 월평균 사용액, 예상 LTV) 재계산
+
+- 고객 집계는 GROUP BY 한 번 + UPDATE ... FROM 한 문장으로 처리 (고객별 쿼리 없음)
+- full: 고객 ID 범위 단위로 나누어 범위마다 커밋 (잠금 시간 제한)
+- incremental: 마지막 실행 이후 변경 가능성이 있는 고객만 갱신
+- 갱신한 고객의 상세 문서(Customer-360)는 같은 트랜잭션에서 무효화
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, Table, and_, case, cast, func, select, union, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.database import Customer, IngestWatermark, Transaction
+from services.customer_360 import invalidate_customer_360, invalidate_customer_360_range
+from services.transaction_partitions import month_tables
+
+logger = logging.getLogger(__name__)
+
+# 한 UPDATE 문에서 갱신할 고객 수 (ID 목록 지정 시)
+SUMMARY_CHUNK_SIZE = 500
+
+# full 모드에서 한 트랜잭션으로 처리할 고객 ID 범위 크기
+SUMMARY_RANGE_SIZE = 50_000
+
+# 예상 LTV = 월평균 사용액 x 36개월 x 유지 확률(1 - 이탈 확률)
+LTV_HORIZON_MONTHS = 36
+
+SUMMARY_SOURCE = 'customer_summary'
+
+# 변경 고객 조회 시 한 번에 가져올 행 수
+STREAM_BATCH_SIZE = 10_000
+
+
+def summary_update(reference_date: datetime, customer_filter, cold_tables: Sequence[Table] = ()):
+    """
+    고객 요약 UPDATE ... FROM (고객별 집계) 문
+    
+    - last_transaction_date: 기준일까지 최근 거래일 (핫 테이블에 없으면 cold_tables에서)
+    - transaction_count_3m: 최근 90일 거래 건수
+    - monthly_avg_amount: 최근 12개월 사용액 / 12
+    - ltv_estimate: monthly_avg_amount x LTV_HORIZON_MONTHS x (1 - churn_probability)
+    
+    거래가 없는 고객도 LEFT JOIN으로 포함되어 0/NULL로 초기화됩니다.
+    집계 구간(최대 12개월)은 핫 테이블(TRANSACTION_HOT_MONTHS)에 있으므로 핫 테이블만 집계하고,
+    핫 구간에 거래가 없는 휴면 고객만 SQLite 월 테이블(cold_tables, 최근 달부터)에서 최근 거래일을 찾습니다.
+    월 테이블마다 (customer_id, transaction_date) 인덱스 탐색 1회이며 COALESCE라 찾으면 이후 테이블은 건너뜁니다
+    (transactions_all 뷰에 상관 서브쿼리를 걸면 SQLite가 뷰 전체를 구체화하므로 사용하지 않음).
+    """
+    customers = Customer.__table__
+    transactions = Transaction.__table__
+    date = transactions.c.transaction_date
+    
+    joined = customers.outerjoin(
+        transactions,
+        and_(transactions.c.customer_id == customers.c.customer_id, date <= reference_date)
+    )
+    summary = (
+        select(
+            customers.c.customer_id.label('customer_id'),
+            func.max(date).label('last_transaction_date'),
+            func.coalesce(func.sum(case((date > reference_date - timedelta(days=90), 1), else_=0)), 0)
+                .label('transaction_count_3m'),
+            (func.coalesce(func.sum(case((date > reference_date - timedelta(days=365), transactions.c.amount),
+                                         else_=0)), 0) // 12).label('monthly_avg_amount'),
+        )
+        .select_from(joined)
+        .where(customer_filter)
+        .group_by(customers.c.customer_id)
+        .subquery('summary')
+    )
+    
+    last_transaction_date = summary.c.last_transaction_date
+    if cold_tables:
+        last_transaction_date = func.coalesce(last_transaction_date, *[
+            select(func.max(table.c.transaction_date))
+            .where(table.c.customer_id == customers.c.customer_id, table.c.transaction_date <= reference_date)
+            .scalar_subquery()
+            for table in cold_tables
+        ])
+    
+    return (
+        update(customers)
+        .where(customers.c.customer_id == summary.c.customer_id)
+        .values(
+            last_transaction_date=last_transaction_date,
+            transaction_count_3m=summary.c.transaction_count_3m,
+            monthly_avg_amount=summary.c.monthly_avg_amount,
+            ltv_estimate=cast(
+                summary.c.monthly_avg_amount * LTV_HORIZON_MONTHS * (1 - func.coalesce(customers.c.churn_probability, 0)),
+                Integer
+            ),
+        )
+    )
+
+
+def refresh_customer_summary(conn, customer_ids: Iterable[str], reference_date: Optional[datetime] = None,
+                             chunk_size: int = SUMMARY_CHUNK_SIZE) -> int:
+    """
+    지정 고객들의 요약 컬럼 재계산
+    
+    거래 테이블 전체 상태에서 다시 집계하므로 같은 거래가 재적재되어도 값이 중복 누적되지 않습니다.
+    
+    Args:
+        conn: Connection 또는 Session (커밋은 호출자 책임)
+        customer_ids: 갱신 대상 고객 ID
+        reference_date: 집계 기준 시각 (기본: 현재)
+    
+    Returns:
+        갱신된 고객 수
+    """
+    reference_date = reference_date or datetime.now()
+    customer_ids = sorted(set(customer_ids))
+    
+    cold_tables = month_tables(conn)
+    updated = 0
+    for start in range(0, len(customer_ids), chunk_size):
+        chunk = customer_ids[start:start + chunk_size]
+        result = conn.execute(summary_update(reference_date, Customer.__table__.c.customer_id.in_(chunk), cold_tables))
+        invalidate_customer_360(conn, chunk)
+        updated += result.rowcount
+    
+    logger.info(f"   ✓ Customer summary refreshed: {updated:,} customers")
+    return updated
+
+
+def iter_customer_ranges(conn, range_size: int = SUMMARY_RANGE_SIZE) -> Iterator[Tuple[Optional[str], str]]:
+    """고객 ID를 range_size 단위 범위 (lower, upper]로 분할 (PK 인덱스 키셋 탐색)"""
+    customer_id = Customer.__table__.c.customer_id
+    lower = None
+    while True:
+        after = customer_id > lower if lower is not None else True
+        upper = conn.execute(
+            select(customer_id).where(after).order_by(customer_id).offset(range_size - 1).limit(1)
+        ).scalar()
+        if upper is None:
+            # 마지막 범위 (range_size 미만)
+            upper = conn.execute(select(func.max(customer_id)).where(after)).scalar()
+            if upper is not None:
+                yield lower, upper
+            return
+        yield lower, upper
+        lower = upper
+
+
+def changed_customers_query(since: datetime, last_reference: datetime, reference_date: datetime):
+    """
+    마지막 실행 이후 요약 값이 바뀔 수 있는 고객 ID (UNION)
+    
+    - since 이후 적재/갱신된 거래 (created_at)
+    - 기준일이 이동하며 집계 구간(기준일, 90일, 12개월 경계)을 넘어간 거래
+    - 마지막 실행 이후 이탈 확률이 재계산된 고객 (LTV)
+    
+    거래 조건은 조건마다 별도 SELECT로 각각 created_at / transaction_date 인덱스 범위 스캔
+    (한 WHERE에 OR로 묶으면 플래너가 거래 테이블 전체 스캔을 선택해 전체 갱신과 비용이 같아짐).
+    """
+    customers = Customer.__table__
+    transactions = Transaction.__table__
+    date = transactions.c.transaction_date
+    
+    changed_txns = [select(transactions.c.customer_id).where(transactions.c.created_at > since)]
+    changed_txns += [
+        select(transactions.c.customer_id).where(
+            date > last_reference - timedelta(days=days), date <= reference_date - timedelta(days=days)
+        )
+        for days in (0, 90, 365)
+    ]
+    rescored = select(customers.c.customer_id).where(customers.c.last_prediction_date > last_reference)
+    return union(*changed_txns, rescored)
+
+
+def changed_customer_ids(conn, since: datetime, last_reference: datetime, reference_date: datetime) -> list:
+    """마지막 실행 이후 요약 값이 바뀔 수 있는 고객 (changed_customers_query, 정렬된 ID 목록)"""
+    # PostgreSQL에서는 서버 측 커서로 나누어 받음 (변경 거래가 많은 날 클라이언트 버퍼링 방지)
+    result = conn.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE).execute(
+        changed_customers_query(since, last_reference, reference_date)
+    )
+    return sorted(set(result.scalars()))
+
+
+def run_summary_refresh(engine: Engine, mode: str = 'incremental', reference_date: Optional[datetime] = None,
+                        range_size: int = SUMMARY_RANGE_SIZE) -> Dict:
+    """
+    고객 요약 갱신 작업 (스케줄러/스크립트용)
+    
+    Args:
+        mode: 'full' (전체 고객, ID 범위 단위) 또는 'incremental' (변경 고객만, 첫 실행은 full)
+        reference_date: 집계 기준 시각 (기본: 현재)
+    
+    Returns:
+        {'mode', 'customers', 'batches', 'seconds'}
+    """
+    if mode not in ('full', 'incremental'):
+        raise ValueError(f"Unknown summary refresh mode: {mode}")
+    
+    reference_date = reference_date or datetime.now()
+    started_at = datetime.utcnow()
+    start = time.perf_counter()
+    
+    with Session(engine) as db:
+        state = db.get(IngestWatermark, SUMMARY_SOURCE)
+        if mode == 'incremental' and (state is None or state.watermark is None or state.processed_at is None):
+            logger.info("   No previous summary refresh, running full refresh")
+            mode = 'full'
+    
+    updated = batches = 0
+    if mode == 'full':
+        with engine.connect() as conn:
+            ranges = list(iter_customer_ranges(conn, range_size))
+        
+        customer_id = Customer.__table__.c.customer_id
+        for lower, upper in ranges:
+            condition = customer_id <= upper if lower is None else and_(customer_id > lower, customer_id <= upper)
+            with engine.begin() as conn:
+                updated += conn.execute(summary_update(reference_date, condition, month_tables(conn))).rowcount
+                invalidate_customer_360_range(conn, lower, upper)
+            batches += 1
+            logger.info(f"   ✓ Range {batches}/{len(ranges)} (..{upper}): {updated:,} customers")
+    else:
+        with engine.connect() as conn:
+            customer_ids = changed_customer_ids(conn, state.processed_at, state.watermark, reference_date)
+        
+        for offset in range(0, len(customer_ids), range_size):
+            with engine.begin() as conn:
+                updated += refresh_customer_summary(conn, customer_ids[offset:offset + range_size], reference_date)
+            batches += 1
+    
+    with Session(engine) as db:
+        state = db.get(IngestWatermark, SUMMARY_SOURCE) or IngestWatermark(source=SUMMARY_SOURCE)
+        state.watermark = reference_date
+        state.processed_at = started_at
+        db.add(state)
+        db.commit()
+    
+    seconds = time.perf_counter() - start
+    logger.info(f"✅ Customer summary refresh ({mode}): {updated:,} customers in {seconds:.1f}s")
+    
+    return {'mode': mode, 'customers': updated, 'batches': batches, 'seconds': round(seconds, 2)}
@@ -2,48 +2,212 @@
 IBK 카드 고객 이탈 예측 - 데이터베이스 연결
 SQLAlchemy Session 관리
 
+- DATABASE_URL이 PostgreSQL이면 연결 풀(QueuePool) 엔진 사용 (여러 API 워커가 한 DB 공유)
+- USE_SQLITE=true 이거나 DATABASE_URL이 없으면 로컬 SQLite 파일 사용
+- async 라우트용 AsyncSession (aiosqlite / asyncpg 드라이버, 첫 사용 시 생성)
+
 Copyright (c) 2024 (주)범온누리 이노베이션
 """
 
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
-from contextlib import contextmanager
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+from contextlib import asynccontextmanager, contextmanager
 import logging
 import os
-from typing import Generator
+from typing import AsyncGenerator, Dict, Generator, Iterator, Optional
 
 from models.database import Base
+from services.app_session import AppSession
+from services.customer_360 import register_customer_360_listeners
+from services.segment_cube import register_segment_cube_listeners
 
 logger = logging.getLogger(__name__)
 
 # SQLite 사용 (최고 성능을 위한 설정)
-import os
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ibk_churn.db")
-DATABASE_URL = f"sqlite:///{DB_PATH}"
+SQLITE_URL = f"sqlite:///{DB_PATH}"
+
+# DATABASE_URL 지정 시 해당 DB 사용 (USE_SQLITE=true면 무시)
+USE_SQLITE = os.getenv("USE_SQLITE", "false").lower() == "true"
+DATABASE_URL = SQLITE_URL if USE_SQLITE else os.getenv("DATABASE_URL", SQLITE_URL)
+
+# PostgreSQL 연결 풀 (워커 프로세스마다 별도 풀 → 총 연결 수 = 워커 수 x (POOL_SIZE + MAX_OVERFLOW))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # 풀 고갈 시 대기 초
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # 방화벽/프록시 유휴 끊김 전에 재연결
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # 0 = 제한 없음
+DB_STREAM_BATCH_SIZE = int(os.getenv("DB_STREAM_BATCH_SIZE", "10000"))
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "ibk-churn-backend")
+
+# SQLite 운영 튜닝 프로필
+# - WAL: 읽기와 쓰기가 서로 막지 않음 (쓰기는 여전히 한 번에 하나)
+# - 연결 풀: 스레드마다 별도 연결을 빌려 씀 (StaticPool 단일 연결 공유 제거)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")  # 'tuned' 또는 'legacy'(단일 연결, PRAGMA 없음)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # WAL + NORMAL: DB 손상 없음, 전원 장애 시 최근 커밋만 유실 가능
+SQLITE_CACHE_SIZE_MB = int(os.getenv("SQLITE_CACHE_SIZE_MB", "64"))  # 연결당 페이지 캐시
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "8"))
+
+
+def sqlite_pragmas() -> Dict[str, str]:
+    """연결마다 적용할 SQLite PRAGMA"""
+    return {
+        "journal_mode": SQLITE_JOURNAL_MODE,
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "cache_size": str(-SQLITE_CACHE_SIZE_MB * 1024),  # 음수 = KiB 단위
+        "mmap_size": str(SQLITE_MMAP_SIZE_MB * 1024 * 1024),
+        "busy_timeout": str(SQLITE_BUSY_TIMEOUT_MS),
+        "temp_store": "MEMORY",
+    }
+
+
+def create_sqlite_engine(url: str = SQLITE_URL, profile: str = SQLITE_PROFILE, echo: bool = False):
+    """
+    SQLite 엔진 생성
+    
+    Args:
+        url: sqlite:/// URL
+        profile: 'tuned' (WAL + 연결 풀 + PRAGMA) 또는 'legacy' (단일 공유 연결)
+    """
+    if profile == "legacy":
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+            echo=echo
+        )
+    
+    sqlite_engine = create_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        poolclass=QueuePool,
+        pool_size=SQLITE_POOL_SIZE,
+        max_overflow=SQLITE_MAX_OVERFLOW,
+        pool_pre_ping=False,  # 로컬 파일 연결은 끊기지 않음
+        echo=echo
+    )
+    
+    _listen_sqlite_pragmas(sqlite_engine)
+    return sqlite_engine
+
+
+def _listen_sqlite_pragmas(sqlite_engine):
+    """새 연결마다 튜닝 PRAGMA 적용 (동기/비동기 엔진 공통)"""
+    pragmas = sqlite_pragmas()
+    
+    @event.listens_for(sqlite_engine, "connect")
+    def apply_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def create_postgres_engine(url: str, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW,
+                           statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS, echo: bool = False):
+    """
+    PostgreSQL 엔진 생성
+    
+    - QueuePool: pool_size 연결 유지, 부하 시 max_overflow까지 추가 (초과 요청은 pool_timeout 대기)
+    - pool_pre_ping: 체크아웃 시 끊긴 연결 감지 후 재연결 (DB 재시작/페일오버)
+    - pool_recycle: 오래된 연결 주기적 교체
+    - statement_timeout: 서버 측에서 장시간 쿼리 취소 (풀 연결 독점 방지)
+    """
+    options = f"-c statement_timeout={statement_timeout_ms}"
+    return create_engine(
+        url,
+        connect_args={"options": options, "application_name": DB_APPLICATION_NAME},
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        echo=echo
+    )
+
+
+def create_db_engine(url: Optional[str] = None, echo: bool = False):
+    """URL 방언에 맞는 엔진 생성 (기본: DATABASE_URL)"""
+    url = url or DATABASE_URL
+    if url.startswith("sqlite"):
+        return create_sqlite_engine(url, echo=echo)
+    if url.startswith("postgresql"):
+        return create_postgres_engine(url, echo=echo)
+    return create_engine(url, pool_pre_ping=True, echo=echo)
+
 
 # Engine 생성 (최적화된 설정)
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-    echo=False
-)
+engine = create_db_engine()
 
 # Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# (읽기 모델 리스너는 AppSession에만 등록 - 적재/배치용 일반 Session은 flush 비용 없음)
+SessionLocal = sessionmaker(class_=AppSession, autocommit=False, autoflush=False, bind=engine)
+
+# 앱 세션으로 고객을 변경하면 같은 트랜잭션에서 세그먼트 큐브에 증감분 반영 + 고객 상세 문서 무효화
+register_segment_cube_listeners()
+register_customer_360_listeners()
 
 
 def init_db():
     """데이터베이스 초기화 (테이블 생성)"""
+    from services.transaction_partitions import create_transaction_storage, ensure_transaction_view
+    
     try:
+        # PostgreSQL 신규 DB는 transactions를 월 파티션 테이블로 먼저 생성 (create_all은 있는 테이블을 건너뜀)
+        create_transaction_storage(engine)
         Base.metadata.create_all(bind=engine)
+        ensure_indexes()
+        ensure_transaction_view(engine)
         logger.info("✅ Database initialized successfully")
     except Exception as e:
         logger.error(f"❌ Database initialization failed: {e}")
         raise
 
 
+# 복합 인덱스로 대체된 단일 컬럼 인덱스 (기존 DB에서 삭제 → 쓰기/적재 비용 절감)
+SUPERSEDED_INDEXES = {
+    'transactions': ['ix_transactions_customer_id'],       # → idx_transaction_customer_date
+    'customer_actions': ['ix_customer_actions_customer_id'],  # → idx_action_customer_date
+}
+
+
+def ensure_indexes(target_engine=None):
+    """
+    기존 테이블에 모델에 새로 추가된 인덱스 생성, 대체된 인덱스 삭제
+    
+    create_all은 없는 테이블만 만들고 이미 있는 테이블의 인덱스는 추가하지 않습니다.
+    """
+    from sqlalchemy import inspect
+    
+    target_engine = target_engine or engine
+    inspector = inspect(target_engine)
+    existing_tables = set(inspector.get_table_names())
+    
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                logger.info(f"   Creating index {index.name} on {table.name}...")
+                index.create(bind=target_engine)
+        for name in SUPERSEDED_INDEXES.get(table.name, []):
+            if name in existing:
+                logger.info(f"   Dropping superseded index {name} on {table.name}...")
+                with target_engine.begin() as conn:
+                    conn.exec_driver_sql(f"DROP INDEX {name}")
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     데이터베이스 세션 의존성 (FastAPI Depends용)
@@ -84,7 +248,6 @@ def check_db_connection() -> bool:
     """데이터베이스 연결 확인"""
     try:
         with engine.connect() as conn:
-            from sqlalchemy import text
             conn.execute(text("SELECT 1"))
         return True
     except Exception as e:
@@ -92,6 +255,180 @@ def check_db_connection() -> bool:
         return False
 
 
+# ========================================
+# Async (FastAPI async 라우트용)
+# ========================================
+_async_engine = None
+_async_session_factory = None
+
+
+def create_async_db_engine(url: Optional[str] = None, echo: bool = False):
+    """
+    DATABASE_URL에 대응하는 비동기 엔진 생성
+    
+    - SQLite → sqlite+aiosqlite (동기 엔진과 같은 PRAGMA/풀 크기)
+    - PostgreSQL → postgresql+asyncpg (같은 풀/타임아웃 설정, statement_timeout은 server_settings로 전달)
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+    
+    url = make_url(url or DATABASE_URL)
+    backend = url.get_backend_name()
+    
+    if backend == "sqlite":
+        async_engine = create_async_engine(
+            url.set(drivername="sqlite+aiosqlite"),
+            connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            poolclass=AsyncAdaptedQueuePool,  # aiosqlite 기본값은 NullPool (요청마다 연결/PRAGMA 반복)
+            pool_size=SQLITE_POOL_SIZE,
+            max_overflow=SQLITE_MAX_OVERFLOW,
+            echo=echo
+        )
+        _listen_sqlite_pragmas(async_engine.sync_engine)
+        return async_engine
+    
+    if backend == "postgresql":
+        return create_async_engine(
+            url.set(drivername="postgresql+asyncpg"),
+            connect_args={"server_settings": {
+                "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS),
+                "application_name": DB_APPLICATION_NAME,
+            }},
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            echo=echo
+        )
+    
+    raise ValueError(f"Async driver not configured for database: {backend}")
+
+
+def get_async_engine():
+    """프로세스 공용 비동기 엔진 (첫 호출 시 생성)"""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        
+        _async_engine = create_async_db_engine()
+        # 커밋 후에도 로드된 속성을 응답 직렬화에 사용 (지연 로딩 I/O 방지)
+        _async_session_factory = async_sessionmaker(
+            _async_engine, sync_session_class=AppSession, expire_on_commit=False, autoflush=False
+        )
+    return _async_engine
+
+
+def AsyncSessionLocal():
+    """AsyncSession 생성"""
+    get_async_engine()
+    return _async_session_factory()
+
+
+async def get_async_db() -> AsyncGenerator:
+    """
+    비동기 데이터베이스 세션 의존성 (FastAPI Depends용)
+    
+    Usage:
+        @app.get("/customers")
+        async def get_customers(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(Customer).limit(20))
+            return result.scalars().all()
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def get_async_db_context():
+    """
+    비동기 데이터베이스 세션 컨텍스트 매니저
+    
+    Usage:
+        async with get_async_db_context() as db:
+            total = await db.scalar(select(func.count(Customer.customer_id)))
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+async def dispose_async_engine():
+    """비동기 엔진 연결 풀 정리 (앱 종료 시)"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_session_factory = None
+
+
+def stream_query(statement, params: Optional[Dict] = None, batch_size: int = DB_STREAM_BATCH_SIZE,
+                 bind=None) -> Iterator[list]:
+    """
+    대용량 조회를 batch_size 행 단위로 스트리밍
+    
+    PostgreSQL은 서버 측 커서(named cursor)를 사용해 결과 전체를 클라이언트 메모리에 올리지 않습니다.
+    SQLite는 원래 행 단위로 읽으므로 같은 인터페이스로 배치만 나눕니다.
+    
+    Usage:
+        for rows in stream_query(select(Transaction.customer_id, Transaction.amount)):
+            ...
+    """
+    bind = bind or engine
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(statement, params or {})
+        for partition in result.partitions():
+            yield partition
+
+
+def optimize_database(full_analyze: bool = False, target_engine=None):
+    """
+    쿼리 플래너 통계 갱신 (스케줄러에서 주기 실행)
+    
+    - SQLite: PRAGMA optimize (변경이 큰 테이블만 ANALYZE), full_analyze 시 전체 ANALYZE
+    - 기타 DB: ANALYZE
+    """
+    target_engine = target_engine or engine
+    with target_engine.connect() as conn:
+        if target_engine.dialect.name == "sqlite":
+            if full_analyze:
+                conn.exec_driver_sql("ANALYZE")
+            conn.exec_driver_sql("PRAGMA optimize")
+            # WAL 파일이 커지지 않도록 체크포인트 (읽기 중인 연결은 막지 않음)
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+        else:
+            conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+    logger.info(f"✅ Database optimized ({'ANALYZE' if full_analyze else 'optimize'})")
+
+
+def get_database_info() -> Dict:
+    """DB 엔진/풀 설정 요약 (시스템 정보용)"""
+    info = {
+        "dialect": engine.dialect.name,
+        "pool": type(engine.pool).__name__,
+    }
+    if engine.dialect.name == "postgresql":
+        info["statement_timeout_ms"] = DB_STATEMENT_TIMEOUT_MS
+        info["pool_recycle"] = DB_POOL_RECYCLE
+    if engine.dialect.name == "sqlite":
+        info["profile"] = SQLITE_PROFILE
+        try:
+            with engine.connect() as conn:
+                info["pragmas"] = {
+                    name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                    for name in ("journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout")
+                }
+        except Exception as e:
+            logger.warning(f"Failed to read SQLite pragmas: {e}")
+    if hasattr(engine.pool, "size"):
+        info["pool_size"] = engine.pool.size()
+        info["checked_out"] = engine.pool.checkedout()
+    return info
+
+
 # DB 이벤트 리스너
 @event.listens_for(engine, "connect")
 def receive_connect(dbapi_conn, connection_record):
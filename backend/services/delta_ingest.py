@@ -0,0 +1,241 @@
+"""
+IBK 카드 고객 이탈 예측 - 일별 거래 증분 적재
+일 단위 거래 파일을 배치 업서트하고 적재 이력(ledger)/워터마크로 멱등성 보장
+
+- 같은 내용의 파일은 ledger에 COMPLETED로 남아 있으면 건너뜀
+- 중간 실패 후 재시도해도 transaction_id 기준 업서트라 중복 적재되지 않음
+  (SQLite 월 테이블로 옮긴 거래를 다시 받으면 이전 행을 지우고 핫 테이블에 적재)
+  (PostgreSQL 파티션 테이블에서 거래일이 정정된 거래는 이전 거래일 행을 지우고 적재)
+- 적재된 거래의 고객만 요약 컬럼을 거래 테이블 기준으로 재계산
+- 월별 거래 집계는 배치마다 새 행과 덮어쓴 기존 행의 차이만 반영
+- 거래가 들어온 고객의 상세 문서(Customer-360)는 배치와 같은 트랜잭션에서 무효화
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import hashlib
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+from sqlalchemy import select, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.database import IngestLedger, IngestWatermark, Transaction
+from services.bulk_loader import TRANSACTION_LOAD_COLUMNS, iter_batches
+from services.customer_360 import invalidate_customer_360, invalidate_customer_360_range
+from services.customer_summary import refresh_customer_summary
+from services.transaction_partitions import (
+    add_months, all_transactions, delete_from_month_tables, is_partitioned, transaction_source
+)
+from services.transaction_rollup import apply_rollup_deltas, latest_rollup_month_query, rollup_deltas
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_SOURCE = 'transactions'
+
+# 기존 행 조회용 IN 목록 크기 (SQLite 바인드 변수 제한 이하)
+EXISTING_LOOKUP_SIZE = 5000
+
+
+def file_hash(path: str) -> str:
+    """파일(또는 parquet 파티션 디렉토리) 내용 SHA-256"""
+    path = Path(path)
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+    
+    digest = hashlib.sha256()
+    for file in files:
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def get_watermark(db: Session, source: str = TRANSACTION_SOURCE) -> Optional[datetime]:
+    """소스의 적재 완료 최대 거래일"""
+    row = db.get(IngestWatermark, source)
+    return row.watermark if row else None
+
+
+def upsert_statement(dialect: str, partitioned: bool = False):
+    """
+    transaction_id 충돌 시 갱신하는 INSERT (created_at은 최초 값 유지)
+    
+    PostgreSQL 파티션 테이블은 고유 제약이 (transaction_id, transaction_date)이므로 충돌 대상도 같게 지정합니다.
+    이 경우 거래일이 정정된 행은 충돌하지 않으므로 적재 전에 delete_redated_rows로 이전 행을 지웁니다.
+    """
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    table = Transaction.__table__
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.transaction_id, table.c.transaction_date] if partitioned else [table.c.transaction_id],
+        set_={column: stmt.excluded[column] for column in TRANSACTION_LOAD_COLUMNS if column != 'transaction_id'}
+    )
+
+
+def _existing_rows(conn, transaction_ids, table=None) -> list:
+    """이미 적재된 행 (덮어쓰기 전 값 → 월별 집계 차감분, table: 기본 transactions 또는 transactions_all 뷰)"""
+    table = table if table is not None else Transaction.__table__
+    existing = []
+    for start in range(0, len(transaction_ids), EXISTING_LOOKUP_SIZE):
+        chunk = transaction_ids[start:start + EXISTING_LOOKUP_SIZE]
+        existing.extend(conn.execute(
+            select(table.c.transaction_id, table.c.customer_id, table.c.transaction_date,
+                   table.c.category, table.c.amount)
+            .where(table.c.transaction_id.in_(chunk))
+        ).mappings())
+    return existing
+
+
+def delete_redated_rows(conn, records, existing) -> int:
+    """
+    거래일이 바뀐 기존 행 삭제 (PostgreSQL 파티션 테이블, 업서트 전)
+    
+    충돌 키에 transaction_date가 포함되어 정정된 거래는 새 행으로 추가되므로, 이전 거래일 행을 지워
+    transaction_id당 한 행을 유지합니다 (월별 집계 증감분은 이전 행을 차감하므로 저장소와 일치).
+    """
+    new_dates = {record['transaction_id']: pd.Timestamp(record['transaction_date']) for record in records}
+    redated = [
+        (row['transaction_id'], row['transaction_date']) for row in existing
+        if pd.Timestamp(row['transaction_date']) != new_dates[row['transaction_id']]
+    ]
+    
+    table = Transaction.__table__
+    deleted = 0
+    for start in range(0, len(redated), EXISTING_LOOKUP_SIZE):
+        chunk = redated[start:start + EXISTING_LOOKUP_SIZE]
+        deleted += conn.execute(
+            table.delete().where(tuple_(table.c.transaction_id, table.c.transaction_date).in_(chunk))
+        ).rowcount
+    return deleted
+
+
+def ingest_transactions_file(engine: Engine, path: str, batch_size: int = 10_000,
+                             reference_date: Optional[datetime] = None, force: bool = False) -> Dict:
+    """
+    일별 거래 파일 증분 적재
+    
+    Args:
+        engine: DB 엔진
+        path: 거래 파일 (CSV 또는 parquet)
+        batch_size: 배치 크기 (배치마다 커밋)
+        reference_date: 고객 요약 집계 기준 시각 (기본: 현재)
+        force: 이미 완료된 파일도 다시 적재
+    
+    Returns:
+        적재 결과 (status: 'COMPLETED' 또는 'SKIPPED')
+    """
+    digest = file_hash(path)
+    partitioned = is_partitioned(engine)
+    upsert = upsert_statement(engine.dialect.name, partitioned)
+    
+    with Session(engine) as db:
+        ledger = db.execute(
+            select(IngestLedger).where(IngestLedger.source == TRANSACTION_SOURCE, IngestLedger.file_hash == digest)
+        ).scalar_one_or_none()
+        
+        if ledger is not None and ledger.status == 'COMPLETED' and not force:
+            logger.info(f"⏭️  {path} already ingested (ledger #{ledger.id}), skipping")
+            return {'status': 'SKIPPED', 'ledger_id': ledger.id, 'file_hash': digest}
+        
+        if ledger is None:
+            ledger = IngestLedger(source=TRANSACTION_SOURCE, file_hash=digest)
+            db.add(ledger)
+        ledger.file_name = Path(path).name
+        ledger.status = 'STARTED'
+        ledger.started_at = datetime.utcnow()
+        ledger.error_message = None
+        db.commit()
+        ledger_id = ledger.id
+    
+    logger.info(f"📥 Ingesting {path} (ledger #{ledger_id})")
+    start = time.perf_counter()
+    rows_read = rows_new = rows_existing = 0
+    max_event_date = None
+    affected_customers = set()
+    
+    with engine.connect() as conn:
+        latest_month = conn.execute(latest_rollup_month_query()).scalar()
+    
+    try:
+        for batch in iter_batches(path, batch_size, date_columns=['transaction_date']):
+            frame = batch[TRANSACTION_LOAD_COLUMNS].assign(created_at=datetime.utcnow())
+            # 같은 배치 안의 중복 ID는 마지막 행만 (업서트 결과와 월별 집계 증감분 일치)
+            records = frame.drop_duplicates('transaction_id', keep='last').to_dict('records')
+            
+            with engine.begin() as conn:
+                source = transaction_source(conn)
+                existing = _existing_rows(conn, [record['transaction_id'] for record in records], source)
+                if source is all_transactions:
+                    delete_from_month_tables(conn, existing)
+                if partitioned:
+                    delete_redated_rows(conn, records, existing)
+                conn.execute(upsert, records)
+                apply_rollup_deltas(conn, rollup_deltas(added=records, removed=existing))
+                invalidate_customer_360(conn, [str(record['customer_id']) for record in records])
+            
+            rows_read += len(frame)
+            rows_existing += len(existing)
+            rows_new += len(frame) - len(existing)
+            affected_customers.update(frame['customer_id'].astype(str))
+            batch_max = frame['transaction_date'].max()
+            max_event_date = batch_max if max_event_date is None else max(max_event_date, batch_max)
+        
+        with engine.begin() as conn:
+            customers_refreshed = refresh_customer_summary(conn, affected_customers, reference_date)
+            # 새 달 거래가 들어오면 모든 고객의 월별 추이 기준월이 바뀜
+            if max_event_date is not None and (latest_month is None or max_event_date >= add_months(latest_month, 1)):
+                invalidate_customer_360_range(conn)
+        
+        with Session(engine) as db:
+            ledger = db.get(IngestLedger, ledger_id)
+            ledger.status = 'COMPLETED'
+            ledger.rows_read = rows_read
+            ledger.rows_new = rows_new
+            ledger.rows_existing = rows_existing
+            ledger.customers_refreshed = customers_refreshed
+            ledger.max_event_date = pd.Timestamp(max_event_date).to_pydatetime() if max_event_date is not None else None
+            ledger.completed_at = datetime.utcnow()
+            
+            watermark = db.get(IngestWatermark, TRANSACTION_SOURCE)
+            if watermark is None:
+                watermark = IngestWatermark(source=TRANSACTION_SOURCE)
+                db.add(watermark)
+            if ledger.max_event_date and (watermark.watermark is None or ledger.max_event_date > watermark.watermark):
+                watermark.watermark = ledger.max_event_date
+            watermark.last_ledger_id = ledger_id
+            db.commit()
+            
+            result_watermark = watermark.watermark
+    except Exception as e:
+        with Session(engine) as db:
+            ledger = db.get(IngestLedger, ledger_id)
+            ledger.status = 'FAILED'
+            ledger.error_message = str(e)[:2000]
+            db.commit()
+        logger.error(f"❌ Ingest failed for {path}: {e}")
+        raise
+    
+    seconds = time.perf_counter() - start
+    logger.info(f"   ✓ {rows_read:,} rows ({rows_new:,} new, {rows_existing:,} existing), "
+                f"{customers_refreshed:,} customers refreshed in {seconds:.1f}s")
+    
+    return {
+        'status': 'COMPLETED',
+        'ledger_id': ledger_id,
+        'file_hash': digest,
+        'rows_read': rows_read,
+        'rows_new': rows_new,
+        'rows_existing': rows_existing,
+        'customers_refreshed': customers_refreshed,
+        'watermark': result_watermark,
+        'seconds': round(seconds, 2),
+    }
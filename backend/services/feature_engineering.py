@@ -7,59 +7,469 @@ Copyright (c) 2024 (주)범온누리 이노베이션
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
+from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
+SECONDS_PER_DAY = 86400
+
+# 기간 윈도우 피처 정의 (라벨 → 일수)
+# 윈도우마다 txn_count_{라벨}, txn_amount_{라벨}, active_days_{라벨} 컬럼이 생성됩니다.
+TREND_WINDOWS = {
+    '7d': 7,
+    '1m': 30,
+    '2m': 60,
+    '3m': 90,
+    '6m': 180,
+    '12m': 365,
+}
+
+# 추세 비율 정의: (피처명, 집계, 최근 윈도우, 비교 윈도우)
+# 최근 구간 / (비교 구간에서 최근 구간을 뺀 나머지 + 1)
+TREND_RATIOS = (
+    ('txn_count_trend', 'txn_count', '3m', '6m'),
+    ('txn_amount_trend', 'txn_amount', '3m', '6m'),
+    ('active_days_trend', 'active_days', '3m', '6m'),
+    ('txn_count_trend_1m', 'txn_count', '1m', '2m'),
+    ('txn_amount_trend_1m', 'txn_amount', '1m', '2m'),
+    ('txn_amount_trend_6m', 'txn_amount', '6m', '12m'),
+)
+
+# RFM 점수 정의: 컬럼 → 점수 컬럼, 높은 값일수록 높은 점수인지 여부
+RFM_SCORES = {
+    'recency_days': ('r_score', False),
+    'frequency': ('f_score', True),
+    'monetary': ('m_score', True),
+}
+RFM_QUANTILES = [0, 0.2, 0.4, 0.6, 0.8, 1.0]
+
+
+# 거래 데이터 문자열 컬럼 (사전 인코딩 대상)
+TRANSACTION_CATEGORICAL_COLUMNS = ['customer_id', 'category', 'payment_method', 'merchant_type']
+
+
+def _to_epoch_seconds(dates) -> np.ndarray:
+    """날짜 컬럼을 epoch 초(int64) 배열로 변환"""
+    return pd.to_datetime(dates).to_numpy().astype('datetime64[s]').astype(np.int64)
+
+
+def _transaction_seconds(df) -> np.ndarray:
+    """거래시각 epoch 초 (read_transactions의 일 단위 오프셋이 있으면 재사용)"""
+    if 'transaction_day' in df.columns:
+        return df['transaction_day'].to_numpy(dtype=np.int64) * SECONDS_PER_DAY
+    return _to_epoch_seconds(df['transaction_date'])
+
+
+def read_transactions(path: str, **read_kwargs) -> pd.DataFrame:
+    """
+    거래 데이터 타입 지정 로드 (CSV 파일 또는 parquet 파일/파티션 디렉토리)
+    
+    - customer_id / category / payment_method / merchant_type: 사전 인코딩 (category dtype, 정수 코드)
+    - transaction_date: 고유 날짜 문자열만 한 번 파싱 → `transaction_day` (epoch 기준 일 오프셋, int32)
+      및 `transaction_date` (datetime64)
+    - amount: int32 (범위 초과 시 int64)
+    """
+    if Path(path).is_dir() or str(path).endswith('.parquet'):
+        df = pd.read_parquet(path, **read_kwargs)
+        for column in TRANSACTION_CATEGORICAL_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype('category')
+        day = df['transaction_date'].to_numpy().astype('datetime64[D]').astype(np.int32)
+    else:
+        dtype = {column: 'category' for column in TRANSACTION_CATEGORICAL_COLUMNS}
+        dtype.update({'transaction_id': 'object', 'transaction_date': 'category', 'amount': 'int64'})
+        df = pd.read_csv(path, dtype=dtype, **read_kwargs)
+        
+        # 날짜는 고유값(수백 개)만 파싱한 뒤 코드로 펼침
+        dates = df['transaction_date'].cat
+        parsed_days = pd.to_datetime(dates.categories).to_numpy().astype('datetime64[D]').astype(np.int32)
+        day = parsed_days[dates.codes.to_numpy()]
+    
+    df['transaction_day'] = day
+    df['transaction_date'] = day.astype('datetime64[D]').astype('datetime64[ns]')
+    
+    if df['amount'].abs().max() < np.iinfo(np.int32).max:
+        df['amount'] = df['amount'].astype(np.int32)
+    
+    logger.info(f"   ✓ Transactions loaded: {len(df):,} rows, "
+                f"{df.memory_usage(deep=True).sum() / 1024**2:.1f} MB")
+    
+    return df
+
+
+class TransactionIndex:
+    """
+    고객·거래시각 기준으로 한 번만 정렬한 거래 인덱스
+    
+    누적합(prefix sum)을 미리 계산해 두고, 임의 기준일/기간의 고객별 집계를
+    이진 탐색(searchsorted)만으로 구합니다. 기준일이나 기간이 늘어나도
+    정렬 비용은 한 번만 발생합니다.
+    """
+    
+    def __init__(self, transactions_df, by_category: bool = True):
+        df = transactions_df
+        codes, customer_ids = pd.factorize(df['customer_id'], sort=True)
+        self.customer_ids = np.asarray(customer_ids)
+        seconds = _transaction_seconds(df)
+        order = np.lexsort((seconds, codes))
+        
+        self.codes = codes[order]
+        self.seconds = seconds[order]
+        self.n_customers = len(self.customer_ids)
+        
+        # 고객 코드 * span + 상대 시각 → 하나의 정렬된 키
+        self._origin = int(self.seconds.min()) if len(order) else 0
+        self._span = (int(self.seconds.max()) - self._origin + 2) if len(order) else 2
+        self.keys = self.codes.astype(np.int64) * self._span + (self.seconds - self._origin)
+        self.seg_start = np.searchsorted(self.codes, np.arange(self.n_customers), side='left')
+        self.seg_end = np.append(self.seg_start[1:], len(order)).astype(np.int64)
+        
+        # 고객별 거래일(일 단위) 첫 거래 표시 → 활동일수 누적합
+        days = self.seconds // SECONDS_PER_DAY
+        self.first_of_day = np.ones(len(order), dtype=bool)
+        self.first_of_day[1:] = (self.codes[1:] != self.codes[:-1]) | (days[1:] != days[:-1])
+        self.active_day_csum = np.concatenate(([0], np.cumsum(self.first_of_day)))
+        
+        # 금액 누적합 / 제곱합 / 고객별 누적 최소·최대
+        amount = df['amount'].to_numpy(dtype=np.float64)[order]
+        self.amount_csum = np.concatenate(([0.0], np.cumsum(amount)))
+        self.amount_sqsum = np.concatenate(([0.0], np.cumsum(amount ** 2)))
+        grouped = pd.Series(amount).groupby(self.codes)
+        self.amount_cummin = grouped.cummin().to_numpy()
+        self.amount_cummax = grouped.cummax().to_numpy()
+        
+        if not by_category:
+            return
+        
+        # 카테고리별 금액 / 결제수단별 건수 누적합
+        self.categories, self.category_csum = self._one_hot_csum(
+            df['category'].to_numpy()[order], amount
+        )
+        self.payment_methods, self.payment_csum = self._one_hot_csum(
+            df['payment_method'].to_numpy()[order], np.ones(len(order))
+        )
+    
+    @staticmethod
+    def _one_hot_csum(values, weights):
+        """범주별 가중치 누적합 행렬 (n+1, 범주 수)"""
+        codes, labels = pd.factorize(values, sort=True)
+        csum = np.zeros((len(values) + 1, len(labels)))
+        for k in range(len(labels)):
+            csum[1:, k] = np.cumsum(np.where(codes == k, weights, 0.0))
+        return list(labels), csum
+    
+    def _locate(self, seconds: int, side: str) -> np.ndarray:
+        offset = min(max(seconds - self._origin, -1), self._span - 1)
+        targets = np.arange(self.n_customers, dtype=np.int64) * self._span + offset
+        return np.searchsorted(self.keys, targets, side=side)
+    
+    def end(self, seconds: int) -> np.ndarray:
+        """고객별로 `seconds` 이하인 마지막 거래의 다음 위치"""
+        return self._locate(seconds, 'right')
+    
+    def start(self, seconds: int) -> np.ndarray:
+        """고객별로 `seconds` 이상인 첫 거래의 위치"""
+        return self._locate(seconds, 'left')
+    
+    @staticmethod
+    def window_sum(csum, start, end):
+        """[start, end) 구간 합"""
+        return csum[end] - csum[start]
+    
+    def active_days(self, start, end):
+        """[start, end) 구간의 고유 거래일 수"""
+        # 구간이 하루 중간에서 시작하면 그 날은 누적합에 잡히지 않으므로 보정
+        partial_day = (start < end) & ~self.first_of_day[np.minimum(start, len(self.first_of_day) - 1)]
+        return self.active_day_csum[end] - self.active_day_csum[start] + partial_day
+
 
 class FeatureEngineer:
     """피처 엔지니어링 클래스"""
     
-    def __init__(self, reference_date=None):
+    def __init__(self, reference_date=None, windows=None, ratios=None, rfm_bins=None,
+                 categorical_levels=None):
         self.reference_date = reference_date or datetime.now()
+        self.windows = dict(windows or TREND_WINDOWS)
+        self.ratios = tuple(ratios or TREND_RATIOS)
+        self.rfm_bins = rfm_bins
+        self.categorical_levels = categorical_levels
+    
+    def get_metadata(self) -> dict:
+        """모델과 함께 저장할 피처 메타데이터 (온라인 스코어링 재현용)"""
+        return {
+            'windows': dict(self.windows),
+            'ratios': [list(ratio) for ratio in self.ratios],
+            'rfm_bins': self.rfm_bins,
+            'categorical_levels': self.categorical_levels
+        }
+    
+    @classmethod
+    def from_metadata(cls, metadata: dict, reference_date=None):
+        """저장된 메타데이터로 FeatureEngineer 복원"""
+        return cls(
+            reference_date=reference_date,
+            windows=metadata.get('windows'),
+            ratios=[tuple(ratio) for ratio in metadata['ratios']] if metadata.get('ratios') else None,
+            rfm_bins=metadata.get('rfm_bins'),
+            categorical_levels=metadata.get('categorical_levels')
+        )
+    
+    def to_model_matrix(self, features_df):
+        """
+        모델 입력 행렬 변환
+        
+        식별자/레이블/날짜 컬럼을 제거하고 범주형 컬럼을 정수 코드로 바꿉니다.
+        범주 목록은 첫 호출(학습) 때 고정되어 이후 스코어링에도 같은 코드가 쓰입니다.
+        """
+        X = features_df.drop(columns=['customer_id', 'churned', 'reference_date'], errors='ignore')
+        
+        # 날짜 타입 제거
+        date_cols = X.select_dtypes(include=['datetime64']).columns
+        X = X.drop(columns=date_cols)
+        
+        # 범주형 변수 인코딩
+        categorical_cols = X.select_dtypes(include=['object', 'category']).columns
+        if self.categorical_levels is None:
+            self.categorical_levels = {
+                # category dtype 입력(parquet)도 CSV 로드와 같은 정렬 순서로 코드화
+                col: pd.Categorical(X[col].astype(object)).categories.tolist() for col in categorical_cols
+            }
+        for col in categorical_cols:
+            X[col] = pd.Categorical(X[col], categories=self.categorical_levels.get(col, [])).codes
+        
+        return X
         
     def transform(self, customers_df, transactions_df):
         """피처 생성"""
         logger.info("🔧 Feature Engineering...")
         
-        # 1. 고객 기본 피처
-        features = customers_df.copy()
-        features['join_date'] = pd.to_datetime(features['join_date'])
-        features['months_since_join'] = (self.reference_date - features['join_date']).dt.days / 30
-        
-        # 2. 거래 데이터 피처
+        # 거래 데이터 피처
         transactions_df['transaction_date'] = pd.to_datetime(transactions_df['transaction_date'])
         
         # 고객별 집계
         txn_features = self._create_transaction_features(transactions_df)
         
-        # 3. RFM 피처
+        # RFM 피처
         rfm_features = self._create_rfm_features(transactions_df)
         
-        # 4. 시계열 피처
+        # 시계열 피처
         trend_features = self._create_trend_features(transactions_df)
         
-        # 5. 카테고리별 피처
+        # 카테고리별 피처
         category_features = self._create_category_features(transactions_df)
         
+        return self.combine_features(
+            customers_df, [txn_features, rfm_features, trend_features, category_features]
+        )
+    
+    def combine_features(self, customers_df, feature_frames):
+        """고객 기본 피처에 고객별 피처 테이블들을 병합하고 결측치 처리"""
+        # 고객 기본 피처
+        features = customers_df.copy()
+        features['join_date'] = pd.to_datetime(features['join_date'])
+        features['months_since_join'] = (self.reference_date - features['join_date']).dt.days / 30
+        
+        # 병합
+        for frame in feature_frames:
+            features = features.merge(frame, on='customer_id', how='left')
+        
+        # 결측치 처리
+        numeric_cols = features.select_dtypes(include=[np.number]).columns
+        features[numeric_cols] = features[numeric_cols].fillna(0)
+        
+        logger.info(f"   ✓ Total features: {features.shape[1]}")
+        
+        return features
+    
+    def transform_snapshots(self, customers_df, transactions_df, reference_dates):
+        """
+        여러 기준일(point-in-time) 피처를 한 번의 정렬로 생성
+        
+        거래를 고객·거래시각 순으로 한 번 정렬한 뒤 누적합과 구간 탐색으로
+        기준일별 피처를 계산합니다. 각 스냅샷은 기준일 이전(이하) 거래만
+        사용하며, 기준일 이후 가입한 고객은 제외됩니다.
+        결과는 `transform()`과 같은 컬럼에 `reference_date` 컬럼이 추가됩니다.
+        """
+        logger.info(f"🔧 Snapshot Feature Engineering ({len(reference_dates)} reference dates)...")
+        
+        index = TransactionIndex(transactions_df)
+        customers = customers_df.copy()
+        customers['join_date'] = pd.to_datetime(customers['join_date'])
+        
+        snapshots = [
+            self._create_snapshot_features(customers, index, reference_date)
+            for reference_date in sorted(pd.to_datetime(list(reference_dates)))
+        ]
+        features = pd.concat(snapshots, ignore_index=True)
+        
+        logger.info(f"   ✓ Snapshot rows: {len(features):,}, features: {features.shape[1]}")
+        
+        return features
+    
+    def _create_snapshot_features(self, customers, index, reference_date):
+        """단일 기준일 스냅샷 피처 (TransactionIndex 기반)"""
+        ref_ns = reference_date.value
+        ref_seconds = ref_ns // 10**9
+        
+        features = customers[customers['join_date'] <= reference_date].copy()
+        features['months_since_join'] = (reference_date - features['join_date']).dt.days / 30
+        
+        # 기준일까지 거래가 있는 고객만 집계
+        snapshot_end = index.end(ref_seconds)
+        has_txn = snapshot_end > index.seg_start
+        start, end = index.seg_start[has_txn], snapshot_end[has_txn]
+        customer_ids = index.customer_ids[has_txn]
+        
+        # 1. 거래 기본 피처
+        count = end - start
+        total = index.window_sum(index.amount_csum, start, end)
+        sqsum = index.window_sum(index.amount_sqsum, start, end)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (sqsum - total ** 2 / count) / (count - 1)
+        std = np.where(count > 1, np.sqrt(np.maximum(variance, 0)), np.nan)
+        
+        first_seconds = index.seconds[start]
+        last_seconds = index.seconds[end - 1]
+        days_active = (last_seconds - first_seconds) // SECONDS_PER_DAY
+        days_since_last = (ref_seconds - last_seconds) // SECONDS_PER_DAY
+        
+        txn_features = pd.DataFrame({
+            'customer_id': customer_ids,
+            'txn_count': count,
+            'txn_amount_total': total,
+            'txn_amount_avg': total / count,
+            'txn_amount_std': std,
+            'txn_amount_min': index.amount_cummin[end - 1],
+            'txn_amount_max': index.amount_cummax[end - 1],
+            'days_active': days_active,
+            'txn_frequency': count / (days_active + 1),
+            'days_since_last_txn': days_since_last
+        })
+        
+        # 2. RFM 피처 (스냅샷 모집단 기준)
+        rfm_features = self._score_rfm(pd.DataFrame({
+            'customer_id': customer_ids,
+            'recency_days': days_since_last,
+            'frequency': count,
+            'monetary': total
+        }))
+        
+        # 3. 시계열 추세 피처
+        trend_features = self._window_features(index, reference_date, snapshot_end, has_txn)
+        
+        # 4. 카테고리별 피처
+        category_amounts = index.window_sum(index.category_csum, start, end)
+        payment_counts = index.window_sum(index.payment_csum, start, end)
+        category_features = pd.DataFrame({'customer_id': customer_ids})
+        for k, category in enumerate(index.categories):
+            category_features[f'amount_{category}'] = category_amounts[:, k]
+        for k, category in enumerate(index.categories):
+            category_features[f'ratio_{category}'] = category_amounts[:, k] / (category_amounts.sum(axis=1) + 1)
+        for k, method in enumerate(index.payment_methods):
+            category_features[f'payment_{method}'] = payment_counts[:, k]
+        
         # 병합
         features = features.merge(txn_features, on='customer_id', how='left')
         features = features.merge(rfm_features, on='customer_id', how='left')
         features = features.merge(trend_features, on='customer_id', how='left')
         features = features.merge(category_features, on='customer_id', how='left')
         
-        # 결측치 처리
         numeric_cols = features.select_dtypes(include=[np.number]).columns
         features[numeric_cols] = features[numeric_cols].fillna(0)
+        features['reference_date'] = reference_date
         
-        logger.info(f"   ✓ Total features: {features.shape[1]}")
+        return features
+    
+    def transform_customer(self, customer: dict, transactions, categories, payment_methods) -> dict:
+        """
+        단일 고객 피처 계산 (온라인 스코어링용)
+        
+        `transform()`과 같은 정의를 고객 1명의 거래 배열에 직접 적용합니다.
+        RFM 점수는 저장된 분위 경계(rfm_bins)를 사용하므로 배치 결과와 일치합니다.
+        
+        Args:
+            customer: 고객 기본 정보 (customers 테이블/CSV 컬럼)
+            transactions: (거래일시, 금액, 카테고리, 결제수단) 튜플 목록
+            categories: 모델 학습 시의 카테고리 목록 (amount_*/ratio_* 컬럼)
+            payment_methods: 모델 학습 시의 결제수단 목록 (payment_* 컬럼)
+        """
+        reference_date = pd.Timestamp(self.reference_date)
+        ref_ns = reference_date.value
+        ref_seconds = ref_ns // 10**9
+        
+        features = dict(customer)
+        features['join_date'] = pd.Timestamp(customer['join_date'])
+        features['months_since_join'] = (reference_date - features['join_date']).days / 30
+        
+        if not transactions:
+            # 거래가 없는 고객: transform()의 결측치 처리와 동일하게 0
+            return features
+        
+        dates, amounts, txn_categories, txn_methods = zip(*transactions)
+        amount = np.array(amounts, dtype=np.float64)
+        raw_seconds = np.array(dates, dtype='datetime64[s]').astype(np.int64)
+        order = np.argsort(raw_seconds, kind='stable')
+        seconds, amount_sorted = raw_seconds[order], amount[order]
+        
+        # 1. 거래 기본 피처
+        count = len(amount)
+        total = amount.sum()
+        days_active = (seconds[-1] - seconds[0]) // SECONDS_PER_DAY
+        days_since_last = (ref_seconds - seconds[-1]) // SECONDS_PER_DAY
+        features.update({
+            'txn_count': count,
+            'txn_amount_total': total,
+            'txn_amount_avg': total / count,
+            'txn_amount_std': amount.std(ddof=1) if count > 1 else 0.0,
+            'txn_amount_min': amount.min(),
+            'txn_amount_max': amount.max(),
+            'days_active': days_active,
+            'txn_frequency': count / (days_active + 1),
+            'days_since_last_txn': days_since_last
+        })
+        
+        # 2. RFM 피처
+        rfm = {'recency_days': days_since_last, 'frequency': count, 'monetary': total}
+        features.update(rfm)
+        for column, (score_column, ascending) in RFM_SCORES.items():
+            inner_edges = np.unique(self.rfm_bins[column])[1:-1]
+            bucket = int(np.searchsorted(inner_edges, float(rfm[column]), side='left'))
+            features[score_column] = (bucket + 1.0) if ascending else (5.0 - bucket)
+        features['rfm_score'] = features['r_score'] + features['f_score'] + features['m_score']
+        
+        # 3. 시계열 추세 피처
+        days = seconds // SECONDS_PER_DAY
+        for label, window_days in self.windows.items():
+            cutoff_seconds = -((window_days * SECONDS_PER_DAY * 10**9 - ref_ns) // 10**9)
+            start = np.searchsorted(seconds, cutoff_seconds, side='left')
+            features[f'txn_count_{label}'] = count - start
+            features[f'txn_amount_{label}'] = amount_sorted[start:].sum()
+            features[f'active_days_{label}'] = len(np.unique(days[start:]))
+        for name, aggregate, recent, baseline in self.ratios:
+            recent_value = features[f'{aggregate}_{recent}']
+            baseline_value = features[f'{aggregate}_{baseline}']
+            features[name] = recent_value / (baseline_value - recent_value + 1)
+        
+        # 4. 카테고리별 피처
+        category_index = {category: k for k, category in enumerate(categories)}
+        category_amounts = np.zeros(len(categories))
+        for category, value in zip(txn_categories, amount):
+            if category in category_index:
+                category_amounts[category_index[category]] += value
+        for category, value in zip(categories, category_amounts):
+            features[f'amount_{category}'] = value
+        for category, value in zip(categories, category_amounts):
+            features[f'ratio_{category}'] = value / (category_amounts.sum() + 1)
+        for method in payment_methods:
+            features[f'payment_{method}'] = txn_methods.count(method)
         
         return features
     
     def _create_transaction_features(self, df):
         """거래 기본 피처"""
-        features = df.groupby('customer_id').agg({
+        features = df.groupby('customer_id', observed=True).agg({
             'transaction_id': 'count',
             'amount': ['sum', 'mean', 'std', 'min', 'max'],
             'transaction_date': ['min', 'max']
@@ -90,14 +500,14 @@ class FeatureEngineer:
     def _create_rfm_features(self, df):
         """RFM (Recency, Frequency, Monetary) 분석"""
         # 최근 거래일
-        recency = df.groupby('customer_id')['transaction_date'].max().reset_index()
+        recency = df.groupby('customer_id', observed=True)['transaction_date'].max().reset_index()
         recency['recency_days'] = (self.reference_date - recency['transaction_date']).dt.days
         
         # 거래 빈도
-        frequency = df.groupby('customer_id').size().reset_index(name='frequency')
+        frequency = df.groupby('customer_id', observed=True).size().reset_index(name='frequency')
         
         # 거래 금액
-        monetary = df.groupby('customer_id')['amount'].sum().reset_index()
+        monetary = df.groupby('customer_id', observed=True)['amount'].sum().reset_index()
         monetary.columns = ['customer_id', 'monetary']
         
         # 병합
@@ -105,48 +515,73 @@ class FeatureEngineer:
         rfm = rfm.merge(frequency, on='customer_id')
         rfm = rfm.merge(monetary, on='customer_id')
         
-        # RFM 점수 (1~5)
-        rfm['r_score'] = pd.qcut(rfm['recency_days'], 5, labels=[5,4,3,2,1], duplicates='drop')
-        rfm['f_score'] = pd.qcut(rfm['frequency'], 5, labels=[1,2,3,4,5], duplicates='drop')
-        rfm['m_score'] = pd.qcut(rfm['monetary'], 5, labels=[1,2,3,4,5], duplicates='drop')
+        # 학습 시점에 분위 경계를 한 번 학습하고 이후에는 재사용
+        if self.rfm_bins is None:
+            self.rfm_bins = self.fit_rfm_bins(rfm)
         
-        rfm['r_score'] = rfm['r_score'].astype(float)
-        rfm['f_score'] = rfm['f_score'].astype(float)
-        rfm['m_score'] = rfm['m_score'].astype(float)
+        return self._score_rfm(rfm, self.rfm_bins)
+    
+    @staticmethod
+    def fit_rfm_bins(rfm) -> dict:
+        """RFM 5분위 경계 학습 (pd.qcut과 동일한 분위수)"""
+        return {
+            column: rfm[column].astype(float).quantile(RFM_QUANTILES).tolist()
+            for column in RFM_SCORES
+        }
+    
+    def _score_rfm(self, rfm, bins=None):
+        """
+        RFM 점수 (1~5) 부여
+        
+        분위 경계에 대해 이진 탐색(searchsorted)으로 구간을 찾으므로 고객 1명이든
+        배치든 같은 점수를 받습니다. bins가 없으면 self.rfm_bins, 그것도 없으면
+        전달된 모집단에서 경계를 계산합니다 (저장하지 않음).
+        """
+        bins = bins or self.rfm_bins or self.fit_rfm_bins(rfm)
+        
+        for column, (score_column, ascending) in RFM_SCORES.items():
+            # qcut과 동일: (a, b] 구간, 중복 경계 제거
+            inner_edges = np.unique(bins[column])[1:-1]
+            bucket = np.searchsorted(inner_edges, rfm[column].to_numpy(dtype=float), side='left')
+            rfm[score_column] = (bucket + 1.0) if ascending else (5.0 - bucket)
         
         rfm['rfm_score'] = rfm['r_score'] + rfm['f_score'] + rfm['m_score']
         
         return rfm
     
     def _create_trend_features(self, df):
-        """시계열 추세 피처"""
-        # 최근 3개월, 6개월 거래
-        cutoff_3m = self.reference_date - timedelta(days=90)
-        cutoff_6m = self.reference_date - timedelta(days=180)
-        
-        df_3m = df[df['transaction_date'] >= cutoff_3m]
-        df_6m = df[df['transaction_date'] >= cutoff_6m]
-        
-        # 3개월 피처
-        txn_3m = df_3m.groupby('customer_id').agg({
-            'transaction_id': 'count',
-            'amount': 'sum'
-        }).reset_index()
-        txn_3m.columns = ['customer_id', 'txn_count_3m', 'txn_amount_3m']
-        
-        # 6개월 피처
-        txn_6m = df_6m.groupby('customer_id').agg({
-            'transaction_id': 'count',
-            'amount': 'sum'
-        }).reset_index()
-        txn_6m.columns = ['customer_id', 'txn_count_6m', 'txn_amount_6m']
-        
-        # 병합
-        trend = txn_3m.merge(txn_6m, on='customer_id', how='outer').fillna(0)
-        
-        # 추세 계산 (최근 3개월 vs 이전 3개월)
-        trend['txn_count_trend'] = trend['txn_count_3m'] / (trend['txn_count_6m'] - trend['txn_count_3m'] + 1)
-        trend['txn_amount_trend'] = trend['txn_amount_3m'] / (trend['txn_amount_6m'] - trend['txn_amount_3m'] + 1)
+        """시계열 추세 피처 (선언된 윈도우를 정렬 1회로 계산)"""
+        index = TransactionIndex(df, by_category=False)
+        return self._window_features(index, pd.Timestamp(self.reference_date), index.seg_end)
+    
+    def _window_features(self, index, reference_date, end, rows=None):
+        """
+        기간 윈도우 집계 및 추세 비율
+        
+        Args:
+            index: TransactionIndex
+            reference_date: 기준일 (윈도우 시작 = 기준일 - 일수)
+            end: 고객별 집계 끝 위치 (index 고객 순서)
+            rows: 대상 고객 마스크 (None이면 전체)
+        """
+        ref_ns = reference_date.value
+        rows = slice(None) if rows is None else rows
+        end = end[rows]
+        
+        trend = pd.DataFrame({'customer_id': index.customer_ids[rows]})
+        for label, days in self.windows.items():
+            # 기준일 - days 이후 거래 (초 단위 올림)
+            cutoff_seconds = -((days * SECONDS_PER_DAY * 10**9 - ref_ns) // 10**9)
+            start = index.start(cutoff_seconds)[rows]
+            trend[f'txn_count_{label}'] = end - start
+            trend[f'txn_amount_{label}'] = index.window_sum(index.amount_csum, start, end)
+            trend[f'active_days_{label}'] = index.active_days(start, end)
+        
+        # 추세 계산 (최근 구간 vs 비교 구간의 나머지)
+        for name, aggregate, recent, baseline in self.ratios:
+            recent_value = trend[f'{aggregate}_{recent}']
+            baseline_value = trend[f'{aggregate}_{baseline}']
+            trend[name] = recent_value / (baseline_value - recent_value + 1)
         
         return trend
     
@@ -158,7 +593,8 @@ class FeatureEngineer:
             columns='category',
             values='amount',
             aggfunc='sum',
-            fill_value=0
+            fill_value=0,
+            observed=True
         ).reset_index()
         
         # 컬럼명 변경
@@ -178,13 +614,16 @@ class FeatureEngineer:
             columns='payment_method',
             values='transaction_id',
             aggfunc='count',
-            fill_value=0
+            fill_value=0,
+            observed=True
         ).reset_index()
         
         payment_pivot.columns = ['customer_id'] + [f'payment_{col}' for col in payment_pivot.columns[1:]]
         
         # 병합
-        features = category_pivot.merge(payment_pivot, on='customer_id', how='outer').fillna(0)
+        features = category_pivot.merge(payment_pivot, on='customer_id', how='outer')
+        value_cols = features.columns.drop('customer_id')
+        features[value_cols] = features[value_cols].fillna(0)
         
         return features
 
@@ -193,7 +632,7 @@ def main():
     """테스트용"""
     # 데이터 로드
     customers_df = pd.read_csv('data/synthetic/customers.csv')
-    transactions_df = pd.read_csv('data/synthetic/transactions.csv')
+    transactions_df = read_transactions('data/synthetic/transactions.csv')
     
     # 피처 생성
     engineer = FeatureEngineer()
@@ -0,0 +1,196 @@
+"""
+IBK 카드 고객 이탈 예측 - 피처 파이프라인 DAG
+피처 단계별 결과를 입력 데이터/코드 버전 해시로 디스크에 캐시하여
+변경되지 않은 단계는 재실행하지 않음
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def hash_frame(df: pd.DataFrame) -> str:
+    """DataFrame 내용 해시 (컬럼명/타입 포함)"""
+    digest = hashlib.sha256()
+    digest.update(repr([(column, str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def hash_code(objects) -> str:
+    """함수/클래스 소스 코드 해시 (코드 버전)"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()
+
+
+class FeatureNode:
+    """
+    피처 DAG 노드
+    
+    Args:
+        name: 노드 이름
+        func: 의존 노드 결과를 순서대로 받아 DataFrame을 반환하는 함수
+        deps: 의존 노드(또는 입력) 이름 목록
+        code: 코드 버전 산정에 포함할 함수/클래스 목록
+        params: 결과에 영향을 주는 파라미터를 반환하는 함수
+        state: 계산 중 FeatureEngineer에 학습되는 속성 (캐시 적중 시 복원)
+    """
+    
+    def __init__(self, name: str, func: Callable, deps: List[str], code=(),
+                 params: Optional[Callable[[], Dict]] = None, state=()):
+        self.name = name
+        self.func = func
+        self.deps = deps
+        self.code_hash = hash_code(code or [func])
+        self.params = params or (lambda: {})
+        self.state = list(state)
+
+
+class FeaturePipeline:
+    """
+    FeatureEngineer 단계를 의존성 그래프로 실행하는 파이프라인
+    
+    각 노드의 결과는 (노드 이름, 코드 해시, 파라미터, 입력 노드 키)의 해시를 키로
+    디스크에 저장됩니다. 하이퍼파라미터만 바꾼 재학습에서는 모든 노드가 캐시에서 로드됩니다.
+    
+    Usage:
+        pipeline = FeaturePipeline(FeatureEngineer(reference_date), cache_dir="ml/cache/features")
+        features_df = pipeline.run(customers_df, transactions_df)
+        print(pipeline.stats)
+    """
+    
+    def __init__(self, engineer, cache_dir: str = "ml/cache/features", use_cache: bool = True):
+        self.engineer = engineer
+        self.cache_dir = Path(cache_dir)
+        self.use_cache = use_cache
+        self.stats: List[Dict] = []
+        
+        module = inspect.getmodule(type(engineer))
+        engineer_cls = type(engineer)
+        reference_date = lambda: {'reference_date': str(engineer.reference_date)}
+        
+        self.nodes = {node.name: node for node in [
+            FeatureNode(
+                'transaction_features', engineer._create_transaction_features, ['transactions'],
+                params=reference_date
+            ),
+            FeatureNode(
+                'rfm_features', engineer._create_rfm_features, ['transactions'],
+                code=[engineer_cls._create_rfm_features, engineer_cls.fit_rfm_bins, engineer_cls._score_rfm],
+                params=lambda: {**reference_date(), 'rfm_bins': engineer.rfm_bins},
+                state=['rfm_bins']
+            ),
+            FeatureNode(
+                'trend_features', engineer._create_trend_features, ['transactions'],
+                code=[engineer_cls._create_trend_features, engineer_cls._window_features, module.TransactionIndex],
+                params=lambda: {**reference_date(), 'windows': engineer.windows, 'ratios': engineer.ratios}
+            ),
+            FeatureNode(
+                'category_features', engineer._create_category_features, ['transactions']
+            ),
+            FeatureNode(
+                'features',
+                lambda customers, *frames: engineer.combine_features(customers, list(frames)),
+                ['customers', 'transaction_features', 'rfm_features', 'trend_features', 'category_features'],
+                code=[engineer_cls.combine_features],
+                params=reference_date
+            ),
+        ]}
+    
+    def run(self, customers_df: pd.DataFrame, transactions_df: pd.DataFrame, target: str = 'features') -> pd.DataFrame:
+        """DAG 실행 (target 노드까지 필요한 노드만 계산)"""
+        transactions_df['transaction_date'] = pd.to_datetime(transactions_df['transaction_date'])
+        
+        self.stats = []
+        results = {
+            'customers': (customers_df, hash_frame(customers_df)),
+            'transactions': (transactions_df, hash_frame(transactions_df)),
+        }
+        output, _ = self._resolve(target, results)
+        
+        hits = [s for s in self.stats if s['status'] == 'hit']
+        saved = sum(s['saved_seconds'] for s in hits)
+        logger.info(f"   📦 Feature cache: {len(hits)} hit / {len(self.stats) - len(hits)} miss, saved {saved:.2f}s")
+        
+        return output
+    
+    def _resolve(self, name: str, results: Dict):
+        """노드 결과 (DataFrame, 캐시 키) - 의존 노드부터 재귀적으로 계산"""
+        if name in results:
+            return results[name]
+        
+        node = self.nodes[name]
+        inputs = [self._resolve(dep, results) for dep in node.deps]
+        key = self._node_key(node, [dep_key for _, dep_key in inputs])
+        
+        start = time.perf_counter()
+        cached = self._load(node, key) if self.use_cache else None
+        if cached is not None:
+            output, meta = cached
+            for attr, value in meta.get('state', {}).items():
+                setattr(self.engineer, attr, value)
+            elapsed = time.perf_counter() - start
+            saved = max(meta['compute_seconds'] - elapsed, 0.0)
+            self.stats.append({'node': name, 'status': 'hit', 'seconds': elapsed, 'saved_seconds': saved})
+            logger.info(f"   ✓ [cache hit]  {name:<22} {elapsed:6.2f}s (saved {saved:.2f}s)")
+        else:
+            output = node.func(*[frame for frame, _ in inputs])
+            elapsed = time.perf_counter() - start
+            self.stats.append({'node': name, 'status': 'miss', 'seconds': elapsed, 'saved_seconds': 0.0})
+            logger.info(f"   ✗ [cache miss] {name:<22} {elapsed:6.2f}s")
+            if self.use_cache:
+                self._store(node, key, output, elapsed)
+        
+        results[name] = (output, key)
+        return results[name]
+    
+    def _node_key(self, node: FeatureNode, input_keys: List[str]) -> str:
+        payload = json.dumps({
+            'node': node.name,
+            'code': node.code_hash,
+            'params': node.params(),
+            'inputs': input_keys,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _paths(self, node: FeatureNode, key: str):
+        stem = self.cache_dir / f"{node.name}-{key[:24]}"
+        return stem.with_suffix('.pkl'), stem.with_suffix('.json')
+    
+    def _load(self, node: FeatureNode, key: str):
+        data_path, meta_path = self._paths(node, key)
+        if not data_path.exists() or not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text())
+            return pd.read_pickle(data_path), meta
+        except Exception as e:
+            logger.warning(f"Feature cache read failed ({node.name}): {e}")
+            return None
+    
+    def _store(self, node: FeatureNode, key: str, output: pd.DataFrame, compute_seconds: float):
+        data_path, meta_path = self._paths(node, key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            output.to_pickle(data_path)
+            meta_path.write_text(json.dumps({
+                'node': node.name,
+                'key': key,
+                'compute_seconds': compute_seconds,
+                'rows': len(output),
+                'state': {attr: getattr(self.engineer, attr) for attr in node.state},
+            }, ensure_ascii=False, default=str))
+        except Exception as e:
+            logger.warning(f"Feature cache write failed ({node.name}): {e}")
@@ -0,0 +1,166 @@
+"""
+IBK 카드 고객 이탈 예측 - 단일 고객 온라인 피처
+거래 발생/민원 접수 시 고객 1명의 피처를 DB에서 즉시 계산하고 점수 갱신
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.database import Customer
+from services.customer_360 import store_top_factors, top_factors_from_explanation
+from services.feature_engineering import FeatureEngineer
+from services.transaction_partitions import transaction_source
+
+logger = logging.getLogger(__name__)
+
+# 학습 데이터(customers.csv)와 동일한 고객 기본 컬럼
+CUSTOMER_COLUMNS = [
+    'customer_id', 'join_date', 'age', 'gender', 'region', 'occupation',
+    'annual_income', 'credit_score', 'card_type', 'lifecycle_stage', 'churned'
+]
+
+
+class OnlineFeatureBuilder:
+    """
+    단일 고객 피처 계산기
+    
+    모델과 함께 저장된 피처 메타데이터(RFM 분위 경계, 윈도우 정의, 범주 목록)를
+    적용해 배치 학습 때와 동일한 피처 벡터를 만듭니다.
+    거래는 인덱스가 있는 customer_id로 해당 고객 행만 읽습니다 (월 테이블로 옮긴 달 포함 - 배치 피처와 같은 기간).
+    """
+    
+    def __init__(self, feature_names: List[str], metadata: Dict):
+        if not metadata or not metadata.get('rfm_bins'):
+            raise ValueError("Feature metadata with RFM bins is required for online scoring.")
+        
+        self.feature_names = list(feature_names)
+        self.metadata = metadata
+        self.categorical_levels = {
+            col: {level: code for code, level in enumerate(levels)}
+            for col, levels in (metadata.get('categorical_levels') or {}).items()
+        }
+        
+        # 카테고리/결제수단 목록은 학습 피처 컬럼에서 복원
+        self.categories = [name[len('amount_'):] for name in self.feature_names if name.startswith('amount_')]
+        self.payment_methods = [name[len('payment_'):] for name in self.feature_names if name.startswith('payment_')]
+    
+    @classmethod
+    def from_predictor(cls, predictor) -> "OnlineFeatureBuilder":
+        """학습된 ChurnPredictor에서 생성"""
+        return cls(predictor.feature_names, predictor.feature_metadata)
+    
+    def build(self, db: Session, customer_id: str, reference_date: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        DB에서 고객 1명의 피처 벡터 계산
+        
+        Returns:
+            모델 feature_names 순서의 1행 DataFrame
+        """
+        customer = db.get(Customer, customer_id)
+        if customer is None:
+            raise KeyError(customer_id)
+        
+        source = transaction_source(db)
+        transactions = db.execute(
+            select(source.c.transaction_date, source.c.amount, source.c.category, source.c.payment_method)
+            .where(source.c.customer_id == customer_id)
+        ).all()
+        
+        profile = {column: getattr(customer, column) for column in CUSTOMER_COLUMNS}
+        return self.compute(profile, transactions, reference_date)
+    
+    def compute(self, customer: Dict, transactions, reference_date: Optional[datetime] = None) -> pd.DataFrame:
+        """고객 정보 + 거래 목록으로 피처 벡터 계산 (DB 없이 사용 가능)"""
+        engineer = FeatureEngineer.from_metadata(self.metadata, reference_date)
+        features = engineer.transform_customer(
+            customer, transactions, self.categories, self.payment_methods
+        )
+        
+        vector = []
+        for name in self.feature_names:
+            value = features.get(name)
+            if name in self.categorical_levels:
+                # 학습 때 없던 범주/결측은 pd.Categorical과 동일하게 -1
+                vector.append(self.categorical_levels[name].get(value, -1))
+            elif value is None or (isinstance(value, float) and np.isnan(value)):
+                vector.append(0)
+            else:
+                vector.append(value)
+        
+        return pd.DataFrame([vector], columns=self.feature_names)
+
+
+def score_customer(db: Session, predictor, customer_id: str,
+                   reference_date: Optional[datetime] = None) -> Dict:
+    """
+    고객 1명의 이탈 점수 계산 (DB 변경 없음 - 예측 API 응답/캐시용)
+    
+    Args:
+        db: DB 세션
+        predictor: 학습된 ChurnPredictor (feature_metadata 필요)
+        customer_id: 고객 ID
+    """
+    X = OnlineFeatureBuilder.from_predictor(predictor).build(db, customer_id, reference_date)
+    prediction = predictor.predict_with_score(X).iloc[0]
+    customer = db.get(Customer, customer_id)
+    
+    return {
+        "customer_id": customer_id,
+        "churn_probability": round(float(prediction['churn_probability']), 4),
+        "risk_score": int(round(float(prediction['risk_score']))),
+        "lifecycle_stage": customer.lifecycle_stage,
+        "scored_at": datetime.now().isoformat()
+    }
+
+
+def refresh_customer_score(db: Session, predictor, customer_id: str,
+                           reference_date: Optional[datetime] = None) -> Dict:
+    """
+    고객 1명의 이탈 점수 재계산 및 DB 반영
+    
+    Args:
+        db: DB 세션 (커밋은 호출자 책임)
+        predictor: 학습된 ChurnPredictor (feature_metadata 필요)
+        customer_id: 고객 ID
+    """
+    start = time.perf_counter()
+    builder = OnlineFeatureBuilder.from_predictor(predictor)
+    X = builder.build(db, customer_id, reference_date)
+    feature_ms = (time.perf_counter() - start) * 1000
+    
+    prediction = predictor.predict_with_score(X).iloc[0]
+    risk_score = float(prediction['risk_score'])
+    
+    customer = db.get(Customer, customer_id)
+    customer.churn_probability = float(prediction['churn_probability'])
+    customer.risk_score = int(round(risk_score))
+    customer.risk_level = str(prediction['risk_level']).upper() if pd.notna(prediction['risk_level']) else 'LOW'
+    customer.last_prediction_date = datetime.now()
+    
+    # 고객 상세 문서용 SHAP 상위 요인 (설명기가 있는 모델만)
+    top_factors = None
+    if getattr(predictor, 'explainer', None) is not None:
+        top_factors = top_factors_from_explanation(predictor.explain(X, customer_id=0))
+        store_top_factors(db, customer_id, top_factors)
+    
+    logger.debug(f"Refreshed score for {customer_id} (features {feature_ms:.1f}ms)")
+    
+    return {
+        "customer_id": customer_id,
+        "churn_probability": round(customer.churn_probability, 4),
+        "risk_score": customer.risk_score,
+        "risk_level": customer.risk_level,
+        "lifecycle_stage": customer.lifecycle_stage,
+        "top_factors": top_factors,
+        "feature_time_ms": round(feature_ms, 2),
+        "scored_at": customer.last_prediction_date.isoformat()
+    }
@@ -0,0 +1,158 @@
+"""
+IBK 카드 고객 이탈 예측 - 키셋(커서) 페이지네이션
+OFFSET 없이 마지막 행의 (정렬 값, 고유 키) 다음부터 읽어 깊은 페이지도 인덱스 범위 스캔으로 처리
+
+- 정렬: (정렬 컬럼, 고유 키) 복합 정렬, NULL은 오름차순에서 마지막 (PostgreSQL B-tree 기본 순서)
+- 한 페이지 = 값 구간 + NULL 구간 → 각 구간이 (정렬 컬럼, 고유 키) 인덱스의 단순 범위 스캔
+- 커서: 정렬 기준/방향/마지막 값/키/페이지 번호를 담은 불투명 문자열 (base64url JSON)
+- OFFSET: 커서 없이 번호로 이동하는 얕은 페이지(PAGINATION_MAX_OFFSET_ROWS 이하)만 허용
+  (건너뛴 행 수만큼 인덱스를 읽으므로 깊은 페이지는 커서로 이어서 이동)
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import base64
+import binascii
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+# 커서 없이 페이지 번호로 건너뛸 수 있는 최대 행 수 (넘으면 커서 이동 또는 필터/정렬로 범위 축소)
+PAGINATION_MAX_OFFSET_ROWS = int(os.getenv("PAGINATION_MAX_OFFSET_ROWS", "2000"))
+
+
+class InvalidCursor(ValueError):
+    """디코딩할 수 없거나 현재 정렬과 맞지 않는 커서"""
+
+
+class PageTooDeep(ValueError):
+    """커서 없이 번호로 이동할 수 있는 범위(PAGINATION_MAX_OFFSET_ROWS)를 넘는 페이지"""
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, key: str, page: Optional[int] = None) -> str:
+    """마지막 행 기준 다음 페이지 커서 (page: 커서가 가리키는 페이지 번호)"""
+    if isinstance(value, datetime):
+        value = {'dt': value.isoformat()}
+    payload = {'s': sort_by, 'o': sort_order, 'v': value, 'k': key}
+    if page is not None:
+        payload['p'] = page
+    payload = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _cursor_payload(cursor: str) -> Dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(payload, dict):
+        raise InvalidCursor("Malformed cursor")
+    return payload
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, str]:
+    """
+    커서 → (마지막 정렬 값, 마지막 키)
+    
+    Raises:
+        InvalidCursor: 형식 오류 또는 다른 정렬 기준으로 만든 커서
+    """
+    payload = _cursor_payload(cursor)
+    try:
+        value, key = payload['v'], payload['k']
+    except KeyError:
+        raise InvalidCursor("Malformed cursor")
+    
+    if payload.get('s') != sort_by or payload.get('o') != sort_order:
+        raise InvalidCursor(f"Cursor was issued for sort {payload.get('s')} {payload.get('o')}")
+    if isinstance(value, dict):
+        value = datetime.fromisoformat(value['dt'])
+    return value, key
+
+
+def cursor_page(cursor: str) -> Optional[int]:
+    """커서가 가리키는 페이지 번호 (번호 없이 만든 커서는 None)"""
+    page = _cursor_payload(cursor).get('p')
+    return page if isinstance(page, int) and page >= 1 else None
+
+
+def offset_rows(page: int, page_size: int) -> int:
+    """
+    커서 없는 페이지 번호 이동의 OFFSET (얕은 페이지만)
+    
+    Raises:
+        PageTooDeep: PAGINATION_MAX_OFFSET_ROWS를 넘는 깊은 페이지
+    """
+    offset = (page - 1) * page_size
+    if offset > PAGINATION_MAX_OFFSET_ROWS:
+        raise PageTooDeep(
+            f"Page {page} is beyond the {PAGINATION_MAX_OFFSET_ROWS:,}-row offset limit; "
+            f"follow next_cursor or narrow the filter"
+        )
+    return offset
+
+
+def keyset_segments(query: Select, sort_column, key_column, descending: bool = False,
+                    after: Optional[Tuple[Any, str]] = None) -> List[Select]:
+    """
+    커서 다음 행을 읽는 구간별 SELECT (순서대로 실행해 limit이 찰 때까지 이어 붙임)
+    
+    Args:
+        query: 필터가 적용된 SELECT (ORDER BY/LIMIT 없음)
+        sort_column: 정렬 컬럼
+        key_column: 고유 키 (동순위 정렬 및 커서 위치)
+        descending: 내림차순 여부
+        after: decode_cursor 결과 (없으면 첫 페이지)
+    """
+    if sort_column is key_column:
+        order = key_column.desc() if descending else key_column.asc()
+        if after is not None:
+            query = query.where(key_column < after[1] if descending else key_column > after[1])
+        return [query.order_by(order)]
+    
+    values = query.where(sort_column.isnot(None))
+    nulls = query.where(sort_column.is_(None))
+    if descending:
+        values = values.order_by(sort_column.desc(), key_column.desc())
+        nulls = nulls.order_by(key_column.desc())
+    else:
+        values = values.order_by(sort_column.asc(), key_column.asc())
+        nulls = nulls.order_by(key_column.asc())
+    
+    position = tuple_(sort_column, key_column)
+    
+    if after is None:
+        # 오름차순: 값 → NULL / 내림차순: NULL → 값
+        return [nulls, values] if descending else [values, nulls]
+    
+    value, key = after
+    if value is None:
+        nulls = nulls.where(key_column < key if descending else key_column > key)
+        return [nulls, values] if descending else [nulls]
+    
+    values = values.where(position < tuple_(value, key) if descending else position > tuple_(value, key))
+    return [values] if descending else [values, nulls]
+
+
+def page_info(rows: List, limit: int, sort_by: str, sort_order: str, sort_attr: Optional[str], key_attr: str,
+              page: Optional[int] = None) -> Dict:
+    """
+    limit + 1 행을 읽은 결과 → 다음 페이지 여부/커서 (page: 현재 페이지 번호, 다음 커서에 page + 1로 기록)
+    
+    sort_attr가 None이면 (관련도순처럼 행 속성으로 위치를 표현할 수 없는 정렬) 커서 없이 has_more만 반환합니다.
+    
+    Returns:
+        {'rows': 현재 페이지 행, 'has_more', 'next_cursor'}
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows and sort_attr:
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_by, sort_order, getattr(last, sort_attr), getattr(last, key_attr),
+                                    page + 1 if page is not None else None)
+    return {'rows': rows, 'has_more': has_more, 'next_cursor': next_cursor}
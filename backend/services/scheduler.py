@@ -8,6 +8,7 @@ Copyright (c) 2024 (주)범온누리 이노베이션
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,6 +37,69 @@ async def generate_weekly_summary():
         logger.error(f"❌ Weekly report generation failed: {e}", exc_info=True)
 
 
+async def refresh_customer_summary(mode: str = 'incremental'):
+    """고객 요약 컬럼(최근 거래일, 3개월 거래 건수, 월평균 사용액, 예상 LTV) 갱신 후 고객 상세 캐시 무효화"""
+    try:
+        from services.cache import invalidate_customer_details
+        from services.db import engine
+        from services.customer_summary import run_summary_refresh
+        
+        logger.info(f"🧮 Refreshing customer summary ({mode})...")
+        # DB 집계는 동기 작업이므로 이벤트 루프를 막지 않도록 스레드에서 실행
+        await asyncio.to_thread(run_summary_refresh, engine, mode)
+        await invalidate_customer_details()
+    except Exception as e:
+        logger.error(f"❌ Customer summary refresh failed: {e}", exc_info=True)
+
+
+async def rebuild_segment_cube():
+    """세그먼트 큐브 전체 재계산 (ORM 밖 대량 변경 반영 / 증분 오차 보정)"""
+    try:
+        from services.db import engine
+        from services.segment_cube import rebuild_segment_cube as run_rebuild
+        
+        logger.info("🧊 Rebuilding segment cube...")
+        await asyncio.to_thread(run_rebuild, engine)
+    except Exception as e:
+        logger.error(f"❌ Segment cube rebuild failed: {e}", exc_info=True)
+
+
+async def optimize_database(full_analyze: bool = False):
+    """쿼리 플래너 통계 갱신 (SQLite: PRAGMA optimize / 주간 ANALYZE)"""
+    try:
+        from services.db import optimize_database as run_optimize
+        
+        await asyncio.to_thread(run_optimize, full_analyze)
+    except Exception as e:
+        logger.error(f"❌ Database optimize failed: {e}", exc_info=True)
+
+
+async def rebuild_transaction_rollup():
+    """월별 거래 집계 전체 재계산 (증분 반영 오차 보정) 후 고객 상세 캐시 무효화"""
+    try:
+        from services.cache import invalidate_customer_details
+        from services.db import engine
+        from services.transaction_rollup import rebuild_transaction_rollup as run_rebuild
+        
+        logger.info("📅 Rebuilding transaction rollup...")
+        await asyncio.to_thread(run_rebuild, engine)
+        await invalidate_customer_details()
+    except Exception as e:
+        logger.error(f"❌ Transaction rollup rebuild failed: {e}", exc_info=True)
+
+
+async def maintain_transaction_partitions():
+    """거래 월 파티션 정리 (다음 달 파티션 생성, 핫 구간 밖 이동, 보관 기간 밖 아카이브)"""
+    try:
+        from services.db import engine
+        from services.transaction_partitions import maintain_transaction_partitions as run_maintenance
+        
+        logger.info("🗄️  Maintaining transaction partitions...")
+        await asyncio.to_thread(run_maintenance, engine)
+    except Exception as e:
+        logger.error(f"❌ Transaction partition maintenance failed: {e}", exc_info=True)
+
+
 def start_scheduler():
     """스케줄러 시작"""
     # 일일 리포트 (매일 오전 8시)
@@ -56,10 +120,79 @@ def start_scheduler():
         replace_existing=True
     )
     
+    # 고객 요약 증분 갱신 (매일 새벽 2시)
+    scheduler.add_job(
+        refresh_customer_summary,
+        CronTrigger(hour=2, minute=0),
+        args=['incremental'],
+        id="customer_summary_incremental",
+        name="Incremental Customer Summary Refresh",
+        replace_existing=True
+    )
+    
+    # 고객 요약 전체 갱신 (매주 일요일 새벽 3시)
+    scheduler.add_job(
+        refresh_customer_summary,
+        CronTrigger(day_of_week='sun', hour=3, minute=0),
+        args=['full'],
+        id="customer_summary_full",
+        name="Full Customer Summary Refresh",
+        replace_existing=True
+    )
+    
+    # 세그먼트 큐브 재계산 (매일 새벽 3시 30분, 요약 갱신 이후)
+    scheduler.add_job(
+        rebuild_segment_cube,
+        CronTrigger(hour=3, minute=30),
+        id="segment_cube_rebuild",
+        name="Segment Cube Rebuild",
+        replace_existing=True
+    )
+    
+    # 월별 거래 집계 재계산 (매주 일요일 새벽 3시 15분, 전체 요약 갱신 이후)
+    scheduler.add_job(
+        rebuild_transaction_rollup,
+        CronTrigger(day_of_week='sun', hour=3, minute=15),
+        id="transaction_rollup_rebuild",
+        name="Transaction Rollup Rebuild",
+        replace_existing=True
+    )
+    
+    # DB 통계 갱신 (매일 새벽 4시 optimize, 매주 일요일 새벽 4시 30분 전체 ANALYZE)
+    scheduler.add_job(
+        optimize_database,
+        CronTrigger(hour=4, minute=0),
+        id="db_optimize",
+        name="Database Optimize",
+        replace_existing=True
+    )
+    scheduler.add_job(
+        optimize_database,
+        CronTrigger(day_of_week='sun', hour=4, minute=30),
+        args=[True],
+        id="db_analyze",
+        name="Database Full ANALYZE",
+        replace_existing=True
+    )
+    
+    # 거래 월 파티션 정리 (매월 1일 새벽 4시 15분)
+    scheduler.add_job(
+        maintain_transaction_partitions,
+        CronTrigger(day=1, hour=4, minute=15),
+        id="transaction_partitions",
+        name="Transaction Partition Maintenance",
+        replace_existing=True
+    )
+    
     scheduler.start()
     logger.info("✅ Scheduler started")
     logger.info("   - Daily report: Every day at 08:00")
     logger.info("   - Weekly summary: Every Monday at 09:00")
+    logger.info("   - Customer summary: incremental daily at 02:00, full every Sunday at 03:00")
+    logger.info("   - Segment cube rebuild: daily at 03:30")
+    logger.info("   - Transaction rollup rebuild: every Sunday at 03:15")
+    logger.info("   - Database optimize: daily at 04:00, full ANALYZE every Sunday at 04:30")
+    logger.info("   - Transaction partitions: monthly on the 1st at 04:15")
 
 
 def stop_scheduler():
@@ -0,0 +1,385 @@
+"""
+IBK 카드 고객 이탈 예측 - 고객 세그먼트 집계 큐브
+생애주기 x 위험 구간 x 연령대 x 지역 x 직업 x 카드 등급별 고객 수/이탈 수/이탈 확률 합계
+
+- 전체 재계산: customers GROUP BY 한 번으로 segment_cube 재작성 (적재 후, 매일 새벽 정합성 보정)
+- 증분 반영: 앱 세션(AppSession)으로 고객을 추가/수정/삭제하면 같은 트랜잭션 안에서 해당 셀에 증감분만 업서트
+- 조회: 큐브 전체를 프로세스 메모리 스냅샷으로 올리고 차원별 합계를 미리 계산 → 대시보드 통계는 dict 조회
+
+ORM을 거치지 않는 대량 UPDATE/INSERT(벌크 로더 등)는 증분 반영되지 않으므로 작업 후 rebuild_segment_cube를 호출합니다.
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import DateTime, and_, case, delete, event, func, inspect, literal, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.database import Customer, SegmentCube
+from services.app_session import AppSession
+
+logger = logging.getLogger(__name__)
+
+CUBE_DIMENSIONS = ('lifecycle_stage', 'risk_band', 'age_band', 'region', 'occupation', 'card_type')
+CUBE_MEASURES = ('customers', 'churned', 'probability_sum', 'probability_count')
+
+# 위험 구간 (churn_probability 하한, 높은 구간부터) - 이 구간에 들지 않으면 LOW, 점수가 없으면 UNSCORED
+RISK_BANDS = [('CRITICAL', 0.9), ('HIGH', 0.7), ('MEDIUM', 0.5)]
+UNSCORED_BAND = 'UNSCORED'
+
+# 연령대 (라벨, 최소, 최대) - 범위 밖/미상은 '기타'
+AGE_BANDS = [
+    ("20대", 20, 29),
+    ("30대", 30, 39),
+    ("40대", 40, 49),
+    ("50대", 50, 59),
+    ("60대+", 60, 100),
+]
+OTHER_AGE_BAND = '기타'
+
+# 큐브 셀 값을 바꾸는 고객 속성
+TRACKED_ATTRIBUTES = ('lifecycle_stage', 'churn_probability', 'age', 'region', 'occupation', 'card_type', 'churned')
+
+# 다른 워커/스케줄러가 갱신한 큐브를 다시 읽는 주기 (같은 프로세스의 변경은 커밋 즉시 반영)
+SEGMENT_CUBE_TTL_SECONDS = float(os.getenv("SEGMENT_CUBE_TTL_SECONDS", "5"))
+
+
+# ========================================
+# 셀 키 계산 (SQL / Python 동일 규칙)
+# ========================================
+
+def risk_band(probability: Optional[float]) -> str:
+    """churn_probability → 위험 구간 (고객 목록/상세의 risk_level과 같은 규칙)"""
+    if probability is None:
+        return UNSCORED_BAND
+    for band, lower in RISK_BANDS:
+        if probability >= lower:
+            return band
+    return 'LOW'
+
+
+def age_band(age: Optional[int]) -> str:
+    if age is not None:
+        for label, min_age, max_age in AGE_BANDS:
+            if min_age <= age <= max_age:
+                return label
+    return OTHER_AGE_BAND
+
+
+def _dimension_columns():
+    """customers 컬럼 → 큐브 차원 SQL 식 (CUBE_DIMENSIONS 순서)"""
+    customers = Customer.__table__.c
+    return [
+        func.coalesce(customers.lifecycle_stage, ''),
+        case((customers.churn_probability.is_(None), UNSCORED_BAND),
+             *[(customers.churn_probability >= lower, band) for band, lower in RISK_BANDS], else_='LOW'),
+        case(*[(and_(customers.age >= min_age, customers.age <= max_age), label)
+               for label, min_age, max_age in AGE_BANDS], else_=OTHER_AGE_BAND),
+        func.coalesce(customers.region, ''),
+        func.coalesce(customers.occupation, ''),
+        func.coalesce(customers.card_type, ''),
+    ]
+
+
+def customer_cell(values: Dict) -> Tuple[tuple, tuple]:
+    """고객 속성 → (셀 키, 측정값)"""
+    probability = values.get('churn_probability')
+    key = (
+        values.get('lifecycle_stage') or '',
+        risk_band(probability),
+        age_band(values.get('age')),
+        values.get('region') or '',
+        values.get('occupation') or '',
+        values.get('card_type') or '',
+    )
+    measures = (1, int(values.get('churned') or 0), float(probability or 0.0), int(probability is not None))
+    return key, measures
+
+
+# ========================================
+# 전체 재계산 / 증분 반영
+# ========================================
+
+def rebuild_segment_cube(engine: Engine) -> Dict:
+    """customers 전체에서 큐브 재작성 (한 트랜잭션)"""
+    start = time.perf_counter()
+    customers = Customer.__table__.c
+    dimensions = _dimension_columns()
+    
+    aggregate = select(
+        *dimensions,
+        func.count(),
+        func.coalesce(func.sum(customers.churned), 0),
+        func.coalesce(func.sum(customers.churn_probability), 0.0),
+        func.count(customers.churn_probability),
+        literal(datetime.utcnow(), DateTime),
+    ).group_by(*dimensions)
+    
+    cube = SegmentCube.__table__
+    with engine.begin() as conn:
+        conn.execute(delete(cube))
+        conn.execute(cube.insert().from_select([*CUBE_DIMENSIONS, *CUBE_MEASURES, 'updated_at'], aggregate))
+        cells, total = conn.execute(select(func.count(), func.coalesce(func.sum(cube.c.customers), 0))).one()
+    
+    invalidate_segment_cube()
+    seconds = time.perf_counter() - start
+    logger.info(f"✅ Segment cube rebuilt: {cells:,} cells / {total:,} customers in {seconds:.2f}s")
+    return {'cells': cells, 'customers': total, 'seconds': round(seconds, 2)}
+
+
+def ensure_segment_cube(engine: Engine) -> bool:
+    """큐브가 비어 있고 고객이 있으면 재계산 (앱 시작 시)"""
+    with engine.connect() as conn:
+        has_cube = conn.execute(select(SegmentCube.id).limit(1)).first() is not None
+        has_customers = conn.execute(select(Customer.customer_id).limit(1)).first() is not None
+    if has_cube or not has_customers:
+        return False
+    rebuild_segment_cube(engine)
+    return True
+
+
+def cube_upsert_statement(dialect: str):
+    """셀 키 충돌 시 측정값을 더하는 INSERT"""
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    cube = SegmentCube.__table__
+    stmt = insert(cube)
+    return stmt.on_conflict_do_update(
+        index_elements=[cube.c[dimension] for dimension in CUBE_DIMENSIONS],
+        set_={
+            **{measure: cube.c[measure] + stmt.excluded[measure] for measure in CUBE_MEASURES},
+            'updated_at': stmt.excluded.updated_at,
+        }
+    )
+
+
+def apply_cube_deltas(conn, deltas: Dict[tuple, list]):
+    """셀별 증감분 반영 (측정값이 0인 셀은 생략, 고객이 없어진 셀은 삭제)"""
+    now = datetime.utcnow()
+    rows = [
+        {**dict(zip(CUBE_DIMENSIONS, key)), **dict(zip(CUBE_MEASURES, measures)), 'updated_at': now}
+        for key, measures in deltas.items()
+        if any(measures)
+    ]
+    if not rows:
+        return
+    
+    conn.execute(cube_upsert_statement(conn.dialect.name), rows)
+    if any(row['customers'] < 0 for row in rows):
+        conn.execute(delete(SegmentCube.__table__).where(SegmentCube.__table__.c.customers <= 0))
+
+
+def _previous_values(customer: Customer) -> Dict:
+    """flush 직전(변경 전) 속성 값"""
+    state = inspect(customer)
+    values = {}
+    for attribute in TRACKED_ATTRIBUTES:
+        history = state.attrs[attribute].history
+        values[attribute] = history.deleted[0] if history.deleted else getattr(customer, attribute)
+    return values
+
+
+def _current_values(customer: Customer) -> Dict:
+    return {attribute: getattr(customer, attribute) for attribute in TRACKED_ATTRIBUTES}
+
+
+def _add_delta(deltas: Dict[tuple, list], values: Dict, sign: int):
+    key, measures = customer_cell(values)
+    cell = deltas[key]
+    for i, value in enumerate(measures):
+        cell[i] += sign * value
+
+
+def collect_customer_deltas(session: Session) -> Dict[tuple, list]:
+    """flush 대상 고객들의 셀 증감분"""
+    deltas = defaultdict(lambda: [0, 0, 0.0, 0])
+    
+    for obj in session.new:
+        if isinstance(obj, Customer):
+            _add_delta(deltas, _current_values(obj), +1)
+    
+    for obj in session.deleted:
+        if isinstance(obj, Customer):
+            _add_delta(deltas, _previous_values(obj), -1)
+    
+    for obj in session.dirty:
+        if isinstance(obj, Customer) and session.is_modified(obj):
+            previous, current = _previous_values(obj), _current_values(obj)
+            if customer_cell(previous) != customer_cell(current):
+                _add_delta(deltas, previous, -1)
+                _add_delta(deltas, current, +1)
+    
+    return deltas
+
+
+def _after_flush(session: Session, flush_context):
+    deltas = collect_customer_deltas(session)
+    if any(any(measures) for measures in deltas.values()):
+        apply_cube_deltas(session.connection(), deltas)
+        session.info['segment_cube_changed'] = True
+
+
+def _after_commit(session: Session):
+    if session.info.pop('segment_cube_changed', False):
+        invalidate_segment_cube()
+
+
+def _after_rollback(session: Session):
+    session.info.pop('segment_cube_changed', None)
+
+
+def register_segment_cube_listeners():
+    """앱 세션(AppSession) 이벤트 등록 (여러 번 호출해도 한 번만 등록)"""
+    if event.contains(AppSession, 'after_flush', _after_flush):
+        return
+    
+    # 값을 바꾸기 전에 기존 값을 로드해 두어야 이전 셀에서 차감 가능 (만료된 속성 포함)
+    for attribute in TRACKED_ATTRIBUTES:
+        event.listen(getattr(Customer, attribute), 'set', lambda target, value, oldvalue, initiator: value,
+                     active_history=True, retval=True)
+    event.listen(AppSession, 'after_flush', _after_flush)
+    event.listen(AppSession, 'after_commit', _after_commit)
+    event.listen(AppSession, 'after_soft_rollback', lambda session, previous_transaction: _after_rollback(session))
+
+
+register_segment_cube_listeners()
+
+
+# ========================================
+# 조회 스냅샷
+# ========================================
+
+@dataclass
+class SegmentMeasures:
+    """세그먼트 측정값"""
+    customers: int = 0
+    churned: int = 0
+    probability_sum: float = 0.0
+    probability_count: int = 0
+    
+    def add(self, customers: int, churned: int, probability_sum: float, probability_count: int):
+        self.customers += customers
+        self.churned += churned
+        self.probability_sum += probability_sum
+        self.probability_count += probability_count
+    
+    @property
+    def churn_rate(self) -> float:
+        """이탈 고객 비율 (%)"""
+        return round(self.churned / self.customers * 100, 1) if self.customers else 0.0
+    
+    @property
+    def avg_probability(self) -> Optional[float]:
+        return self.probability_sum / self.probability_count if self.probability_count else None
+
+
+class SegmentCubeSnapshot:
+    """
+    큐브 메모리 스냅샷
+    
+    - total: 전체 합계
+    - by(dimension): 차원 값별 합계 (미리 계산)
+    - slice(**filters): 임의 차원 조합 합계 (셀 순회)
+    """
+    
+    def __init__(self, rows: Iterable[tuple]):
+        self.cells = []
+        self.total = SegmentMeasures()
+        self.marginals = {dimension: defaultdict(SegmentMeasures) for dimension in CUBE_DIMENSIONS}
+        
+        for row in rows:
+            key, measures = tuple(row[:len(CUBE_DIMENSIONS)]), tuple(row[len(CUBE_DIMENSIONS):])
+            self.cells.append((key, measures))
+            self.total.add(*measures)
+            for dimension, value in zip(CUBE_DIMENSIONS, key):
+                self.marginals[dimension][value].add(*measures)
+        
+        self.loaded_at = datetime.now()
+    
+    @classmethod
+    def load(cls, conn) -> "SegmentCubeSnapshot":
+        cube = SegmentCube.__table__.c
+        return cls(conn.execute(select(*[cube[name] for name in CUBE_DIMENSIONS + CUBE_MEASURES])).all())
+    
+    def by(self, dimension: str) -> Dict[str, SegmentMeasures]:
+        if dimension not in self.marginals:
+            raise ValueError(f"Unknown cube dimension: {dimension}")
+        return self.marginals[dimension]
+    
+    def count(self, dimension: str, value: str) -> SegmentMeasures:
+        return self.by(dimension).get(value, SegmentMeasures())
+    
+    def slice(self, **filters) -> SegmentMeasures:
+        positions = [(CUBE_DIMENSIONS.index(dimension), value) for dimension, value in filters.items()]
+        result = SegmentMeasures()
+        for key, measures in self.cells:
+            if all(key[i] == value for i, value in positions):
+                result.add(*measures)
+        return result
+
+
+_snapshot: Optional[SegmentCubeSnapshot] = None
+_snapshot_generation = -1
+_snapshot_loaded_at = 0.0
+_generation = 0
+_snapshot_lock = threading.Lock()
+
+
+def invalidate_segment_cube():
+    """다음 조회 시 스냅샷 다시 로드"""
+    global _generation
+    _generation += 1
+
+
+def _cached_snapshot() -> Optional[SegmentCubeSnapshot]:
+    if (_snapshot is not None and _snapshot_generation == _generation
+            and time.monotonic() - _snapshot_loaded_at < SEGMENT_CUBE_TTL_SECONDS):
+        return _snapshot
+    return None
+
+
+def _store_snapshot(snapshot: SegmentCubeSnapshot, generation: int) -> SegmentCubeSnapshot:
+    global _snapshot, _snapshot_generation, _snapshot_loaded_at
+    _snapshot, _snapshot_generation, _snapshot_loaded_at = snapshot, generation, time.monotonic()
+    return snapshot
+
+
+def get_segment_cube(bind=None) -> SegmentCubeSnapshot:
+    """큐브 스냅샷 (동기, 만료 시 재로드)"""
+    snapshot = _cached_snapshot()
+    if snapshot is not None:
+        return snapshot
+    
+    if bind is None:
+        from services.db import engine as bind
+    
+    with _snapshot_lock:
+        generation = _generation
+        with bind.connect() as conn:
+            return _store_snapshot(SegmentCubeSnapshot.load(conn), generation)
+
+
+async def get_segment_cube_async() -> SegmentCubeSnapshot:
+    """큐브 스냅샷 (async 라우트용, 만료 시 비동기 엔진으로 재로드)"""
+    snapshot = _cached_snapshot()
+    if snapshot is not None:
+        return snapshot
+    
+    from services.db import get_async_engine
+    
+    generation = _generation
+    async with get_async_engine().connect() as conn:
+        snapshot = await conn.run_sync(SegmentCubeSnapshot.load)
+    return _store_snapshot(snapshot, generation)
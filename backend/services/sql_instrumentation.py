@@ -0,0 +1,294 @@
+"""
+IBK 카드 고객 이탈 예측 - SQL 계측
+요청마다 실행된 쿼리 수/DB 시간/느린 쿼리를 수집하고 N+1 패턴(같은 모양의 쿼리 반복)을 감지
+
+- 수집: SQLAlchemy before/after_cursor_execute (모든 엔진), 요청 컨텍스트(ContextVar)가 있을 때만 기록
+  async 세션/asyncio.to_thread/스레드풀 라우트도 컨텍스트가 전달되어 같은 요청으로 집계
+- 쿼리 모양: 리터럴/바인드 자리/IN 목록 길이를 정규화한 SQL (같은 모양 N회 이상 → N+1 의심)
+- 노출: DEBUG 모드에서만 /api/system/sql 진단 API (엔드포인트별 누적 + 최근 요청)와 응답 헤더
+  (정규화 SQL/엔드포인트별 시간이 드러나므로 운영에서는 노출하지 않고, 계측도 SQL_INSTRUMENTATION=true로 명시할 때만)
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+# 계측은 기본 DEBUG 모드에서만 (운영에서는 명시적으로 켤 때만)
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", str(DEBUG)).lower() == "true"
+# 진단 API는 인증이 없으므로 DEBUG 모드에서만 등록
+SQL_DIAGNOSTICS_ENABLED = SQL_INSTRUMENTATION and DEBUG
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", str(DEBUG)).lower() == "true"
+# 느린 쿼리 파라미터 기록 (고객 ID 등 개인정보 포함 가능 → 기본은 DEBUG 모드에서만)
+SQL_CAPTURE_PARAMETERS = os.getenv("SQL_CAPTURE_PARAMETERS", str(DEBUG)).lower() == "true"
+SQL_SLOW_QUERY_COUNT = int(os.getenv("SQL_SLOW_QUERY_COUNT", "5"))  # 요청당 보관할 느린 쿼리 수
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))  # 같은 모양 반복 횟수
+SQL_RECENT_REQUESTS = int(os.getenv("SQL_RECENT_REQUESTS", "200"))  # 진단 API 최근 요청 보관 수
+
+# 로그/진단 응답의 SQL, 파라미터 최대 길이
+STATEMENT_MAX_LENGTH = 2000
+PARAMETER_MAX_LENGTH = 500
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_BIND = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """
+    SQL → 쿼리 모양 (값만 다른 쿼리는 같은 모양)
+    
+    리터럴/바인드 자리는 ?, IN (?, ?, ...) 목록은 길이와 무관하게 (?...)
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _BIND.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("(?...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class RequestQueryStats:
+    """요청 1건의 쿼리 통계 (스레드 안전 - to_thread/스레드풀에서 동시에 기록될 수 있음)"""
+    
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.endpoint = path
+        self.started_at = time.time()
+        self.query_count = 0
+        self.db_ms = 0.0
+        self.shapes: Dict[str, List] = defaultdict(lambda: [0, 0.0])  # 모양 → [횟수, 시간 ms]
+        self._slowest: List[tuple] = []  # (ms, 순번, SQL, 파라미터) 최소 힙
+        self._lock = threading.Lock()
+    
+    def record(self, statement: str, parameters, elapsed_ms: float, executemany: bool):
+        shape = statement_shape(statement)
+        with self._lock:
+            self.query_count += 1
+            self.db_ms += elapsed_ms
+            counter = self.shapes[shape]
+            counter[0] += 1
+            counter[1] += elapsed_ms
+            
+            if len(self._slowest) < SQL_SLOW_QUERY_COUNT or elapsed_ms > self._slowest[0][0]:
+                if SQL_CAPTURE_PARAMETERS:
+                    params = _truncate(repr(parameters if not executemany else parameters[:3]), PARAMETER_MAX_LENGTH)
+                else:
+                    params = None
+                entry = (elapsed_ms, self.query_count, statement, params)
+                if len(self._slowest) < SQL_SLOW_QUERY_COUNT:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heapreplace(self._slowest, entry)
+    
+    def slowest(self) -> List[Dict]:
+        with self._lock:
+            entries = sorted(self._slowest, reverse=True)
+        return [
+            {"ms": round(ms, 3), "statement": _truncate(" ".join(statement.split()), STATEMENT_MAX_LENGTH),
+             "parameters": params}
+            for ms, _, statement, params in entries
+        ]
+    
+    def n_plus_one(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> List[Dict]:
+        """같은 모양이 threshold회 이상 반복된 쿼리 (반복 횟수 순)"""
+        with self._lock:
+            repeated = [(shape, count, ms) for shape, (count, ms) in self.shapes.items() if count >= threshold]
+        return [
+            {"statement": _truncate(shape, STATEMENT_MAX_LENGTH), "count": count, "ms": round(ms, 3)}
+            for shape, count, ms in sorted(repeated, key=lambda item: -item[1])
+        ]
+    
+    def summary(self) -> Dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "endpoint": self.endpoint,
+            "started_at": self.started_at,
+            "query_count": self.query_count,
+            "db_ms": round(self.db_ms, 3),
+            "distinct_statements": len(self.shapes),
+            "n_plus_one": self.n_plus_one(),
+            "slowest": self.slowest(),
+        }
+
+
+_current_request: ContextVar[Optional[RequestQueryStats]] = ContextVar("sql_request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestQueryStats]:
+    return _current_request.get()
+
+
+# ========================================
+# 커서 실행 이벤트
+# ========================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info.setdefault("sql_instrumentation_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    if stats is None:
+        return
+    starts = conn.info.get("sql_instrumentation_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    stats.record(statement, parameters, elapsed_ms, executemany)
+
+
+def _handle_error(exception_context):
+    # 실패한 쿼리는 after_cursor_execute가 호출되지 않으므로 시작 시각만 정리
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("sql_instrumentation_start"):
+        conn.info["sql_instrumentation_start"].pop()
+
+
+def register_sql_instrumentation():
+    """모든 엔진(동기/비동기 내부 엔진)에 계측 이벤트 등록 (여러 번 호출해도 한 번만 등록)"""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+
+# ========================================
+# 진단 집계
+# ========================================
+
+class QueryDiagnostics:
+    """엔드포인트별 누적 통계 + 최근 요청 (프로세스 로컬)"""
+    
+    def __init__(self, recent: int = SQL_RECENT_REQUESTS):
+        self.recent = deque(maxlen=recent)
+        self.endpoints: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, stats: RequestQueryStats) -> Dict:
+        summary = stats.summary()
+        key = f"{stats.method} {stats.endpoint}"
+        with self._lock:
+            endpoint = self.endpoints.setdefault(key, {
+                "requests": 0, "queries": 0, "db_ms": 0.0, "max_queries": 0, "n_plus_one_requests": 0
+            })
+            endpoint["requests"] += 1
+            endpoint["queries"] += stats.query_count
+            endpoint["db_ms"] += stats.db_ms
+            endpoint["max_queries"] = max(endpoint["max_queries"], stats.query_count)
+            endpoint["n_plus_one_requests"] += bool(summary["n_plus_one"])
+            self.recent.append(summary)
+        return summary
+    
+    def snapshot(self, limit: int = 50) -> Dict:
+        with self._lock:
+            endpoints = [
+                {
+                    "endpoint": key,
+                    **values,
+                    "db_ms": round(values["db_ms"], 3),
+                    "avg_queries": round(values["queries"] / values["requests"], 2),
+                    "avg_db_ms": round(values["db_ms"] / values["requests"], 3),
+                }
+                for key, values in self.endpoints.items()
+            ]
+            recent = list(self.recent)[-limit:][::-1]
+        
+        return {
+            "enabled": SQL_INSTRUMENTATION,
+            "n_plus_one_threshold": SQL_N_PLUS_ONE_THRESHOLD,
+            "capture_parameters": SQL_CAPTURE_PARAMETERS,
+            "endpoints": sorted(endpoints, key=lambda endpoint: -endpoint["db_ms"]),
+            "n_plus_one": [request for request in recent if request["n_plus_one"]],
+            "recent": recent,
+        }
+    
+    def reset(self):
+        with self._lock:
+            self.recent.clear()
+            self.endpoints.clear()
+
+
+diagnostics = QueryDiagnostics()
+
+
+def get_sql_diagnostics(limit: int = 50) -> Dict:
+    """진단 API 응답 (DB 시간 합계가 큰 엔드포인트 순, 최근 요청은 최신 순)"""
+    return diagnostics.snapshot(limit)
+
+
+def reset_sql_diagnostics():
+    diagnostics.reset()
+
+
+# ========================================
+# ASGI 미들웨어
+# ========================================
+
+class QueryInstrumentationMiddleware:
+    """
+    HTTP 요청마다 쿼리 통계 수집
+    
+    - 응답 헤더 (debug_headers): X-DB-Query-Count, X-DB-Time-Ms, X-DB-N-Plus-One
+    - N+1 의심 요청은 경고 로그
+    헤더는 응답 시작 시점까지 실행된 쿼리 기준입니다 (스트리밍 응답 이후 쿼리는 진단 API에만 반영).
+    """
+    
+    def __init__(self, app, debug_headers: bool = SQL_DEBUG_HEADERS):
+        self.app = app
+        self.debug_headers = debug_headers
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = RequestQueryStats(scope["method"], scope["path"])
+        token = _current_request.set(stats)
+        
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.debug_headers:
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-db-query-count", str(stats.query_count).encode()),
+                    (b"x-db-time-ms", f"{stats.db_ms:.1f}".encode()),
+                    (b"x-db-n-plus-one", str(len(stats.n_plus_one())).encode()),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_request.reset(token)
+            # 라우터가 채운 경로 템플릿 기준으로 집계 (/api/customers/{customer_id})
+            route = scope.get("route")
+            stats.endpoint = getattr(route, "path", None) or scope["path"]
+            summary = diagnostics.add(stats)
+            for pattern in summary["n_plus_one"]:
+                logger.warning(f"N+1 query suspected in {stats.method} {stats.endpoint}: "
+                               f"{pattern['count']}x {_truncate(pattern['statement'], 200)}")
@@ -0,0 +1,548 @@
+"""
+IBK 카드 고객 이탈 예측 - 거래 테이블 월 파티셔닝 / 콜드 데이터 아카이브
+거래가 계속 쌓여도 핫 테이블(transactions)과 그 인덱스 크기가 보관 기간만큼으로 유지되도록 월 단위로 분리
+
+- PostgreSQL: transactions를 transaction_date RANGE 파티션 테이블로 생성 (월 파티션 transactions_YYYYMM + DEFAULT)
+  - 기본 키는 파티션 키를 포함해야 하므로 (transaction_id, transaction_date)
+  - 기존 일반 테이블은 convert_to_partitioned로 명시적으로 변환 (앱 시작 시 자동 변환하지 않음)
+- SQLite: 네이티브 파티션이 없으므로 transactions는 핫 테이블(최근 TRANSACTION_HOT_MONTHS개월)로 두고
+  그 이전 달은 월별 테이블 transactions_YYYYMM으로 이동, 전체 조회는 뷰 transactions_all (UNION ALL)
+- 아카이브: TRANSACTION_RETENTION_MONTHS개월보다 오래된 달은 zstd parquet(컬럼형)으로 내보낸 뒤 DB에서 삭제
+  {TRANSACTION_ARCHIVE_DIR}/month=YYYY-MM/transactions.parquet (hive 파티션 → 월 단위로 읽기 범위 축소)
+  장기 피처/리포트는 load_transaction_history로 DB + 아카이브를 함께 조회
+
+고객 단위 조회(거래 내역, 온라인 피처, 요약 집계의 최근 거래일, 증분 적재의 기존 행)는 transaction_source()로
+월 테이블까지 포함해 조회합니다. 쓰기는 모두 transactions로 들어가며
+SQLite에서 이미 월 테이블로 옮긴 달의 늦게 도착한 거래는 다음 정리 작업 때 해당 월 테이블로 이동합니다.
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import logging
+import os
+import re
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+from sqlalchemy import Column, MetaData, Table, func, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from models.database import Customer, Transaction
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_PARTITIONING = os.getenv("TRANSACTION_PARTITIONING", "true").lower() == "true"  # PostgreSQL 신규 DB
+TRANSACTION_HOT_MONTHS = int(os.getenv("TRANSACTION_HOT_MONTHS", "13"))  # 12개월 요약 집계 구간 + 당월
+TRANSACTION_RETENTION_MONTHS = int(os.getenv("TRANSACTION_RETENTION_MONTHS", "24"))  # 이보다 오래된 달은 아카이브
+TRANSACTION_PARTITION_AHEAD_MONTHS = int(os.getenv("TRANSACTION_PARTITION_AHEAD_MONTHS", "3"))
+TRANSACTION_ARCHIVE_DIR = os.getenv("TRANSACTION_ARCHIVE_DIR", "data/archive/transactions")
+ARCHIVE_BATCH_SIZE = 100_000
+ARCHIVE_COMPRESSION = 'zstd'
+ARCHIVE_FILE_NAME = 'transactions.parquet'
+
+TRANSACTION_TABLE = 'transactions'
+ALL_TRANSACTIONS_VIEW = 'transactions_all'
+DEFAULT_PARTITION = 'transactions_default'
+PARTITION_PATTERN = re.compile(r'^transactions_(\d{4})(\d{2})$')
+
+TRANSACTION_COLUMNS = [column.name for column in Transaction.__table__.columns]
+
+# 핫 테이블 + 월 테이블 전체 조회용 뷰 (ORM 메타데이터와 분리 → create_all 대상 아님)
+all_transactions = Table(
+    ALL_TRANSACTIONS_VIEW, MetaData(),
+    *[Column(column.name, column.type) for column in Transaction.__table__.columns],
+)
+
+
+# ========================================
+# 월 계산
+# ========================================
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TRANSACTION_TABLE}_{month:%Y%m}"
+
+
+def _month_range(first: datetime, stop: datetime) -> List[datetime]:
+    """first 달부터 stop 달 직전까지"""
+    months = []
+    month = month_start(first)
+    while month < stop:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def _column_ddl(conn: Connection) -> str:
+    return ", ".join(
+        f"{column.name} {column.type.compile(conn.dialect)}{'' if column.nullable else ' NOT NULL'}"
+        for column in Transaction.__table__.columns
+    )
+
+
+# ========================================
+# 파티션 조회
+# ========================================
+
+def is_partitioned(bind) -> bool:
+    """transactions가 PostgreSQL 네이티브 파티션 테이블인지 (Engine 또는 Connection)"""
+    if bind.dialect.name != 'postgresql':
+        return False
+    with bind.connect() if isinstance(bind, Engine) else nullcontext(bind) as conn:
+        return conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+        ), {'name': TRANSACTION_TABLE}).first() is not None
+
+
+def list_partitions(conn: Connection) -> List[datetime]:
+    """월 파티션(PostgreSQL) / 월 테이블(SQLite) 목록 (오래된 달부터)"""
+    if conn.dialect.name == 'postgresql':
+        names = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name AND pg_table_is_visible(p.oid)"
+        ), {'name': TRANSACTION_TABLE}).scalars()
+    else:
+        names = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars()
+    
+    months = []
+    for name in names:
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            months.append(datetime(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def has_month_tables(conn) -> bool:
+    """SQLite 월 테이블(핫 구간에서 옮긴 달)이 있는지 (Connection 또는 Session)"""
+    return conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+        "AND name GLOB 'transactions_[0-9][0-9][0-9][0-9][0-9][0-9]' LIMIT 1"
+    )).first() is not None
+
+
+def transaction_source(conn) -> Table:
+    """
+    고객 거래 전체 조회 대상 (Connection 또는 Session)
+    
+    - SQLite에 월 테이블이 있으면 transactions_all 뷰 (핫 테이블 + 월 테이블, 고객 조건은 각 테이블 인덱스로 전달)
+    - 그 외에는 transactions (PostgreSQL 파티션 테이블은 부모 테이블 조회가 모든 파티션 포함)
+    아카이브(parquet)로 내보낸 달은 포함하지 않습니다 - 필요하면 load_transaction_history.
+    """
+    dialect = conn.get_bind().dialect if isinstance(conn, Session) else conn.dialect
+    if dialect.name != 'postgresql' and has_month_tables(conn):
+        return all_transactions
+    return Transaction.__table__
+
+
+def _partition_table(month: datetime) -> Table:
+    return Table(partition_name(month), MetaData(),
+                 *[Column(column.name, column.type) for column in Transaction.__table__.columns])
+
+
+def month_tables(conn) -> List[Table]:
+    """SQLite 월 테이블 (최근 달부터, PostgreSQL은 빈 목록 - 파티션은 부모 테이블 조회에 포함)"""
+    dialect = conn.get_bind().dialect if isinstance(conn, Session) else conn.dialect
+    if dialect.name == 'postgresql':
+        return []
+    return [_partition_table(month) for month in reversed(list_partitions(conn))]
+
+
+def delete_from_month_tables(conn: Connection, rows: Iterable) -> int:
+    """
+    SQLite 월 테이블에 있는 거래 삭제 (rows: transaction_id, transaction_date를 가진 매핑)
+    
+    증분 적재는 핫 테이블에서만 transaction_id 충돌을 검사하므로, 월 테이블로 옮긴 거래를 다시 받으면
+    이전 행을 먼저 지워야 같은 거래가 두 행으로 남지 않습니다.
+    """
+    months = set(list_partitions(conn))
+    by_month: Dict[datetime, List[str]] = {}
+    for row in rows:
+        month = month_start(row['transaction_date'])
+        if month in months:
+            by_month.setdefault(month, []).append(row['transaction_id'])
+    
+    deleted = 0
+    for month, transaction_ids in by_month.items():
+        table = _partition_table(month)
+        deleted += conn.execute(table.delete().where(table.c.transaction_id.in_(transaction_ids))).rowcount
+    return deleted
+
+
+# ========================================
+# PostgreSQL 네이티브 파티션
+# ========================================
+
+def _create_partitioned_table(conn: Connection, name: str = TRANSACTION_TABLE):
+    conn.exec_driver_sql(
+        f"CREATE TABLE {name} ({_column_ddl(conn)}, "
+        f"PRIMARY KEY (transaction_id, transaction_date), "
+        f"FOREIGN KEY (customer_id) REFERENCES customers (customer_id)) "
+        f"PARTITION BY RANGE (transaction_date)"
+    )
+    conn.exec_driver_sql(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {name} DEFAULT")
+
+
+def create_transaction_storage(engine: Engine) -> bool:
+    """
+    PostgreSQL 신규 DB: transactions를 파티션 테이블로 생성 (init_db에서 create_all 전에 호출)
+    
+    보조 인덱스는 create_all/ensure_indexes가 부모 테이블에 만들고 모든 파티션에 전파됩니다.
+    """
+    if engine.dialect.name != 'postgresql' or not TRANSACTION_PARTITIONING:
+        return False
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT to_regclass(:name)"), {'name': TRANSACTION_TABLE}).scalar() is not None:
+            return False
+        Customer.__table__.create(conn, checkfirst=True)
+        _create_partitioned_table(conn)
+    logger.info("✅ Created partitioned transactions table")
+    return True
+
+
+def _create_month_partition(conn: Connection, month: datetime) -> bool:
+    name = partition_name(month)
+    if conn.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar() is not None:
+        return False
+    conn.exec_driver_sql(
+        f"CREATE TABLE {name} PARTITION OF {TRANSACTION_TABLE} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+    )
+    return True
+
+
+def _drain_default_partition(conn: Connection) -> List[datetime]:
+    """DEFAULT 파티션에 들어간 행을 월 파티션으로 이동 (해당 월 파티션을 만들 수 있도록 잠시 분리)"""
+    months = [month_start(value) for value in conn.exec_driver_sql(
+        f"SELECT DISTINCT date_trunc('month', transaction_date) FROM {DEFAULT_PARTITION}"
+    ).scalars()]
+    if not months:
+        return []
+    
+    conn.exec_driver_sql(f"ALTER TABLE {TRANSACTION_TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+    for month in sorted(months):
+        _create_month_partition(conn, month)
+    conn.exec_driver_sql(f"INSERT INTO {TRANSACTION_TABLE} SELECT * FROM {DEFAULT_PARTITION}")
+    conn.exec_driver_sql(f"TRUNCATE {DEFAULT_PARTITION}")
+    conn.exec_driver_sql(f"ALTER TABLE {TRANSACTION_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    return sorted(months)
+
+
+def convert_to_partitioned(engine: Engine) -> Dict:
+    """
+    기존 일반 transactions 테이블 → 월 파티션 테이블 (PostgreSQL, 한 트랜잭션)
+    
+    데이터 범위의 월 파티션을 만든 뒤 행을 복사하고 기존 테이블을 삭제합니다.
+    복사하는 동안 transactions 쓰기가 막히므로 적재/배치가 없는 시간에 실행합니다.
+    """
+    if engine.dialect.name != 'postgresql':
+        raise ValueError("Native partitioning requires PostgreSQL")
+    if is_partitioned(engine):
+        return {'converted': False, 'rows': 0, 'partitions': []}
+    
+    start = time.perf_counter()
+    legacy = f"{TRANSACTION_TABLE}_unpartitioned"
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP VIEW IF EXISTS {ALL_TRANSACTIONS_VIEW}")
+        conn.exec_driver_sql(f"ALTER TABLE {TRANSACTION_TABLE} RENAME TO {legacy}")
+        conn.exec_driver_sql(f"ALTER TABLE {legacy} RENAME CONSTRAINT {TRANSACTION_TABLE}_pkey TO {legacy}_pkey")
+        for index in Transaction.__table__.indexes:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+        
+        _create_partitioned_table(conn)
+        first, last = conn.exec_driver_sql(f"SELECT min(transaction_date), max(transaction_date) FROM {legacy}").first()
+        months = _month_range(first, add_months(month_start(last), 1)) if first else []
+        for month in months:
+            _create_month_partition(conn, month)
+        
+        rows = conn.exec_driver_sql(
+            f"INSERT INTO {TRANSACTION_TABLE} ({', '.join(TRANSACTION_COLUMNS)}) "
+            f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM {legacy}"
+        ).rowcount
+        conn.exec_driver_sql(f"DROP TABLE {legacy}")
+        for index in Transaction.__table__.indexes:
+            index.create(conn)
+        refresh_transaction_view(conn)
+        conn.exec_driver_sql(f"ANALYZE {TRANSACTION_TABLE}")
+    
+    logger.info(f"✅ Converted transactions to {len(months)} monthly partitions "
+                f"({rows:,} rows, {time.perf_counter() - start:.1f}s)")
+    return {'converted': True, 'rows': rows, 'partitions': [f"{month:%Y-%m}" for month in months]}
+
+
+# ========================================
+# SQLite 월 테이블 + 뷰
+# ========================================
+
+def _move_month_to_table(conn: Connection, month: datetime) -> int:
+    """핫 테이블의 한 달치 행을 월 테이블로 이동 (같은 transaction_id는 최신 행으로 교체)"""
+    name = partition_name(month)
+    conn.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {name} ({_column_ddl(conn)}, PRIMARY KEY (transaction_id))"
+    )
+    conn.exec_driver_sql(
+        f"CREATE INDEX IF NOT EXISTS idx_{name}_customer_date ON {name} (customer_id, transaction_date)"
+    )
+    
+    hot = Transaction.__table__
+    condition = (hot.c.transaction_date >= month) & (hot.c.transaction_date < add_months(month, 1))
+    conn.execute(
+        _partition_table(month).insert().prefix_with('OR REPLACE')
+        .from_select(TRANSACTION_COLUMNS, select(*hot.columns).where(condition))
+    )
+    return conn.execute(hot.delete().where(condition)).rowcount
+
+
+def refresh_transaction_view(conn: Connection):
+    """전체 거래 뷰 transactions_all 재생성 (월 테이블이 추가/삭제되면 호출)"""
+    columns = ', '.join(TRANSACTION_COLUMNS)
+    sources = [TRANSACTION_TABLE]
+    if conn.dialect.name != 'postgresql':
+        sources += [partition_name(month) for month in reversed(list_partitions(conn))]
+    
+    body = ' UNION ALL '.join(f"SELECT {columns} FROM {source}" for source in sources)
+    if conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql(f"CREATE OR REPLACE VIEW {ALL_TRANSACTIONS_VIEW} AS {body}")
+    else:
+        conn.exec_driver_sql(f"DROP VIEW IF EXISTS {ALL_TRANSACTIONS_VIEW}")
+        conn.exec_driver_sql(f"CREATE VIEW {ALL_TRANSACTIONS_VIEW} AS {body}")
+
+
+def drop_month_tables(conn: Connection):
+    """SQLite 월 테이블 삭제 (전체 재적재 전, PostgreSQL 파티션은 부모 테이블 DELETE로 비워짐)"""
+    if conn.dialect.name == 'postgresql':
+        return
+    for month in list_partitions(conn):
+        conn.exec_driver_sql(f"DROP TABLE {partition_name(month)}")
+    refresh_transaction_view(conn)
+
+
+def ensure_transaction_view(engine: Engine):
+    """transactions_all 뷰가 없으면 생성 (init_db)"""
+    with engine.begin() as conn:
+        if engine.dialect.name == 'postgresql':
+            exists = conn.execute(text("SELECT to_regclass(:name)"), {'name': ALL_TRANSACTIONS_VIEW}).scalar()
+        else:
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = :name"),
+                                  {'name': ALL_TRANSACTIONS_VIEW}).first()
+        if exists is None:
+            refresh_transaction_view(conn)
+
+
+# ========================================
+# 아카이브 (zstd parquet)
+# ========================================
+
+def archive_path(month: datetime, archive_dir: Optional[str] = None) -> Path:
+    return Path(archive_dir or TRANSACTION_ARCHIVE_DIR) / f"month={month:%Y-%m}" / ARCHIVE_FILE_NAME
+
+
+def _archive_schema():
+    import pyarrow as pa
+    
+    return pa.schema([
+        ('transaction_id', pa.string()),
+        ('customer_id', pa.string()),
+        ('transaction_date', pa.timestamp('us')),
+        ('amount', pa.int64()),
+        ('category', pa.string()),
+        ('payment_method', pa.string()),
+        ('merchant_type', pa.string()),
+        ('created_at', pa.timestamp('us')),
+    ])
+
+
+def archive_month(engine: Engine, month: datetime, archive_dir: Optional[str] = None) -> int:
+    """
+    월 파티션/월 테이블을 parquet로 내보내고 DB에서 삭제
+    
+    임시 파일에 쓴 뒤 행 수를 확인하고 이름을 바꿉니다. 삭제 전에 실패하면 다음 실행 때 다시 내보냅니다.
+    
+    Returns:
+        아카이브한 행 수
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    table = _partition_table(month)
+    target = archive_path(month, archive_dir)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_suffix('.parquet.tmp')
+    schema = _archive_schema()
+    
+    rows = 0
+    with engine.connect() as conn:
+        expected = conn.execute(select(func.count()).select_from(table)).scalar()
+        result = conn.execution_options(stream_results=True).execute(
+            select(table).order_by(table.c.customer_id, table.c.transaction_date)
+        )
+        with pq.ParquetWriter(temp, schema, compression=ARCHIVE_COMPRESSION) as writer:
+            for chunk in result.partitions(ARCHIVE_BATCH_SIZE):
+                frame = pd.DataFrame(chunk, columns=TRANSACTION_COLUMNS)
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+                rows += len(frame)
+    
+    if rows != expected:
+        temp.unlink(missing_ok=True)
+        raise RuntimeError(f"Archive row count mismatch for {month:%Y-%m}: {rows} != {expected}")
+    os.replace(temp, target)
+    
+    with engine.begin() as conn:
+        if engine.dialect.name == 'postgresql':
+            conn.exec_driver_sql(f"ALTER TABLE {TRANSACTION_TABLE} DETACH PARTITION {table.name}")
+        conn.exec_driver_sql(f"DROP TABLE {table.name}")
+        if engine.dialect.name != 'postgresql':
+            refresh_transaction_view(conn)
+    
+    logger.info(f"   Archived {month:%Y-%m}: {rows:,} rows → {target}")
+    return rows
+
+
+def list_archived_months(archive_dir: Optional[str] = None) -> List[datetime]:
+    root = Path(archive_dir or TRANSACTION_ARCHIVE_DIR)
+    months = []
+    for path in root.glob(f"month=*/{ARCHIVE_FILE_NAME}"):
+        months.append(datetime.strptime(path.parent.name.split('=', 1)[1], '%Y-%m'))
+    return sorted(months)
+
+
+def read_archived_transactions(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                               customer_ids: Optional[Iterable[str]] = None,
+                               columns: Optional[List[str]] = None,
+                               archive_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    아카이브된 거래 조회 (start <= transaction_date < end)
+    
+    month 파티션 디렉토리와 row group 통계로 기간/고객 밖의 데이터는 읽지 않습니다.
+    """
+    import pyarrow.dataset as ds
+    
+    columns = columns or TRANSACTION_COLUMNS
+    root = Path(archive_dir or TRANSACTION_ARCHIVE_DIR)
+    if not list_archived_months(str(root)):
+        return pd.DataFrame(columns=columns)
+    
+    dataset = ds.dataset(root, format='parquet', partitioning='hive', exclude_invalid_files=True)
+    condition = None
+    
+    def both(expression):
+        return expression if condition is None else condition & expression
+    
+    if start is not None:
+        condition = both((ds.field('month') >= f"{start:%Y-%m}") & (ds.field('transaction_date') >= start))
+    if end is not None:
+        condition = both((ds.field('month') <= f"{end:%Y-%m}") & (ds.field('transaction_date') < end))
+    if customer_ids is not None:
+        condition = both(ds.field('customer_id').isin(list(customer_ids)))
+    
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def load_transaction_history(engine: Engine, start: datetime, end: Optional[datetime] = None,
+                             customer_ids: Optional[Iterable[str]] = None,
+                             columns: Optional[List[str]] = None,
+                             archive_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    장기 구간 거래 조회 (장기 피처/리포트용): DB(transactions_all) + 아카이브
+    
+    아카이브는 조회 시작이 DB에 남은 가장 오래된 달보다 앞설 때만 읽습니다.
+    """
+    columns = columns or TRANSACTION_COLUMNS
+    customer_ids = list(customer_ids) if customer_ids is not None else None
+    
+    query = select(*[all_transactions.c[name] for name in columns]).where(all_transactions.c.transaction_date >= start)
+    if end is not None:
+        query = query.where(all_transactions.c.transaction_date < end)
+    if customer_ids is not None:
+        query = query.where(all_transactions.c.customer_id.in_(customer_ids))
+    
+    with engine.connect() as conn:
+        frames = [pd.DataFrame(conn.execute(query).all(), columns=columns)]
+    
+    archived = [month for month in list_archived_months(archive_dir) if add_months(month, 1) > start]
+    if archived and (end is None or archived[0] < end):
+        frames.insert(0, read_archived_transactions(start, end, customer_ids, columns, archive_dir))
+    
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    history = pd.concat(frames, ignore_index=True)
+    if 'transaction_date' in columns:
+        history = history.sort_values('transaction_date', ignore_index=True)
+    return history
+
+
+# ========================================
+# 정리 작업 (월 1회)
+# ========================================
+
+def maintain_transaction_partitions(engine: Engine, reference_date: Optional[datetime] = None,
+                                    hot_months: int = TRANSACTION_HOT_MONTHS,
+                                    retention_months: int = TRANSACTION_RETENTION_MONTHS,
+                                    archive_dir: Optional[str] = None) -> Dict:
+    """
+    월 파티션 정리
+    
+    - PostgreSQL: 다음 TRANSACTION_PARTITION_AHEAD_MONTHS개월 파티션 미리 생성, DEFAULT 파티션 행 분배
+    - SQLite: 핫 구간(hot_months)보다 오래된 달을 월 테이블로 이동 + 뷰 재생성
+    - 공통: 보관 기간(retention_months)보다 오래된 달을 parquet로 아카이브 후 삭제
+    
+    Args:
+        reference_date: 기준 시각 (기본: 최근 거래일 → 과거 데이터를 적재한 환경에서도 구간이 데이터 기준)
+    
+    Returns:
+        {'reference_month', 'created', 'moved', 'archived', 'seconds'}
+    """
+    start = time.perf_counter()
+    postgres = engine.dialect.name == 'postgresql'
+    if postgres and not is_partitioned(engine):
+        logger.warning("⚠️  transactions is not partitioned, run scripts/partition_transactions.py --convert")
+        return {'reference_month': None, 'created': [], 'moved': {}, 'archived': {}, 'seconds': 0.0}
+    
+    with engine.connect() as conn:
+        if reference_date is None:
+            reference_date = conn.execute(select(func.max(Transaction.transaction_date))).scalar() or datetime.utcnow()
+        oldest = conn.execute(select(func.min(Transaction.transaction_date))).scalar()
+    
+    current = month_start(reference_date)
+    hot_start = add_months(current, -(hot_months - 1))
+    retention_start = add_months(current, -(retention_months - 1))
+    created, moved, archived = [], {}, {}
+    
+    with engine.begin() as conn:
+        if postgres:
+            created += [f"{month:%Y-%m}" for month in _drain_default_partition(conn)]
+            for month in _month_range(current, add_months(current, TRANSACTION_PARTITION_AHEAD_MONTHS + 1)):
+                if _create_month_partition(conn, month):
+                    created.append(f"{month:%Y-%m}")
+        elif oldest is not None and oldest < hot_start:
+            for month in _month_range(oldest, hot_start):
+                rows = _move_month_to_table(conn, month)
+                if rows:
+                    moved[f"{month:%Y-%m}"] = rows
+        refresh_transaction_view(conn)
+    
+    with engine.connect() as conn:
+        expired = [month for month in list_partitions(conn) if month < retention_start]
+    for month in expired:
+        archived[f"{month:%Y-%m}"] = archive_month(engine, month, archive_dir)
+    
+    seconds = round(time.perf_counter() - start, 2)
+    logger.info(f"✅ Transaction partitions maintained: {len(created)} created, {len(moved)} moved, "
+                f"{len(archived)} archived ({seconds}s)")
+    return {'reference_month': f"{current:%Y-%m}", 'created': created, 'moved': moved,
+            'archived': archived, 'seconds': seconds}
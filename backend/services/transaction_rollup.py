@@ -0,0 +1,279 @@
+"""
+IBK 카드 고객 이탈 예측 - 월별 거래 집계 (고객 x 월 x 카테고리)
+고객 상세 월별 추이/리포트 거래 통계/장기 구간 피처가 거래 원본 대신 고객당 수백 행 이하의 집계를 읽도록 유지
+
+- 전체 재계산: transactions_all GROUP BY 한 번으로 재작성 (벌크 적재 후, 매주 정합성 보정)
+  아카이브되어 DB에 원본이 없는 달의 집계는 그대로 유지
+- 증분 반영: 일별 적재 배치마다 새 행(+)과 덮어쓴 기존 행(-)의 차이만 같은 트랜잭션에서 업서트
+
+ORM을 거치지 않는 대량 적재(벌크 로더 등)는 작업 후 rebuild_transaction_rollup을 호출합니다.
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import pandas as pd
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.engine import Engine
+
+from models.database import Transaction, TransactionMonthly
+from services.transaction_partitions import (
+    add_months, all_transactions, ensure_transaction_view, list_archived_months, month_start
+)
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_KEYS = ('customer_id', 'month', 'category')
+ROLLUP_MEASURES = ('transaction_count', 'total_amount')
+
+# 장기 구간 피처 윈도우 (개월)
+LONG_WINDOW_MONTHS = (6, 12, 24)
+
+# 고객 ID IN 목록 크기 (SQLite 바인드 변수 제한 이하)
+ROLLUP_CHUNK_SIZE = 500
+
+
+def month_expression(column, dialect: str):
+    """거래 시각 → 월 첫날 SQL 식 (SQLite는 DateTime 저장 형식과 같은 문자열)"""
+    if dialect == 'postgresql':
+        return func.date_trunc('month', column)
+    return func.strftime('%Y-%m-01 00:00:00.000000', column)
+
+
+# ========================================
+# 전체 재계산 / 증분 반영
+# ========================================
+
+def rebuild_transaction_rollup(engine: Engine, archive_dir: Optional[str] = None) -> Dict:
+    """DB에 남아 있는 거래 전체에서 집계 재작성 (아카이브된 달의 집계는 유지, 한 트랜잭션)"""
+    # customer_360이 이 모듈의 조회 함수를 사용하므로 지연 import
+    from services.customer_360 import invalidate_customer_360_range
+    
+    start = time.perf_counter()
+    ensure_transaction_view(engine)
+    source = all_transactions.c
+    month = month_expression(source.transaction_date, engine.dialect.name)
+    category = func.coalesce(source.category, '')
+    
+    aggregate = select(
+        source.customer_id, month, category, func.count(), func.coalesce(func.sum(source.amount), 0)
+    ).group_by(source.customer_id, month, category)
+    
+    rollup = TransactionMonthly.__table__
+    archived = list_archived_months(archive_dir)
+    with engine.begin() as conn:
+        conn.execute(delete(rollup).where(rollup.c.month.notin_(archived)) if archived else delete(rollup))
+        conn.execute(rollup.insert().from_select([*ROLLUP_KEYS, *ROLLUP_MEASURES], aggregate))
+        invalidate_customer_360_range(conn)
+        rows, total = conn.execute(select(func.count(), func.coalesce(func.sum(rollup.c.transaction_count), 0))).one()
+    
+    seconds = time.perf_counter() - start
+    logger.info(f"✅ Transaction rollup rebuilt: {rows:,} rows / {total:,} transactions in {seconds:.2f}s")
+    return {'rows': rows, 'transactions': total, 'seconds': round(seconds, 2)}
+
+
+def ensure_transaction_rollup(engine: Engine) -> bool:
+    """집계가 비어 있고 거래가 있으면 재계산 (앱 시작 시)"""
+    with engine.connect() as conn:
+        has_rollup = conn.execute(select(TransactionMonthly.customer_id).limit(1)).first() is not None
+        has_transactions = conn.execute(select(Transaction.transaction_id).limit(1)).first() is not None
+    if has_rollup or not has_transactions:
+        return False
+    rebuild_transaction_rollup(engine)
+    return True
+
+
+def rollup_key(row: Mapping) -> tuple:
+    """거래 행 → (customer_id, 월 첫날, 카테고리) - 카테고리 NULL/NaN(CSV 빈 값)은 ''"""
+    date = pd.Timestamp(row['transaction_date']).to_pydatetime()
+    category = row.get('category')
+    return str(row['customer_id']), month_start(date), category if isinstance(category, str) else ''
+
+
+def rollup_deltas(added: Iterable[Mapping] = (), removed: Iterable[Mapping] = ()) -> Dict[tuple, list]:
+    """추가된 거래(+)/덮어쓰거나 삭제된 거래(-) → 집계 키별 [건수, 금액] 증감분"""
+    deltas = defaultdict(lambda: [0, 0])
+    for rows, sign in ((added, 1), (removed, -1)):
+        for row in rows:
+            delta = deltas[rollup_key(row)]
+            delta[0] += sign
+            delta[1] += sign * int(row['amount'] or 0)
+    return dict(deltas)
+
+
+def rollup_upsert_statement(dialect: str):
+    """집계 키 충돌 시 측정값을 더하는 INSERT"""
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    rollup = TransactionMonthly.__table__
+    stmt = insert(rollup)
+    return stmt.on_conflict_do_update(
+        index_elements=[rollup.c[key] for key in ROLLUP_KEYS],
+        set_={measure: rollup.c[measure] + stmt.excluded[measure] for measure in ROLLUP_MEASURES}
+    )
+
+
+def apply_rollup_deltas(conn, deltas: Dict[tuple, list]):
+    """키별 증감분 반영 (변화 없는 키는 생략, 건수가 0 이하가 된 키는 삭제)"""
+    rows = [
+        {**dict(zip(ROLLUP_KEYS, key)), **dict(zip(ROLLUP_MEASURES, measures))}
+        for key, measures in deltas.items()
+        if any(measures)
+    ]
+    if not rows:
+        return
+    
+    conn.execute(rollup_upsert_statement(conn.dialect.name), rows)
+    decreased = [tuple(row[key] for key in ROLLUP_KEYS) for row in rows if row['transaction_count'] < 0]
+    rollup = TransactionMonthly.__table__
+    for start in range(0, len(decreased), ROLLUP_CHUNK_SIZE):
+        conn.execute(delete(rollup).where(
+            tuple_(*[rollup.c[key] for key in ROLLUP_KEYS]).in_(decreased[start:start + ROLLUP_CHUNK_SIZE]),
+            rollup.c.transaction_count <= 0,
+        ))
+
+
+# ========================================
+# 조회
+# ========================================
+
+def customer_rollup_query(customer_id: str):
+    """고객 1명의 집계 행 (기본 키 범위 조회, 월 순)"""
+    rollup = TransactionMonthly.__table__.c
+    return (
+        select(rollup.month, rollup.category, rollup.transaction_count, rollup.total_amount)
+        .where(rollup.customer_id == customer_id)
+        .order_by(rollup.month)
+    )
+
+
+def latest_rollup_month_query():
+    """집계 전체의 최근 월 (월별 추이 기준월 - 거래가 끊긴 고객도 최근 달까지 0으로 표시)"""
+    return select(func.max(TransactionMonthly.__table__.c.month))
+
+
+def monthly_trend(rows: Sequence, reference_month: Optional[datetime], months: int = 12) -> List[Dict]:
+    """
+    고객 집계 행 → 기준월까지 최근 months개월 추이 (거래가 없는 달은 0)
+    
+    Returns:
+        [{'month': 'YYYY-MM', 'transaction_count', 'total_amount', 'categories': {카테고리: 금액}}]
+    """
+    if reference_month is None:
+        return []
+    reference_month = month_start(reference_month)
+    trend = {
+        add_months(reference_month, -offset): {'transaction_count': 0, 'total_amount': 0, 'categories': {}}
+        for offset in range(months - 1, -1, -1)
+    }
+    for row in rows:
+        bucket = trend.get(month_start(row.month))
+        if bucket is None:
+            continue
+        bucket['transaction_count'] += row.transaction_count
+        bucket['total_amount'] += row.total_amount
+        category = row.category or '기타'
+        bucket['categories'][category] = bucket['categories'].get(category, 0) + row.total_amount
+    
+    return [{'month': month.strftime('%Y-%m'), **values} for month, values in trend.items()]
+
+
+def rollup_totals(rows: Sequence, top_categories: int = 3) -> Dict:
+    """고객 집계 행 → 누적 거래 건수/금액, 금액 기준 상위 카테고리"""
+    by_category = defaultdict(int)
+    count = amount = 0
+    for row in rows:
+        count += row.transaction_count
+        amount += row.total_amount
+        by_category[row.category or '기타'] += row.total_amount
+    
+    favorites = sorted(by_category, key=lambda category: by_category[category], reverse=True)[:top_categories]
+    return {'transaction_count': count, 'total_amount': amount, 'favorite_categories': favorites}
+
+
+def period_activity(conn, period_start: datetime, period_end: datetime) -> Dict:
+    """
+    리포트 기간의 월별/카테고리별 거래 합계 (월 단위, 기간이 걸친 달 전체 포함)
+    
+    idx_transaction_monthly_month 커버링 인덱스 범위만 읽습니다.
+    """
+    rollup = TransactionMonthly.__table__.c
+    rows = conn.execute(
+        select(rollup.month, rollup.category, func.sum(rollup.transaction_count), func.sum(rollup.total_amount))
+        .where(rollup.month >= month_start(period_start), rollup.month <= period_end)
+        .group_by(rollup.month, rollup.category)
+    ).all()
+    
+    months, categories = defaultdict(lambda: [0, 0]), defaultdict(lambda: [0, 0])
+    for month, category, count, amount in rows:
+        for bucket in (months[month_start(month)], categories[category or '기타']):
+            bucket[0] += int(count)
+            bucket[1] += int(amount)
+    
+    total_amount = sum(amount for _, amount in categories.values())
+    return {
+        'months': [
+            {'month': month.strftime('%Y-%m'), 'transaction_count': count, 'total_amount': amount}
+            for month, (count, amount) in sorted(months.items())
+        ],
+        'categories': [
+            {'category': category, 'transaction_count': count, 'total_amount': amount,
+             'share': round(amount / total_amount, 4) if total_amount else 0.0}
+            for category, (count, amount) in sorted(categories.items(), key=lambda item: -item[1][1])
+        ],
+        'transaction_count': sum(count for count, _ in categories.values()),
+        'total_amount': total_amount,
+    }
+
+
+def long_window_features(conn, customer_ids: Iterable[str], reference_date: datetime,
+                         windows: Sequence[int] = LONG_WINDOW_MONTHS) -> pd.DataFrame:
+    """
+    월 단위 장기 구간 피처 (기준월 포함 최근 N개월)
+    
+    - txn_count_{N}mo / txn_amount_{N}mo: 거래 건수/금액
+    - active_months_{N}mo: 거래가 있었던 달 수
+    - category_count_{N}mo: 이용 카테고리 수
+    - months_since_last_txn: 기준월 - 마지막 거래 월 (가장 긴 윈도우 안에 거래가 없으면 NaN)
+    
+    일 단위 윈도우 피처(FeatureEngineer)는 원본 거래 기준이며, 이 피처는 아카이브된 기간까지 포함하는
+    장기 구간 분석용입니다.
+    """
+    customer_ids = sorted(set(customer_ids))
+    reference_month = month_start(reference_date)
+    first_month = add_months(reference_month, -(max(windows) - 1))
+    rollup = TransactionMonthly.__table__.c
+    
+    frames = []
+    for start in range(0, len(customer_ids), ROLLUP_CHUNK_SIZE):
+        chunk = customer_ids[start:start + ROLLUP_CHUNK_SIZE]
+        rows = conn.execute(
+            select(rollup.customer_id, rollup.month, rollup.category, rollup.transaction_count, rollup.total_amount)
+            .where(rollup.customer_id.in_(chunk), rollup.month >= first_month, rollup.month <= reference_month)
+        ).all()
+        frames.append(pd.DataFrame(rows, columns=[*ROLLUP_KEYS, *ROLLUP_MEASURES]))
+    
+    rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[*ROLLUP_KEYS, *ROLLUP_MEASURES])
+    rows['month'] = pd.to_datetime(rows['month'])
+    age = (reference_month.year - rows['month'].dt.year) * 12 + reference_month.month - rows['month'].dt.month
+    
+    features = pd.DataFrame(index=pd.Index(customer_ids, name='customer_id'))
+    for months in windows:
+        window = rows[age < months]
+        grouped = window.groupby('customer_id')
+        features[f'txn_count_{months}mo'] = grouped['transaction_count'].sum()
+        features[f'txn_amount_{months}mo'] = grouped['total_amount'].sum()
+        features[f'active_months_{months}mo'] = grouped['month'].nunique()
+        features[f'category_count_{months}mo'] = window[window['category'] != ''].groupby('customer_id')['category'].nunique()
+    
+    features = features.fillna(0).astype('int64')
+    features['months_since_last_txn'] = age.groupby(rows['customer_id']).min()
+    return features.reset_index()
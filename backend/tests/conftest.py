@@ -0,0 +1,28 @@
+"""
+pytest 공통 설정
+- 저장소 루트(backend.* 임포트)와 backend 디렉터리(services.* / models.* 임포트)를 경로에 추가
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+for path in (BACKEND_DIR.parent, BACKEND_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+@pytest.fixture(autouse=True)
+def reset_read_caches():
+    """테스트마다 다른 DB를 쓰므로 프로세스 로컬 조회 캐시(세그먼트 큐브, 카운트, 로컬 캐시 계층) 초기화"""
+    from services.cache import local_cache
+    from services.count_cache import invalidate_counts
+    from services.segment_cube import invalidate_segment_cube
+    
+    invalidate_segment_cube()
+    invalidate_counts()
+    local_cache.clear()
+    yield
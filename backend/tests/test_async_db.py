@@ -0,0 +1,127 @@
+"""
+Unit Tests for the async database layer and migrated routes
+"""
+
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, func, select
+
+import services.db as db_module
+from models.database import Base, Customer, Transaction
+from services.app_session import AppSession
+from api.routes import customers, dashboard, reports
+
+
+@pytest.fixture
+def database_url(tmp_path, monkeypatch):
+    """고객 100명 / 거래 300건 SQLite DB를 프로세스 공용 비동기 엔진으로 지정"""
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with AppSession(engine) as db:
+        for i in range(100):
+            db.add(Customer(
+                customer_id=f'C{i:08d}', join_date=datetime(2022, 1, 1), churned=int(i % 10 == 0),
+                churn_probability=i / 100, lifecycle_stage=['신규', '성장', '성숙', '쇠퇴'][i % 4]
+            ))
+        for i in range(300):
+            db.add(Transaction(
+                transaction_id=f'T{i:010d}', customer_id=f'C{i % 100:08d}',
+                transaction_date=datetime(2024, 1, 1 + i // 100), amount=1000 + i, category='쇼핑'
+            ))
+        db.commit()
+    engine.dispose()
+    
+    asyncio.run(db_module.dispose_async_engine())
+    monkeypatch.setattr(db_module, "DATABASE_URL", url)
+    yield url
+    asyncio.run(db_module.dispose_async_engine())
+
+
+@pytest.fixture
+def unscored_database_url(tmp_path, monkeypatch):
+    """점수가 없는 고객 100명(이탈 20명) SQLite DB를 프로세스 공용 비동기 엔진으로 지정"""
+    url = f"sqlite:///{tmp_path / 'unscored.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with AppSession(engine) as db:
+        for i in range(100):
+            db.add(Customer(
+                customer_id=f'C{i:08d}', join_date=datetime(2022, 1, 1), churned=int(i % 5 == 0),
+                churn_probability=None, lifecycle_stage='성숙'
+            ))
+        db.commit()
+    engine.dispose()
+    
+    asyncio.run(db_module.dispose_async_engine())
+    monkeypatch.setattr(db_module, "DATABASE_URL", url)
+    yield url
+    asyncio.run(db_module.dispose_async_engine())
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    for module in (customers, dashboard, reports):
+        app.include_router(module.router, prefix="/api")
+    return app
+
+
+@pytest.mark.asyncio
+async def test_async_session_applies_sqlite_profile(database_url):
+    """비동기 SQLite 엔진도 동기 엔진과 같은 PRAGMA/풀 사용"""
+    async with db_module.get_async_db_context() as db:
+        assert await db.scalar(select(func.count(Customer.customer_id))) == 100
+        assert (await db.execute(select(func.count()).select_from(Transaction))).scalar() == 300
+    
+    async with db_module.get_async_engine().connect() as conn:
+        assert (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar() == db_module.SQLITE_JOURNAL_MODE.lower()
+        assert (await conn.exec_driver_sql("PRAGMA busy_timeout")).scalar() == db_module.SQLITE_BUSY_TIMEOUT_MS
+
+
+@pytest.mark.asyncio
+async def test_migrated_routes_read_database(database_url, app):
+    """async 라우트가 Mock 대신 DB 값을 반환하고 동시 요청을 처리"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        stats, listing, detail, summary = await asyncio.gather(
+            client.get("/api/dashboard/stats"),
+            client.get("/api/customers", params={"risk_level": "HIGH", "sort_by": "churn_probability",
+                                                 "sort_order": "desc", "page_size": 5}),
+            client.get("/api/customers/C00000042"),
+            client.get("/api/reports/summary/current"),
+        )
+    
+    stats = stats.json()
+    assert stats["summary"]["total_customers"] == 100
+    assert stats["summary"]["at_risk_customers"] == 10
+    assert stats["lifecycle_distribution"] == {'신규': 25, '성장': 25, '성숙': 25, '쇠퇴': 25}
+    assert stats["risk_levels"] == {"critical": 10, "high": 20, "medium": 20, "low": 50, "unscored": 0}
+    
+    listing = listing.json()
+    assert listing["total"] == 20
+    assert [c["customer_id"] for c in listing["customers"]] == [f'C{i:08d}' for i in range(89, 84, -1)]
+    assert listing["stats"]["total_customers"] == 100
+    assert listing["stats"]["high_risk_count"] == 30
+    
+    detail = detail.json()
+    assert detail["churn_probability"] == 0.42
+    assert [t["amount"] for t in detail["recent_transactions"]] == [1242, 1142, 1042]
+    
+    assert summary.json()["churned_customers"] == 10
+
+
+@pytest.mark.asyncio
+async def test_dashboard_risk_levels_for_unscored_population(unscored_database_url, app):
+    """점수가 없는 고객은 이탈 여부와 관계없이 UNSCORED로만 집계 (이탈 고객 비율로 구간을 추정하지 않음)"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        stats = (await client.get("/api/dashboard/stats")).json()
+    
+    assert stats["summary"]["total_customers"] == 100
+    assert stats["summary"]["at_risk_customers"] == 20
+    assert stats["risk_levels"] == {"critical": 0, "high": 0, "medium": 0, "low": 0, "unscored": 100}
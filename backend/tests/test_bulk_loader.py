@@ -0,0 +1,81 @@
+"""
+Unit Tests for BulkLoader
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base, Customer, Transaction
+from services.bulk_loader import BulkLoader
+
+
+@pytest.fixture
+def data_files(tmp_path):
+    """CSV 고객/거래 파일 생성"""
+    rng = np.random.default_rng(7)
+    n_customers = 300
+    n_txns = 5000
+    base = datetime(2023, 1, 1)
+    
+    customers_df = pd.DataFrame({
+        'customer_id': [f'C{i:08d}' for i in range(n_customers)],
+        'join_date': [(base - timedelta(days=int(d))).strftime('%Y-%m-%d') for d in rng.integers(0, 700, n_customers)],
+        'age': rng.integers(20, 70, n_customers),
+        'gender': rng.choice(['M', 'F'], n_customers),
+        'region': rng.choice(['서울', '경기', '부산'], n_customers),
+        'occupation': rng.choice(['회사원', '자영업'], n_customers),
+        'annual_income': rng.integers(2000, 9000, n_customers),
+        'credit_score': rng.integers(1, 11, n_customers),
+        'card_type': rng.choice(['일반', 'VIP'], n_customers),
+        'lifecycle_stage': rng.choice(['신규', '성숙'], n_customers),
+        'churned': rng.integers(0, 2, n_customers)
+    })
+    transactions_df = pd.DataFrame({
+        'transaction_id': [f'T{i:010d}' for i in range(n_txns)],
+        'customer_id': rng.choice(customers_df['customer_id'], n_txns),
+        'transaction_date': [(base + timedelta(days=int(d))).strftime('%Y-%m-%d') for d in rng.integers(0, 365, n_txns)],
+        'amount': rng.integers(1000, 500000, n_txns),
+        'category': rng.choice(['식음료', '쇼핑', '교통'], n_txns),
+        'payment_method': rng.choice(['일시불', '할부'], n_txns),
+        'merchant_type': rng.choice(['온라인', '오프라인'], n_txns)
+    })
+    
+    customers_df.to_csv(tmp_path / "customers.csv", index=False)
+    transactions_df.to_csv(tmp_path / "transactions.csv", index=False)
+    return tmp_path, customers_df, transactions_df
+
+
+def test_bulk_load_sqlite_matches_orm(data_files):
+    """벌크 적재 결과가 ORM 조회/기간 필터와 일치하고 인덱스가 복구되는지 검증"""
+    data_dir, customers_df, transactions_df = data_files
+    engine = create_engine(f"sqlite:///{data_dir / 'bulk.db'}")
+    Base.metadata.create_all(engine)
+    index_names = {index['name'] for index in inspect(engine).get_indexes('transactions')}
+    
+    loader = BulkLoader(engine, batch_size=1000)
+    with loader.bulk_session([Customer.__table__, Transaction.__table__]):
+        assert not inspect(engine).get_indexes('transactions')
+        loader.load(Customer.__table__, str(data_dir / "customers.csv"))
+        loader.load(Transaction.__table__, str(data_dir / "transactions.csv"))
+    
+    assert {index['name'] for index in inspect(engine).get_indexes('transactions')} == index_names
+    assert [s['rows'] for s in loader.stats] == [len(customers_df), len(transactions_df)]
+    
+    db = sessionmaker(bind=engine)()
+    assert db.query(Transaction).count() == len(transactions_df)
+    
+    customer = db.get(Customer, customers_df['customer_id'].iloc[5])
+    assert customer.join_date == datetime.fromisoformat(customers_df['join_date'].iloc[5])
+    assert customer.created_at is not None
+    
+    # ORM이 바인딩하는 datetime 파라미터와 문자열 비교가 일치해야 함
+    cutoff = datetime(2023, 7, 1)
+    expected = (pd.to_datetime(transactions_df['transaction_date']) >= cutoff).sum()
+    assert db.query(Transaction).filter(Transaction.transaction_date >= cutoff).count() == expected
+    
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 2
@@ -0,0 +1,459 @@
+"""
+Unit Tests for the two-tier cache (local LRU/TTL + async Redis) and circuit breaker
+Redis 서버 없이 실행 (연결이 거부되는 포트 + 메모리 클라이언트)
+"""
+
+import asyncio
+import fnmatch
+import json
+import time
+
+import pytest
+
+import services.cache as cache
+from services.cache import CircuitBreaker, LocalCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class MemoryRedis:
+    """테스트용 메모리 클라이언트 (호출 수 기록, 장애 전환 가능)"""
+    
+    def __init__(self):
+        self.data = {}
+        self.calls = []
+        self.published = []
+        self.down = False
+    
+    async def _call(self, name):
+        self.calls.append(name)
+        if self.down:
+            raise ConnectionError("redis down")
+    
+    async def ping(self):
+        await self._call("ping")
+        return True
+    
+    async def get(self, key):
+        await self._call("get")
+        return self.data.get(key)
+    
+    async def mget(self, keys):
+        await self._call("mget")
+        return [self.data.get(key) for key in keys]
+    
+    async def setex(self, key, ttl, value):
+        await self._call("setex")
+        self.data[key] = value
+    
+    async def scan_iter(self, match="*", count=None):
+        await self._call("scan")
+        for key in [key for key in self.data if fnmatch.fnmatchcase(key, match)]:
+            yield key
+    
+    async def unlink(self, *keys):
+        await self._call("unlink")
+        return sum(self.data.pop(key, None) is not None for key in keys)
+    
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+    
+    async def info(self):
+        await self._call("info")
+        return {"used_memory_human": "1M", "keyspace_hits": 1, "keyspace_misses": 0}
+    
+    async def dbsize(self):
+        await self._call("dbsize")
+        return len(self.data)
+    
+    async def publish(self, channel, message):
+        await self._call("publish")
+        self.published.append(message)
+    
+    def pipeline(self, transaction=True):
+        return MemoryPipeline(self)
+    
+    def pubsub(self):
+        return MemoryPubSub(self)
+
+
+class MemoryPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+    
+    def setex(self, key, ttl, value):
+        self.commands.append(lambda: self.client.data.__setitem__(key, value))
+    
+    def incr(self, key):
+        self.commands.append(lambda: self.client.incr(key))
+    
+    def delete(self, *keys):
+        self.commands.append(lambda: sum(self.client.data.pop(key, None) is not None for key in keys))
+    
+    def publish(self, channel, message):
+        self.commands.append(lambda: self.client.published.append(message))
+    
+    async def execute(self):
+        await self.client._call("pipeline")
+        return [command() for command in self.commands]
+
+
+class MemoryPubSub:
+    """published 목록을 구독 메시지로 전달"""
+    
+    def __init__(self, client):
+        self.client = client
+        self.position = None
+    
+    async def subscribe(self, channel):
+        self.position = len(self.client.published)
+    
+    async def get_message(self, ignore_subscribe_messages=True, timeout=1.0):
+        if self.position < len(self.client.published):
+            self.position += 1
+            return {"type": "message", "data": self.client.published[self.position - 1]}
+        await asyncio.sleep(0.001)
+        return None
+    
+    async def aclose(self):
+        pass
+
+
+class SyncMemoryRedis:
+    """동기 클라이언트 대역 (MemoryRedis와 저장소/호출 기록 공유)"""
+    
+    def __init__(self, memory):
+        self.memory = memory
+    
+    def get(self, key):
+        self.memory.calls.append("sync_get")
+        return self.memory.data.get(key)
+    
+    def pipeline(self, transaction=True):
+        memory = self.memory
+        
+        class Pipeline(MemoryPipeline):
+            def execute(self):
+                memory.calls.append("sync_pipeline")
+                return [command() for command in self.commands]
+        
+        return Pipeline(memory)
+
+
+@pytest.fixture(autouse=True)
+def reset_state(monkeypatch):
+    cache.breaker.reset()
+    cache.local_cache.clear()
+    cache.local_cache.reset_stats()
+    monkeypatch.setattr(cache, "_client", None)
+    monkeypatch.setattr(cache, "_sync_client", None)
+    monkeypatch.setattr(cache, "_probe_task", None)
+    monkeypatch.setattr(cache, "_invalidation_task", None)
+    for name in cache.counters:
+        cache.counters[name] = 0
+    yield
+    cache.breaker.reset()
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    client = MemoryRedis()
+    monkeypatch.setattr(cache, "get_redis", lambda: client)
+    return client
+
+
+def test_circuit_breaker_transitions():
+    """연속 실패 → open, 대기 후 half_open 시험 1건, 실패 시 다시 open / 성공 시 closed"""
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=3, open_seconds=10, clock=clock)
+    
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow_request()
+    
+    clock.now = 10
+    assert breaker.allow_request() and not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    
+    clock.now = 20
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_no_ping_per_call(memory):
+    """캐시 조회/저장은 왕복 1회씩 (호출마다 PING 없음, 네임스페이스 버전은 첫 조회에만 MGET, 저장+알림은 파이프라인 1회)"""
+    async def run():
+        assert await cache.get_cached_prediction("C1", "v1") is None
+        await cache.cache_prediction("C1", {"churn_probability": 0.7}, "v1")
+        cache.local_cache.delete_pattern("prediction:*")
+        return await cache.get_cached_prediction("C1", "v1")
+    
+    assert asyncio.run(run()) == {"churn_probability": 0.7}
+    assert memory.calls == ["mget", "get", "pipeline", "get"]
+    assert cache.counters["hits"] == 1 and cache.counters["misses"] == 1
+
+
+def test_local_cache_lru_and_ttl():
+    """로컬 계층: 최대 항목 수 초과 시 가장 오래 안 쓴 키부터 제거, TTL은 로컬 상한 이하"""
+    clock = Clock()
+    local = LocalCache(max_entries=2, ttl_seconds=10, clock=clock)
+    local.set("a", "1")
+    local.set("b", "2", ttl=3600)
+    assert local.get("a") == "1"
+    local.set("c", "3")
+    assert local.get("b") is None and local.get("a") == "1" and local.get("c") == "3"
+    
+    clock.now = 10
+    assert local.get("a") is None
+    local.set("d", "4", ttl=1)
+    clock.now = 11
+    assert local.get("d") is None
+    
+    stats = local.stats()
+    assert stats["evictions"] == 1 and stats["expirations"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 3 and stats["hit_ratio"] == 0.5
+
+
+def test_hot_keys_served_from_local_tier(memory):
+    """로컬 적중은 Redis 호출 없음, 로컬 만료 후에는 Redis 적중으로 다시 채움, 계층별 적중률"""
+    async def run():
+        await cache.cache_set_json("dashboard:stats", {"total": 100}, ttl=60)
+        values = [await cache.cache_get_json("dashboard:stats") for _ in range(9)]
+        cache.local_cache.clear()
+        values.append(await cache.cache_get_json("dashboard:stats"))
+        values.append(await cache.cache_get_json("dashboard:stats"))
+        return values, await cache.get_cache_stats()
+    
+    values, stats = asyncio.run(run())
+    assert values == [{"total": 100}] * 11
+    assert memory.calls == ["pipeline", "get", "info", "dbsize"]
+    
+    # 반환 값을 수정해도 캐시 값은 그대로
+    values[0]["total"] = 0
+    assert json.loads(cache.local_cache.get("dashboard:stats")) == {"total": 100}
+    
+    tiers = stats["tiers"]
+    assert tiers["local"]["hits"] == 10 and tiers["local"]["misses"] == 1
+    assert tiers["redis"]["hits"] == 1 and tiers["redis"]["hit_ratio"] == 1.0
+    assert stats["total_keys"] == 1
+
+
+def test_invalidation_messages_from_other_workers():
+    """다른 워커의 저장/패턴 무효화 메시지는 로컬에서 삭제, 자기 메시지는 무시"""
+    for key in ("prediction:C1", "prediction:C2", "dashboard:stats"):
+        cache.local_cache.set(key, "{}")
+    
+    cache.handle_invalidation_message(cache.invalidation_message(keys=["prediction:C1"]))
+    assert cache.local_cache.get("prediction:C1") == "{}"
+    
+    other = json.dumps({"origin": "other-worker", "keys": ["prediction:C1"], "pattern": None})
+    cache.handle_invalidation_message(other)
+    assert cache.local_cache.get("prediction:C1") is None
+    
+    cache.handle_invalidation_message(json.dumps({"origin": "other-worker", "keys": [], "pattern": "prediction:*"}))
+    assert cache.local_cache.get("prediction:C2") is None and cache.local_cache.get("dashboard:stats") == "{}"
+    cache.handle_invalidation_message("not json")
+
+
+def test_listener_drops_entries_changed_by_other_workers(memory):
+    """구독 태스크: 시작 시 로컬 계층을 비우고, 다른 워커가 같은 키를 저장하면 로컬 값 삭제"""
+    async def run():
+        cache.local_cache.set("stale", "{}")
+        await cache.start_cache_invalidation_listener(interval=0.01)
+        await asyncio.sleep(0.02)
+        assert cache.local_cache.get("stale") is None
+        
+        await cache.cache_set_json("dashboard:stats", {"total": 1}, ttl=60)
+        memory.published.append(json.dumps({"origin": "other-worker", "keys": ["dashboard:stats"], "pattern": None}))
+        await asyncio.sleep(0.02)
+        value = await cache.cache_get_json("dashboard:stats")
+        await cache.close_redis()
+        return value
+    
+    assert asyncio.run(run()) == {"total": 1}
+    assert memory.calls[-1] == "get"
+
+
+def test_namespace_invalidation_without_scanning(memory):
+    """세그먼트/모델 버전 무효화는 버전 INCR 1회 (키 순회 없음), 모델 교체 후에는 이전 점수 미반환"""
+    async def run():
+        await cache.cache_prediction("C1", {"risk_score": 10}, "v1", segment="성장")
+        await cache.cache_prediction("C2", {"risk_score": 20}, "v1", segment="성장")
+        await cache.cache_prediction("C3", {"risk_score": 30}, "v1", segment="성숙")
+        
+        calls = len(memory.calls)
+        assert await cache.invalidate_predictions(segment="성장") == 1
+        assert memory.calls[calls:] == ["pipeline"]
+        
+        results = [
+            await cache.get_cached_prediction("C1", "v1", segment="성장"),
+            await cache.get_cached_prediction("C2", "v1", segment="성장"),
+            await cache.get_cached_prediction("C3", "v1", segment="성숙"),
+            await cache.get_cached_prediction("C3", "v2", segment="성숙"),
+        ]
+        await cache.invalidate_predictions(model_version="v1")
+        results.append(await cache.get_cached_prediction("C3", "v1", segment="성숙"))
+        return results
+    
+    assert asyncio.run(run()) == [None, None, {"risk_score": 30}, None, None]
+    assert memory.data["cache:ns:prediction:segment:성장"] == "1"
+    assert "scan" not in memory.calls
+    assert len(memory.published) == 5
+
+
+def test_missed_namespace_message_is_bounded_by_version_ttl(memory, monkeypatch):
+    """다른 워커의 무효화 메시지를 놓쳐도 버전 TTL(로컬 값 TTL보다 짧음) 뒤에는 새 버전으로 조회"""
+    clock = Clock()
+    monkeypatch.setattr(cache, "local_cache", LocalCache(ttl_seconds=10, clock=clock))
+    
+    async def run():
+        await cache.cache_prediction("C1", {"risk_score": 10}, "v1")
+        # 다른 워커가 무효화했지만 메시지는 도착하지 않음
+        memory.data["cache:ns:prediction"] = "1"
+        before = await cache.get_cached_prediction("C1", "v1")
+        clock.now = cache.CACHE_NAMESPACE_VERSION_TTL_SECONDS
+        after = await cache.get_cached_prediction("C1", "v1")
+        return before, after
+    
+    assert asyncio.run(run()) == ({"risk_score": 10}, None)
+
+
+def test_customer_detail_cache_invalidation(memory):
+    """고객 상세: 고객 1명 삭제는 해당 키만 (다른 워커에도 전달), 일괄 변경 후에는 예측 + 상세 전체 무효화"""
+    async def run():
+        await cache.cache_customer_detail("C1", {"customer_id": "C1"})
+        await cache.cache_customer_detail("C2", {"customer_id": "C2"})
+        await cache.cache_prediction("C1", {"risk_score": 10}, "v1")
+        
+        first = await cache.get_cached_customer_detail("C1")
+        await cache.invalidate_customer_details("C1")
+        published = json.loads(memory.published[-1])
+        results = [first, await cache.get_cached_customer_detail("C1"), await cache.get_cached_customer_detail("C2")]
+        
+        await cache.invalidate_customer_caches()
+        results += [await cache.get_cached_customer_detail("C2"), await cache.get_cached_prediction("C1", "v1")]
+        return results, published
+    
+    results, published = asyncio.run(run())
+    assert results == [{"customer_id": "C1"}, None, {"customer_id": "C2"}, None, None]
+    assert len(published["keys"]) == 1 and "customer_detail:C1" in published["keys"][0]
+    assert "scan" not in memory.calls
+
+
+def test_decorator_results_invalidated_by_namespace(memory):
+    """데코레이터 namespaces: 네임스페이스 무효화 후 원본 함수 다시 실행"""
+    executed = []
+    
+    @cache.cache_decorator(prefix="dashboard", ttl=60, namespaces=["dashboard"])
+    async def load_dashboard(period: str):
+        executed.append(period)
+        return {"period": period, "run": len(executed)}
+    
+    async def run():
+        first = [await load_dashboard("month") for _ in range(2)]
+        await cache.invalidate_namespace("dashboard")
+        return first + [await load_dashboard("month")]
+    
+    assert [result["run"] for result in asyncio.run(run())] == [1, 1, 2]
+
+
+def test_pattern_invalidation_uses_scan(memory, monkeypatch):
+    """패턴 무효화: KEYS 대신 SCAN + 배치 UNLINK, 네임스페이스 버전 키는 유지"""
+    monkeypatch.setattr(cache, "CACHE_SCAN_COUNT", 1000)
+    memory.data.update({f"dashboard:{i}": "{}" for i in range(2500)})
+    memory.data.update({"customer:1": "{}", "cache:ns:dashboard": "3"})
+    
+    asyncio.run(cache.invalidate_cache("*"))
+    assert memory.data == {"cache:ns:dashboard": "3"}
+    assert memory.calls == ["scan", "unlink", "unlink", "unlink", "publish"]
+
+
+def test_open_circuit_skips_redis_until_probe_recovers(memory):
+    """장애: 임계 실패 후 Redis 호출 없이 건너뜀, 프로브 성공 시 바로 복구"""
+    memory.down = True
+    
+    async def run():
+        for _ in range(cache.breaker.failure_threshold):
+            assert await cache.get_cached_prediction("C1", "v1") is None
+        calls = len(memory.calls)
+        for _ in range(100):
+            assert await cache.get_cached_prediction("C1", "v1") is None
+        assert len(memory.calls) == calls
+        assert not cache.is_redis_available()
+        
+        memory.down = False
+        assert await cache.probe_redis()
+        await cache.cache_prediction("C1", {"risk_score": 80}, "v1")
+        return await cache.get_cached_prediction("C1", "v1")
+    
+    assert asyncio.run(run()) == {"risk_score": 80}
+    assert cache.counters["skipped"] == 100 and cache.counters["misses"] == 0
+    assert cache.is_redis_available()
+
+
+def test_decorator_caches_async_results(memory):
+    """데코레이터: 같은 인자는 원본 함수 1회 실행, 동기 함수는 거부"""
+    executed = []
+    
+    @cache.cache_decorator(prefix="stats", ttl=60)
+    async def load_stats(segment: str):
+        executed.append(segment)
+        return {"segment": segment}
+    
+    async def run():
+        return [await load_stats("growth") for _ in range(3)]
+    
+    assert asyncio.run(run()) == [{"segment": "growth"}] * 3
+    assert executed == ["growth"]
+    
+    with pytest.raises(TypeError):
+        cache.cache_decorator(namespaces=["stats"])(lambda: None)
+
+
+def test_decorator_keeps_sync_functions_sync(memory, monkeypatch):
+    """동기 함수는 동기 래퍼 (호출자 변경 없음): 로컬 → 동기 Redis 클라이언트, 결과는 비동기 경로와 공유"""
+    monkeypatch.setattr(cache, "get_sync_redis", lambda: SyncMemoryRedis(memory))
+    executed = []
+    
+    @cache.cache_decorator(prefix="report", ttl=60)
+    def build_report(period):
+        executed.append(period)
+        return {"period": period}
+    
+    assert [build_report("2024-06") for _ in range(3)] == [{"period": "2024-06"}] * 3
+    assert executed == ["2024-06"]
+    assert memory.calls == ["sync_get", "sync_pipeline"]
+    
+    cache.local_cache.clear()
+    assert build_report("2024-06") == {"period": "2024-06"} and executed == ["2024-06"]
+    assert memory.calls[-1] == "sync_get" and len(memory.published) == 1
+
+
+def test_unreachable_redis_fails_fast(monkeypatch):
+    """연결 거부되는 Redis: 첫 프로브에서 회로가 열리고 이후 조회는 네트워크 대기 없음"""
+    monkeypatch.setattr(cache, "REDIS_PORT", 1)
+    
+    async def run():
+        available = await cache.start_redis_health_probe(interval=60)
+        start = time.perf_counter()
+        results = [await cache.get_cached_prediction(f"C{i}", "v1") for i in range(1000)]
+        elapsed = time.perf_counter() - start
+        await cache.close_redis()
+        return available, results, elapsed
+    
+    available, results, elapsed = asyncio.run(run())
+    assert not available and results == [None] * 1000
+    assert elapsed < 0.1
+    assert cache.counters["skipped"] == 1000
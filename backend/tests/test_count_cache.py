@@ -0,0 +1,97 @@
+"""
+Unit Tests for the customer list count cache
+"""
+
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+
+import services.db as db_module
+import services.count_cache as count_cache_module
+from models.database import Base, Customer
+from services.app_session import AppSession
+from api.routes import customers
+from services.count_cache import count_cache, filter_signature
+from services.customer_search import ensure_search_index
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """고객 60명 (위험 점수 0.00 ~ 0.59, 지역 서울/부산)"""
+    url = f"sqlite:///{tmp_path / 'counts.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with AppSession(engine) as db:
+        for i in range(60):
+            db.add(Customer(
+                customer_id=f'C{i:08d}', join_date=datetime(2022, 1, 1), churn_probability=i / 100,
+                region=['서울', '부산'][i % 2], occupation='회사원'
+            ))
+        db.commit()
+    ensure_search_index(engine)
+    
+    asyncio.run(db_module.dispose_async_engine())
+    monkeypatch.setattr(db_module, "DATABASE_URL", url)
+    yield engine
+    asyncio.run(db_module.dispose_async_engine())
+    engine.dispose()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(customers.router, prefix="/api")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_filter_signature_normalizes_equivalent_filters():
+    assert filter_signature(search=" 서울  회사원", risk_level="HIGH", lifecycle=None) == \
+        filter_signature(search="서울 회사원", risk_level="HIGH")
+    assert filter_signature(search="c0000671") == filter_signature(search="C0000671")
+    assert filter_signature(search="671") != filter_signature(search="C0000671")
+    assert filter_signature(search="서울", approximate=True) != filter_signature(search="서울")
+    assert filter_signature(search="671", approximate=True) == filter_signature(search="671")
+
+
+@pytest.mark.asyncio
+async def test_pages_reuse_count_until_score_write_back(engine, client):
+    """페이지 이동은 캐시된 카운트 사용, 점수 반영 커밋 후 다시 계산"""
+    async with client:
+        first = (await client.get("/api/customers", params={"risk_level": "MEDIUM", "page_size": 4})).json()
+        hits = count_cache.hits
+        second = (await client.get("/api/customers", params={"risk_level": "MEDIUM", "page_size": 4, "page": 2})).json()
+        assert first["total"] == second["total"] == 10
+        assert count_cache.hits == hits + 1
+        
+        with AppSession(engine) as db:
+            db.get(Customer, 'C00000001').churn_probability = 0.55
+            db.commit()
+        
+        after = (await client.get("/api/customers", params={"risk_level": "MEDIUM", "page_size": 4})).json()
+        assert after["total"] == 11
+        
+        # 카운트와 무관한 속성 변경은 캐시 유지
+        generation = count_cache.generation
+        with AppSession(engine) as db:
+            db.get(Customer, 'C00000002').monthly_avg_amount = 1000.0
+            db.commit()
+        assert count_cache.generation == generation
+
+
+@pytest.mark.asyncio
+async def test_approximate_count_for_text_search(engine, client, monkeypatch):
+    """근사 카운트: 상한을 넘으면 상한값 + total_approximate, ID 검색은 항상 정확"""
+    monkeypatch.setattr(count_cache_module, "APPROXIMATE_COUNT_LIMIT", 20)
+    
+    async with client:
+        exact = (await client.get("/api/customers", params={"search": "서울"})).json()
+        approximate = (await client.get("/api/customers", params={"search": "서울", "approximate_total": True})).json()
+        by_id = (await client.get("/api/customers", params={"search": "C0000001", "approximate_total": True})).json()
+    
+    assert (exact["total"], exact["total_approximate"]) == (30, False)
+    assert (approximate["total"], approximate["total_approximate"]) == (20, True)
+    assert (by_id["total"], by_id["total_approximate"]) == (11, False)
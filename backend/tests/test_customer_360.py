@@ -0,0 +1,201 @@
+"""
+Unit Tests for the Customer-360 read model
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from api.routes.customers import format_customer
+from models.database import Base, Customer, Customer360, CustomerAction, RetentionRecord, Transaction
+from services.app_session import AppSession
+from services.customer_360 import (
+    decode_document, invalidate_customer_360, load_customer_360, store_top_factors
+)
+from services.delta_ingest import ingest_transactions_file
+from services.transaction_rollup import rebuild_transaction_rollup
+
+CUSTOMERS = [f'C{i:08d}' for i in range(5)]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """고객 5명 / 2024-01 ~ 2024-06 거래 300건 / 액션 20건"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'c360.db'}")
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(Customer.__table__.insert(), [
+            {'customer_id': customer_id, 'join_date': datetime(2022, 1, 1), 'churn_probability': 0.3,
+             'lifecycle_stage': '성숙', 'card_type': '골드'}
+            for customer_id in CUSTOMERS
+        ])
+        conn.execute(Transaction.__table__.insert(), [
+            {'transaction_id': f'T{i:010d}', 'customer_id': CUSTOMERS[i % 5],
+             'transaction_date': start + timedelta(hours=13 * i), 'amount': 1000 * (i + 1),
+             'category': ['쇼핑', '외식', '교통'][i % 3], 'merchant_type': '온라인'}
+            for i in range(300)
+        ])
+        conn.execute(CustomerAction.__table__.insert(), [
+            {'customer_id': CUSTOMERS[i % 5], 'action_type': '상담', 'action_title': f'상담 {i}',
+             'action_date': start + timedelta(days=i)}
+            for i in range(20)
+        ])
+    rebuild_transaction_rollup(engine)
+    yield engine
+    engine.dispose()
+
+
+def load(engine, customer_id='C00000001'):
+    with AppSession(engine) as db:
+        document = load_customer_360(db, customer_id, format_customer)
+        db.commit()
+    return document
+
+
+def source_selects(engine, customer_id='C00000001'):
+    """문서 조회 중 실행된 SELECT의 대상 테이블"""
+    statements = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        document = load(engine, customer_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return document, statements
+
+
+def test_first_read_builds_and_second_read_is_single_lookup(engine):
+    """첫 조회는 원천에서 생성/저장, 이후 조회는 customer_360 기본 키 한 번"""
+    built, statements = source_selects(engine)
+    assert any('FROM transactions' in statement for statement in statements)
+    assert len(built['recent_transactions']) == 10 and len(built['action_history']) == 4
+    assert built['monthly_trend'][-1]['month'] == '2024-06'
+    assert built['lifetime']['transaction_count'] == 60
+    
+    cached, statements = source_selects(engine)
+    assert cached == json.loads(json.dumps(built))
+    assert len(statements) == 1 and 'FROM customer_360' in statements[0]
+    
+    assert load(engine, 'C99999999') is None
+    with engine.connect() as conn:
+        assert conn.execute(select(Customer360.customer_id)).scalars().all() == ['C00000001']
+
+
+def test_document_is_compressed(engine):
+    """문서는 공백 없는 JSON을 zlib으로 압축해 저장"""
+    document = load(engine)
+    with engine.connect() as conn:
+        stored = conn.execute(select(Customer360.document)).scalar()
+    assert decode_document(stored) == json.loads(json.dumps(document))
+    assert len(stored) < len(json.dumps(document, ensure_ascii=False).encode('utf-8')) / 2
+
+
+def test_orm_changes_invalidate_document(engine):
+    """ORM으로 고객 점수/액션을 바꾸면 커밋과 함께 무효화되어 다음 조회에서 다시 생성"""
+    load(engine)
+    with AppSession(engine) as db:
+        db.get(Customer, 'C00000001').churn_probability = 0.95
+        db.add(CustomerAction(customer_id='C00000001', action_type='쿠폰', action_title='최신 쿠폰',
+                              action_date=datetime(2024, 7, 1)))
+        db.commit()
+    
+    document = load(engine)
+    assert document['risk_level'] == 'CRITICAL'
+    assert document['action_history'][0]['title'] == '최신 쿠폰'
+    
+    # 다른 고객 문서는 그대로
+    other = load(engine, 'C00000002')
+    with AppSession(engine) as db:
+        db.get(Customer, 'C00000001').region = '서울'
+        db.commit()
+    with engine.connect() as conn:
+        versions = dict(conn.execute(select(Customer360.customer_id, Customer360.version)).all())
+    assert versions['C00000002'] == 0 and load(engine, 'C00000002') == other
+
+
+def test_ingest_invalidates_affected_customers(engine, tmp_path):
+    """일별 적재: 거래가 들어온 고객 + 새 달이면 전체 문서 무효화"""
+    first, second = load(engine, 'C00000001'), load(engine, 'C00000002')
+    pd.DataFrame([{
+        'transaction_id': 'T9000000000', 'customer_id': 'C00000001', 'transaction_date': datetime(2024, 6, 29, 9),
+        'amount': 777, 'category': '여행', 'payment_method': '일시불', 'merchant_type': '항공',
+    }]).to_csv(tmp_path / "day.csv", index=False)
+    ingest_transactions_file(engine, str(tmp_path / "day.csv"), reference_date=datetime(2024, 6, 30))
+    
+    document = load(engine, 'C00000001')
+    assert document['recent_transactions'][0] == {'date': '2024-06-29', 'category': '여행', 'merchant': '항공',
+                                                  'amount': 777}
+    assert document['lifetime']['transaction_count'] == first['lifetime']['transaction_count'] + 1
+    assert load(engine, 'C00000002') == second
+    
+    pd.DataFrame([{
+        'transaction_id': 'T9000000001', 'customer_id': 'C00000003', 'transaction_date': datetime(2024, 7, 1, 9),
+        'amount': 1000, 'category': '쇼핑', 'payment_method': '일시불', 'merchant_type': '온라인',
+    }]).to_csv(tmp_path / "next.csv", index=False)
+    ingest_transactions_file(engine, str(tmp_path / "next.csv"), reference_date=datetime(2024, 7, 2))
+    assert load(engine, 'C00000002')['monthly_trend'][-1]['month'] == '2024-07'
+
+
+def test_document_changed_while_building_is_not_stored(engine):
+    """생성 중 무효화되면 저장하지 않고 다음 조회에서 다시 생성"""
+    load(engine)
+    with AppSession(engine) as db:
+        invalidate_customer_360(db, ['C00000001'])
+        db.commit()
+    
+    def format_and_invalidate(customer):
+        invalidate_customer_360(Session.object_session(customer), [customer.customer_id])
+        return format_customer(customer)
+    
+    with AppSession(engine) as db:
+        assert load_customer_360(db, 'C00000001', format_and_invalidate) is not None
+        db.commit()
+    with engine.connect() as conn:
+        version, built_version = conn.execute(select(Customer360.version, Customer360.built_version)).one()
+    assert (version, built_version) == (2, 0)
+    
+    load(engine)
+    with engine.connect() as conn:
+        assert conn.execute(select(Customer360.built_version)).scalar() == 2
+
+
+def test_top_factors_from_scoring(engine):
+    """점수 계산 시 저장한 SHAP 상위 요인이 문서에 포함 (문서가 없는 고객도 저장)"""
+    load(engine)
+    factors = [{'feature': 'recency_days', 'shap_value': 0.42, 'feature_value': 63.0}]
+    with AppSession(engine) as db:
+        store_top_factors(db, 'C00000001', factors)
+        store_top_factors(db, 'C00000004', factors)
+        db.commit()
+    
+    assert load(engine)['top_factors'] == factors
+    assert load(engine, 'C00000004')['top_factors'] == factors
+
+
+def test_prediction_history_from_stored_scores(engine):
+    """예측 이력은 저장된 점수만 사용 (점수 기록이 없으면 빈 목록, 효과 측정 기록 추가 시 무효화)"""
+    assert load(engine)['prediction_history'] == []
+    
+    with AppSession(engine) as db:
+        customer = db.get(Customer, 'C00000001')
+        customer.risk_score, customer.churn_probability = 35, 0.35
+        customer.last_prediction_date = datetime(2024, 7, 1)
+        db.add(RetentionRecord(customer_id='C00000001', action_date=datetime(2024, 3, 1),
+                               before_risk_score=80, before_churn_prob=0.8,
+                               measurement_end_date=datetime(2024, 4, 1), after_churn_prob=0.5))
+        db.commit()
+    
+    assert load(engine)['prediction_history'] == [
+        {'date': '2024-03-01', 'risk_score': 80, 'churn_probability': 0.8},
+        {'date': '2024-04-01', 'risk_score': 50, 'churn_probability': 0.5},
+        {'date': '2024-07-01', 'risk_score': 35, 'churn_probability': 0.35},
+    ]
@@ -0,0 +1,133 @@
+"""
+Unit Tests for the customer search index
+"""
+
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+import services.db as db_module
+from models.database import Base, Customer
+from api.routes import customers
+from services.customer_search import apply_search, ensure_search_index, parse_customer_id
+
+REGIONS = ['서울', '경기', '부산', '기타']
+OCCUPATIONS = ['회사원', '자영업', '전문직']
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """고객 120명 + 검색 인덱스 (라우트도 같은 DB 사용)"""
+    url = f"sqlite:///{tmp_path / 'search.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        for i in range(120):
+            db.add(Customer(
+                customer_id=f'C{i:08d}', join_date=datetime(2022, 1, 1), churn_probability=i / 120,
+                region=REGIONS[i % 4], occupation=OCCUPATIONS[i % 3]
+            ))
+        db.commit()
+    assert ensure_search_index(engine)
+    assert not ensure_search_index(engine)
+    
+    asyncio.run(db_module.dispose_async_engine())
+    monkeypatch.setattr(db_module, "DATABASE_URL", url)
+    yield engine
+    asyncio.run(db_module.dispose_async_engine())
+    engine.dispose()
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.include_router(customers.router, prefix="/api")
+    return app
+
+
+async def search(app, **params):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return (await client.get("/api/customers", params=params)).json()
+
+
+def test_parse_customer_id():
+    assert parse_customer_id("C00000671") == ("C00000671", "C00000671")
+    assert parse_customer_id("c0000006") == ("C00000006", "C0000006")
+    assert parse_customer_id(" 671 ") == ("C00000671", None)
+    assert parse_customer_id("00671") == ("C00000671", "C00671")
+    assert parse_customer_id("서울") is None
+
+
+@pytest.mark.asyncio
+async def test_customer_id_exact_match_ranks_first(engine, app):
+    """ID 검색: 정확 일치 → 접두 일치 (ID순)"""
+    result = await search(app, search="C0000006", page_size=20)
+    
+    assert result["sort_by"] == "relevance"
+    assert [c["customer_id"] for c in result["customers"]] == ['C00000006'] + [f'C000000{i}' for i in range(60, 70)]
+    assert result["total"] == 11
+    
+    assert [c["customer_id"] for c in (await search(app, search="42"))["customers"]] == ['C00000042']
+
+
+@pytest.mark.asyncio
+async def test_text_search_matches_word_prefixes(engine, app):
+    """지역/직업 단어 접두 검색, 여러 단어는 모두 일치, 다른 필터/정렬과 함께 사용"""
+    seoul = await search(app, search="서울", page_size=100)
+    assert seoul["total"] == 30
+    assert {c["region"] for c in seoul["customers"]} == {'서울'}
+    
+    both = await search(app, search="서 회사", page_size=100)
+    assert {c["customer_id"] for c in both["customers"]} == {f'C{i:08d}' for i in range(0, 120, 12)}
+    
+    riskiest = await search(app, search="부산", sort_by="churn_probability", sort_order="desc", page_size=3)
+    assert [c["customer_id"] for c in riskiest["customers"]] == ['C00000118', 'C00000114', 'C00000110']
+    assert riskiest["next_cursor"]
+    
+    assert (await search(app, search="!!"))["total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_search_does_not_match_inside_words(engine, app):
+    """
+    검색 의미: 단어 시작부터만 일치 (이전 ilike '%검색어%'의 단어 중간/끝 일치는 지원하지 않음)
+    
+    고객 ID는 정확 일치 또는 앞자리(MIN_ID_PREFIX_DIGITS 이상) 접두 일치만 - ID 중간 숫자로는 찾지 않음
+    """
+    assert (await search(app, search="회사"))["total"] == 40
+    assert (await search(app, search="사원"))["total"] == 0
+    assert (await search(app, search="울"))["total"] == 0
+    # '%00011%'이면 C00000011 + C00000110~119 (11명) - 정확 일치 C00000011과 접두 C00011...만
+    assert [c["customer_id"] for c in (await search(app, search="00011"))["customers"]] == ['C00000011']
+
+
+@pytest.mark.asyncio
+async def test_index_follows_customer_changes(engine, app):
+    """트리거로 INSERT/UPDATE/DELETE가 검색 인덱스에 반영"""
+    with Session(engine) as db:
+        db.get(Customer, 'C00000001').region = '제주'
+        db.delete(db.get(Customer, 'C00000002'))
+        db.add(Customer(customer_id='C00000500', join_date=datetime(2022, 1, 1), region='제주', occupation='공무원'))
+        db.commit()
+    
+    jeju = await search(app, search="제주")
+    assert [c["customer_id"] for c in jeju["customers"]] == ['C00000001', 'C00000500']
+    assert (await search(app, search="공무원"))["total"] == 1
+    assert (await search(app, search="부산", page_size=100))["total"] == 29
+
+
+def test_text_search_uses_fts_index(engine):
+    """FTS 조회 후 rowid로 고객 행을 찾음 (customers 전체 스캔 없음)"""
+    query, rank = apply_search(select(Customer), "서울", "sqlite")
+    sql = str(query.order_by(rank).limit(20).compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    
+    assert "VIRTUAL TABLE INDEX" in plan
+    assert "SCAN customers" not in plan
@@ -0,0 +1,84 @@
+"""
+Integration Tests for the PostgreSQL engine
+TEST_DATABASE_URL(postgresql://...)이 지정된 경우에만 실행
+"""
+
+import os
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from models.database import Base, Customer
+from services.db import create_postgres_engine, stream_query
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL.startswith("postgresql"),
+    reason="TEST_DATABASE_URL (PostgreSQL) not set"
+)
+
+
+@pytest.fixture
+def engine():
+    """고객 2,000명이 있는 PostgreSQL 테스트 DB (테스트 후 테이블 삭제)"""
+    engine = create_postgres_engine(TEST_DATABASE_URL, pool_size=4, max_overflow=2, statement_timeout_ms=500)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(Customer.__table__.insert(), [
+            {'customer_id': f'C{i:08d}', 'join_date': datetime(2022, 1, 1), 'churn_probability': i / 2000}
+            for i in range(2000)
+        ])
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def test_pool_settings_and_statement_timeout(engine):
+    """풀 크기/pre-ping 설정과 statement_timeout 초과 쿼리 취소"""
+    assert engine.pool.size() == 4
+    assert engine.pool._pre_ping
+    
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SHOW statement_timeout").scalar() == '500ms'
+        with pytest.raises(OperationalError, match="statement timeout"):
+            conn.execute(text("SELECT pg_sleep(2)"))
+
+
+def test_stream_query_uses_batches(engine):
+    """서버 측 커서로 batch_size 단위 조회"""
+    batches = list(stream_query(select(Customer.customer_id).order_by(Customer.customer_id),
+                                batch_size=300, bind=engine))
+    assert [len(rows) for rows in batches] == [300] * 6 + [200]
+    assert batches[-1][-1].customer_id == 'C00001999'
+
+
+def test_concurrent_sessions_share_database(engine):
+    """여러 스레드가 풀 연결로 동시에 쓰고 읽기"""
+    errors = []
+    
+    def worker(offset):
+        try:
+            for i in range(offset, 2000, 8):
+                with Session(engine) as db:
+                    customer = db.get(Customer, f'C{i:08d}')
+                    customer.risk_level = 'HIGH'
+                    db.commit()
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert not errors
+    assert engine.pool.checkedout() == 0
+    with Session(engine) as db:
+        assert db.query(Customer).filter(Customer.risk_level == 'HIGH').count() == 2000
@@ -0,0 +1,192 @@
+"""
+Unit Tests for delta transaction ingest
+"""
+
+import os
+
+import pytest
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from models.database import Base, Customer, Transaction, IngestLedger, TransactionMonthly
+from services.delta_ingest import ingest_transactions_file, get_watermark
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """고객 50명이 있는 SQLite DB"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        for i in range(50):
+            db.add(Customer(customer_id=f'C{i:08d}', join_date=datetime(2022, 1, 1)))
+        db.commit()
+    return engine
+
+
+def make_daily_file(path, day: datetime, start_id: int, n_rows: int, seed: int):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'transaction_id': [f'T{i:010d}' for i in range(start_id, start_id + n_rows)],
+        'customer_id': rng.choice([f'C{i:08d}' for i in range(50)], n_rows),
+        'transaction_date': day.strftime('%Y-%m-%d'),
+        'amount': rng.integers(1000, 100000, n_rows),
+        'category': '쇼핑',
+        'payment_method': '일시불',
+        'merchant_type': '온라인'
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+def expected_summary(df: pd.DataFrame, reference_date: datetime) -> pd.DataFrame:
+    dates = pd.to_datetime(df['transaction_date'])
+    df = df.assign(transaction_date=dates)
+    recent_3m = df[dates > reference_date - timedelta(days=90)]
+    recent_12m = df[dates > reference_date - timedelta(days=365)]
+    return pd.DataFrame({
+        'last_transaction_date': df.groupby('customer_id')['transaction_date'].max(),
+        'transaction_count_3m': recent_3m.groupby('customer_id').size(),
+        'monthly_avg_amount': recent_12m.groupby('customer_id')['amount'].sum() // 12,
+    }).fillna({'transaction_count_3m': 0, 'monthly_avg_amount': 0})
+
+
+def test_delta_ingest_is_idempotent(engine, tmp_path):
+    """같은 파일 재실행은 건너뛰고, 겹치는 행은 중복 적재하지 않으며 요약 컬럼이 거래 기준과 일치"""
+    reference_date = datetime(2024, 1, 10)
+    day1 = make_daily_file(tmp_path / "day1.csv", datetime(2024, 1, 1), 0, 400, seed=1)
+    # day2는 day1 마지막 100행을 재전송 (같은 ID, 같은 내용)
+    day2 = make_daily_file(tmp_path / "day2.csv", datetime(2024, 1, 2), 400, 300, seed=2)
+    day2 = pd.concat([day1.tail(100), day2], ignore_index=True)
+    day2.to_csv(tmp_path / "day2.csv", index=False)
+    
+    first = ingest_transactions_file(engine, str(tmp_path / "day1.csv"), batch_size=150, reference_date=reference_date)
+    assert first['status'] == 'COMPLETED' and first['rows_new'] == 400
+    
+    again = ingest_transactions_file(engine, str(tmp_path / "day1.csv"), reference_date=reference_date)
+    assert again['status'] == 'SKIPPED'
+    
+    second = ingest_transactions_file(engine, str(tmp_path / "day2.csv"), batch_size=150, reference_date=reference_date)
+    assert second['rows_new'] == 300 and second['rows_existing'] == 100
+    
+    all_txns = pd.concat([day1, day2]).drop_duplicates('transaction_id')
+    expected = expected_summary(all_txns, reference_date)
+    
+    with Session(engine) as db:
+        assert db.query(Transaction).count() == 700
+        assert db.query(IngestLedger).filter(IngestLedger.status == 'COMPLETED').count() == 2
+        assert get_watermark(db) == datetime(2024, 1, 2)
+        
+        for customer in db.query(Customer).all():
+            if customer.customer_id not in expected.index:
+                continue
+            row = expected.loc[customer.customer_id]
+            assert customer.last_transaction_date == row['last_transaction_date']
+            assert customer.transaction_count_3m == row['transaction_count_3m']
+            assert customer.monthly_avg_amount == row['monthly_avg_amount']
+
+
+def test_summary_refresh_full_and_incremental(engine, tmp_path):
+    """full(ID 범위)/incremental 요약 갱신이 거래 기준 집계와 일치"""
+    from services.customer_summary import run_summary_refresh, LTV_HORIZON_MONTHS
+    
+    day1 = make_daily_file(tmp_path / "day1.csv", datetime(2023, 10, 1), 0, 400, seed=1)
+    ingest_transactions_file(engine, str(tmp_path / "day1.csv"), reference_date=datetime(2023, 10, 2))
+    
+    # 고객 7명 범위로 나누어 전체 갱신
+    reference_date = datetime(2023, 12, 15)
+    full = run_summary_refresh(engine, 'full', reference_date, range_size=7)
+    assert full['mode'] == 'full' and full['customers'] == 50 and full['batches'] == 8
+    
+    # 신규 거래 적재 없이 기준일만 이동 → 90일 경계를 넘은 day1 거래 고객이 갱신 대상
+    day2 = make_daily_file(tmp_path / "day2.csv", datetime(2024, 1, 2), 400, 30, seed=2)
+    with engine.begin() as conn:
+        conn.execute(Transaction.__table__.insert(), [
+            {**row, 'transaction_date': datetime.fromisoformat(row['transaction_date']), 'created_at': datetime.utcnow()}
+            for row in day2.to_dict('records')
+        ])
+    reference_date = datetime(2024, 1, 5)
+    incremental = run_summary_refresh(engine, 'incremental', reference_date)
+    assert incremental['mode'] == 'incremental'
+    
+    expected = expected_summary(pd.concat([day1, day2]), reference_date)
+    with Session(engine) as db:
+        for customer in db.query(Customer).all():
+            if customer.customer_id not in expected.index:
+                assert customer.transaction_count_3m == 0 and customer.last_transaction_date is None
+                continue
+            row = expected.loc[customer.customer_id]
+            assert customer.last_transaction_date == row['last_transaction_date']
+            assert customer.transaction_count_3m == row['transaction_count_3m']
+            assert customer.monthly_avg_amount == row['monthly_avg_amount']
+            assert customer.ltv_estimate == row['monthly_avg_amount'] * LTV_HORIZON_MONTHS
+
+
+
+def test_changed_customers_query_uses_indexes(engine):
+    """증분 대상 조회의 거래 조건은 각각 별도 SELECT의 인덱스 범위 탐색 (OR로 묶지 않아 전체 스캔 선택 여지 없음)"""
+    from services.customer_summary import changed_customers_query
+    
+    query = changed_customers_query(datetime(2024, 1, 1), datetime(2024, 1, 1), datetime(2024, 1, 2))
+    compiled = query.compile(engine)
+    with engine.connect() as conn:
+        parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+        plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", parameters)]
+    
+    assert not [detail for detail in plan if detail.startswith("SCAN transactions")]
+    assert "MULTI-INDEX OR" not in plan
+    assert sum(detail.startswith("SEARCH transactions USING") for detail in plan) == 4
+
+def assert_date_correction_keeps_one_row(engine, tmp_path):
+    """월말 거래의 거래일을 다음 달로 정정해 재적재 → 한 행만 남고 월별 집계도 이동"""
+    row = {'transaction_id': 'T0000000001', 'customer_id': 'C00000001', 'transaction_date': '2024-01-31',
+           'amount': 5000, 'category': '쇼핑', 'payment_method': '일시불', 'merchant_type': '온라인'}
+    pd.DataFrame([row]).to_csv(tmp_path / "original.csv", index=False)
+    pd.DataFrame([{**row, 'transaction_date': '2024-02-01'}]).to_csv(tmp_path / "corrected.csv", index=False)
+    
+    ingest_transactions_file(engine, str(tmp_path / "original.csv"), reference_date=datetime(2024, 2, 2))
+    result = ingest_transactions_file(engine, str(tmp_path / "corrected.csv"), reference_date=datetime(2024, 2, 2))
+    
+    assert result['rows_existing'] == 1
+    with Session(engine) as db:
+        dates = db.scalars(select(Transaction.transaction_date).where(Transaction.transaction_id == 'T0000000001')).all()
+        assert dates == [datetime(2024, 2, 1)]
+        monthly = dict(db.execute(select(TransactionMonthly.month, TransactionMonthly.transaction_count)).all())
+        assert monthly.get(datetime(2024, 1, 1), 0) == 0 and monthly[datetime(2024, 2, 1)] == 1
+        assert db.get(Customer, 'C00000001').last_transaction_date == datetime(2024, 2, 1)
+
+
+def test_date_correction_replaces_row(engine, tmp_path):
+    assert_date_correction_keeps_one_row(engine, tmp_path)
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL.startswith("postgresql"), reason="TEST_DATABASE_URL (PostgreSQL) not set")
+def test_date_correction_on_partitioned_table(tmp_path):
+    """파티션 테이블은 충돌 키에 거래일이 포함되어도 정정 시 이전 거래일 행 삭제"""
+    from services.db import create_postgres_engine
+    from services.transaction_partitions import create_transaction_storage, is_partitioned
+    
+    engine = create_postgres_engine(TEST_DATABASE_URL, pool_size=2, max_overflow=2)
+    
+    def drop_all():
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP VIEW IF EXISTS transactions_all")
+        Base.metadata.drop_all(engine)
+    
+    drop_all()
+    try:
+        assert create_transaction_storage(engine)
+        Base.metadata.create_all(engine)
+        assert is_partitioned(engine)
+        with Session(engine) as db:
+            db.add(Customer(customer_id='C00000001', join_date=datetime(2022, 1, 1)))
+            db.commit()
+        assert_date_correction_keeps_one_row(engine, tmp_path)
+    finally:
+        drop_all()
+        engine.dispose()
@@ -0,0 +1,221 @@
+"""
+Unit Tests for FeatureEngineer
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+from backend.services.feature_engineering import FeatureEngineer, TREND_WINDOWS, read_transactions
+from backend.services.feature_pipeline import FeaturePipeline
+
+
+@pytest.fixture
+def sample_data():
+    """샘플 고객/거래 데이터 생성"""
+    rng = np.random.default_rng(42)
+    n_customers = 200
+    n_txns = 6000
+    base = datetime(2023, 1, 1)
+    
+    customers_df = pd.DataFrame({
+        'customer_id': [f'C{i:08d}' for i in range(n_customers)],
+        'join_date': [(base - timedelta(days=int(d))).strftime('%Y-%m-%d') for d in rng.integers(-200, 700, n_customers)],
+        'age': rng.integers(20, 70, n_customers),
+        'region': rng.choice(['서울', '경기', '부산'], n_customers),
+        'churned': rng.integers(0, 2, n_customers)
+    })
+    transactions_df = pd.DataFrame({
+        'transaction_id': [f'T{i:010d}' for i in range(n_txns)],
+        'customer_id': rng.choice(customers_df['customer_id'], n_txns),
+        'transaction_date': [(base + timedelta(days=int(d))).strftime('%Y-%m-%d') for d in rng.integers(0, 365, n_txns)],
+        'amount': rng.integers(1000, 500000, n_txns),
+        'category': rng.choice(['식음료', '쇼핑', '교통', '문화'], n_txns),
+        'payment_method': rng.choice(['일시불', '할부', '리볼빙'], n_txns)
+    })
+    
+    return customers_df, transactions_df
+
+
+def test_transform_snapshots_matches_independent_runs(sample_data):
+    """스냅샷 피처가 기준일별 단독 실행 결과와 동일한지 검증"""
+    customers_df, transactions_df = sample_data
+    reference_dates = [datetime(2023, 4, 1), datetime(2023, 7, 15, 9, 30), datetime(2024, 1, 1)]
+    
+    snapshots = FeatureEngineer().transform_snapshots(customers_df, transactions_df.copy(), reference_dates)
+    
+    for reference_date in reference_dates:
+        customers = customers_df[pd.to_datetime(customers_df['join_date']) <= reference_date]
+        transactions = transactions_df[pd.to_datetime(transactions_df['transaction_date']) <= reference_date].copy()
+        expected = FeatureEngineer(reference_date).transform(customers, transactions)
+        
+        actual = snapshots[snapshots['reference_date'] == reference_date].drop(columns=['reference_date'])
+        actual = actual[expected.columns].reset_index(drop=True)
+        
+        pd.testing.assert_frame_equal(actual, expected.reset_index(drop=True), check_dtype=False)
+
+
+def test_transform_snapshots_excludes_future_transactions(sample_data):
+    """기준일 이후 거래/가입 고객이 스냅샷에 포함되지 않는지 검증"""
+    customers_df, transactions_df = sample_data
+    reference_date = datetime(2023, 3, 1)
+    
+    snapshot = FeatureEngineer().transform_snapshots(customers_df, transactions_df.copy(), [reference_date])
+    
+    joined = pd.to_datetime(customers_df['join_date']) <= reference_date
+    assert set(snapshot['customer_id']) == set(customers_df.loc[joined, 'customer_id'])
+    
+    past = transactions_df[pd.to_datetime(transactions_df['transaction_date']) <= reference_date]
+    past = past[past['customer_id'].isin(snapshot['customer_id'])]
+    assert snapshot['txn_count'].sum() == len(past)
+    assert snapshot['txn_amount_total'].sum() == past['amount'].sum()
+
+
+def test_window_features_match_filtered_groupby(sample_data):
+    """윈도우 피처가 기간별 필터+groupby 결과와 동일한지 검증"""
+    _, transactions_df = sample_data
+    reference_date = datetime(2023, 12, 31, 18, 0)
+    engineer = FeatureEngineer(reference_date)
+    
+    transactions_df['transaction_date'] = pd.to_datetime(transactions_df['transaction_date'])
+    trend = engineer._create_trend_features(transactions_df).set_index('customer_id')
+    
+    for label, days in engineer.windows.items():
+        window = transactions_df[transactions_df['transaction_date'] >= reference_date - timedelta(days=days)]
+        expected = window.groupby('customer_id').agg(
+            count=('transaction_id', 'count'),
+            amount=('amount', 'sum'),
+            active_days=('transaction_date', 'nunique')
+        ).reindex(trend.index, fill_value=0)
+        
+        np.testing.assert_array_equal(trend[f'txn_count_{label}'], expected['count'])
+        np.testing.assert_array_equal(trend[f'txn_amount_{label}'], expected['amount'])
+        np.testing.assert_array_equal(trend[f'active_days_{label}'], expected['active_days'])
+    
+    expected_trend = trend['txn_count_3m'] / (trend['txn_count_6m'] - trend['txn_count_3m'] + 1)
+    np.testing.assert_allclose(trend['txn_count_trend'], expected_trend)
+
+
+def test_custom_window_spec(sample_data):
+    """사용자 정의 윈도우/비율 스펙 검증"""
+    customers_df, transactions_df = sample_data
+    engineer = FeatureEngineer(
+        datetime(2024, 1, 1),
+        windows={'2w': 14, '4w': 28},
+        ratios=[('txn_count_trend_2w', 'txn_count', '2w', '4w')]
+    )
+    
+    features = engineer.transform(customers_df, transactions_df)
+    
+    for column in ['txn_count_2w', 'txn_amount_4w', 'active_days_4w', 'txn_count_trend_2w']:
+        assert column in features.columns
+    assert 'txn_count_3m' not in features.columns
+    assert (features['txn_count_4w'] >= features['txn_count_2w']).all()
+
+
+def test_rfm_bins_match_qcut_and_score_single_customer(sample_data):
+    """학습된 RFM 경계가 qcut과 같고, 단일 고객 스코어링이 배치와 일치하는지 검증"""
+    customers_df, transactions_df = sample_data
+    engineer = FeatureEngineer(datetime(2024, 1, 1))
+    features = engineer.transform(customers_df, transactions_df)
+    scored = features[features['txn_count'] > 0]
+    
+    expected = pd.qcut(scored['monetary'], 5, labels=[1, 2, 3, 4, 5]).astype(float)
+    np.testing.assert_array_equal(scored['m_score'], expected)
+    
+    # 저장된 경계로 고객 1명씩 스코어링해도 배치 결과와 동일
+    restored = FeatureEngineer.from_metadata(engineer.get_metadata(), datetime(2024, 1, 1))
+    for _, row in scored.head(20).iterrows():
+        single = restored._score_rfm(pd.DataFrame([row[['recency_days', 'frequency', 'monetary']]]))
+        assert single['r_score'].iloc[0] == row['r_score']
+        assert single['f_score'].iloc[0] == row['f_score']
+        assert single['m_score'].iloc[0] == row['m_score']
+
+
+def test_read_transactions_typed_columns(sample_data, tmp_path):
+    """타입 지정 로더의 dtype과 피처 결과 동일성 검증"""
+    customers_df, transactions_df = sample_data
+    csv_path = tmp_path / "transactions.csv"
+    transactions_df.to_csv(csv_path, index=False)
+    
+    typed = read_transactions(str(csv_path))
+    
+    assert typed['customer_id'].dtype == 'category'
+    assert typed['category'].dtype == 'category'
+    assert typed['amount'].dtype == np.int32
+    assert typed['transaction_day'].dtype == np.int32
+    assert typed['transaction_day'].iloc[0] == (pd.Timestamp(transactions_df['transaction_date'].iloc[0]) - pd.Timestamp(0)).days
+    
+    reference_date = datetime(2024, 1, 1)
+    expected = FeatureEngineer(reference_date).transform(customers_df, pd.read_csv(csv_path))
+    actual = FeatureEngineer(reference_date).transform(customers_df, typed)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    
+    # parquet 파티션 디렉토리도 같은 결과
+    pytest.importorskip('pyarrow')
+    parquet_dir = tmp_path / "transactions"
+    parquet_dir.mkdir()
+    frame = transactions_df.assign(transaction_date=pd.to_datetime(transactions_df['transaction_date']))
+    frame.iloc[:3000].to_parquet(parquet_dir / "part-00000.parquet", index=False)
+    frame.iloc[3000:].to_parquet(parquet_dir / "part-00001.parquet", index=False)
+    
+    from_parquet = read_transactions(str(parquet_dir))
+    assert from_parquet['customer_id'].dtype == 'category'
+    np.testing.assert_array_equal(from_parquet['transaction_day'], typed['transaction_day'])
+    actual = FeatureEngineer(reference_date).transform(customers_df, from_parquet)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_online_features_match_batch_vector(sample_data):
+    """DB 기반 단일 고객 피처가 배치 학습 행렬과 동일한지 검증"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from models.database import Base, Customer, Transaction
+    from services.online_features import OnlineFeatureBuilder
+    
+    customers_df, transactions_df = sample_data
+    reference_date = datetime(2024, 1, 1)
+    
+    engineer = FeatureEngineer(reference_date)
+    features_df = engineer.transform(customers_df, transactions_df.copy())
+    X = engineer.to_model_matrix(features_df)
+    
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    for row in customers_df.to_dict('records'):
+        db.add(Customer(**{**row, 'join_date': datetime.fromisoformat(row['join_date'])}))
+    for row in transactions_df.to_dict('records'):
+        db.add(Transaction(**{**row, 'transaction_date': datetime.fromisoformat(row['transaction_date'])}))
+    db.commit()
+    
+    builder = OnlineFeatureBuilder(X.columns, engineer.get_metadata())
+    for position in [0, 7, 42, 199]:
+        customer_id = features_df['customer_id'].iloc[position]
+        online = builder.build(db, customer_id, reference_date)
+        
+        assert list(online.columns) == list(X.columns)
+        np.testing.assert_allclose(online.iloc[0].to_numpy(dtype=float), X.iloc[position].to_numpy(dtype=float), rtol=1e-9)
+
+
+def test_feature_pipeline_cache_hits_and_invalidation(sample_data, tmp_path):
+    """피처 캐시 재실행 시 전 단계 적중, 파라미터 변경 시 해당 단계만 재계산"""
+    customers_df, transactions_df = sample_data
+    reference_date = datetime(2024, 1, 1)
+    expected = FeatureEngineer(reference_date).transform(customers_df, transactions_df.copy())
+    
+    first = FeaturePipeline(FeatureEngineer(reference_date), cache_dir=tmp_path)
+    pd.testing.assert_frame_equal(first.run(customers_df, transactions_df.copy()), expected)
+    assert all(s['status'] == 'miss' for s in first.stats)
+    
+    engineer = FeatureEngineer(reference_date)
+    second = FeaturePipeline(engineer, cache_dir=tmp_path)
+    pd.testing.assert_frame_equal(second.run(customers_df, transactions_df.copy()), expected)
+    assert all(s['status'] == 'hit' for s in second.stats)
+    assert engineer.rfm_bins  # 캐시 적중 시에도 RFM 경계 복원
+    
+    third = FeaturePipeline(FeatureEngineer(reference_date, windows={**TREND_WINDOWS, '1m': 28}), cache_dir=tmp_path)
+    third.run(customers_df, transactions_df.copy())
+    status = {s['node']: s['status'] for s in third.stats}
+    assert status['trend_features'] == 'miss' and status['features'] == 'miss'
+    assert status['rfm_features'] == 'hit' and status['category_features'] == 'hit'
@@ -0,0 +1,159 @@
+"""
+Unit Tests for keyset pagination of the customer list
+"""
+
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+import services.db as db_module
+from models.database import Base, Customer
+from api.routes import customers
+import services.pagination as pagination
+from services.pagination import InvalidCursor, cursor_page, decode_cursor, encode_cursor
+
+SORTS = ["customer_id", "churn_probability", "ltv_estimate", "last_transaction_date"]
+
+
+@pytest.fixture
+def database_url(tmp_path, monkeypatch):
+    """동순위/NULL 정렬 값이 섞인 고객 53명"""
+    url = f"sqlite:///{tmp_path / 'pagination.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        for i in range(53):
+            db.add(Customer(
+                customer_id=f'C{(i * 7) % 53:08d}', join_date=datetime(2022, 1, 1),
+                churn_probability=None if i % 9 == 0 else (i % 5) / 10,
+                ltv_estimate=None if i % 4 == 0 else float(i % 6),
+                last_transaction_date=None if i % 11 == 0 else datetime(2024, 1, 1 + i % 3),
+                lifecycle_stage=['신규', '성장'][i % 2]
+            ))
+        db.commit()
+    engine.dispose()
+    
+    asyncio.run(db_module.dispose_async_engine())
+    monkeypatch.setattr(db_module, "DATABASE_URL", url)
+    yield url
+    asyncio.run(db_module.dispose_async_engine())
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.include_router(customers.router, prefix="/api")
+    return app
+
+
+def expected_order(database_url, sort_by, descending, lifecycle=None):
+    """NULL은 오름차순 마지막 / 내림차순 처음, 동순위는 customer_id"""
+    engine = create_engine(database_url)
+    with Session(engine) as db:
+        query = db.query(Customer)
+        if lifecycle:
+            query = query.filter(Customer.lifecycle_stage == lifecycle)
+        rows = [(getattr(c, sort_by), c.customer_id) for c in query]
+    engine.dispose()
+    
+    values = sorted((r for r in rows if r[0] is not None), reverse=descending)
+    nulls = sorted((r for r in rows if r[0] is None), reverse=descending)
+    ordered = nulls + values if descending else values + nulls
+    return [customer_id for _, customer_id in ordered]
+
+
+def test_cursor_round_trip_and_sort_check():
+    """커서는 값/키를 보존하고 다른 정렬 기준에는 사용할 수 없음"""
+    cursor = encode_cursor("last_transaction_date", "desc", datetime(2024, 1, 2), "C00000007")
+    assert decode_cursor(cursor, "last_transaction_date", "desc") == (datetime(2024, 1, 2), "C00000007")
+    
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "last_transaction_date", "asc")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor", "customer_id", "asc")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by", SORTS)
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+async def test_cursor_pages_match_offset_order(database_url, app, sort_by, sort_order):
+    """커서로 끝까지 넘긴 결과 = OFFSET 페이지 결과 = 전체 정렬 (누락/중복 없음)"""
+    expected = expected_order(database_url, sort_by, sort_order == "desc")
+    params = {"sort_by": sort_by, "sort_order": sort_order, "page_size": 10}
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        by_cursor, cursor = [], None
+        while True:
+            page = (await client.get("/api/customers", params={**params, **({"cursor": cursor} if cursor else {})})).json()
+            by_cursor += [c["customer_id"] for c in page["customers"]]
+            cursor = page["next_cursor"]
+            assert page["has_more"] == (cursor is not None)
+            if not cursor:
+                break
+        
+        by_offset = []
+        for number in range(1, 7):
+            page = (await client.get("/api/customers", params={**params, "page": number})).json()
+            by_offset += [c["customer_id"] for c in page["customers"]]
+    
+    assert by_cursor == expected
+    assert by_offset == expected
+
+
+@pytest.mark.asyncio
+async def test_cursor_with_filter_and_invalid_cursor(database_url, app):
+    """필터와 함께 사용하고, 정렬이 다른 커서는 400"""
+    expected = expected_order(database_url, "churn_probability", True, lifecycle="성장")
+    params = {"sort_by": "churn_probability", "sort_order": "desc", "lifecycle": "growth", "page_size": 8}
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = (await client.get("/api/customers", params=params)).json()
+        second = (await client.get("/api/customers", params={**params, "cursor": first["next_cursor"]})).json()
+        mismatched = await client.get("/api/customers", params={**params, "sort_order": "asc",
+                                                                "cursor": first["next_cursor"]})
+    
+    assert [c["customer_id"] for c in first["customers"] + second["customers"]] == expected[:16]
+    assert mismatched.status_code == 400
+
+
+
+@pytest.mark.asyncio
+async def test_page_number_follows_cursor_and_deep_offsets_are_refused(database_url, app, monkeypatch):
+    """응답 page는 커서 기준, 커서 없는 번호 이동은 OFFSET 상한까지만"""
+    monkeypatch.setattr(pagination, "PAGINATION_MAX_OFFSET_ROWS", 20)
+    params = {"sort_by": "churn_probability", "sort_order": "desc", "page_size": 10}
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = (await client.get("/api/customers", params=params)).json()
+        # 다른 page 값과 함께 보내도 커서가 가리키는 페이지
+        second = (await client.get("/api/customers", params={**params, "page": 5, "cursor": first["next_cursor"]})).json()
+        shallow = await client.get("/api/customers", params={**params, "page": 3})
+        deep = await client.get("/api/customers", params={**params, "page": 4})
+    
+    assert cursor_page(first["next_cursor"]) == 2
+    assert (first["page"], second["page"]) == (1, 2)
+    assert cursor_page(second["next_cursor"]) == 3
+    assert shallow.status_code == 200
+    assert deep.status_code == 400 and "next_cursor" in deep.json()["detail"]
+
+def test_keyset_queries_use_sort_index(database_url):
+    """커서 다음 구간 조회가 (정렬 컬럼, customer_id) 인덱스를 사용"""
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM customers "
+            "WHERE churn_probability IS NOT NULL AND (churn_probability, customer_id) > (0.2, 'C00000010') "
+            "ORDER BY churn_probability, customer_id LIMIT 11"
+        )))
+    engine.dispose()
+    
+    assert "idx_customer_page_probability" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,228 @@
+"""
+Query plan regression tests for backend/api/routes
+데이터가 채워진 SQLite DB에서 라우트를 호출하며 실행된 SELECT를 모두 수집하고 EXPLAIN QUERY PLAN 검사
+
+- 대용량 테이블(customers/transactions/customer_actions/transaction_monthly/customer_360)을 전체 스캔하면 실패
+  (커버링 인덱스만 읽는 스캔은 허용: 필터 없는 건수, ID만 건너뛰는 OFFSET)
+- 정렬을 임시 B-tree로 처리하면 실패 (관련도순 검색처럼 계산 값으로 정렬하는 쿼리만 예외)
+"""
+
+import asyncio
+import random
+import re
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+import services.db as db_module
+from models.database import Base, Campaign, Customer, CustomerAction, Report, Transaction
+from api.routes import campaigns, customers, dashboard, predict, reports
+from services.cache import local_cache
+from services.count_cache import invalidate_counts
+from services.customer_search import ensure_search_index
+from services.segment_cube import invalidate_segment_cube, rebuild_segment_cube
+from services.transaction_rollup import rebuild_transaction_rollup
+
+HOT_TABLES = ('customers', 'transactions', 'customer_actions', 'transaction_monthly', 'customer_360')
+
+# 임시 정렬을 허용하는 쿼리 (SQL 조각)
+# - 텍스트 검색: FTS 일치 행만 정렬 (관련도 bm25 또는 컬럼 정렬)
+# - 고객 ID 검색: 정확 일치 우선 정렬, 접두 범위는 MIN_ID_PREFIX_DIGITS로 행 수 상한
+TEMP_SORT_ALLOWED = ('JOIN (SELECT customer_search.rowid', 'ORDER BY CASE WHEN (customers.customer_id = ?)')
+
+# 요청별로 반드시 사용해야 하는 인덱스 (핫 쿼리용 복합 인덱스)
+EXPECTED_INDEXES = {
+    "detail": ["idx_transaction_customer_date", "idx_action_customer_date", "sqlite_autoindex_transaction_monthly_1",
+               "idx_transaction_monthly_month"],
+    "transactions": ["idx_transaction_customer_date"],
+    "transactions_period": ["idx_transaction_customer_date"],
+    "transactions_category": ["idx_transaction_customer_category_date"],
+    "dashboard_alerts": ["idx_customer_page_churned_probability"],
+    "list_lifecycle_sorted": ["idx_customer_page_lifecycle_probability"],
+}
+
+# (이름, 경로, 파라미터) - 라우트의 DB 조회 경로를 모두 지나도록 구성
+REQUESTS = [
+    ("list_default", "/api/customers", {}),
+    ("list_page_10", "/api/customers", {"page": 10}),
+    ("list_risk_sorted", "/api/customers", {"risk_level": "HIGH", "sort_by": "churn_probability", "sort_order": "desc"}),
+    ("list_low_risk", "/api/customers", {"risk_level": "LOW", "sort_by": "risk_score"}),
+    ("list_lifecycle_sorted", "/api/customers", {"lifecycle": "growth", "sort_by": "churn_probability", "sort_order": "desc"}),
+    ("list_at_risk_sorted", "/api/customers", {"lifecycle": "at_risk", "sort_by": "churn_probability", "sort_order": "desc"}),
+    *[(f"list_sort_{column}_{order}", "/api/customers", {"sort_by": column, "sort_order": order, "page": 3})
+      for column in ("monthly_avg_amount", "ltv_estimate", "last_transaction_date", "age")
+      for order in ("asc", "desc")],
+    ("search_id", "/api/customers", {"search": "C0000012"}),
+    ("search_text", "/api/customers", {"search": "서울 회사원"}),
+    ("search_text_sorted", "/api/customers", {"search": "부산", "sort_by": "churn_probability", "sort_order": "desc",
+                                              "approximate_total": True}),
+    ("detail", "/api/customers/C00000042", {}),
+    ("transactions", "/api/customers/C00000042/transactions", {}),
+    ("transactions_period", "/api/customers/C00000042/transactions",
+     {"start_date": "2024-03-01", "end_date": "2024-06-30"}),
+    ("transactions_category", "/api/customers/C00000042/transactions", {"category": "쇼핑", "start_date": "2024-02-01"}),
+    ("dashboard_stats", "/api/dashboard/stats", {}),
+    ("dashboard_alerts", "/api/dashboard/alerts", {}),
+    ("dashboard_realtime", "/api/dashboard/realtime", {}),
+    ("segment_analysis", "/api/dashboard/segment-analysis", {}),
+    ("clusters", "/api/clusters", {}),
+    ("reports", "/api/reports", {}),
+    ("report_summary", "/api/reports/summary/current", {}),
+    ("campaigns", "/api/campaigns", {}),
+]
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    """고객 2,000명 / 거래 60,000건 / 액션 4,000건 + 검색 인덱스 + 큐브 + 월별 집계 + ANALYZE"""
+    path = tmp_path_factory.mktemp("plans") / "plans.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    
+    rng = random.Random(7)
+    categories = ['쇼핑', '외식', '교통', '온라인', '여행']
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(Customer.__table__.insert(), [
+            {'customer_id': f'C{i:08d}', 'join_date': datetime(2022, 1, 1), 'age': rng.randint(20, 70),
+             'region': rng.choice(['서울', '경기', '부산', '기타']), 'occupation': rng.choice(['회사원', '자영업', '전문직']),
+             'lifecycle_stage': rng.choice(['신규', '성장', '성숙', '쇠퇴']), 'churned': int(rng.random() < 0.15),
+             'churn_probability': None if i % 50 == 0 else rng.random(),
+             'monthly_avg_amount': rng.random() * 1e6, 'ltv_estimate': rng.random() * 1e7,
+             'last_transaction_date': start + timedelta(days=rng.randint(0, 180))}
+            for i in range(2000)
+        ])
+        conn.execute(Transaction.__table__.insert(), [
+            {'transaction_id': f'T{i:010d}', 'customer_id': f'C{i % 2000:08d}',
+             'transaction_date': start + timedelta(hours=rng.randint(0, 24 * 180)),
+             'amount': rng.randint(1000, 300000), 'category': rng.choice(categories)}
+            for i in range(60000)
+        ])
+        conn.execute(CustomerAction.__table__.insert(), [
+            {'customer_id': f'C{i % 2000:08d}', 'action_type': '상담', 'action_date': start + timedelta(days=i % 180)}
+            for i in range(4000)
+        ])
+        conn.execute(Campaign.__table__.insert(), [
+            {'campaign_name': f'캠페인 {i}', 'campaign_type': '쿠폰', 'start_date': start, 'end_date': start,
+             'created_at': start + timedelta(days=i)}
+            for i in range(5)
+        ])
+        conn.execute(Report.__table__.insert(), [
+            {'report_type': 'monthly', 'report_name': f'보고서 {i}', 'period_start': start, 'period_end': start,
+             'generated_at': start + timedelta(days=i), 'status': '완료'}
+            for i in range(5)
+        ])
+    ensure_search_index(engine)
+    rebuild_segment_cube(engine)
+    rebuild_transaction_rollup(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def captured(engine):
+    """모든 요청을 실행하며 요청별로 실행된 SELECT (SQL, 파라미터) 수집"""
+    url = str(engine.url)
+    statements = {}
+    current = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and conn.engine.url.database == engine.url.database:
+            current.append((statement, parameters))
+    
+    app = FastAPI()
+    for module in (customers, dashboard, reports, campaigns, predict):
+        app.include_router(module.router, prefix="/api")
+    
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for name, path, params in REQUESTS:
+                # 캐시 없이 매 요청의 쿼리를 모두 실행
+                invalidate_segment_cube()
+                invalidate_counts()
+                local_cache.clear()
+                current.clear()
+                response = await client.get(path, params=params)
+                assert response.status_code == 200, name
+                statements[name] = list(current)
+                
+                # 다음 페이지 커서가 있으면 키셋 경로도 수집
+                body = response.json()
+                if isinstance(body, dict) and body.get("next_cursor"):
+                    current.clear()
+                    await client.get(path, params={**params, "cursor": body["next_cursor"]})
+                    statements[f"{name}_cursor"] = list(current)
+        await db_module.dispose_async_engine()
+    
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(db_module, "DATABASE_URL", url)
+        monkeypatch.setattr(db_module, "SessionLocal", sessionmaker(bind=engine))
+        event.listen(Engine, "before_cursor_execute", capture)
+        try:
+            asyncio.run(db_module.dispose_async_engine())
+            asyncio.run(run())
+        finally:
+            event.remove(Engine, "before_cursor_execute", capture)
+    return statements
+
+
+def plan_problems(conn, statement, parameters):
+    """EXPLAIN QUERY PLAN → 대용량 테이블 전체 스캔/임시 정렬 목록 (소형 테이블만 읽는 쿼리는 검사 제외)"""
+    plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    tables = {match.group(1) for detail in plan for match in [re.match(r"(?:SCAN|SEARCH) (\w+)", detail)] if match}
+    if not tables & set(HOT_TABLES):
+        return []
+    
+    problems = []
+    for detail in plan:
+        scan = re.match(r"SCAN (\w+)", detail)
+        if scan and scan.group(1) in HOT_TABLES and "COVERING INDEX" not in detail:
+            problems.append(detail)
+        if "TEMP B-TREE" in detail and not any(fragment in statement for fragment in TEMP_SORT_ALLOWED):
+            problems.append(detail)
+    return problems
+
+
+def test_every_route_queries_the_database(captured):
+    """Mock 폴백 없이 라우트가 실제 DB를 조회 (수집 누락 방지)"""
+    missing = [name for name, _, _ in REQUESTS if not captured[name]]
+    assert not missing
+    assert any(name.endswith("_cursor") for name in captured)
+
+
+@pytest.mark.parametrize("name", [name for name, _, _ in REQUESTS])
+def test_route_queries_use_indexes(engine, captured, name):
+    """라우트가 실행한 SELECT마다 대용량 테이블 전체 스캔/임시 정렬 없음"""
+    names = [name] + ([f"{name}_cursor"] if f"{name}_cursor" in captured else [])
+    failures = []
+    with engine.connect() as conn:
+        for request in names:
+            for statement, parameters in captured[request]:
+                problems = plan_problems(conn, statement, parameters)
+                if problems:
+                    failures.append(f"[{request}] {' '.join(statement.split())}\n    -> {problems}")
+    
+    assert not failures, "\n".join(failures)
+
+
+@pytest.mark.parametrize("name", list(EXPECTED_INDEXES))
+def test_hot_queries_use_composite_indexes(engine, captured, name):
+    """핫 쿼리가 해당 쿼리용 복합 인덱스를 선택"""
+    with engine.connect() as conn:
+        details = [
+            row[-1]
+            for statement, parameters in captured[name]
+            for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        ]
+    
+    for index in EXPECTED_INDEXES[name]:
+        assert any(index in detail for detail in details), (index, details)
@@ -0,0 +1,127 @@
+"""
+Unit Tests for the segment aggregate cube
+"""
+
+import numpy as np
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, select
+
+from models.database import Base, Customer, SegmentCube
+from services.app_session import AppSession
+from services.segment_cube import (
+    CUBE_DIMENSIONS, CUBE_MEASURES, get_segment_cube, rebuild_segment_cube, register_segment_cube_listeners
+)
+
+register_segment_cube_listeners()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """다양한 차원 조합(미상 값 포함)의 고객 500명"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'cube.db'}")
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(3)
+    with AppSession(engine) as db:
+        for i in range(500):
+            db.add(Customer(
+                customer_id=f'C{i:08d}', join_date=datetime(2022, 1, 1),
+                age=int(rng.integers(15, 75)) if i % 17 else None,
+                region=str(rng.choice(['서울', '경기', '부산'])) if i % 13 else None,
+                occupation=str(rng.choice(['회사원', '자영업'])),
+                card_type=str(rng.choice(['일반', '골드'])),
+                lifecycle_stage=str(rng.choice(['신규', '성장', '성숙', '쇠퇴'])),
+                churned=int(rng.random() < 0.2),
+                churn_probability=float(rng.random()) if i % 11 else None,
+            ))
+        db.commit()
+    return engine
+
+
+def cube_cells(engine) -> dict:
+    cube = SegmentCube.__table__.c
+    with engine.connect() as conn:
+        rows = conn.execute(select(*[cube[name] for name in CUBE_DIMENSIONS + CUBE_MEASURES])).all()
+    return {
+        tuple(row[:len(CUBE_DIMENSIONS)]): (row.customers, row.churned, round(row.probability_sum, 9), row.probability_count)
+        for row in rows
+    }
+
+
+def test_orm_changes_keep_cube_in_sync(engine):
+    """ORM 추가/수정/삭제 후 증분 큐브가 전체 재계산 결과와 같음"""
+    incremental = cube_cells(engine)
+    assert sum(cell[0] for cell in incremental.values()) == 500
+    
+    with AppSession(engine) as db:
+        # 커밋 후 만료된 속성을 바로 변경해도 이전 셀에서 차감되어야 함
+        for customer in db.scalars(select(Customer).where(Customer.customer_id < 'C00000100')):
+            customer.churn_probability = 0.95
+            customer.churned = 1
+        db.commit()
+        for customer in db.scalars(select(Customer).where(Customer.customer_id.between('C00000100', 'C00000149'))):
+            customer.region = '제주'
+            customer.age = None
+        db.delete(db.get(Customer, 'C00000400'))
+        db.add(Customer(customer_id='C00009999', join_date=datetime(2024, 1, 1), age=33, region='서울'))
+        db.commit()
+        
+        # 롤백된 변경은 반영되지 않음
+        customer = db.get(Customer, 'C00000300')
+        customer.lifecycle_stage = '쇠퇴' if customer.lifecycle_stage != '쇠퇴' else '신규'
+        db.flush()
+        db.rollback()
+    
+    incremental = cube_cells(engine)
+    rebuild_segment_cube(engine)
+    assert incremental == cube_cells(engine)
+
+
+def test_snapshot_marginals(engine):
+    """스냅샷 차원별 합계가 고객 테이블 직접 집계와 일치"""
+    with AppSession(engine) as db:
+        db.get(Customer, 'C00000001').churn_probability = 0.99
+        db.commit()
+        customers = db.scalars(select(Customer)).all()
+    
+    cube = get_segment_cube(engine)
+    assert cube.total.customers == 500
+    assert cube.total.churned == sum(c.churned for c in customers)
+    
+    probabilities = [c.churn_probability for c in customers if c.churn_probability is not None]
+    assert cube.total.avg_probability == pytest.approx(np.mean(probabilities))
+    assert cube.count('risk_band', 'CRITICAL').customers == sum(p >= 0.9 for p in probabilities)
+    assert cube.count('risk_band', 'LOW').customers == sum(p < 0.5 for p in probabilities)
+    assert cube.count('risk_band', 'UNSCORED').customers == 500 - len(probabilities)
+    assert cube.count('age_band', '20대').customers == sum(1 for c in customers if c.age is not None and 20 <= c.age <= 29)
+    assert cube.by('region')[''].customers == sum(1 for c in customers if c.region is None)
+    
+    seoul_new = cube.slice(region='서울', lifecycle_stage='신규')
+    assert seoul_new.customers == sum(1 for c in customers if c.region == '서울' and c.lifecycle_stage == '신규')
+
+
+def test_list_labels_match_cube_bands(engine):
+    """고객 목록 risk_level과 큐브 위험 구간이 같은 규칙 (점수 없는 고객은 양쪽 모두 UNSCORED)"""
+    from api.routes.customers import format_customer
+    
+    with AppSession(engine) as db:
+        labels = [format_customer(c)["risk_level"] for c in db.scalars(select(Customer))]
+    
+    cube = get_segment_cube(engine)
+    for band, cell in cube.by('risk_band').items():
+        assert labels.count(band) == cell.customers
+    assert labels.count('UNSCORED') > 0
+
+
+def test_plain_sessions_skip_read_model_listeners(engine):
+    """적재/배치용 일반 Session은 flush 리스너를 실행하지 않음 (큐브는 rebuild로 반영)"""
+    from sqlalchemy.orm import Session
+    
+    before = cube_cells(engine)
+    with Session(engine) as db:
+        db.get(Customer, 'C00000001').churn_probability = 0.99
+        db.commit()
+    assert cube_cells(engine) == before
+    
+    rebuild_segment_cube(engine)
+    assert cube_cells(engine) != before
@@ -0,0 +1,133 @@
+"""
+Unit Tests for per-request SQL instrumentation
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import services.sql_instrumentation as instrumentation
+from services.sql_instrumentation import (
+    QueryInstrumentationMiddleware, get_sql_diagnostics, register_sql_instrumentation, reset_sql_diagnostics,
+    statement_shape
+)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """N+1 라우트(동기 스레드풀) / 단일 쿼리 라우트(async 엔진) / 스레드 위임 라우트"""
+    monkeypatch.setattr(instrumentation, "SQL_CAPTURE_PARAMETERS", True)
+    register_sql_instrumentation()
+    reset_sql_diagnostics()
+    
+    path = tmp_path / "instrumented.db"
+    engine = create_engine(f"sqlite:///{path}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY, stage TEXT)")
+        conn.exec_driver_sql("INSERT INTO items (stage) VALUES ('신규'), ('성장'), ('성숙'), ('쇠퇴'), ('신규')")
+    
+    def count_stage(stage):
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT count(*) FROM items WHERE stage = :stage"), {"stage": stage}).scalar()
+    
+    app = FastAPI()
+    app.add_middleware(QueryInstrumentationMiddleware, debug_headers=True)
+    
+    @app.get("/stages/{group}")
+    def stages(group: str):
+        # 단계마다 같은 쿼리 반복 (N+1)
+        return {stage: count_stage(stage) for stage in ['신규', '성장', '성숙', '쇠퇴', '기타', group]}
+    
+    @app.get("/total")
+    async def total():
+        async with async_engine.connect() as conn:
+            return {"total": (await conn.execute(text("SELECT count(*) FROM items"))).scalar()}
+    
+    @app.get("/threaded")
+    async def threaded():
+        return {"count": await asyncio.to_thread(count_stage, '신규')}
+    
+    yield app
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+
+
+def request(app, *paths):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.get(path) for path in paths]
+    return asyncio.run(run())
+
+
+def test_statement_shape_ignores_values():
+    """값/바인드 표기/IN 목록 길이만 다른 쿼리는 같은 모양"""
+    assert statement_shape("SELECT * FROM t WHERE a = 'x' AND b = 10\n  LIMIT 5") == \
+        statement_shape("SELECT * FROM t WHERE a = ? AND b = ? LIMIT ?")
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == \
+        statement_shape("SELECT * FROM t WHERE id IN (%(id_1)s, %(id_2)s)")
+    assert statement_shape("SELECT * FROM transactions_202401") != statement_shape("SELECT * FROM transactions_202402")
+
+
+def test_headers_report_queries_and_n_plus_one(app):
+    """동기 라우트(스레드풀)의 쿼리 수/시간이 헤더에 기록되고 반복 쿼리는 N+1로 표시"""
+    response, = request(app, "/stages/x")
+    assert response.status_code == 200
+    assert response.headers["x-db-query-count"] == "6"
+    assert float(response.headers["x-db-time-ms"]) > 0
+    assert response.headers["x-db-n-plus-one"] == "1"
+
+
+def test_async_and_threaded_queries_are_attributed_to_request(app):
+    """async 엔진/asyncio.to_thread 쿼리도 해당 요청으로 집계, 요청 밖 쿼리는 기록 안 함"""
+    total, threaded = request(app, "/total", "/threaded")
+    assert total.headers["x-db-query-count"] == "1" and total.headers["x-db-n-plus-one"] == "0"
+    assert threaded.headers["x-db-query-count"] == "1"
+    assert instrumentation.current_request_stats() is None
+
+
+def test_diagnostics_aggregate_by_route_template(app):
+    """진단: 경로 템플릿별 누적, N+1 요청 목록, 느린 쿼리와 파라미터"""
+    request(app, "/stages/a", "/stages/b", "/total")
+    diagnostics = get_sql_diagnostics()
+    
+    endpoints = {endpoint["endpoint"]: endpoint for endpoint in diagnostics["endpoints"]}
+    assert endpoints["GET /stages/{group}"]["requests"] == 2
+    assert endpoints["GET /stages/{group}"]["queries"] == 12
+    assert endpoints["GET /stages/{group}"]["n_plus_one_requests"] == 2
+    assert endpoints["GET /total"]["avg_queries"] == 1
+    
+    latest = diagnostics["recent"][0]
+    assert latest["path"] == "/total"
+    flagged = diagnostics["n_plus_one"][0]
+    assert flagged["path"] == "/stages/b"
+    assert flagged["n_plus_one"][0]["count"] == 6
+    assert flagged["n_plus_one"][0]["statement"] == "SELECT count(*) FROM items WHERE stage = ?"
+    assert len(flagged["slowest"]) == 5
+    assert all(query["parameters"].startswith("(") for query in flagged["slowest"])
+    assert flagged["slowest"][0]["ms"] >= flagged["slowest"][-1]["ms"]
+
+
+
+@pytest.mark.parametrize("environment, expected", [
+    ({}, "False False"),
+    ({"SQL_INSTRUMENTATION": "true"}, "True False"),
+    ({"DEBUG": "true"}, "True True"),
+])
+def test_instrumentation_and_diagnostics_are_debug_only(environment, expected):
+    """계측은 DEBUG 또는 명시적 설정일 때만, 진단 API는 DEBUG 모드에서만 (새 프로세스에서 설정 읽기)"""
+    env = {key: value for key, value in os.environ.items() if key not in ("DEBUG", "SQL_INSTRUMENTATION")}
+    script = ("import services.sql_instrumentation as s; "
+              "print(s.SQL_INSTRUMENTATION, s.SQL_DIAGNOSTICS_ENABLED)")
+    output = subprocess.run([sys.executable, "-c", script], env={**env, **environment}, capture_output=True,
+                            text=True, check=True, cwd=Path(__file__).resolve().parent.parent).stdout
+    assert output.strip() == expected
@@ -0,0 +1,203 @@
+"""
+Unit Tests for monthly transaction partitions and cold-data archive
+SQLite 월 테이블/뷰는 항상, PostgreSQL 네이티브 파티션은 TEST_DATABASE_URL이 지정된 경우에만 실행
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+
+from models.database import Base, Customer, Transaction, TransactionMonthly
+from services.customer_summary import refresh_customer_summary
+from services.db import create_postgres_engine, ensure_indexes
+from services.delta_ingest import ingest_transactions_file, upsert_statement
+from services.transaction_partitions import (
+    add_months, all_transactions, create_transaction_storage, ensure_transaction_view, is_partitioned,
+    list_archived_months, list_partitions, load_transaction_history, maintain_transaction_partitions,
+    read_archived_transactions, transaction_source
+)
+from services.transaction_rollup import rebuild_transaction_rollup
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+
+# 2022-01 ~ 2024-06 (30개월), 월 40건
+FIRST_MONTH = datetime(2022, 1, 1)
+N_MONTHS = 30
+
+
+def make_rows():
+    rows = []
+    for m in range(N_MONTHS):
+        month = add_months(FIRST_MONTH, m)
+        for i in range(40):
+            rows.append({
+                'transaction_id': f'T{m:03d}{i:04d}', 'customer_id': f'C{i % 10:08d}',
+                'transaction_date': month + timedelta(days=i % 28, hours=i % 24),
+                'amount': 1000 * (i + 1), 'category': '쇼핑', 'created_at': month,
+            })
+    return rows
+
+
+def populate(engine):
+    with engine.begin() as conn:
+        conn.execute(Customer.__table__.insert(), [
+            {'customer_id': f'C{i:08d}', 'join_date': datetime(2021, 1, 1)} for i in range(10)
+        ])
+        conn.execute(Transaction.__table__.insert(), make_rows())
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'partitions.db'}")
+    Base.metadata.create_all(engine)
+    ensure_transaction_view(engine)
+    populate(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_sqlite_rolls_cold_months_out_of_hot_table(engine, tmp_path):
+    """핫 구간 밖 달은 월 테이블로, 보관 기간 밖 달은 parquet로 이동하고 전체 뷰/아카이브 합은 원본과 같음"""
+    archive_dir = str(tmp_path / "archive")
+    result = maintain_transaction_partitions(engine, hot_months=6, retention_months=12, archive_dir=archive_dir)
+    
+    # 기준 월 2024-06: 핫 2024-01~, 월 테이블 2023-07~2023-12, 아카이브 ~2023-06
+    assert result['reference_month'] == '2024-06'
+    assert len(result['archived']) == 18 and sum(result['archived'].values()) == 18 * 40
+    with engine.connect() as conn:
+        assert conn.execute(select(func.min(Transaction.transaction_date))).scalar() >= datetime(2024, 1, 1)
+        assert conn.execute(select(func.count()).select_from(Transaction)).scalar() == 6 * 40
+        assert list_partitions(conn) == [datetime(2023, m, 1) for m in range(7, 13)]
+        assert conn.execute(select(func.count()).select_from(all_transactions)).scalar() == 12 * 40
+    assert list_archived_months(archive_dir)[0] == FIRST_MONTH
+    
+    # 다시 실행해도 옮길 달이 없음
+    again = maintain_transaction_partitions(engine, hot_months=6, retention_months=12, archive_dir=archive_dir)
+    assert again['moved'] == {} and again['archived'] == {}
+
+
+def test_history_reads_database_and_archive(engine, tmp_path):
+    """장기 구간 조회는 아카이브 + 월 테이블 + 핫 테이블을 합쳐 원본과 같은 행 반환"""
+    archive_dir = str(tmp_path / "archive")
+    maintain_transaction_partitions(engine, hot_months=6, retention_months=12, archive_dir=archive_dir)
+    
+    expected = [row for row in make_rows() if row['customer_id'] == 'C00000003']
+    history = load_transaction_history(engine, FIRST_MONTH, customer_ids=['C00000003'], archive_dir=archive_dir)
+    assert sorted(history['transaction_id']) == sorted(row['transaction_id'] for row in expected)
+    assert history['transaction_date'].is_monotonic_increasing
+    assert history['amount'].sum() == sum(row['amount'] for row in expected)
+    
+    # 아카이브만 포함하는 구간은 월 파티션 범위 밖 파일을 읽지 않고 기간 조건 적용
+    archived = read_archived_transactions(datetime(2022, 3, 1), datetime(2022, 5, 1), archive_dir=archive_dir)
+    assert len(archived) == 2 * 40
+    assert archived['transaction_date'].min() >= datetime(2022, 3, 1)
+
+
+def test_late_rows_for_moved_months_are_moved_again(engine, tmp_path):
+    """이미 월 테이블로 옮긴 달에 늦게 도착한 거래는 다음 정리 때 해당 월 테이블로 이동"""
+    archive_dir = str(tmp_path / "archive")
+    maintain_transaction_partitions(engine, hot_months=6, retention_months=12, archive_dir=archive_dir)
+    
+    with engine.begin() as conn:
+        conn.execute(upsert_statement('sqlite'), [{
+            'transaction_id': 'T0190000', 'customer_id': 'C00000000', 'transaction_date': datetime(2023, 8, 1),
+            'amount': 1, 'category': '외식', 'payment_method': None, 'merchant_type': None,
+        }])
+    result = maintain_transaction_partitions(engine, hot_months=6, retention_months=12, archive_dir=archive_dir)
+    
+    assert result['moved'] == {'2023-08': 1}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT amount FROM transactions_202308 WHERE transaction_id = 'T0190000'")).scalar() == 1
+        assert conn.execute(select(func.count()).select_from(all_transactions)).scalar() == 12 * 40
+
+
+def test_customer_reads_include_moved_months(engine, tmp_path):
+    """월 테이블로 옮긴 달도 고객 거래 조회/요약 최근 거래일/재적재 중복 검사에 포함"""
+    with engine.begin() as conn:
+        conn.execute(Customer.__table__.insert(), [{'customer_id': 'C00000099', 'join_date': datetime(2021, 1, 1)}])
+        conn.execute(Transaction.__table__.insert(), [{
+            'transaction_id': 'T9990000', 'customer_id': 'C00000099', 'transaction_date': datetime(2023, 8, 5),
+            'amount': 500, 'category': '외식',
+        }])
+    maintain_transaction_partitions(engine, hot_months=6, retention_months=12, archive_dir=str(tmp_path / "archive"))
+    rebuild_transaction_rollup(engine, archive_dir=str(tmp_path / "archive"))
+    
+    with Session(engine) as db:
+        source = transaction_source(db)
+        assert source is all_transactions
+        history = db.execute(select(source.c.transaction_id).where(source.c.customer_id == 'C00000003')).scalars()
+        assert len(list(history)) == 12 * 4
+    
+    # 핫 구간에 거래가 없는 휴면 고객도 최근 거래일 유지
+    with engine.begin() as conn:
+        refresh_customer_summary(conn, ['C00000099', 'C00000003'], reference_date=datetime(2024, 6, 30))
+        last_dates = dict(conn.execute(select(Customer.customer_id, Customer.last_transaction_date)
+                                       .where(Customer.customer_id.in_(['C00000099', 'C00000003']))).all())
+    assert last_dates['C00000099'] == datetime(2023, 8, 5)
+    assert last_dates['C00000003'] >= datetime(2024, 6, 1)
+    
+    # 월 테이블에 있는 거래를 정정 재적재: 한 행만 남고 월별 집계 건수 그대로
+    pd.DataFrame([{
+        'transaction_id': 'T0190003', 'customer_id': 'C00000003', 'transaction_date': datetime(2023, 8, 4, 3),
+        'amount': 1, 'category': '쇼핑', 'payment_method': '일시불', 'merchant_type': '온라인',
+    }]).to_csv(tmp_path / "fix.csv", index=False)
+    result = ingest_transactions_file(engine, str(tmp_path / "fix.csv"), reference_date=datetime(2024, 6, 30))
+    
+    assert result['rows_existing'] == 1 and result['rows_new'] == 0
+    with engine.connect() as conn:
+        rows = conn.execute(select(all_transactions.c.amount)
+                            .where(all_transactions.c.transaction_id == 'T0190003')).scalars().all()
+        assert rows == [1]
+        assert conn.execute(select(func.count()).select_from(all_transactions)).scalar() == 12 * 40 + 1
+        monthly = conn.execute(select(func.sum(TransactionMonthly.transaction_count))
+                               .where(TransactionMonthly.month == datetime(2023, 8, 1))).scalar()
+        assert monthly == 41
+
+
+def drop_all(engine):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP VIEW IF EXISTS transactions_all")
+    Base.metadata.drop_all(engine)
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL.startswith("postgresql"), reason="TEST_DATABASE_URL (PostgreSQL) not set")
+def test_postgres_native_partitions(tmp_path):
+    """네이티브 파티션 테이블: DEFAULT 파티션 행을 월 파티션으로 분배, 보관 기간 밖 파티션 아카이브 후 삭제"""
+    engine = create_postgres_engine(TEST_DATABASE_URL, pool_size=2, max_overflow=2)
+    drop_all(engine)
+    try:
+        assert create_transaction_storage(engine)
+        Base.metadata.create_all(engine)
+        ensure_indexes(engine)
+        ensure_transaction_view(engine)
+        assert is_partitioned(engine)
+        populate(engine)
+        
+        archive_dir = str(tmp_path / "archive")
+        result = maintain_transaction_partitions(engine, hot_months=6, retention_months=12, archive_dir=archive_dir)
+        
+        assert len(result['archived']) == 18
+        with engine.connect() as conn:
+            months = list_partitions(conn)
+            assert months[0] == datetime(2023, 7, 1) and months[-1] == datetime(2024, 9, 1)
+            assert conn.execute(text("SELECT count(*) FROM transactions_default")).scalar() == 0
+            assert conn.execute(select(func.count()).select_from(Transaction)).scalar() == 12 * 40
+        
+        # 파티션 테이블 업서트는 (transaction_id, transaction_date) 충돌 대상
+        with Session(engine) as db:
+            db.execute(upsert_statement('postgresql', partitioned=True), [{
+                'transaction_id': 'T0290000', 'customer_id': 'C00000000', 'transaction_date': datetime(2024, 6, 1),
+                'amount': 7, 'category': '외식', 'payment_method': None, 'merchant_type': None,
+            }])
+            db.commit()
+            assert db.scalar(select(Transaction.amount).where(Transaction.transaction_id == 'T0290000')) == 7
+        
+        history = load_transaction_history(engine, FIRST_MONTH, archive_dir=archive_dir)
+        assert len(history) == N_MONTHS * 40
+    finally:
+        drop_all(engine)
+        engine.dispose()
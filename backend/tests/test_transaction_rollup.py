@@ -0,0 +1,155 @@
+"""
+Unit Tests for the monthly transaction rollup
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from models.database import Base, Customer, Transaction, TransactionMonthly
+from services.delta_ingest import ingest_transactions_file
+from services.transaction_partitions import maintain_transaction_partitions
+from services.transaction_rollup import (
+    customer_rollup_query, long_window_features, monthly_trend, period_activity, rebuild_transaction_rollup,
+    rollup_totals
+)
+
+CUSTOMERS = [f'C{i:08d}' for i in range(20)]
+CATEGORIES = ['쇼핑', '외식', '교통', None]
+
+
+def make_transactions(start_id: int, n_rows: int, first_day: datetime, days: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'transaction_id': [f'T{i:010d}' for i in range(start_id, start_id + n_rows)],
+        'customer_id': rng.choice(CUSTOMERS, n_rows),
+        'transaction_date': [first_day + timedelta(days=int(d), hours=int(h))
+                             for d, h in zip(rng.integers(0, days, n_rows), rng.integers(0, 24, n_rows))],
+        'amount': rng.integers(1000, 100000, n_rows),
+        'category': rng.choice(np.array(CATEGORIES, dtype=object), n_rows),
+        'payment_method': '일시불',
+        'merchant_type': '온라인',
+    })
+
+
+def expected_rollup(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.assign(month=df['transaction_date'].dt.to_period('M').dt.to_timestamp(),
+                   category=df['category'].fillna(''))
+    return (df.groupby(['customer_id', 'month', 'category'])
+              .agg(transaction_count=('amount', 'size'), total_amount=('amount', 'sum'))
+              .reset_index())
+
+
+def read_rollup(engine) -> pd.DataFrame:
+    with engine.connect() as conn:
+        rows = conn.execute(select(TransactionMonthly.__table__).order_by(
+            TransactionMonthly.customer_id, TransactionMonthly.month, TransactionMonthly.category
+        )).all()
+    frame = pd.DataFrame(rows, columns=['customer_id', 'month', 'category', 'transaction_count', 'total_amount'])
+    return frame.assign(month=pd.to_datetime(frame['month']))
+
+
+def assert_rollup_equals(engine, df: pd.DataFrame):
+    actual = read_rollup(engine)
+    expected = expected_rollup(df).sort_values(['customer_id', 'month', 'category'], ignore_index=True)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """고객 20명 / 2023-01 ~ 2024-06 거래 3,000건"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollup.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        for customer_id in CUSTOMERS:
+            db.add(Customer(customer_id=customer_id, join_date=datetime(2022, 1, 1)))
+        db.commit()
+    
+    history = make_transactions(0, 3000, datetime(2023, 1, 1), 547, seed=1)
+    with engine.begin() as conn:
+        conn.execute(Transaction.__table__.insert(), history.to_dict('records'))
+    rebuild_transaction_rollup(engine)
+    engine.history = history
+    return engine
+
+
+def test_rebuild_matches_raw_transactions(engine):
+    """전체 재계산 = 원본 거래 고객 x 월 x 카테고리 GROUP BY (카테고리 없음은 '')"""
+    assert_rollup_equals(engine, engine.history)
+
+
+def test_ingest_applies_deltas_incrementally(engine, tmp_path):
+    """일별 적재: 새 거래는 더하고, 재전송으로 덮어쓴 거래는 이전 값을 빼서 재계산 결과와 동일"""
+    day = make_transactions(3000, 200, datetime(2024, 7, 1), 1, seed=2)
+    # 기존 거래 50건 재전송 (금액/카테고리/거래일 변경 → 이전 달 집계 차감)
+    resent = engine.history.iloc[:50].assign(amount=7, category='외식', transaction_date=datetime(2024, 7, 1, 9))
+    pd.concat([day, resent]).to_csv(tmp_path / "day.csv", index=False)
+    
+    ingest_transactions_file(engine, str(tmp_path / "day.csv"), batch_size=64, reference_date=datetime(2024, 7, 2))
+    
+    current = pd.concat([engine.history.iloc[50:], day, resent], ignore_index=True)
+    assert_rollup_equals(engine, current)
+
+
+def test_archived_months_survive_rebuild(engine, tmp_path):
+    """원본이 아카이브된 달의 집계는 재계산 후에도 유지"""
+    maintain_transaction_partitions(engine, hot_months=6, retention_months=12, archive_dir=str(tmp_path / "archive"))
+    rebuild_transaction_rollup(engine, archive_dir=str(tmp_path / "archive"))
+    
+    assert_rollup_equals(engine, engine.history)
+
+
+def test_customer_trend_and_totals(engine):
+    """고객 상세: 기준월까지 최근 12개월 추이 (거래 없는 달 0) + 누적 합계/상위 카테고리"""
+    customer = engine.history[engine.history['customer_id'] == 'C00000003']
+    with engine.connect() as conn:
+        rows = conn.execute(customer_rollup_query('C00000003')).all()
+    
+    trend = monthly_trend(rows, datetime(2024, 9, 15))
+    assert [point['month'] for point in trend][-3:] == ['2024-07', '2024-08', '2024-09']
+    assert trend[-1]['transaction_count'] == 0
+    june = customer[customer['transaction_date'].dt.strftime('%Y-%m') == '2024-06']
+    assert trend[-4]['month'] == '2024-06' and trend[-4]['total_amount'] == june['amount'].sum()
+    
+    totals = rollup_totals(rows)
+    assert totals['transaction_count'] == len(customer)
+    assert totals['total_amount'] == customer['amount'].sum()
+    by_category = customer.assign(category=customer['category'].fillna('기타')).groupby('category')['amount'].sum()
+    assert totals['favorite_categories'] == list(by_category.sort_values(ascending=False).index[:3])
+
+
+def test_period_activity_for_reports(engine):
+    """리포트: 기간이 걸친 달 전체의 월별/카테고리별 합계"""
+    with Session(engine) as db:
+        activity = period_activity(db, datetime(2023, 3, 15), datetime(2023, 5, 10))
+    
+    months = engine.history[engine.history['transaction_date'].dt.strftime('%Y-%m').isin(['2023-03', '2023-04', '2023-05'])]
+    assert [month['month'] for month in activity['months']] == ['2023-03', '2023-04', '2023-05']
+    assert activity['transaction_count'] == len(months)
+    assert activity['total_amount'] == months['amount'].sum()
+    assert sum(category['share'] for category in activity['categories']) == pytest.approx(1.0, abs=1e-3)
+
+
+def test_long_window_features(engine):
+    """월 단위 장기 윈도우 피처 = 원본 거래에서 직접 계산한 값"""
+    reference_date = datetime(2024, 6, 20)
+    with engine.connect() as conn:
+        features = long_window_features(conn, CUSTOMERS + ['C99999999'], reference_date, windows=(6, 12))
+    features = features.set_index('customer_id')
+    
+    df = engine.history.assign(month=engine.history['transaction_date'].dt.to_period('M'))
+    age = (pd.Period(reference_date, 'M') - df['month']).apply(lambda offset: offset.n)
+    for months in (6, 12):
+        window = df[age < months]
+        assert (features[f'txn_count_{months}mo'].drop('C99999999') == window.groupby('customer_id').size()).all()
+        assert (features[f'txn_amount_{months}mo'].drop('C99999999')
+                == window.groupby('customer_id')['amount'].sum()).all()
+        assert (features[f'active_months_{months}mo'].drop('C99999999')
+                == window.groupby('customer_id')['month'].nunique()).all()
+    
+    assert features.loc['C99999999', 'txn_count_12mo'] == 0
+    assert np.isnan(features.loc['C99999999', 'months_since_last_txn'])
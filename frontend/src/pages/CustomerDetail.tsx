@@ -24,6 +24,7 @@ import {
   FileTextOutlined,
   PhoneOutlined,
   MailOutlined,
+  BarChartOutlined,
 } from '@ant-design/icons';
 import ReactECharts from 'echarts-for-react';
 import apiClient from '../services/api';
@@ -203,6 +204,37 @@ const CustomerDetail: React.FC = () => {
     ],
   };
 
+  // 월별 거래 추이 차트 (월별 거래 집계 기준)
+  const monthlyTrendChartOption: EChartsOption = {
+    title: { text: '월별 거래 추이', left: 'center' },
+    tooltip: { trigger: 'axis' },
+    legend: { bottom: 0 },
+    xAxis: {
+      type: 'category',
+      data: customer.monthly_trend?.map((m: any) => m.month) || [],
+    },
+    yAxis: [
+      { type: 'value', name: '금액(원)' },
+      { type: 'value', name: '건수' },
+    ],
+    series: [
+      {
+        name: '거래 금액',
+        type: 'bar',
+        data: customer.monthly_trend?.map((m: any) => m.total_amount) || [],
+        itemStyle: { color: '#1890ff' },
+      },
+      {
+        name: '거래 건수',
+        type: 'line',
+        yAxisIndex: 1,
+        data: customer.monthly_trend?.map((m: any) => m.transaction_count) || [],
+        smooth: true,
+        itemStyle: { color: '#fa8c16' },
+      },
+    ],
+  };
+
   // 거래 내역 컬럼
   const transactionColumns = [
     {
@@ -277,7 +309,7 @@ const CustomerDetail: React.FC = () => {
           >
             <div style={{ textAlign: 'center', marginBottom: 20 }}>
               <div style={{ fontSize: 48, fontWeight: 'bold', color: '#ff4d4f' }}>
-                {customer.risk_score}
+                {customer.risk_score ?? '-'}
               </div>
               <div style={{ fontSize: 16, color: '#666', marginTop: 8 }}>
                 위험도 점수
@@ -288,6 +320,8 @@ const CustomerDetail: React.FC = () => {
                     ? 'red'
                     : customer.risk_level === 'HIGH'
                     ? 'orange'
+                    : customer.risk_level === 'UNSCORED'
+                    ? 'default'
                     : 'blue'
                 }
                 style={{ fontSize: 16, padding: '4px 12px', marginTop: 12 }}
@@ -297,7 +331,9 @@ const CustomerDetail: React.FC = () => {
             </div>
             <Descriptions column={1} size="small">
               <Descriptions.Item label="이탈 확률">
-                {(customer.churn_probability * 100).toFixed(1)}%
+                {customer.churn_probability == null
+                  ? '-'
+                  : `${(customer.churn_probability * 100).toFixed(1)}%`}
               </Descriptions.Item>
               <Descriptions.Item label="생애주기">
                 {
@@ -362,6 +398,11 @@ const CustomerDetail: React.FC = () => {
                 />
               ),
             },
+            {
+              key: 'monthly_trend',
+              label: <span><BarChartOutlined /> 월별 거래 추이</span>,
+              children: <ReactECharts option={monthlyTrendChartOption} style={{ height: 400 }} />,
+            },
             {
               key: 'prediction_history',
               label: <span><AlertOutlined /> 위험도 변화</span>,
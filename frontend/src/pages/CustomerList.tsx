@@ -8,7 +8,7 @@
  * Copyright (c) 2024-2026 (주)범온누리 이노베이션
  */
 
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useNavigate, useSearchParams } from 'react-router-dom';
 import {
   Table,
@@ -47,10 +47,10 @@ interface CustomerData {
   region: string;
   occupation: string;
   join_date: string;
-  risk_score: number;
+  risk_score: number | null;
   risk_level: string;
   lifecycle_stage: string;
-  churn_probability: number;
+  churn_probability: number | null;
   monthly_avg_amount: number;
   ltv_estimate: number;
   last_transaction_date: string;
@@ -64,6 +64,7 @@ const CustomerList: React.FC = () => {
   const [loading, setLoading] = useState(false);
   const [customers, setCustomers] = useState<CustomerData[]>([]);
   const [total, setTotal] = useState(0);
+  const [totalApproximate, setTotalApproximate] = useState(false);
   const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState(20);
   
@@ -74,8 +75,11 @@ const CustomerList: React.FC = () => {
     high_risk_count: 0
   });
   
-  // 정렬 상태
-  const [sortBy, setSortBy] = useState<string>('customer_id');
+  // 페이지별 키셋 커서 (다음 페이지 이동 시 OFFSET 대신 사용)
+  const cursorsRef = useRef<Record<number, string>>({});
+  
+  // 정렬 상태 ('' = 기본 정렬: 검색 중이면 관련도순, 아니면 고객 ID순)
+  const [sortBy, setSortBy] = useState<string>('');
   const [sortOrder, setSortOrder] = useState<string>('asc');
   
   // 필터 상태 - URL 파라미터에서 초기화
@@ -95,12 +99,14 @@ const CustomerList: React.FC = () => {
       const params: any = {
         page,
         page_size: pageSize,
-        sort_by: sortBy,
+        sort_by: sortBy || undefined,
         sort_order: sortOrder,
       };
       
       if (searchText.trim()) {
         params.search = searchText.trim();
+        // 입력 중 검색은 상한까지만 카운트
+        params.approximate_total = true;
       }
       if (riskLevelFilter) {
         params.risk_level = riskLevelFilter;
@@ -108,22 +114,39 @@ const CustomerList: React.FC = () => {
       if (lifecycleFilter) {
         params.lifecycle = lifecycleFilter;
       }
+      if (cursorsRef.current[page]) {
+        params.cursor = cursorsRef.current[page];
+      }
       
       const data = await apiClient.getCustomers(params);
       setCustomers(data.customers || []);
       setTotal(data.total || 0);
+      setTotalApproximate(Boolean(data.total_approximate));
+      if (data.next_cursor) {
+        cursorsRef.current[page + 1] = data.next_cursor;
+      }
       // 전체 DB 통계 설정
       if (data.stats) {
         setDbStats(data.stats);
       }
-    } catch (error) {
+    } catch (error: any) {
       console.error('고객 목록 로드 실패:', error);
-      message.error('고객 목록을 불러오는데 실패했습니다');
+      if (error?.response?.status === 400) {
+        // 커서 없이 너무 깊은 페이지로 이동 (서버 OFFSET 상한) → 다음 페이지로 이어서 이동하거나 필터로 범위 축소
+        message.warning('이 페이지는 바로 이동할 수 없습니다. 다음 페이지로 이어서 이동하거나 필터로 범위를 좁혀 주세요');
+      } else {
+        message.error('고객 목록을 불러오는데 실패했습니다');
+      }
     } finally {
       setLoading(false);
     }
   }, [page, pageSize, searchText, riskLevelFilter, lifecycleFilter, sortBy, sortOrder]);
 
+  // 필터/정렬/페이지 크기가 바뀌면 기존 커서 무효화 (로드보다 먼저 실행)
+  useEffect(() => {
+    cursorsRef.current = {};
+  }, [pageSize, searchText, riskLevelFilter, lifecycleFilter, sortBy, sortOrder]);
+
   // 초기 로드 및 필터 변경 시 로드
   useEffect(() => {
     loadCustomers();
@@ -149,7 +172,7 @@ const CustomerList: React.FC = () => {
     setSearchText('');
     setRiskLevelFilter(undefined);
     setLifecycleFilter(undefined);
-    setSortBy('customer_id');
+    setSortBy('');
     setSortOrder('asc');
     setPage(1);
   };
@@ -190,7 +213,7 @@ const CustomerList: React.FC = () => {
       setSortOrder(newSortOrder);
     } else if (!sorterResult.order) {
       // 정렬 해제시 기본 정렬로 복귀
-      setSortBy('customer_id');
+      setSortBy('');
       setSortOrder('asc');
     }
   };
@@ -303,11 +326,14 @@ const CustomerList: React.FC = () => {
       width: 90,
       sorter: true,
       sortOrder: getSortOrder('risk_score'),
-      render: (score: number) => (
-        <Tag color={score >= 90 ? 'red' : score >= 70 ? 'orange' : score >= 50 ? 'blue' : 'green'}>
-          {score}
-        </Tag>
-      ),
+      render: (score: number | null) =>
+        score == null ? (
+          '-'
+        ) : (
+          <Tag color={score >= 90 ? 'red' : score >= 70 ? 'orange' : score >= 50 ? 'blue' : 'green'}>
+            {score}
+          </Tag>
+        ),
     },
     {
       title: '위험 등급',
@@ -320,6 +346,7 @@ const CustomerList: React.FC = () => {
           HIGH: 'orange',
           MEDIUM: 'blue',
           LOW: 'green',
+          UNSCORED: 'default',
         };
         return <Tag color={colors[level]}>{level}</Tag>;
       },
@@ -354,7 +381,7 @@ const CustomerList: React.FC = () => {
       width: 100,
       sorter: true,
       sortOrder: getSortOrder('churn_probability'),
-      render: (prob: number) => `${(prob * 100).toFixed(1)}%`,
+      render: (prob: number | null) => (prob == null ? '-' : `${(prob * 100).toFixed(1)}%`),
     },
     {
       title: '월 평균 사용액',
@@ -423,7 +450,7 @@ const CustomerList: React.FC = () => {
             <Statistic
               title="검색 결과"
               value={total}
-              suffix="명"
+              suffix={totalApproximate ? '명 이상' : '명'}
             />
           </Card>
         </Col>
@@ -476,6 +503,7 @@ const CustomerList: React.FC = () => {
                 <Option value="HIGH">HIGH</Option>
                 <Option value="MEDIUM">MEDIUM</Option>
                 <Option value="LOW">LOW</Option>
+                <Option value="UNSCORED">UNSCORED</Option>
               </Select>
               <Select
                 placeholder="생애주기"
@@ -530,7 +558,7 @@ const CustomerList: React.FC = () => {
             pageSize,
             total,
             showSizeChanger: true,
-            showTotal: (total) => `전체 ${total.toLocaleString()}명`,
+            showTotal: (total) => `전체 ${total.toLocaleString()}명${totalApproximate ? ' 이상' : ''}`,
             pageSizeOptions: ['10', '20', '50', '100'],
           }}
           scroll={{ x: 1600 }}
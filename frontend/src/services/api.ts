@@ -115,6 +115,8 @@ class ApiClient {
     search?: string;
     sort_by?: string;
     sort_order?: string;
+    cursor?: string;
+    approximate_total?: boolean;
   }) {
     const { data } = await this.client.get('/api/customers', { params });
     return data;
@@ -14,7 +14,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.models.churn_predictor import ChurnPredictor
-from backend.services.feature_engineering import FeatureEngineer
+from backend.services.feature_engineering import FeatureEngineer, read_transactions
+from backend.services.feature_pipeline import FeaturePipeline
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,8 +25,13 @@ def load_data(data_dir: str = 'data/synthetic'):
     """데이터 로드"""
     logger.info(f"📂 Loading data from {data_dir}")
     
-    customers_df = pd.read_csv(f"{data_dir}/customers.csv")
-    transactions_df = pd.read_csv(f"{data_dir}/transactions.csv")
+    # generate_synthetic_data.py 기본 출력(parquet 파티션) 또는 단일 CSV
+    if Path(data_dir, 'customers').is_dir():
+        customers_df = pd.read_parquet(f"{data_dir}/customers")
+        transactions_df = read_transactions(f"{data_dir}/transactions")
+    else:
+        customers_df = pd.read_csv(f"{data_dir}/customers.csv")
+        transactions_df = read_transactions(f"{data_dir}/transactions.csv")
     
     logger.info(f"   Customers: {len(customers_df):,}")
     logger.info(f"   Transactions: {len(transactions_df):,}")
@@ -33,31 +39,25 @@ def load_data(data_dir: str = 'data/synthetic'):
     return customers_df, transactions_df
 
 
-def prepare_features(customers_df, transactions_df):
-    """Feature Engineering"""
+def prepare_features(customers_df, transactions_df, reference_date=None,
+                     cache_dir: str = 'ml/cache/features', use_cache: bool = True):
+    """Feature Engineering (변경 없는 단계는 피처 캐시에서 로드)"""
     logger.info("🔧 Feature Engineering...")
     
-    engineer = FeatureEngineer()
-    features_df = engineer.transform(customers_df, transactions_df)
+    engineer = FeatureEngineer(reference_date)
+    pipeline = FeaturePipeline(engineer, cache_dir=cache_dir, use_cache=use_cache)
+    features_df = pipeline.run(customers_df, transactions_df)
     
-    # 레이블 분리
-    X = features_df.drop(columns=['customer_id', 'churned'])
+    # 레이블 분리 (날짜 제거, 범주형 코드화 포함)
+    X = engineer.to_model_matrix(features_df)
     y = features_df['churned']
-    
-    # 날짜 타입 제거
-    date_cols = X.select_dtypes(include=['datetime64']).columns
-    X = X.drop(columns=date_cols)
-    
-    # 범주형 변수 인코딩
-    categorical_cols = X.select_dtypes(include=['object']).columns
-    for col in categorical_cols:
-        X[col] = pd.Categorical(X[col]).codes
+    metadata = engineer.get_metadata()
     
     logger.info(f"   Features: {X.shape[1]}")
     logger.info(f"   Samples: {len(X)}")
     logger.info(f"   Churn rate: {y.mean():.2%}")
     
-    return X, y
+    return X, y, metadata
 
 
 def train_model(X_train, y_train, X_val, y_val):
@@ -100,6 +100,10 @@ def main():
     parser.add_argument('--data-dir', default='data/synthetic', help='Data directory')
     parser.add_argument('--output-dir', default='ml/models', help='Output directory')
     parser.add_argument('--test-size', type=float, default=0.2, help='Test set ratio')
+    parser.add_argument('--reference-date', default=None,
+                        help='Feature reference date (YYYY-MM-DD, default: today)')
+    parser.add_argument('--cache-dir', default='ml/cache/features', help='Feature cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='Recompute all feature stages')
     
     args = parser.parse_args()
     
@@ -111,7 +115,15 @@ def main():
     customers_df, transactions_df = load_data(args.data_dir)
     
     # 2. Feature Engineering
-    X, y = prepare_features(customers_df, transactions_df)
+    # 기준일을 날짜 단위로 고정해야 같은 날 재학습 시 캐시가 적중
+    if args.reference_date:
+        reference_date = datetime.fromisoformat(args.reference_date)
+    else:
+        reference_date = datetime.combine(datetime.now().date(), datetime.min.time())
+    X, y, feature_metadata = prepare_features(
+        customers_df, transactions_df, reference_date,
+        cache_dir=args.cache_dir, use_cache=not args.no_cache
+    )
     
     # 3. Train/Test Split
     from sklearn.model_selection import train_test_split
@@ -121,6 +133,7 @@ def main():
     
     # 4. 모델 학습
     predictor, metrics = train_model(X_train, y_train, X_test, y_test)
+    predictor.feature_metadata = feature_metadata
     
     # 5. 모델 저장
     save_model(predictor, args.output_dir)
@@ -0,0 +1,169 @@
+"""
+DB 동시성 벤치마크
+여러 스레드가 고객 조회(읽기)와 이탈 점수 반영(쓰기)을 섞어 실행할 때
+legacy(단일 공유 연결) vs tuned(WAL + 연결 풀 + PRAGMA) SQLite 프로필 비교
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import text
+
+from services.db import create_sqlite_engine
+from models.database import Base
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+READ_SQL = text(
+    "SELECT customer_id, churn_probability, risk_level FROM customers "
+    "WHERE risk_level = :risk_level ORDER BY churn_probability DESC LIMIT 20 OFFSET :offset"
+)
+DETAIL_SQL = text("SELECT * FROM customers WHERE customer_id = :customer_id")
+WRITE_SQL = text(
+    "UPDATE customers SET churn_probability = :probability, risk_score = :score, "
+    "last_prediction_date = :scored_at WHERE customer_id = :customer_id"
+)
+
+
+def seed_database(engine, n_customers: int):
+    """벤치마크용 고객 테이블 생성"""
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(42)
+    probabilities = rng.random(n_customers)
+    rows = [
+        {
+            'customer_id': f'C{i:08d}',
+            'join_date': '2022-01-01 00:00:00.000000',
+            'churn_probability': float(p),
+            'risk_level': 'HIGH' if p > 0.7 else 'MEDIUM' if p > 0.4 else 'LOW',
+            'risk_score': int(p * 100),
+        }
+        for i, p in enumerate(probabilities)
+    ]
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO customers (customer_id, join_date, churn_probability, risk_level, risk_score) "
+            "VALUES (:customer_id, :join_date, :churn_probability, :risk_level, :risk_score)"
+        ), rows)
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_bench_risk ON customers (risk_level, churn_probability)")
+
+
+def worker(engine, n_customers, write_ratio, deadline, results, lock, seed, connection_lock=None):
+    """
+    읽기/쓰기 혼합 루프
+    
+    connection_lock: legacy 프로필은 연결 하나를 모든 스레드가 공유하므로
+    동시에 사용하면 sqlite3 연결 상태가 깨짐 → 연결 사용 구간을 직렬화해 측정
+    """
+    rng = random.Random(seed)
+    reads, writes, errors = [], [], 0
+    
+    while time.perf_counter() < deadline:
+        customer_id = f'C{rng.randrange(n_customers):08d}'
+        is_write = rng.random() < write_ratio
+        start = time.perf_counter()
+        try:
+            with connection_lock or nullcontext(), engine.connect() as conn:
+                if is_write:
+                    probability = rng.random()
+                    conn.execute(WRITE_SQL, {
+                        'probability': probability,
+                        'score': int(probability * 100),
+                        'scored_at': datetime.now().isoformat(sep=' '),
+                        'customer_id': customer_id,
+                    })
+                    conn.commit()
+                else:
+                    conn.execute(READ_SQL, {
+                        'risk_level': rng.choice(['HIGH', 'MEDIUM', 'LOW']),
+                        'offset': rng.randrange(0, 2000, 20),
+                    }).fetchall()
+                    conn.execute(DETAIL_SQL, {'customer_id': customer_id}).fetchall()
+            (writes if is_write else reads).append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+    
+    with lock:
+        results['reads'].extend(reads)
+        results['writes'].extend(writes)
+        results['errors'] += errors
+
+
+def run_profile(profile: str, args) -> dict:
+    """프로필 하나를 새 DB 파일에서 측정"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_sqlite_engine(f"sqlite:///{tmp}/bench.db", profile=profile)
+        seed_database(engine, args.customers)
+        
+        results = {'reads': [], 'writes': [], 'errors': 0}
+        lock = threading.Lock()
+        connection_lock = threading.Lock() if profile == 'legacy' else None
+        deadline = time.perf_counter() + args.duration
+        threads = [
+            threading.Thread(target=worker, args=(engine, args.customers, args.write_ratio, deadline,
+                                                 results, lock, i, connection_lock))
+            for i in range(args.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+    
+    def percentile(values, q):
+        return np.percentile(values, q) * 1000 if values else float('nan')
+    
+    total = len(results['reads']) + len(results['writes'])
+    summary = {
+        'ops_per_sec': total / args.duration,
+        'read_p50': percentile(results['reads'], 50),
+        'read_p95': percentile(results['reads'], 95),
+        'write_p50': percentile(results['writes'], 50),
+        'write_p95': percentile(results['writes'], 95),
+        'errors': results['errors'],
+    }
+    logger.info(
+        f"   {profile:<7} {summary['ops_per_sec']:9,.0f} ops/s | "
+        f"read p50 {summary['read_p50']:6.2f}ms p95 {summary['read_p95']:6.2f}ms | "
+        f"write p50 {summary['write_p50']:6.2f}ms p95 {summary['write_p95']:6.2f}ms | "
+        f"errors {summary['errors']}"
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent reads and score write-backs')
+    parser.add_argument('--customers', type=int, default=50_000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per profile')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of score write-backs')
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info("DB CONCURRENCY BENCHMARK")
+    logger.info(f"{args.threads} threads, {args.write_ratio:.0%} writes, {args.customers:,} customers")
+    logger.info("="*60)
+    
+    legacy = run_profile('legacy', args)
+    tuned = run_profile('tuned', args)
+    
+    logger.info("-"*60)
+    logger.info(f"   Throughput: {tuned['ops_per_sec'] / legacy['ops_per_sec']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
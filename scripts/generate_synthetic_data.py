@@ -1,159 +1,331 @@
 """
 IBK 카드 고객 이탈 예측 - 합성 데이터 생성 (Ultra Fast)
-완전 벡터화 버전
+완전 벡터화 + 청크 병렬 버전
+
+- 고객을 고정 크기 청크로 나누고, 청크마다 SeedSequence([seed, chunk])로 난수 생성기를 만듦
+  → 워커 수/실행 순서와 무관하게 (seed, 고객 수, 청크 크기)가 같으면 항상 같은 데이터
+- 1단계: 청크별 거래 건수만 계산 → 누적합으로 거래 ID 시작 번호 확정
+- 2단계: 청크별 고객/거래 생성 후 파티션 파일로 저장 (parquet, pyarrow 없으면 CSV)
 
 Copyright (c) 2024 (주)범온누리 이노베이션
 """
 
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+import os
+import json
+import time
+import shutil
 import logging
+import importlib.util
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
-np.random.seed(42)
+REFERENCE_DATE = np.datetime64('2024-01-01', 'D')
 
+# 데이터 규모 티어: (고객 수, 고객당 거래 건수 배율)
+SIZE_TIERS = {
+    'small': (10_000, 1.0),
+    'medium': (100_000, 1.0),
+    'large': (1_000_000, 1.0),
+    'production': (7_000_000, 1.9),  # 약 7백만 고객 / 10억 거래
+}
 
-def generate_data(n_customers=10000):
-    """고객 + 거래 데이터 생성 (완전 벡터화)"""
-    
-    logger.info("="*60)
-    logger.info("IBK 카드 합성 데이터 생성")
-    logger.info("(주)범온누리 이노베이션")
-    logger.info("="*60 + "\n")
-    
-    logger.info(f"👥 Generating {n_customers:,} customers...")
-    
-    # ========== 고객 데이터 ==========
-    lifecycle = np.random.choice(['신규', '성장', '성숙', '쇠퇴'], n_customers, p=[0.15, 0.25, 0.40, 0.20])
-    
-    months_ago = np.where(lifecycle == '신규', np.random.randint(0, 6, n_customers),
-                 np.where(lifecycle == '성장', np.random.randint(6, 24, n_customers),
-                 np.where(lifecycle == '성숙', np.random.randint(24, 60, n_customers),
-                          np.random.randint(60, 120, n_customers))))
-    
-    reference_date = datetime(2024, 1, 1)
-    join_dates = [reference_date - timedelta(days=int(m*30)) for m in months_ago]
-    
-    ages = np.random.choice([25, 35, 45, 55, 65], n_customers, p=[0.15, 0.30, 0.30, 0.15, 0.10])
-    ages += np.random.randint(-5, 6, n_customers)
-    
-    regions = np.random.choice(['서울', '경기', '부산', '기타'], n_customers, p=[0.25, 0.25, 0.15, 0.35])
-    occupations = np.random.choice(['회사원', '자영업', '전문직', '기타'], n_customers, p=[0.50, 0.20, 0.15, 0.15])
-    
-    incomes = np.where(occupations == '전문직', np.random.normal(7000, 1500, n_customers),
-              np.where(occupations == '회사원', np.random.normal(5000, 1000, n_customers),
-              np.where(occupations == '자영업', np.random.normal(4000, 1500, n_customers),
-                       np.random.normal(3000, 800, n_customers))))
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 100_000
+
+LIFECYCLE = ['신규', '성장', '성숙', '쇠퇴']
+REGIONS = ['서울', '경기', '부산', '기타']
+OCCUPATIONS = ['회사원', '자영업', '전문직', '기타']
+CARD_TYPES = ['일반', '골드', 'VIP']
+GENDERS = ['M', 'F']
+CATEGORIES = ['식음료', '쇼핑', '교통', '문화', '의료', '통신', '기타']
+PAYMENT_METHODS = ['일시불', '할부', '리볼빙']
+MERCHANT_TYPES = ['온라인', '오프라인']
+
+
+def format_ids(prefix: str, start: int, count: int, width: int) -> np.ndarray:
+    """연속 ID 문자열 벡터화 생성 (예: C00000001)"""
+    numbers = np.arange(start, start + count, dtype=np.int64)
+    chars = np.empty((count, width + 1), dtype=np.uint8)
+    chars[:, 0] = ord(prefix)
+    chars[:, 1:] = numbers[:, None] // 10 ** np.arange(width - 1, -1, -1, dtype=np.int64) % 10 + ord('0')
+    return chars.view(f'S{width + 1}').ravel().astype(str)
+
+
+def _categorical(rng, options, size, p=None) -> pd.Categorical:
+    """범주 코드를 뽑아 문자열 배열 대신 Categorical로 생성"""
+    return pd.Categorical.from_codes(rng.choice(len(options), size, p=p), categories=options)
+
+
+def _chunk_rngs(seed: int, chunk_index: int):
+    """청크별 (고객, 거래) 난수 생성기 - 청크 번호만으로 결정"""
+    customer_seq, txn_seq = np.random.SeedSequence([seed, chunk_index]).spawn(2)
+    return np.random.default_rng(customer_seq), np.random.default_rng(txn_seq)
+
+
+def generate_customers(rng, start: int, n_customers: int, txn_scale: float = 1.0):
+    """
+    고객 청크 생성
+    
+    Returns:
+        (customers_df, txn_counts, incomes)
+    """
+    lifecycle_codes = rng.choice(4, n_customers, p=[0.15, 0.25, 0.40, 0.20])
+    
+    months_ago = np.select(
+        [lifecycle_codes == 0, lifecycle_codes == 1, lifecycle_codes == 2],
+        [rng.integers(0, 6, n_customers), rng.integers(6, 24, n_customers), rng.integers(24, 60, n_customers)],
+        rng.integers(60, 120, n_customers)
+    )
+    join_dates = REFERENCE_DATE - (months_ago * 30).astype('timedelta64[D]')
+    
+    ages = rng.choice([25, 35, 45, 55, 65], n_customers, p=[0.15, 0.30, 0.30, 0.15, 0.10])
+    ages += rng.integers(-5, 6, n_customers)
+    
+    occupation_codes = rng.choice(4, n_customers, p=[0.50, 0.20, 0.15, 0.15])
+    incomes = np.select(
+        [occupation_codes == 2, occupation_codes == 0, occupation_codes == 1],
+        [rng.normal(7000, 1500, n_customers), rng.normal(5000, 1000, n_customers), rng.normal(4000, 1500, n_customers)],
+        rng.normal(3000, 800, n_customers)
+    )
     incomes = np.maximum(incomes, 1500)
     
-    credit_scores = np.random.choice(range(1, 11), n_customers, p=[0.03, 0.07, 0.12, 0.18, 0.22, 0.18, 0.10, 0.06, 0.03, 0.01])
-    card_types = np.random.choice(['일반', '골드', 'VIP'], n_customers, p=[0.70, 0.25, 0.05])
+    credit_scores = rng.choice(np.arange(1, 11), n_customers, p=[0.03, 0.07, 0.12, 0.18, 0.22, 0.18, 0.10, 0.06, 0.03, 0.01])
+    card_codes = rng.choice(3, n_customers, p=[0.70, 0.25, 0.05])
     
-    churn_probs = np.where(lifecycle == '신규', 0.20,
-                  np.where(lifecycle == '성장', 0.10,
-                  np.where(lifecycle == '성숙', 0.08, 0.25)))
+    churn_probs = np.array([0.20, 0.10, 0.08, 0.25])[lifecycle_codes]
     churn_probs *= np.where(credit_scores >= 7, 1.5, 1.0)
-    churn_probs *= np.where(card_types == 'VIP', 0.5, 1.0)
-    churned = (np.random.random(n_customers) < churn_probs).astype(int)
+    churn_probs *= np.where(card_codes == 2, 0.5, 1.0)
+    churned = (rng.random(n_customers) < churn_probs).astype(np.int8)
     
     customers_df = pd.DataFrame({
-        'customer_id': [f'C{i+1:08d}' for i in range(n_customers)],
-        'join_date': [d.strftime('%Y-%m-%d') for d in join_dates],
-        'age': ages,
-        'gender': np.random.choice(['M', 'F'], n_customers),
-        'region': regions,
-        'occupation': occupations,
-        'annual_income': incomes.astype(int),
-        'credit_score': credit_scores,
-        'card_type': card_types,
-        'lifecycle_stage': lifecycle,
+        'customer_id': format_ids('C', start + 1, n_customers, 8),
+        'join_date': join_dates.astype('datetime64[ns]'),
+        'age': ages.astype(np.int16),
+        'gender': _categorical(rng, GENDERS, n_customers),
+        'region': _categorical(rng, REGIONS, n_customers, p=[0.25, 0.25, 0.15, 0.35]),
+        'occupation': pd.Categorical.from_codes(occupation_codes, categories=OCCUPATIONS),
+        'annual_income': incomes.astype(np.int32),
+        'credit_score': credit_scores.astype(np.int8),
+        'card_type': pd.Categorical.from_codes(card_codes, categories=CARD_TYPES),
+        'lifecycle_stage': pd.Categorical.from_codes(lifecycle_codes, categories=LIFECYCLE),
         'churned': churned
     })
     
-    logger.info(f"   ✓ Generated {len(customers_df):,} customers")
-    logger.info(f"   ✓ Churn rate: {customers_df['churned'].mean():.2%}\n")
-    
-    # ========== 거래 데이터 ==========
-    logger.info("💳 Generating transactions...")
-    
-    # 고객당 평균 거래 건수 (생애주기별)
-    avg_txns = np.where(lifecycle == '신규', 30,
-               np.where(lifecycle == '성장', 80,
-               np.where(lifecycle == '성숙', 120, 20)))
+    # 고객당 평균 거래 건수 (생애주기별, VIP 1.5배, 이탈 고객 0.5배)
+    avg_txns = np.array([30, 80, 120, 20])[lifecycle_codes] * txn_scale
+    avg_txns = np.where(card_codes == 2, avg_txns * 1.5, avg_txns).astype(int)
+    avg_txns = np.where(churned == 1, avg_txns * 0.5, avg_txns).astype(int)
     
-    avg_txns = np.where(card_types == 'VIP', avg_txns * 1.5, avg_txns).astype(int)
-    avg_txns = np.where(churned == 1, avg_txns * 0.5, avg_txns).astype(int)  # 이탈 고객은 거래 적음
+    # 각 고객의 실제 거래 건수 (포아송 분포, 최소 5건)
+    txn_counts = np.maximum(rng.poisson(avg_txns), 5)
     
-    # 각 고객의 실제 거래 건수 (포아송 분포)
-    txn_counts = np.random.poisson(avg_txns)
-    txn_counts = np.maximum(txn_counts, 5)  # 최소 5건
-    
-    total_txns = txn_counts.sum()
-    logger.info(f"   ✓ Total transactions to generate: {total_txns:,}")
+    return customers_df, txn_counts, incomes
+
+
+def generate_transactions(rng, customers_df, txn_counts, incomes, start: int) -> pd.DataFrame:
+    """거래 청크 생성 (거래 ID는 start+1부터)"""
+    total_txns = int(txn_counts.sum())
     
-    # 고객 ID 반복
-    customer_ids = np.repeat(customers_df['customer_id'].values, txn_counts)
+    # 고객 ID는 청크 고객 목록의 코드로 펼침 (문자열 복제 없음)
+    customer_codes = np.repeat(np.arange(len(customers_df)), txn_counts)
     
     # 거래 날짜 (최근 360일 내)
-    days_ago = np.random.randint(0, 360, total_txns)
-    txn_dates = [reference_date - timedelta(days=int(d)) for d in days_ago]
+    days_ago = rng.integers(0, 360, total_txns)
+    txn_dates = REFERENCE_DATE - days_ago.astype('timedelta64[D]')
     
     # 거래 금액 (로그 정규 분포)
-    customer_incomes = np.repeat(incomes, txn_counts)
-    avg_amounts = customer_incomes / 12 * 0.25
-    amounts = np.random.lognormal(np.log(avg_amounts + 1), 0.6)
-    amounts = np.clip(amounts, 1000, 5000000).astype(int)
-    
-    # 카테고리, 결제 방법
-    categories = np.random.choice(['식음료', '쇼핑', '교통', '문화', '의료', '통신', '기타'],
-                                  total_txns, p=[0.25, 0.30, 0.15, 0.10, 0.07, 0.05, 0.08])
-    
-    payment_methods = np.random.choice(['일시불', '할부', '리볼빙'], total_txns, p=[0.75, 0.20, 0.05])
-    merchant_types = np.random.choice(['온라인', '오프라인'], total_txns, p=[0.40, 0.60])
-    
-    transactions_df = pd.DataFrame({
-        'transaction_id': [f'T{i+1:010d}' for i in range(total_txns)],
-        'customer_id': customer_ids,
-        'transaction_date': [d.strftime('%Y-%m-%d') for d in txn_dates],
+    avg_amounts = incomes[customer_codes] / 12 * 0.25
+    amounts = rng.lognormal(np.log(avg_amounts + 1), 0.6)
+    amounts = np.clip(amounts, 1000, 5000000).astype(np.int32)
+    
+    return pd.DataFrame({
+        'transaction_id': format_ids('T', start + 1, total_txns, 10),
+        'customer_id': pd.Categorical.from_codes(customer_codes, categories=customers_df['customer_id']),
+        'transaction_date': txn_dates.astype('datetime64[ns]'),
         'amount': amounts,
-        'category': categories,
-        'payment_method': payment_methods,
-        'merchant_type': merchant_types
+        'category': _categorical(rng, CATEGORIES, total_txns, p=[0.25, 0.30, 0.15, 0.10, 0.07, 0.05, 0.08]),
+        'payment_method': _categorical(rng, PAYMENT_METHODS, total_txns, p=[0.75, 0.20, 0.05]),
+        'merchant_type': _categorical(rng, MERCHANT_TYPES, total_txns, p=[0.40, 0.60])
     })
-    
-    logger.info(f"   ✓ Generated {len(transactions_df):,} transactions")
-    logger.info(f"   ✓ Average per customer: {len(transactions_df) / len(customers_df):.1f}\n")
-    
+
+
+def generate_chunk(seed: int, chunk_index: int, start: int, n_customers: int,
+                   txn_scale: float = 1.0, txn_start: int = 0):
+    """청크 하나의 고객 + 거래 생성"""
+    customer_rng, txn_rng = _chunk_rngs(seed, chunk_index)
+    customers_df, txn_counts, incomes = generate_customers(customer_rng, start, n_customers, txn_scale)
+    transactions_df = generate_transactions(txn_rng, customers_df, txn_counts, incomes, txn_start)
     return customers_df, transactions_df
 
 
+def count_chunk_transactions(seed: int, chunk_index: int, start: int, n_customers: int,
+                             txn_scale: float = 1.0) -> int:
+    """1단계: 청크의 거래 건수만 계산 (거래 ID 오프셋 산정용)"""
+    customer_rng, _ = _chunk_rngs(seed, chunk_index)
+    _, txn_counts, _ = generate_customers(customer_rng, start, n_customers, txn_scale)
+    return int(txn_counts.sum())
+
+
+def plan_chunks(n_customers: int, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """고객 범위를 청크로 분할: [(chunk_index, start, size), ...]"""
+    return [
+        (index, start, min(chunk_size, n_customers - start))
+        for index, start in enumerate(range(0, n_customers, chunk_size))
+    ]
+
+
+def generate_data(n_customers=10000, seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE, txn_scale=1.0):
+    """고객 + 거래 데이터 생성 (단일 프로세스, 메모리 내 결과 반환)"""
+    customer_frames, txn_frames = [], []
+    txn_start = 0
+    for chunk_index, start, size in plan_chunks(n_customers, chunk_size):
+        customers_df, transactions_df = generate_chunk(seed, chunk_index, start, size, txn_scale, txn_start)
+        customer_frames.append(customers_df)
+        txn_frames.append(transactions_df)
+        txn_start += len(transactions_df)
+    
+    customers_df = pd.concat(customer_frames, ignore_index=True)
+    transactions_df = pd.concat(txn_frames, ignore_index=True)
+    transactions_df['customer_id'] = transactions_df['customer_id'].astype('category')
+    return customers_df, transactions_df
+
+
+def _to_csv_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """CSV 출력용: 날짜를 기존 포맷(YYYY-MM-DD) 문자열로"""
+    df = df.copy()
+    for column in ('join_date', 'transaction_date'):
+        if column in df.columns:
+            df[column] = np.datetime_as_string(df[column].to_numpy(), unit='D')
+    return df
+
+
+def write_chunk(output: str, fmt: str, seed: int, chunk_index: int, start: int, n_customers: int,
+                txn_scale: float, txn_start: int):
+    """2단계 워커: 청크 생성 후 파티션 파일 저장 (결과 데이터는 프로세스 간 전송하지 않음)"""
+    customers_df, transactions_df = generate_chunk(seed, chunk_index, start, n_customers, txn_scale, txn_start)
+    
+    for name, df in (('customers', customers_df), ('transactions', transactions_df)):
+        if fmt == 'parquet':
+            df.to_parquet(f"{output}/{name}/part-{chunk_index:05d}.parquet", index=False)
+        else:
+            # 첫 파티션만 헤더 포함 → 단순 이어붙이기로 단일 CSV 생성
+            _to_csv_frame(df).to_csv(
+                f"{output}/{name}/part-{chunk_index:05d}.csv", index=False, header=chunk_index == 0,
+                encoding='utf-8-sig' if chunk_index == 0 else 'utf-8'
+            )
+    
+    return chunk_index, len(customers_df), len(transactions_df)
+
+
+def _merge_csv_parts(output: str, name: str):
+    """CSV 파티션을 기존 경로(customers.csv / transactions.csv)로 병합"""
+    parts = sorted(Path(output, name).glob('part-*.csv'))
+    with open(f"{output}/{name}.csv", 'wb') as merged:
+        for part in parts:
+            with open(part, 'rb') as f:
+                shutil.copyfileobj(f, merged, length=16 * 1024 * 1024)
+    shutil.rmtree(Path(output, name))
+
+
+def generate_to_disk(output: str, n_customers: int, seed: int = DEFAULT_SEED, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     txn_scale: float = 1.0, fmt: str = 'parquet', workers: int = None):
+    """
+    병렬 생성 후 파티션 저장
+    
+    Returns:
+        manifest (생성 조건 + 행 수)
+    """
+    if fmt == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        logger.warning("⚠️  pyarrow not installed, falling back to CSV output")
+        fmt = 'csv'
+    
+    chunks = plan_chunks(n_customers, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    
+    for name in ('customers', 'transactions'):
+        shutil.rmtree(Path(output, name), ignore_errors=True)
+        Path(output, name).mkdir(parents=True, exist_ok=True)
+    
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # 1단계: 청크별 거래 건수 → 거래 ID 오프셋
+        counts = list(pool.map(
+            count_chunk_transactions,
+            *zip(*[(seed, index, start, size, txn_scale) for index, start, size in chunks])
+        ))
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(int)
+        logger.info(f"   ✓ Planned {len(chunks)} chunks, {sum(counts):,} transactions")
+        
+        # 2단계: 청크 생성 + 저장
+        futures = [
+            pool.submit(write_chunk, output, fmt, seed, index, start, size, txn_scale, int(offsets[index]))
+            for index, start, size in chunks
+        ]
+        for future in futures:
+            chunk_index, n_chunk_customers, n_chunk_txns = future.result()
+            logger.info(f"   ✓ Chunk {chunk_index + 1}/{len(chunks)}: "
+                        f"{n_chunk_customers:,} customers, {n_chunk_txns:,} transactions")
+    
+    if fmt == 'csv':
+        _merge_csv_parts(output, 'customers')
+        _merge_csv_parts(output, 'transactions')
+    
+    elapsed = time.perf_counter() - start_time
+    manifest = {
+        'seed': seed,
+        'customers': n_customers,
+        'transactions': int(sum(counts)),
+        'chunk_size': chunk_size,
+        'txn_scale': txn_scale,
+        'format': fmt,
+        'chunks': len(chunks),
+        'reference_date': str(REFERENCE_DATE),
+        'elapsed_seconds': round(elapsed, 2),
+    }
+    Path(output, 'manifest.json').write_text(json.dumps(manifest, indent=2))
+    
+    return manifest
+
+
 def main():
     import argparse
     
     parser = argparse.ArgumentParser()
-    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--tier', choices=SIZE_TIERS.keys(), default='small', help='Dataset size tier')
+    parser.add_argument('--customers', type=int, default=None, help='Override customer count of the tier')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Customers per chunk')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
     parser.add_argument('--output', default='data/synthetic')
     args = parser.parse_args()
     
-    # 데이터 생성
-    customers_df, transactions_df = generate_data(args.customers)
+    n_customers, txn_scale = SIZE_TIERS[args.tier]
+    n_customers = args.customers or n_customers
     
-    # 저장
-    Path(args.output).mkdir(parents=True, exist_ok=True)
-    
-    customers_path = f"{args.output}/customers.csv"
-    transactions_path = f"{args.output}/transactions.csv"
-    
-    customers_df.to_csv(customers_path, index=False, encoding='utf-8-sig')
-    transactions_df.to_csv(transactions_path, index=False, encoding='utf-8-sig')
-    
-    logger.info("💾 Saved:")
-    logger.info(f"   📄 {customers_path} ({len(customers_df):,} rows)")
-    logger.info(f"   📄 {transactions_path} ({len(transactions_df):,} rows)")
+    logger.info("="*60)
+    logger.info("IBK 카드 합성 데이터 생성")
+    logger.info("(주)범온누리 이노베이션")
+    logger.info("="*60 + "\n")
+    logger.info(f"👥 Generating {n_customers:,} customers (tier={args.tier}, seed={args.seed})...")
+    
+    manifest = generate_to_disk(
+        args.output, n_customers, seed=args.seed, chunk_size=args.chunk_size,
+        txn_scale=txn_scale, fmt=args.format, workers=args.workers
+    )
+    
+    logger.info("\n💾 Saved:")
+    logger.info(f"   📁 {args.output} ({manifest['format']})")
+    logger.info(f"   Customers: {manifest['customers']:,}")
+    logger.info(f"   Transactions: {manifest['transactions']:,} "
+                f"({manifest['transactions'] / manifest['customers']:.1f} per customer)")
+    logger.info(f"   Elapsed: {manifest['elapsed_seconds']:.1f}s")
     
     logger.info("\n" + "="*60)
     logger.info("✅ 합성 데이터 생성 완료!")
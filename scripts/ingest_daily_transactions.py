@@ -0,0 +1,61 @@
+"""
+일별 거래 파일 증분 적재
+같은 파일을 다시 실행해도 중복 적재되지 않음 (적재 이력 + transaction_id 업서트)
+
+Usage:
+    python scripts/ingest_daily_transactions.py data/daily/transactions_20240102.csv
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+
+from services.cache import close_redis, invalidate_customer_caches
+from services.db import engine, init_db
+from services.delta_ingest import ingest_transactions_file
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def invalidate_caches():
+    """적재한 거래가 반영되도록 API 워커의 예측/고객 상세 캐시 무효화 (Redis 사용 불가면 TTL 만료로 반영)"""
+    try:
+        await invalidate_customer_caches()
+    finally:
+        await close_redis()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest daily transaction files')
+    parser.add_argument('files', nargs='+', help='Transaction files (CSV or parquet)')
+    parser.add_argument('--batch-size', type=int, default=10_000, help='Rows per upsert batch')
+    parser.add_argument('--reference-date', default=None,
+                        help='Customer summary reference time (ISO format, default: now)')
+    parser.add_argument('--force', action='store_true', help='Re-ingest files already marked as completed')
+    args = parser.parse_args()
+    
+    reference_date = datetime.fromisoformat(args.reference_date) if args.reference_date else None
+    
+    init_db()
+    
+    ingested = False
+    for path in args.files:
+        result = ingest_transactions_file(
+            engine, path, batch_size=args.batch_size, reference_date=reference_date, force=args.force
+        )
+        if result['status'] == 'COMPLETED':
+            ingested = True
+            logger.info(f"✅ {path}: {result['rows_new']:,} new / {result['rows_existing']:,} existing, "
+                        f"watermark {result['watermark']}")
+    
+    if ingested:
+        asyncio.run(invalidate_caches())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,109 +1,101 @@
 """
 합성 데이터를 데이터베이스에 로드
+벌크 로더 사용 (SQLite executemany / PostgreSQL COPY, 인덱스 지연 생성)
 """
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
 
-import pandas as pd
-from datetime import datetime
+import argparse
 import logging
-from sqlalchemy.orm import Session
+from datetime import datetime
+
+from sqlalchemy import func, select
 
-from services.db import engine, SessionLocal, init_db
-from models.database import Customer, Transaction
+from services.db import engine, init_db
+from services.bulk_loader import BulkLoader
+from services.customer_summary import run_summary_refresh
+from services.segment_cube import rebuild_segment_cube
+from services.customer_search import drop_search_index, ensure_search_index
+from services.transaction_partitions import drop_month_tables, maintain_transaction_partitions
+from services.transaction_rollup import rebuild_transaction_rollup
+from models.database import Customer, Customer360, Transaction
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def load_customers(db: Session, csv_path: str):
-    """고객 데이터 로드"""
-    logger.info(f"📂 Loading customers from {csv_path}")
-    
-    df = pd.read_csv(csv_path)
-    
-    customers = []
-    for _, row in df.iterrows():
-        customer = Customer(
-            customer_id=row['customer_id'],
-            join_date=datetime.strptime(row['join_date'], '%Y-%m-%d'),
-            age=int(row['age']),
-            gender=row['gender'],
-            region=row['region'],
-            occupation=row['occupation'],
-            annual_income=int(row['annual_income']),
-            credit_score=int(row['credit_score']),
-            card_type=row['card_type'],
-            lifecycle_stage=row['lifecycle_stage'],
-            churned=int(row['churned'])
-        )
-        customers.append(customer)
-    
-    # 배치 삽입
-    db.bulk_save_objects(customers)
-    db.commit()
-    
-    logger.info(f"   ✓ Loaded {len(customers):,} customers")
-
-
-def load_transactions(db: Session, csv_path: str, batch_size: int = 10000):
-    """거래 데이터 로드 (배치 처리)"""
-    logger.info(f"📂 Loading transactions from {csv_path}")
-    
-    # 청크로 읽기
-    total_loaded = 0
-    for chunk in pd.read_csv(csv_path, chunksize=batch_size):
-        transactions = []
-        for _, row in chunk.iterrows():
-            transaction = Transaction(
-                transaction_id=row['transaction_id'],
-                customer_id=row['customer_id'],
-                transaction_date=datetime.strptime(row['transaction_date'], '%Y-%m-%d'),
-                amount=int(row['amount']),
-                category=row['category'],
-                payment_method=row['payment_method'],
-                merchant_type=row['merchant_type']
-            )
-            transactions.append(transaction)
-        
-        db.bulk_save_objects(transactions)
-        db.commit()
-        
-        total_loaded += len(transactions)
-        logger.info(f"   ✓ Loaded {total_loaded:,} transactions...")
-    
-    logger.info(f"   ✓ Total loaded: {total_loaded:,} transactions")
+def resolve_source(data_dir: str, name: str) -> str:
+    """parquet 파티션 디렉토리 우선, 없으면 단일 CSV"""
+    partition_dir = Path(data_dir, name)
+    if partition_dir.is_dir():
+        return str(partition_dir)
+    return str(Path(data_dir, f"{name}.csv"))
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Bulk load synthetic data into the database')
+    parser.add_argument('--data-dir', default='data/synthetic', help='Data directory')
+    parser.add_argument('--batch-size', type=int, default=100_000, help='Rows per batch')
+    parser.add_argument('--truncate', action='store_true', help='Delete existing customers/transactions first')
+    parser.add_argument('--summary-reference-date', default=None,
+                        help='Customer summary reference date (ISO format, default: latest transaction date)')
+    args = parser.parse_args()
+    
     logger.info("="*60)
     logger.info("IBK 데이터베이스 로딩")
     logger.info("(주)범온누리 이노베이션")
     logger.info("="*60 + "\n")
     
     # 1. 데이터베이스 초기화
-    logger.info("[1/3] Initializing database...")
+    logger.info("[1/6] Initializing database...")
     init_db()
     
-    # 2. 고객 데이터 로드
-    logger.info("\n[2/3] Loading customers...")
-    db = SessionLocal()
-    try:
-        load_customers(db, "data/synthetic/customers.csv")
-    finally:
-        db.close()
+    if args.truncate:
+        with engine.begin() as conn:
+            conn.execute(Transaction.__table__.delete())
+            drop_month_tables(conn)
+            conn.execute(Customer360.__table__.delete())
+            conn.execute(Customer.__table__.delete())
+    
+    loader = BulkLoader(engine, batch_size=args.batch_size)
+    tables = [Customer.__table__, Transaction.__table__]
+    
+    # 검색 인덱스 동기화 트리거가 행마다 실행되지 않도록 적재 후 한 번에 색인
+    drop_search_index(engine)
+    
+    with loader.bulk_session(tables):
+        # 2. 고객 데이터 로드
+        logger.info("\n[2/6] Loading customers...")
+        loader.load(Customer.__table__, resolve_source(args.data_dir, 'customers'))
+        
+        # 3. 거래 데이터 로드
+        logger.info("\n[3/6] Loading transactions...")
+        loader.load(Transaction.__table__, resolve_source(args.data_dir, 'transactions'))
+    
+    # 4. 고객 요약 컬럼 계산 (기본: 데이터의 최근 거래일 기준)
+    logger.info("\n[4/6] Refreshing customer summary...")
+    if args.summary_reference_date:
+        reference_date = datetime.fromisoformat(args.summary_reference_date)
+    else:
+        with engine.connect() as conn:
+            reference_date = conn.execute(select(func.max(Transaction.transaction_date))).scalar()
+    run_summary_refresh(engine, 'full', reference_date)
+    
+    # 5. 세그먼트 큐브/월별 거래 집계 (벌크 적재는 증분 반영 경로를 거치지 않으므로 전체 재계산) + 고객 검색 인덱스
+    logger.info("\n[5/6] Rebuilding segment cube, transaction rollup and search index...")
+    rebuild_segment_cube(engine)
+    rebuild_transaction_rollup(engine)
+    ensure_search_index(engine)
     
-    # 3. 거래 데이터 로드
-    logger.info("\n[3/3] Loading transactions...")
-    db = SessionLocal()
-    try:
-        load_transactions(db, "data/synthetic/transactions.csv")
-    finally:
-        db.close()
+    # 6. 거래 월 파티션 정리 (핫 구간 밖 이동 / 보관 기간 밖 아카이브, 최근 거래일 기준)
+    logger.info("\n[6/6] Maintaining transaction partitions...")
+    maintain_transaction_partitions(engine, reference_date)
     
     logger.info("\n" + "="*60)
     logger.info("✅ 데이터베이스 로딩 완료!")
+    for stats in loader.stats:
+        logger.info(f"   {stats['table']:<14} {stats['rows']:>13,} rows  {stats['rows_per_sec']:>10,} rows/sec")
     logger.info("="*60)
 
 
@@ -0,0 +1,127 @@
+"""
+API 부하 테스트
+실행 중인 API 서버에 동시 요청을 보내 엔드포인트별 처리량/지연 시간 측정
+
+- 주요 조회 엔드포인트(대시보드 통계, 고객 목록/상세, 월간 요약)를 동시 클라이언트로 반복 호출
+- 같은 시간 동안 /health 지연 시간을 따로 측정 → DB 조회가 이벤트 루프를 막는지 확인
+  (동기 세션을 쓰는 async 라우트는 쿼리 동안 /health 응답도 밀림)
+
+Usage:
+    uvicorn main:app --workers 1 --port 8000   # backend/
+    python scripts/load_test_api.py --base-url http://localhost:8000 --concurrency 32
+
+Copyright (c) 2024 (주)범온누리 이노베이션
+"""
+
+import time
+import random
+import asyncio
+import logging
+import argparse
+
+import httpx
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = {
+    'dashboard_stats': lambda rng, n: ("/api/dashboard/stats", None),
+    'customers': lambda rng, n: ("/api/customers", {
+        'page': rng.randint(1, 50),
+        'risk_level': rng.choice(['HIGH', 'MEDIUM', 'LOW', None]),
+        'sort_by': rng.choice(['customer_id', 'churn_probability']),
+        'sort_order': rng.choice(['asc', 'desc']),
+    }),
+    'customer_detail': lambda rng, n: (f"/api/customers/C{rng.randrange(n):08d}", None),
+    'summary_current': lambda rng, n: ("/api/reports/summary/current", None),
+}
+
+
+async def client_loop(client, endpoints, n_customers, deadline, latencies, errors, seed):
+    """deadline까지 엔드포인트를 무작위로 호출"""
+    rng = random.Random(seed)
+    names = list(endpoints)
+    
+    while time.perf_counter() < deadline:
+        name = rng.choice(names)
+        path, params = endpoints[name](rng, n_customers)
+        if params:
+            params = {k: v for k, v in params.items() if v is not None}
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            response.raise_for_status()
+            latencies[name].append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            errors[name] = errors.get(name, 0) + 1
+
+
+async def health_probe(client, deadline, latencies, interval: float = 0.05):
+    """부하 중 /health 지연 시간 (이벤트 루프 응답성)"""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            await client.get("/health")
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def run_load_test(args) -> dict:
+    endpoints = {name: ENDPOINTS[name] for name in args.endpoints}
+    latencies = {name: [] for name in endpoints}
+    errors = {}
+    health = []
+    
+    limits = httpx.Limits(max_connections=args.concurrency + 1, max_keepalive_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        # 워밍업 (연결 풀/캐시)
+        for name in endpoints:
+            path, params = endpoints[name](random.Random(0), args.customers)
+            await client.get(path, params={k: v for k, v in (params or {}).items() if v is not None})
+        
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(
+            health_probe(client, deadline, health),
+            *[client_loop(client, endpoints, args.customers, deadline, latencies, errors, seed)
+              for seed in range(args.concurrency)]
+        )
+    
+    total = sum(len(values) for values in latencies.values())
+    logger.info(f"{'endpoint':<18} {'requests':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, values in list(latencies.items()) + [('health (probe)', health)]:
+        if values:
+            p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+            logger.info(f"{name:<18} {len(values):>9,} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f}")
+    logger.info("-"*60)
+    logger.info(f"Throughput: {total / args.duration:,.1f} req/s ({total:,} requests, errors: {sum(errors.values())})")
+    
+    return {
+        'requests_per_sec': total / args.duration,
+        'health_p95_ms': float(np.percentile(health, 95) * 1000) if health else None,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test for the read-heavy API endpoints')
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds')
+    parser.add_argument('--customers', type=int, default=10_000, help='Customer ID range for detail requests')
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS.keys(), default=list(ENDPOINTS))
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info("API LOAD TEST")
+    logger.info(f"{args.base_url}, {args.concurrency} clients, {args.duration:.0f}s")
+    logger.info("="*60)
+    
+    asyncio.run(run_load_test(args))
+
+
+if __name__ == "__main__":
+    main()
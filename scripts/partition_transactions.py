@@ -0,0 +1,60 @@
+"""
+거래 테이블 월 파티션 정리 / 변환
+핫 구간 밖의 달은 월 테이블로, 보관 기간 밖의 달은 parquet 아카이브로 이동
+
+Usage:
+    python scripts/partition_transactions.py
+    python scripts/partition_transactions.py --convert          # PostgreSQL 기존 테이블 → 파티션 테이블
+    python scripts/partition_transactions.py --reference-date 2024-01-01 --retention-months 12
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+import argparse
+import logging
+from datetime import datetime
+
+from services.db import engine, init_db
+from services.transaction_partitions import (
+    TRANSACTION_HOT_MONTHS, TRANSACTION_RETENTION_MONTHS, convert_to_partitioned, maintain_transaction_partitions
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain monthly transaction partitions and archive cold months')
+    parser.add_argument('--convert', action='store_true',
+                        help='Convert an existing PostgreSQL transactions table to monthly partitions first')
+    parser.add_argument('--reference-date', default=None,
+                        help='Reference date (ISO format, default: latest transaction date)')
+    parser.add_argument('--hot-months', type=int, default=TRANSACTION_HOT_MONTHS, help='Months kept in the hot table')
+    parser.add_argument('--retention-months', type=int, default=TRANSACTION_RETENTION_MONTHS,
+                        help='Months kept in the database before archiving')
+    parser.add_argument('--archive-dir', default=None, help='Archive directory (default: TRANSACTION_ARCHIVE_DIR)')
+    args = parser.parse_args()
+    
+    reference_date = datetime.fromisoformat(args.reference_date) if args.reference_date else None
+    
+    init_db()
+    
+    if args.convert:
+        result = convert_to_partitioned(engine)
+        if result['converted']:
+            logger.info(f"✅ Converted {result['rows']:,} rows into {len(result['partitions'])} partitions")
+        else:
+            logger.info("⏭️  transactions is already partitioned")
+    
+    result = maintain_transaction_partitions(
+        engine, reference_date, hot_months=args.hot_months, retention_months=args.retention_months,
+        archive_dir=args.archive_dir
+    )
+    logger.info(f"   created: {result['created']}")
+    logger.info(f"   moved: {result['moved']}")
+    logger.info(f"   archived: {result['archived']}")
+
+
+if __name__ == "__main__":
+    main()